@@ -0,0 +1,140 @@
+"""
+Бенчмарк: загрузка "экрана" мобильного клиента из --groups групп и --tasks задач
+(/users/me, /users/me/groups, /groups/{group_id} и /tasks/{task_id}).
+
+separate - каждая операция отдельным запросом, запросы экрана отправляются
+одновременно (проверка токена и сессия с соединением на каждый запрос);
+batch - все операции одним POST /batch (одна проверка токена, одна сессия,
+группы и задачи загружаются одним запросом на тип).
+
+Кроме задержки считаются SQL-запросы к БД на один экран.
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.batch --screens 500 --concurrency 10
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from models import Group, Task, UsersGroups
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+class StatementCounter:
+    """Количество SQL-запросов, выполненных движком приложения"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(database_helper.engine.sync_engine, "before_cursor_execute", self.__count)
+
+    def __count(self, *args: Any) -> None:
+        self.count += 1
+
+    def close(self) -> None:
+        event.remove(database_helper.engine.sync_engine, "before_cursor_execute", self.__count)
+
+
+async def run_scenario(
+        mode: str,
+        client: AsyncClient,
+        args: argparse.Namespace,
+        paths: List[str],
+        headers: Dict[str, str]
+) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies_ms = []
+
+    async def load_screen() -> None:
+        async with semaphore:
+            started_at = perf_counter()
+
+            if mode == "separate":
+                responses = await asyncio.gather(
+                    *[client.get(path, headers=headers) for path in paths]
+                )
+                assert all(response.status_code == 200 for response in responses)
+            else:
+                response = await client.post(
+                    "/batch",
+                    json={"operations": [{"method": "GET", "path": path} for path in paths]},
+                    headers=headers
+                )
+                assert response.status_code == 200, response.text
+                assert all(result["status"] == 200 for result in response.json()["results"])
+
+            latencies_ms.append((perf_counter() - started_at) * 1000)
+
+    counter = StatementCounter()
+
+    try:
+        started_at = perf_counter()
+        await asyncio.gather(*[load_screen() for _ in range(args.screens)])
+        elapsed = perf_counter() - started_at
+    finally:
+        counter.close()
+
+    print(format_latencies(f"[{mode}] screen of {len(paths)} operations", latencies_ms))
+    print(
+        f"[{mode}] {args.screens / elapsed:.0f} screens/s, "
+        f"{counter.count / args.screens:.1f} SQL statements per screen"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, task = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+
+        groups = [group] + [
+            Group(name="benchmark", description="benchmark")
+            for _ in range(args.groups - 1)
+        ]
+        session.add_all(groups[1:])
+        await session.flush()
+
+        tasks = [task] + [
+            Task(
+                group_id=groups[i % len(groups)].group_id,
+                name="benchmark",
+                description="benchmark"
+            )
+            for i in range(args.tasks - 1)
+        ]
+        session.add_all(
+            [UsersGroups(user_id=user.user_id, group_id=group.group_id) for group in groups[1:]]
+            + tasks[1:]
+        )
+        await session.commit()
+
+    paths = (
+        ["/users/me", "/users/me/groups"]
+        + [f"/groups/{group.group_id}" for group in groups]
+        + [f"/tasks/{task.task_id}" for task in tasks]
+    )
+    headers = {"Authorization": f"Bearer {encode_token({'sub': str(user.user_id)})}"}
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for mode in ("separate", "batch"):
+                await run_scenario(mode, client, args, paths, headers)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], groups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--screens", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=6)
+    parser.add_argument("--tasks", type=int, default=8)
+
+    asyncio.run(main(parser.parse_args()))
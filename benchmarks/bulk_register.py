@@ -0,0 +1,110 @@
+"""
+Бенчмарк: скорость массовой регистрации пользователей.
+
+sequential - как при регистрации через POST /auth/register по одному:
+хеш в пуле воркера и отдельная транзакция на каждого пользователя;
+bulk - AuthService.register_bulk (временный пул процессов на все ядра,
+вставка пачками); insert - только вставка --insert-users пользователей
+с заранее посчитанным хешем, чтобы оценить долю БД.
+
+Стоимость хеширования задается обычными настройками, например:
+PASSWORD_HASHING_BCRYPT_ROUNDS=10 PYTHONPATH=src python -m benchmarks.bulk_register
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from uuid import uuid4
+
+from sqlalchemy import delete
+
+from api import get_unit_of_work
+from auth.auth_service import AuthService
+from auth.hashing import hashing_pool, get_password_hash, get_password_hash_async
+from auth.schemas import CredentialsSchema
+from core import database_helper, settings
+from models import User
+
+
+# username всех созданных бенчмарком пользователей (для очистки)
+usernames: list[str] = []
+
+
+def generate_credentials(count: int) -> list[CredentialsSchema]:
+    credentials_list = [
+        CredentialsSchema(username=uuid4().hex[:18], password=uuid4().hex[:18])
+        for _ in range(count)
+    ]
+    usernames.extend(credentials.username for credentials in credentials_list)
+
+    return credentials_list
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(f"{name}: {count} users in {elapsed:.2f}s, {count / elapsed * 60:.0f} users/min")
+
+
+async def run_sequential(credentials_list: list[CredentialsSchema]) -> None:
+    started_at = perf_counter()
+
+    for credentials in credentials_list:
+        hashed_password = await get_password_hash_async(credentials.password)
+
+        async with get_unit_of_work() as uow:
+            await uow.users.create({
+                "username": credentials.username,
+                "hashed_password": hashed_password
+            })
+            await uow.commit()
+
+    report("sequential", len(credentials_list), perf_counter() - started_at)
+
+
+async def run_bulk(credentials_list: list[CredentialsSchema]) -> None:
+    started_at = perf_counter()
+    result = await AuthService(get_unit_of_work()).register_bulk(credentials_list)
+
+    assert len(result.created) == len(credentials_list)
+    report(f"bulk ({settings.BULK_HASHING_WORKERS} processes)", len(credentials_list), perf_counter() - started_at)
+
+
+async def run_insert(count: int) -> None:
+    hashed_password = get_password_hash(uuid4().hex)
+    data = [
+        {"username": credentials.username, "hashed_password": hashed_password}
+        for credentials in generate_credentials(count)
+    ]
+
+    started_at = perf_counter()
+
+    async with get_unit_of_work() as uow:
+        users = await uow.users.bulk_create(data)
+        await uow.commit()
+
+    assert len(users) == count
+    report("insert only", count, perf_counter() - started_at)
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{settings.PASSWORD_HASHING_SCHEME}, bcrypt rounds {settings.PASSWORD_HASHING_BCRYPT_ROUNDS}")
+
+    try:
+        await hashing_pool.warm_up()
+
+        await run_sequential(generate_credentials(args.users))
+        await run_bulk(generate_credentials(args.users))
+        await run_insert(args.insert_users)
+    finally:
+        hashing_pool.shutdown()
+
+        async with database_helper.session_factory() as session:
+            await session.execute(delete(User).where(User.username.in_(usernames)))
+            await session.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--insert-users", type=int, default=10000)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""
+Бенчмарк: скорость создания задач в одной группе.
+
+single - POST /tasks по одной задаче (проверка доступа, INSERT и коммит на каждую);
+bulk - POST /tasks/bulk пачками по --batch задач (одна проверка доступа
+и один COPY в одной транзакции на пачку).
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.bulk_tasks --tasks 200000 --batch 50000
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+async def run_single(client: AsyncClient, args: argparse.Namespace, group_id, headers) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies_ms = []
+
+    async def create_task(i: int) -> None:
+        async with semaphore:
+            started_at = perf_counter()
+            response = await client.post(
+                "/tasks",
+                json={"group_id": str(group_id), "name": f"task {i}", "description": "benchmark"},
+                headers=headers
+            )
+            latencies_ms.append((perf_counter() - started_at) * 1000)
+            assert response.status_code == 201, response.text
+
+    started_at = perf_counter()
+    await asyncio.gather(*[create_task(i) for i in range(args.single_tasks)])
+    elapsed = perf_counter() - started_at
+
+    print(format_latencies("[single] POST /tasks", latencies_ms))
+    print(f"[single] {args.single_tasks / elapsed:.0f} tasks/s")
+
+
+async def run_bulk(client: AsyncClient, args: argparse.Namespace, group_id, headers) -> None:
+    # тела запросов готовятся заранее, чтобы не учитывать кодирование JSON клиентом
+    bodies = [
+        json.dumps([
+            {"group_id": str(group_id), "name": f"task {i}", "description": "benchmark"}
+            for i in range(offset, min(offset + args.batch, args.tasks))
+        ])
+        for offset in range(0, args.tasks, args.batch)
+    ]
+    headers = {**headers, "Content-Type": "application/json"}
+    latencies_ms = []
+    created = 0
+
+    started_at = perf_counter()
+
+    for body in bodies:
+        request_started_at = perf_counter()
+        response = await client.post("/tasks/bulk", content=body, headers=headers)
+        latencies_ms.append((perf_counter() - request_started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+        created += sum(result["task_id"] is not None for result in response.json()["results"])
+
+    elapsed = perf_counter() - started_at
+
+    print(format_latencies(f"[bulk] POST /tasks/bulk x{args.batch}", latencies_ms))
+    print(f"[bulk] {created} tasks, {created / elapsed:.0f} tasks/s")
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, _ = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+
+    headers = {"Authorization": f"Bearer {encode_token({'sub': str(user.user_id)})}"}
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await run_single(client, args, group.group_id, headers)
+            await run_bulk(client, args, group.group_id, headers)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--single-tasks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""
+Бенчмарк: список групп пользователя со статистикой (задачи, участники,
+суммарное оценочное время) для --groups групп по --tasks задач.
+
+load - без счетчиков: клиент выгружает задачи и участников каждой группы
+(GET /groups/{group_id}/tasks и /users с Accept: application/x-ndjson) и считает сам;
+count - серверный COUNT(*)/SUM по задачам и участникам групп пользователя одним запросом;
+stats - GET /users/me/groups?include=stats (счетчики, поддерживаемые триггерами).
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.group_stats --groups 20 --tasks 5000
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from models import Group, UsersGroups
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+SEED_TASKS_QUERY = text("""
+    INSERT INTO tasks (task_id, group_id, name, description, created_at, estimated_time)
+    SELECT gen_random_uuid(), group_id, 'benchmark', 'benchmark', current_date, i % 100
+    FROM unnest(CAST(:group_ids AS uuid[])) AS group_id, generate_series(1, :count) AS i
+""")
+
+COUNT_QUERY = text("""
+    SELECT
+        ug.group_id,
+        (SELECT count(*) FROM tasks t WHERE t.group_id = ug.group_id),
+        (SELECT count(*) FROM users_groups m WHERE m.group_id = ug.group_id),
+        (SELECT coalesce(sum(estimated_time), 0) FROM tasks t WHERE t.group_id = ug.group_id)
+    FROM users_groups ug
+    WHERE ug.user_id = :user_id
+""")
+
+
+async def run_load(client: AsyncClient, args: argparse.Namespace, group_ids, headers) -> None:
+    headers = {**headers, "Accept": "application/x-ndjson"}
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+
+        for group_id in group_ids:
+            for items in ("tasks", "users"):
+                response = await client.get(f"/groups/{group_id}/{items}", headers=headers)
+                assert response.status_code == 200, response.text
+                assert response.text.count("\n") >= 1
+
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+    print(format_latencies(f"[load] {len(group_ids)} groups", latencies_ms))
+
+
+async def run_count(args: argparse.Namespace, user_id, group_ids) -> None:
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+
+        async with database_helper.session_factory() as session:
+            rows = (await session.execute(COUNT_QUERY, {"user_id": user_id})).all()
+
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+        assert len(rows) == len(group_ids)
+
+    print(format_latencies(f"[count] {len(group_ids)} groups", latencies_ms))
+
+
+async def run_stats(client: AsyncClient, args: argparse.Namespace, group_ids, headers) -> None:
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+        response = await client.get(
+            "/users/me/groups",
+            params={"include": "stats"},
+            headers=headers
+        )
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+        assert all(
+            group["task_count"] >= args.tasks for group in response.json()["groups"]
+        )
+
+    print(format_latencies(f"[stats] {len(group_ids)} groups", latencies_ms))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, _ = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+
+        groups = [group] + [
+            Group(name="benchmark", description="benchmark")
+            for _ in range(args.groups - 1)
+        ]
+        session.add_all(groups[1:])
+        await session.flush()
+
+        session.add_all([
+            UsersGroups(user_id=user.user_id, group_id=group.group_id) for group in groups[1:]
+        ])
+        await session.execute(
+            SEED_TASKS_QUERY,
+            {"group_ids": [group.group_id for group in groups], "count": args.tasks}
+        )
+        await session.commit()
+
+    group_ids = [group.group_id for group in groups]
+    headers = {"Authorization": f"Bearer {encode_token({'sub': str(user.user_id)})}"}
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await run_load(client, args, group_ids, headers)
+            await run_count(args, user.user_id, group_ids)
+            await run_stats(client, args, group_ids, headers)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], groups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=10)
+
+    asyncio.run(main(parser.parse_args()))
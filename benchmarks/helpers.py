@@ -0,0 +1,58 @@
+from math import ceil
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.hashing import get_password_hash
+from models import User, Group, UsersGroups, Task
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..100) по методу ближайшего ранга"""
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def format_latencies(name: str, latencies_ms: Sequence[float]) -> str:
+    return (
+        f"{name}: n={len(latencies_ms)} "
+        f"p50={percentile(latencies_ms, 50):.1f}ms "
+        f"p95={percentile(latencies_ms, 95):.1f}ms "
+        f"p99={percentile(latencies_ms, 99):.1f}ms "
+        f"max={max(latencies_ms, default=0):.1f}ms"
+    )
+
+
+async def create_user_with_task(
+        session: AsyncSession,
+        username: str,
+        password: str
+) -> Tuple[User, Group, Task]:
+    """Создание пользователя, его группы и одной задачи в этой группе"""
+
+    user = User(username=username, hashed_password=get_password_hash(password))
+    group = Group(name="benchmark", description="benchmark")
+    session.add_all([user, group])
+    await session.flush()
+
+    task = Task(group_id=group.group_id, name="benchmark", description="benchmark")
+    session.add_all([UsersGroups(user_id=user.user_id, group_id=group.group_id), task])
+    await session.commit()
+
+    return user, group, task
+
+
+async def cleanup(session: AsyncSession, users: List[User], groups: List[Group]) -> None:
+    await session.execute(
+        delete(Group).where(Group.group_id.in_([group.group_id for group in groups]))
+    )
+    await session.execute(
+        delete(User).where(User.user_id.in_([user.user_id for user in users]))
+    )
+    await session.commit()
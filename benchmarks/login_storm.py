@@ -0,0 +1,111 @@
+"""
+Бенчмарк: задержка посторонних запросов GET /tasks/{task_id}
+во время шторма логинов.
+
+Режим inline повторяет старое поведение (bcrypt считается прямо в event loop),
+режим pool использует пул процессов из auth.hashing.
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.login_storm --logins 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import nullcontext
+from time import perf_counter
+from unittest.mock import patch
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+
+from auth.hashing import hashing_pool, verify_password
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+async def inline_verify_password(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def run_scenario(
+        mode: str,
+        args: argparse.Namespace,
+        username: str,
+        password: str,
+        task_id: str,
+        token: str
+) -> None:
+    if mode == "inline":
+        context = patch("auth.auth_service.verify_password_async", inline_verify_password)
+    else:
+        context = nullcontext()
+
+    latencies_ms = []
+    statuses = Counter()
+    storm_finished = asyncio.Event()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def probe() -> None:
+            headers = {"Authorization": f"Bearer {token}"}
+
+            while not storm_finished.is_set():
+                started_at = perf_counter()
+                response = await client.get(f"/tasks/{task_id}", headers=headers)
+                latencies_ms.append((perf_counter() - started_at) * 1000)
+                assert response.status_code == 200
+                await asyncio.sleep(args.probe_interval)
+
+        async def storm() -> None:
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def login() -> None:
+                async with semaphore:
+                    response = await client.post(
+                        "/auth/login",
+                        json={"username": username, "password": password}
+                    )
+                    statuses[response.status_code] += 1
+
+            await asyncio.gather(*[login() for _ in range(args.logins)])
+            storm_finished.set()
+
+        with context:
+            started_at = perf_counter()
+            await asyncio.gather(probe(), storm())
+            elapsed = perf_counter() - started_at
+
+    print(format_latencies(f"[{mode}] GET /tasks/{{id}}", latencies_ms))
+    print(f"[{mode}] logins: {dict(statuses)} in {elapsed:.1f}s")
+
+
+async def main(args: argparse.Namespace) -> None:
+    username = uuid4().hex[:12]
+    password = uuid4().hex[:12]
+
+    async with database_helper.session_factory() as session:
+        user, group, task = await create_user_with_task(session, username, password)
+
+    token = encode_token({"sub": str(user.user_id)})
+
+    try:
+        await hashing_pool.warm_up()
+
+        for mode in ("inline", "pool"):
+            await run_scenario(mode, args, username, password, str(task.task_id), token)
+    finally:
+        hashing_pool.shutdown()
+
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Бенчмарк: получение --tasks конкретных задач (например, из списка уведомлений).
+
+single - GET /tasks/{task_id} на каждую задачу (--concurrency одновременно);
+multi - один GET /tasks?ids=... (проверка доступа и выборка одним запросом
+с task_id = ANY(...)).
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.multi_get --tasks 200 --rounds 20
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from models import Task
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+async def run_single(client: AsyncClient, args: argparse.Namespace, task_ids, headers) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def get_task(task_id) -> None:
+        async with semaphore:
+            response = await client.get(f"/tasks/{task_id}", headers=headers)
+            assert response.status_code == 200, response.text
+
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+        await asyncio.gather(*[get_task(task_id) for task_id in task_ids])
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+    print(format_latencies(f"[single] {len(task_ids)} x GET /tasks/{{id}}", latencies_ms))
+
+
+async def run_multi(client: AsyncClient, args: argparse.Namespace, task_ids, headers) -> None:
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+        response = await client.get("/tasks", params={"ids": task_ids}, headers=headers)
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+        assert len(response.json()["tasks"]) == len(task_ids)
+
+    print(format_latencies(f"[multi] GET /tasks?ids=... x{len(task_ids)}", latencies_ms))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, task = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+
+        tasks = [
+            Task(group_id=group.group_id, name="benchmark", description="benchmark")
+            for _ in range(args.tasks - 1)
+        ]
+        session.add_all(tasks)
+        await session.commit()
+
+    task_ids = [task.task_id] + [task.task_id for task in tasks]
+    headers = {"Authorization": f"Bearer {encode_token({'sub': str(user.user_id)})}"}
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await run_single(client, args, task_ids, headers)
+            await run_multi(client, args, task_ids, headers)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,178 @@
+"""
+Бенчмарк: память процесса при выдаче всех задач большой группы.
+
+stream - GET /groups/{group_id}/tasks с Accept: application/x-ndjson через
+настоящий HTTP-сервер (uvicorn в том же процессе, клиент читает ответ потоком);
+materialized - для сравнения весь список задач загружается в память
+ORM-объектами и схемами TaskPreviewSchema, как потребовалось бы без потоковой выдачи.
+
+RSS процесса снимается из /proc/self/statm каждые 50 мс; --read-delay замедляет
+клиента после каждого прочитанного куска, чтобы проверить, что сервер не копит
+ответ в памяти, а ждет клиента.
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.ndjson_stream --tasks 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+from time import perf_counter
+from typing import List
+from uuid import uuid4
+
+import uvicorn
+from httpx import AsyncClient
+from sqlalchemy import select, text
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from models import Task
+from schemas import TaskPreviewSchema
+from .helpers import create_user_with_task, cleanup
+
+
+SEED_TASKS_QUERY = text("""
+    INSERT INTO tasks (task_id, group_id, name, description, created_at)
+    SELECT gen_random_uuid(), :group_id, 'benchmark_' || i, 'benchmark', current_date
+    FROM generate_series(1, :count) AS i
+""")
+
+
+def get_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+class RssSampler:
+    """Пиковый RSS процесса за время работы (опрос в фоне)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.baseline = get_rss_mb()
+        self.peak = self.baseline
+        self.__task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "RssSampler":
+        self.__task = asyncio.create_task(self.__sample())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__task.cancel()
+        self.peak = max(self.peak, get_rss_mb())
+
+    async def __sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, get_rss_mb())
+            await asyncio.sleep(self.interval)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_stream(args: argparse.Namespace, group_id, token: str) -> None:
+    port = get_free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        host="127.0.0.1",
+        port=port,
+        lifespan="off",
+        log_level="warning"
+    ))
+    serving = asyncio.create_task(server.serve())
+
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/x-ndjson"}
+    rows = 0
+    checkpoints: List[str] = []
+
+    try:
+        async with AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            async with RssSampler() as sampler:
+                started_at = perf_counter()
+
+                async with client.stream("GET", f"/groups/{group_id}/tasks", headers=headers) as response:
+                    assert response.status_code == 200, await response.aread()
+
+                    async for chunk in response.aiter_text():
+                        rows += chunk.count("\n")
+
+                        if rows >= (len(checkpoints) + 1) * args.tasks // 10:
+                            checkpoints.append(f"{rows}: {get_rss_mb():.0f}MB")
+
+                        if args.read_delay:
+                            await asyncio.sleep(args.read_delay)
+
+                elapsed = perf_counter() - started_at
+    finally:
+        server.should_exit = True
+        await serving
+
+    print(f"[stream] rows={rows} elapsed={elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+    print(f"[stream] RSS along the stream: {', '.join(checkpoints)}")
+    print(
+        f"[stream] RSS baseline={sampler.baseline:.0f}MB peak={sampler.peak:.0f}MB "
+        f"(+{sampler.peak - sampler.baseline:.0f}MB)"
+    )
+
+
+async def run_materialized(group_id) -> None:
+    async with RssSampler() as sampler:
+        started_at = perf_counter()
+
+        async with database_helper.session_factory() as session:
+            tasks = await session.scalars(
+                select(Task).where(Task.group_id == group_id).order_by(Task.task_id)
+            )
+            tasks = [TaskPreviewSchema.model_validate(task, from_attributes=True) for task in tasks]
+
+        elapsed = perf_counter() - started_at
+
+    print(f"[materialized] rows={len(tasks)} elapsed={elapsed:.1f}s")
+    print(
+        f"[materialized] RSS baseline={sampler.baseline:.0f}MB peak={sampler.peak:.0f}MB "
+        f"(+{sampler.peak - sampler.baseline:.0f}MB)"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    username = uuid4().hex[:12]
+
+    async with database_helper.session_factory() as session:
+        user, group, _ = await create_user_with_task(session, username, uuid4().hex[:12])
+
+    token = encode_token({"sub": str(user.user_id)})
+
+    try:
+        async with database_helper.session_factory() as session:
+            await session.execute(SEED_TASKS_QUERY, {"group_id": group.group_id, "count": args.tasks - 1})
+            await session.commit()
+
+        print(f"seeded {args.tasks} tasks")
+
+        await run_stream(args, group.group_id, token)
+
+        # RSS после материализации не возвращается, поэтому этот режим идет последним
+        if not args.skip_materialized:
+            await run_materialized(group.group_id)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--read-delay", type=float, default=0, help="пауза клиента после каждого куска, с")
+    parser.add_argument("--skip-materialized", action="store_true")
+
+    asyncio.run(main(parser.parse_args()))
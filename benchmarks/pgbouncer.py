@@ -0,0 +1,181 @@
+"""
+Бенчмарк: количество серверных соединений и пропускная способность
+при --workers воркерах приложения (у каждого свой пул) напрямую и через PgBouncer.
+
+Каждый воркер в --concurrency корутин выполняет короткие читающие транзакции
+через SQLAlchemyUnitOfWork; количество серверных соединений снимается
+из pg_stat_activity по прямому соединению с PostgreSQL (DATABASE_HOST/PORT).
+Пулы воркеров по умолчанию делят DATABASE_MAX_CONNECTIONS на WORKERS = --workers.
+
+Напрямую:
+PYTHONPATH=src python -m benchmarks.pgbouncer --workers 20
+Через PgBouncer (docker compose --profile pgbouncer up pgbouncer):
+DATABASE_PGBOUNCER_MODE=true PYTHONPATH=src python -m benchmarks.pgbouncer --workers 20 --port 6432
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import List, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import text, delete
+
+from core import DatabaseHelper, database_helper, settings
+from infrastructure import (
+    SQLAlchemyUnitOfWork,
+    UsersRepository,
+    GroupsRepository,
+    TasksRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
+)
+from models import User
+from .helpers import format_latencies
+
+
+SERVER_CONNECTIONS_QUERY = text("""
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND backend_type = 'client backend'
+""")
+
+
+async def run_worker(
+        database_url: str,
+        user_id: UUID,
+        concurrency: int,
+        started_at: float,
+        duration: float
+) -> Tuple[List[float], int]:
+    database_helper = DatabaseHelper(database_url)
+    latencies_ms = []
+    errors = 0
+
+    await asyncio.sleep(max(0.0, started_at - time.time()))
+    finished_at = time.time() + duration
+
+    def get_unit_of_work() -> SQLAlchemyUnitOfWork:
+        return SQLAlchemyUnitOfWork(
+            database_helper.session_factory,
+            UsersRepository,
+            GroupsRepository,
+            TasksRepository,
+            RevokedTokensRepository,
+            RefreshTokensRepository,
+            ApiKeysRepository
+        )
+
+    async def run_transactions() -> None:
+        nonlocal errors
+
+        while time.time() < finished_at:
+            transaction_started_at = perf_counter()
+
+            try:
+                async with get_unit_of_work() as uow:
+                    assert await uow.users.get(user_id) is not None
+            except Exception:
+                errors += 1
+                continue
+
+            latencies_ms.append((perf_counter() - transaction_started_at) * 1000)
+
+    try:
+        await asyncio.gather(*[run_transactions() for _ in range(concurrency)])
+    finally:
+        await database_helper.engine.dispose()
+
+    return latencies_ms, errors
+
+
+def worker(*args) -> Tuple[List[float], int]:
+    return asyncio.run(run_worker(*args))
+
+
+async def watch_server_connections(stop: asyncio.Event) -> int:
+    """Максимальное количество серверных соединений (без собственного)"""
+
+    peak = 0
+
+    async with database_helper.engine.connect() as connection:
+        while not stop.is_set():
+            peak = max(peak, await connection.scalar(SERVER_CONNECTIONS_QUERY) - 1)
+            # pg_stat_activity снимается один раз за транзакцию
+            await connection.commit()
+            await asyncio.sleep(0.1)
+
+    return peak
+
+
+async def main(args: argparse.Namespace) -> None:
+    database_url = settings.database_url.replace(
+        f"@{settings.DATABASE_HOST}:{settings.DATABASE_PORT}/",
+        f"@{args.host or settings.DATABASE_HOST}:{args.port or settings.DATABASE_PORT}/"
+    )
+    user = User(username=uuid4().hex[:18], hashed_password="benchmark")
+
+    async with database_helper.session_factory() as session:
+        session.add(user)
+        await session.commit()
+
+    print(
+        f"{args.workers} workers x {args.concurrency} coroutines, "
+        f"pgbouncer mode {settings.DATABASE_PGBOUNCER_MODE}"
+    )
+
+    try:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(watch_server_connections(stop))
+        started_at = time.time() + 3
+
+        with ProcessPoolExecutor(
+                max_workers=args.workers,
+                mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = await asyncio.gather(*[
+                loop.run_in_executor(
+                    executor,
+                    worker,
+                    database_url,
+                    user.user_id,
+                    args.concurrency,
+                    started_at,
+                    args.duration
+                )
+                for _ in range(args.workers)
+            ])
+
+        stop.set()
+        peak_connections = await watcher
+    finally:
+        async with database_helper.session_factory() as session:
+            await session.execute(delete(User).where(User.user_id == user.user_id))
+            await session.commit()
+
+    latencies_ms = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    errors = sum(worker_errors for _, worker_errors in results)
+
+    print(format_latencies("transactions", latencies_ms))
+    print(f"throughput: {len(latencies_ms) / args.duration:.0f} transactions/s, errors: {errors}")
+    print(f"peak server connections: {peak_connections}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--host", help="адрес PgBouncer (по умолчанию DATABASE_HOST)")
+    parser.add_argument("--port", type=int, help="порт PgBouncer (по умолчанию DATABASE_PORT)")
+    args = parser.parse_args()
+
+    # размер пулов воркеров считается от количества воркеров
+    os.environ.setdefault("WORKERS", str(args.workers))
+
+    asyncio.run(main(args))
@@ -0,0 +1,158 @@
+"""
+Бенчмарк: пропускная способность PATCH /tasks/{task_id} и POST /groups
+при записи одним запросом (UPDATE/INSERT ... RETURNING, CTE для группы и владельца)
+и при прежней записи в несколько запросов (session.get + flush, отдельный INSERT
+членства в группе).
+
+Режим legacy подменяет методы репозиториев их прежними реализациями.
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.single_statement_writes --requests 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Any, Dict, List
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select, delete
+
+from auth.tokens import encode_token
+from core import database_helper
+from infrastructure import GroupsRepository, TasksRepository
+from main import app
+from models import Group, Task, UsersGroups
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+async def legacy_update_task_for_user(
+        self: TasksRepository,
+        user_id: UUID,
+        task_id: UUID,
+        data: Dict[str, Any]
+) -> Task | None:
+    if not await self.get_task_id_if_user_in_group(user_id, task_id):
+        return None
+
+    task = await self.session.get(Task, task_id)
+
+    for key, value in data.items():
+        setattr(task, key, value)
+
+    return task
+
+
+async def legacy_create_group(self: GroupsRepository, data: Dict[str, Any]) -> Group:
+    group = Group(name=data["name"], description=data["description"])
+    self.session.add(group)
+    await self.session.flush()
+
+    self.session.add(UsersGroups(group_id=group.group_id, user_id=data["user_id"]))
+
+    return group
+
+
+async def run_requests(
+        client: AsyncClient,
+        args: argparse.Namespace,
+        send: Any
+) -> List[float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies_ms = []
+
+    async def run_request(i: int) -> None:
+        async with semaphore:
+            started_at = perf_counter()
+            response = await send(i)
+            latencies_ms.append((perf_counter() - started_at) * 1000)
+            assert response.status_code in (200, 201), response.text
+
+    await asyncio.gather(*[run_request(i) for i in range(args.requests)])
+    return latencies_ms
+
+
+async def run_scenario(
+        mode: str,
+        args: argparse.Namespace,
+        user_id: UUID,
+        task_id: UUID,
+        token: str
+) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with ExitStack() as stack:
+        if mode == "legacy":
+            stack.enter_context(
+                patch.object(TasksRepository, "update_for_user", legacy_update_task_for_user)
+            )
+            stack.enter_context(
+                patch.object(GroupsRepository, "create", legacy_create_group)
+            )
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for name, send in (
+                (
+                    "PATCH /tasks/{id}",
+                    lambda i: client.patch(
+                        f"/tasks/{task_id}",
+                        json={"estimated_time": i},
+                        headers=headers
+                    )
+                ),
+                (
+                    "POST /groups",
+                    lambda i: client.post(
+                        "/groups",
+                        json={"name": "benchmark", "description": "benchmark"},
+                        headers=headers
+                    )
+                )
+            ):
+                started_at = perf_counter()
+                latencies_ms = await run_requests(client, args, send)
+                elapsed = perf_counter() - started_at
+
+                print(format_latencies(f"[{mode}] {name}", latencies_ms))
+                print(f"[{mode}] {name}: {len(latencies_ms) / elapsed:.0f} requests/s")
+
+    # группы, созданные бенчмарком (кроме группы задачи)
+    async with database_helper.session_factory() as session:
+        await session.execute(
+            delete(Group).where(
+                Group.group_id.in_(
+                    select(UsersGroups.group_id).where(UsersGroups.user_id == user_id)
+                ),
+                Group.name == "benchmark",
+                Group.group_id != args.group_id
+            )
+        )
+        await session.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    username = uuid4().hex[:12]
+
+    async with database_helper.session_factory() as session:
+        user, group, task = await create_user_with_task(session, username, uuid4().hex[:12])
+
+    args.group_id = group.group_id
+    token = encode_token({"sub": str(user.user_id)})
+
+    try:
+        for mode in ("legacy", "single-statement"):
+            await run_scenario(mode, args, user.user_id, task.task_id, token)
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,235 @@
+"""
+Бенчмарк: полнотекстовый поиск GET /tasks/search по --tasks задачам в --groups группах,
+пользователь состоит в --member-groups из них.
+
+Названия и описания задач - слова w1..w<--vocabulary> с распределением, близким
+к закону Ципфа (частое слово w1 встречается почти в каждой задаче, w<N> - единицы раз).
+Классы запросов:
+common - частое слово (фильтр по группам пользователя отсекает почти все совпадения);
+rare - редкое слово (совпадений мало во всей таблице);
+multi - несколько слов и фраза;
+page - вторая страница частого запроса по курсору.
+Каждый запрос повторяется --rounds раз подряд, так что после пятого выполнения
+подготовленного выражения видно и возможный переход PostgreSQL на общий план.
+Если в группах поиска не больше TASK_SEARCH_SCAN_MAX_TASKS задач, поиск перебирает
+их, иначе идет по GIN-индексу. Поэтому те же запросы выполняются и от пользователя,
+в группах которого почти TASK_SEARCH_SCAN_MAX_TASKS задач (scan - самый долгий
+перебор), и от пользователя, который состоит еще и в большой группе
+из --large-group-tasks задач (index - по всем его группам, index group - только
+по большой группе).
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.task_search --tasks 10000000
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from auth.tokens import encode_token
+from core import database_helper, settings
+from main import app
+from models import User, Group, UsersGroups
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+SEED_GROUPS_QUERY = text("""
+    INSERT INTO groups (group_id, name, description, created_at)
+    SELECT gen_random_uuid(), 'benchmark', 'benchmark', current_date
+    FROM generate_series(1, :count)
+    RETURNING group_id
+""")
+
+# коррелированные подзапросы (WHERE i > 0) вычисляются для каждой строки
+SEED_TASKS_QUERY = text("""
+    INSERT INTO tasks (task_id, group_id, name, description, created_at)
+    SELECT
+        gen_random_uuid(),
+        group_id,
+        (
+            SELECT string_agg('w' || floor(power(:vocabulary, random()))::int, ' ')
+            FROM generate_series(1, 3) WHERE i > 0
+        ),
+        (
+            SELECT string_agg('w' || floor(power(:vocabulary, random()))::int, ' ')
+            FROM generate_series(1, 8) WHERE i > 0
+        ),
+        current_date
+    FROM unnest(CAST(:group_ids AS uuid[])) AS group_id, generate_series(1, :count) AS i
+""")
+
+
+async def run_search(
+        client: AsyncClient,
+        args: argparse.Namespace,
+        name: str,
+        query: str,
+        headers,
+        group_id=None
+) -> None:
+    params = {"q": query} if group_id is None else {"q": query, "group_id": str(group_id)}
+    latencies_ms = []
+    found = 0
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+        response = await client.get("/tasks/search", params=params, headers=headers)
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+        found = len(response.json()["tasks"])
+
+    print(format_latencies(f"[{name}] q={query!r} found={found}", latencies_ms))
+
+
+async def run_page(client: AsyncClient, args: argparse.Namespace, query: str, headers) -> None:
+    response = await client.get("/tasks/search", params={"q": query}, headers=headers)
+    assert response.status_code == 200, response.text
+    cursor = response.json()["next_cursor"]
+    assert cursor is not None
+
+    latencies_ms = []
+
+    for _ in range(args.rounds):
+        started_at = perf_counter()
+        response = await client.get(
+            "/tasks/search",
+            params={"q": query, "cursor": cursor},
+            headers=headers
+        )
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+
+    print(format_latencies(f"[page] q={query!r} second page", latencies_ms))
+
+
+async def seed(args: argparse.Namespace, user, group, scan_user, index_user) -> list:
+    tasks_per_group = args.tasks // args.groups
+    # группы, в которых вместе не больше TASK_SEARCH_SCAN_MAX_TASKS задач (без group_ids[0]:
+    # в ней еще и задача create_user_with_task)
+    scan_groups = settings.TASK_SEARCH_SCAN_MAX_TASKS // tasks_per_group
+
+    async with database_helper.session_factory() as session:
+        group_ids = list(
+            (await session.execute(SEED_GROUPS_QUERY, {"count": args.groups - 1})).scalars()
+        )
+        group_ids.insert(0, group.group_id)
+
+        session.add_all([
+            UsersGroups(user_id=user.user_id, group_id=group_id)
+            for group_id in group_ids[1:args.member_groups]
+        ])
+        session.add_all([
+            UsersGroups(user_id=search_user.user_id, group_id=group_id)
+            for search_user in (scan_user, index_user)
+            for group_id in group_ids[1:scan_groups + 1]
+        ])
+        await session.commit()
+
+    chunk = max(1, args.chunk // tasks_per_group)
+    started_at = perf_counter()
+
+    for start in range(0, len(group_ids), chunk):
+        async with database_helper.session_factory() as session:
+            await session.execute(SEED_TASKS_QUERY, {
+                "group_ids": group_ids[start:start + chunk],
+                "count": tasks_per_group,
+                "vocabulary": args.vocabulary
+            })
+            await session.commit()
+
+        print(
+            f"seeded {min(start + chunk, len(group_ids)) * tasks_per_group} tasks "
+            f"in {perf_counter() - started_at:.0f}s",
+            flush=True
+        )
+
+    # большая группа (последняя в group_ids) только у index_user
+    async with database_helper.session_factory() as session:
+        group_ids.append((await session.execute(SEED_GROUPS_QUERY, {"count": 1})).scalar_one())
+        session.add(UsersGroups(user_id=index_user.user_id, group_id=group_ids[-1]))
+        await session.commit()
+
+    for start in range(0, args.large_group_tasks, args.chunk):
+        async with database_helper.session_factory() as session:
+            await session.execute(SEED_TASKS_QUERY, {
+                "group_ids": group_ids[-1:],
+                "count": min(args.chunk, args.large_group_tasks - start),
+                "vocabulary": args.vocabulary
+            })
+            await session.commit()
+
+    async with database_helper.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE tasks"))
+
+    return group_ids
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, _ = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+        scan_user = User(username=uuid4().hex[:12], hashed_password="benchmark")
+        index_user = User(username=uuid4().hex[:12], hashed_password="benchmark")
+        session.add_all([scan_user, index_user])
+        await session.commit()
+
+    users = [user, scan_user, index_user]
+    groups = [group]
+
+    try:
+        group_ids = await seed(args, user, group, scan_user, index_user)
+        groups = [Group(group_id=group_id) for group_id in group_ids]
+        headers, scan_headers, index_headers = (
+            {"Authorization": f"Bearer {encode_token({'sub': str(search_user.user_id)})}"}
+            for search_user in users
+        )
+        queries = {
+            "common": "w1",
+            "rare": f"w{args.vocabulary // 2}",
+            "multi": "w2 w17 or w5",
+            "phrase": '"w1 w2"'
+        }
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            for name, query in queries.items():
+                await run_search(client, args, name, query, headers)
+
+            await run_page(client, args, queries["common"], headers)
+
+            for name, query in queries.items():
+                await run_search(client, args, f"scan {name}", query, scan_headers)
+
+            for name, query in queries.items():
+                await run_search(client, args, f"index {name}", query, index_headers)
+
+            for name, query in queries.items():
+                await run_search(
+                    client,
+                    args,
+                    f"index group {name}",
+                    query,
+                    index_headers,
+                    group_id=group_ids[-1]
+                )
+    finally:
+        async with database_helper.session_factory() as session:
+            await cleanup(session, users, groups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    parser.add_argument("--groups", type=int, default=10_000)
+    parser.add_argument("--member-groups", type=int, default=5)
+    parser.add_argument("--large-group-tasks", type=int, default=200_000)
+    parser.add_argument("--vocabulary", type=int, default=10_000)
+    parser.add_argument("--chunk", type=int, default=500_000)
+    parser.add_argument("--rounds", type=int, default=50)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+"""
+Бенчмарк: поиск пользователей по префиксу username (GET /users/search)
+в таблице из --users пользователей.
+
+ilike - username ILIKE 'префикс%' без подходящего индекса (последовательное сканирование);
+search - GET /users/search по префиксам из 4 символов (мимо кеша воркера);
+short - префиксы из 1-2 символов (самые частые и с наибольшим числом совпадений):
+без кеша и из кеша воркера.
+
+Запуск из корня репозитория (нужны переменные окружения приложения):
+PYTHONPATH=src python -m benchmarks.user_search --users 5000000
+"""
+
+import argparse
+import asyncio
+import random
+from time import perf_counter
+from uuid import uuid4
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from auth.tokens import encode_token
+from core import database_helper
+from main import app
+from services import user_search_cache
+from .helpers import create_user_with_task, cleanup, format_latencies
+
+
+# пользователи бенчмарка помечены датой создания (по username их не отличить);
+# username - 6-12 букв a-p, у каждого пятого первая буква заглавная
+BENCHMARK_DATE = "1970-01-01"
+
+SEED_USERS_QUERY = text(f"""
+    INSERT INTO users (user_id, username, hashed_password, created_at, membership_version)
+    SELECT
+        gen_random_uuid(),
+        CASE WHEN i % 5 = 0 THEN initcap(name) ELSE name END,
+        'benchmark',
+        DATE '{BENCHMARK_DATE}',
+        0
+    FROM (
+        SELECT i, substr(translate(md5(i::text), '0123456789', 'ghijklmnop'), 1, 6 + i % 7) AS name
+        FROM generate_series(:start, :stop - 1) AS i
+    ) AS names
+    ON CONFLICT DO NOTHING
+""")
+
+SAMPLE_USERNAMES_QUERY = text(f"""
+    SELECT username FROM users TABLESAMPLE SYSTEM (1)
+    WHERE created_at = DATE '{BENCHMARK_DATE}'
+    LIMIT :count
+""")
+
+ILIKE_QUERY = text("""
+    SELECT user_id, username FROM users
+    WHERE username ILIKE :prefix || '%'
+    ORDER BY username
+    LIMIT :limit
+""")
+
+CLEANUP_QUERY = text(f"DELETE FROM users WHERE created_at = DATE '{BENCHMARK_DATE}'")
+
+
+async def run_ilike(args: argparse.Namespace, prefixes) -> None:
+    latencies_ms = []
+
+    for prefix in prefixes[:args.ilike_rounds]:
+        started_at = perf_counter()
+
+        async with database_helper.session_factory() as session:
+            await session.execute(ILIKE_QUERY, {"prefix": prefix, "limit": args.limit})
+
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+    print(format_latencies("[ilike] 4-char prefixes", latencies_ms))
+
+
+async def run_search(
+        client: AsyncClient,
+        args: argparse.Namespace,
+        name: str,
+        prefixes,
+        headers,
+        cached: bool
+) -> None:
+    latencies_ms = []
+    found = 0
+
+    for prefix in prefixes:
+        if not cached:
+            user_search_cache.clear()
+
+        started_at = perf_counter()
+        response = await client.get(
+            "/users/search",
+            params={"prefix": prefix, "limit": args.limit},
+            headers=headers
+        )
+        latencies_ms.append((perf_counter() - started_at) * 1000)
+
+        assert response.status_code == 200, response.text
+        found += len(response.json()["users"])
+
+    print(format_latencies(f"[{name}] found={found / len(prefixes):.1f}/request", latencies_ms))
+
+
+async def seed(args: argparse.Namespace) -> None:
+    started_at = perf_counter()
+
+    for start in range(0, args.users, args.chunk):
+        async with database_helper.session_factory() as session:
+            await session.execute(
+                SEED_USERS_QUERY,
+                {"start": start, "stop": min(start + args.chunk, args.users)}
+            )
+            await session.commit()
+
+        print(
+            f"seeded {min(start + args.chunk, args.users)} users "
+            f"in {perf_counter() - started_at:.0f}s",
+            flush=True
+        )
+
+    async with database_helper.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE users"))
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with database_helper.session_factory() as session:
+        user, group, _ = await create_user_with_task(session, uuid4().hex[:12], uuid4().hex[:12])
+
+    try:
+        await seed(args)
+
+        async with database_helper.session_factory() as session:
+            usernames = list(
+                (await session.execute(SAMPLE_USERNAMES_QUERY, {"count": args.rounds})).scalars()
+            )
+
+        prefixes = [username[:4] for username in usernames]
+        letters = "abcdefghijklmnop"
+        short_prefixes = [
+            "".join(random.choices(letters, k=random.randint(1, 2))) for _ in range(args.rounds)
+        ]
+        headers = {"Authorization": f"Bearer {encode_token({'sub': str(user.user_id)})}"}
+
+        await run_ilike(args, prefixes)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            await run_search(client, args, "search", prefixes, headers, cached=False)
+            await run_search(client, args, "short", short_prefixes, headers, cached=False)
+            await run_search(client, args, "short cached", short_prefixes, headers, cached=True)
+
+        print(f"user_search_cache: {user_search_cache.stats()}")
+    finally:
+        async with database_helper.session_factory() as session:
+            await session.execute(CLEANUP_QUERY)
+            await cleanup(session, [user], [group])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5_000_000)
+    parser.add_argument("--chunk", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--ilike-rounds", type=int, default=10)
+
+    asyncio.run(main(parser.parse_args()))
@@ -6,7 +6,7 @@ from sqlalchemy import pool
 
 
 from core import settings
-from models import Base, User, Group, Task, UsersGroups  # noqa
+from models import Base, User, Group, Task, UsersGroups, RevokedToken, RefreshToken, ApiKey  # noqa
 
 
 config = context.config
@@ -0,0 +1,46 @@
+"""task full-text search
+
+Revision ID: a9d2c5e7f318
+Revises: f1c7e2a94b36
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d2c5e7f318'
+down_revision: Union[str, None] = 'f1c7e2a94b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # хранимая генерируемая колонка: добавление переписывает таблицу tasks
+    # под эксклюзивной блокировкой, индекс строится без блокировки записи
+    op.add_column('tasks', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian'::regconfig, name), 'A') || "
+            "setweight(to_tsvector('russian'::regconfig, description), 'B')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_search_vector', table_name='tasks', postgresql_using='gin', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,34 @@
+"""access check and cascade indexes
+
+Revision ID: b8d41f7a9e25
+Revises: e5a90f3c2d71
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d41f7a9e25'
+down_revision: Union[str, None] = 'e5a90f3c2d71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_tasks_group_id'), 'tasks', ['group_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_users_groups_group_id'), 'users_groups', ['group_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_refresh_tokens_user_id'), 'refresh_tokens', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_refresh_tokens_user_id'), table_name='refresh_tokens', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_users_groups_group_id'), table_name='users_groups', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_tasks_group_id'), table_name='tasks', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,32 @@
+"""users membership version
+
+Revision ID: c47d2b9e8a16
+Revises: a81e4c5f0d23
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d2b9e8a16'
+down_revision: Union[str, None] = 'a81e4c5f0d23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('membership_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('membership_changed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_users_membership_changed_at'), 'users', ['membership_changed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_membership_changed_at'), table_name='users')
+    op.drop_column('users', 'membership_changed_at')
+    op.drop_column('users', 'membership_version')
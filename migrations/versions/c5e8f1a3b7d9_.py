@@ -0,0 +1,30 @@
+"""username prefix search
+
+Revision ID: c5e8f1a3b7d9
+Revises: a9d2c5e7f318
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8f1a3b7d9'
+down_revision: Union[str, None] = 'a9d2c5e7f318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_username_prefix', 'users', [sa.text('lower(username) COLLATE "C"')], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_username_prefix', table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""keyset pagination indexes
+
+Revision ID: d3f6a8c1b042
+Revises: b8d41f7a9e25
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f6a8c1b042'
+down_revision: Union[str, None] = 'b8d41f7a9e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # составные индексы заменяют одноколоночные по group_id
+    with op.get_context().autocommit_block():
+        op.create_index('ix_tasks_group_id_task_id', 'tasks', ['group_id', 'task_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_users_groups_group_id_user_id', 'users_groups', ['group_id', 'user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index(op.f('ix_tasks_group_id'), table_name='tasks', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_users_groups_group_id'), table_name='users_groups', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_groups_group_id'), 'users_groups', ['group_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_tasks_group_id'), 'tasks', ['group_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_users_groups_group_id_user_id', table_name='users_groups', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tasks_group_id_task_id', table_name='tasks', postgresql_concurrently=True, if_exists=True)
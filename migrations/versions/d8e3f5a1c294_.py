@@ -0,0 +1,155 @@
+"""group counters lock order
+
+Revision ID: d8e3f5a1c294
+Revises: c5e8f1a3b7d9
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e3f5a1c294'
+down_revision: Union[str, None] = 'c5e8f1a3b7d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASKS_INSERT_DELTA = """
+    SELECT group_id, count(*) AS task_count,
+           coalesce(sum(estimated_time), 0) AS estimated_time_sum
+    FROM new_tasks
+    GROUP BY group_id
+"""
+
+TASKS_DELETE_DELTA = """
+    SELECT group_id, count(*) AS task_count,
+           coalesce(sum(estimated_time), 0) AS estimated_time_sum
+    FROM old_tasks
+    GROUP BY group_id
+"""
+
+TASKS_UPDATE_DELTA = """
+    SELECT group_id, sum(task_count) AS task_count,
+           sum(estimated_time_sum) AS estimated_time_sum
+    FROM (
+        SELECT group_id, 1 AS task_count,
+               coalesce(estimated_time, 0) AS estimated_time_sum
+        FROM new_tasks
+        UNION ALL
+        SELECT group_id, -1, -coalesce(estimated_time, 0)
+        FROM old_tasks
+    ) AS changes
+    GROUP BY group_id
+    HAVING sum(task_count) <> 0 OR sum(estimated_time_sum) <> 0
+"""
+
+# строки групп блокируются по возрастанию group_id (как при сверке счетчиков),
+# а не в порядке плана UPDATE ... FROM: операции над несколькими группами
+# (COPY задач, перенос задач между группами) не взаимоблокируются.
+# FOR NO KEY UPDATE - та же блокировка, что берет UPDATE: она не конфликтует
+# с FOR KEY SHARE проверок внешних ключей
+LOCK_GROUPS = """
+        PERFORM 1 FROM groups
+        WHERE group_id IN (SELECT group_id FROM ({delta}) AS delta)
+        ORDER BY group_id
+        FOR NO KEY UPDATE;
+"""
+
+APPLY_TASKS_DELTA = """
+        UPDATE groups
+        SET task_count = groups.task_count {sign} delta.task_count,
+            estimated_time_sum = groups.estimated_time_sum {sign} delta.estimated_time_sum
+        FROM ({delta}) AS delta
+        WHERE groups.group_id = delta.group_id;
+"""
+
+TASKS_COUNTERS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION groups_apply_tasks_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+{LOCK_GROUPS.format(delta=TASKS_INSERT_DELTA)}
+{APPLY_TASKS_DELTA.format(sign='+', delta=TASKS_INSERT_DELTA)}
+    ELSIF TG_OP = 'DELETE' THEN
+{LOCK_GROUPS.format(delta=TASKS_DELETE_DELTA)}
+{APPLY_TASKS_DELTA.format(sign='-', delta=TASKS_DELETE_DELTA)}
+    ELSE
+{LOCK_GROUPS.format(delta=TASKS_UPDATE_DELTA)}
+{APPLY_TASKS_DELTA.format(sign='+', delta=TASKS_UPDATE_DELTA)}
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+MEMBERS_INSERT_DELTA = "SELECT group_id, count(*) AS member_count FROM new_members GROUP BY group_id"
+MEMBERS_DELETE_DELTA = "SELECT group_id, count(*) AS member_count FROM old_members GROUP BY group_id"
+
+APPLY_MEMBERS_DELTA = """
+        UPDATE groups
+        SET member_count = groups.member_count {sign} delta.member_count
+        FROM ({delta}) AS delta
+        WHERE groups.group_id = delta.group_id;
+"""
+
+USERS_GROUPS_COUNTERS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION groups_apply_users_groups_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+{LOCK_GROUPS.format(delta=MEMBERS_INSERT_DELTA)}
+{APPLY_MEMBERS_DELTA.format(sign='+', delta=MEMBERS_INSERT_DELTA)}
+    ELSE
+{LOCK_GROUPS.format(delta=MEMBERS_DELETE_DELTA)}
+{APPLY_MEMBERS_DELTA.format(sign='-', delta=MEMBERS_DELETE_DELTA)}
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+# функции предыдущей ревизии (f1c7e2a94b36): без предварительной блокировки групп
+PREVIOUS_TASKS_COUNTERS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION groups_apply_tasks_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+{APPLY_TASKS_DELTA.format(sign='+', delta=TASKS_INSERT_DELTA)}
+    ELSIF TG_OP = 'DELETE' THEN
+{APPLY_TASKS_DELTA.format(sign='-', delta=TASKS_DELETE_DELTA)}
+    ELSE
+{APPLY_TASKS_DELTA.format(sign='+', delta=TASKS_UPDATE_DELTA)}
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+PREVIOUS_USERS_GROUPS_COUNTERS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION groups_apply_users_groups_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+{APPLY_MEMBERS_DELTA.format(sign='+', delta=MEMBERS_INSERT_DELTA)}
+    ELSE
+{APPLY_MEMBERS_DELTA.format(sign='-', delta=MEMBERS_DELETE_DELTA)}
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(TASKS_COUNTERS_FUNCTION)
+    op.execute(USERS_GROUPS_COUNTERS_FUNCTION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(PREVIOUS_USERS_GROUPS_COUNTERS_FUNCTION)
+    op.execute(PREVIOUS_TASKS_COUNTERS_FUNCTION)
@@ -0,0 +1,146 @@
+"""group counters
+
+Revision ID: f1c7e2a94b36
+Revises: d3f6a8c1b042
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7e2a94b36'
+down_revision: Union[str, None] = 'd3f6a8c1b042'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# триггеры уровня оператора с таблицами переходов: один UPDATE groups на оператор
+# (в т.ч. на COPY пачки задач), а не на каждую строку
+TASKS_COUNTERS_FUNCTION = """
+CREATE FUNCTION groups_apply_tasks_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE groups
+        SET task_count = groups.task_count + delta.task_count,
+            estimated_time_sum = groups.estimated_time_sum + delta.estimated_time_sum
+        FROM (
+            SELECT group_id, count(*) AS task_count,
+                   coalesce(sum(estimated_time), 0) AS estimated_time_sum
+            FROM new_tasks
+            GROUP BY group_id
+        ) AS delta
+        WHERE groups.group_id = delta.group_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE groups
+        SET task_count = groups.task_count - delta.task_count,
+            estimated_time_sum = groups.estimated_time_sum - delta.estimated_time_sum
+        FROM (
+            SELECT group_id, count(*) AS task_count,
+                   coalesce(sum(estimated_time), 0) AS estimated_time_sum
+            FROM old_tasks
+            GROUP BY group_id
+        ) AS delta
+        WHERE groups.group_id = delta.group_id;
+    ELSE
+        UPDATE groups
+        SET task_count = groups.task_count + delta.task_count,
+            estimated_time_sum = groups.estimated_time_sum + delta.estimated_time_sum
+        FROM (
+            SELECT group_id, sum(task_count) AS task_count,
+                   sum(estimated_time_sum) AS estimated_time_sum
+            FROM (
+                SELECT group_id, 1 AS task_count,
+                       coalesce(estimated_time, 0) AS estimated_time_sum
+                FROM new_tasks
+                UNION ALL
+                SELECT group_id, -1, -coalesce(estimated_time, 0)
+                FROM old_tasks
+            ) AS changes
+            GROUP BY group_id
+        ) AS delta
+        WHERE groups.group_id = delta.group_id
+          AND (delta.task_count <> 0 OR delta.estimated_time_sum <> 0);
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+USERS_GROUPS_COUNTERS_FUNCTION = """
+CREATE FUNCTION groups_apply_users_groups_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE groups
+        SET member_count = groups.member_count + delta.member_count
+        FROM (
+            SELECT group_id, count(*) AS member_count FROM new_members GROUP BY group_id
+        ) AS delta
+        WHERE groups.group_id = delta.group_id;
+    ELSE
+        UPDATE groups
+        SET member_count = groups.member_count - delta.member_count
+        FROM (
+            SELECT group_id, count(*) AS member_count FROM old_members GROUP BY group_id
+        ) AS delta
+        WHERE groups.group_id = delta.group_id;
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = (
+    ('tasks_insert_counters', 'INSERT', 'tasks', 'NEW TABLE AS new_tasks', 'groups_apply_tasks_counters'),
+    ('tasks_update_counters', 'UPDATE', 'tasks', 'OLD TABLE AS old_tasks NEW TABLE AS new_tasks', 'groups_apply_tasks_counters'),
+    ('tasks_delete_counters', 'DELETE', 'tasks', 'OLD TABLE AS old_tasks', 'groups_apply_tasks_counters'),
+    ('users_groups_insert_counters', 'INSERT', 'users_groups', 'NEW TABLE AS new_members', 'groups_apply_users_groups_counters'),
+    ('users_groups_delete_counters', 'DELETE', 'users_groups', 'OLD TABLE AS old_members', 'groups_apply_users_groups_counters'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('groups', sa.Column('task_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('groups', sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('groups', sa.Column('estimated_time_sum', sa.BigInteger(), server_default='0', nullable=False))
+
+    # таблицы блокируются до конца миграции, чтобы между заполнением счетчиков
+    # и созданием триггеров не потерялись изменения
+    op.execute('LOCK TABLE tasks, users_groups IN SHARE ROW EXCLUSIVE MODE')
+    op.execute("""
+        UPDATE groups
+        SET task_count = (SELECT count(*) FROM tasks WHERE tasks.group_id = groups.group_id),
+            estimated_time_sum = (
+                SELECT coalesce(sum(estimated_time), 0) FROM tasks WHERE tasks.group_id = groups.group_id
+            ),
+            member_count = (
+                SELECT count(*) FROM users_groups WHERE users_groups.group_id = groups.group_id
+            )
+    """)
+
+    op.execute(TASKS_COUNTERS_FUNCTION)
+    op.execute(USERS_GROUPS_COUNTERS_FUNCTION)
+
+    for name, event, table, transition_tables, function in TRIGGERS:
+        op.execute(
+            f'CREATE TRIGGER {name} AFTER {event} ON {table} '
+            f'REFERENCING {transition_tables} FOR EACH STATEMENT EXECUTE FUNCTION {function}()'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, table, _, _ in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+
+    op.execute('DROP FUNCTION IF EXISTS groups_apply_users_groups_counters()')
+    op.execute('DROP FUNCTION IF EXISTS groups_apply_tasks_counters()')
+    op.drop_column('groups', 'estimated_time_sum')
+    op.drop_column('groups', 'member_count')
+    op.drop_column('groups', 'task_count')
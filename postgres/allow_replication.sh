@@ -0,0 +1,4 @@
+#!/bin/sh
+# разрешение потоковой репликации для реплики из профиля replica
+# (выполняется только при инициализации пустого каталога данных)
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -2,8 +2,11 @@ from .dependencies import (
     get_unit_of_work,
     get_users_service,
     get_groups_service,
-    get_tasks_service
+    get_tasks_service,
+    get_batch_service
 )
+from .batch import router as batch_router
 from .groups import router as groups_router
+from .metrics import router as metrics_router
 from .tasks import router as tasks_router
 from .users import router as users_router
@@ -0,0 +1,37 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from auth import TokenPayloadSchema, verify_token_or_api_key
+from core import settings
+from exceptions import BatchTooLargeError
+from schemas import BatchSchema, BatchResultSchema
+from services import BatchService
+from .dependencies import get_batch_service
+
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post(
+    "",
+    response_model=BatchResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def run_batch(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        batch_service: Annotated[BatchService, Depends(get_batch_service)],
+        data: BatchSchema
+):
+    """
+    Несколько GET-запросов (/users/me, /users/me/groups, /groups/{group_id}[/details|/users|/tasks],
+    /tasks/{task_id}) за один запрос: у каждой операции свой статус и тело ответа
+    """
+
+    try:
+        return await batch_service.run_batch(payload, data)
+    except BatchTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BATCH_MAX_OPERATIONS} operations per request"
+        )
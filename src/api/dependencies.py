@@ -7,10 +7,13 @@ from infrastructure import (
     SQLAlchemyUnitOfWork,
     UsersRepository,
     TasksRepository,
-    GroupsRepository
+    GroupsRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
 )
 from interfaces import AbstractUnitOfWork
-from services import UsersService, GroupsService, TasksService
+from services import UsersService, GroupsService, TasksService, BatchService
 
 
 def get_unit_of_work() -> AbstractUnitOfWork:
@@ -18,7 +21,12 @@ def get_unit_of_work() -> AbstractUnitOfWork:
         database_helper.session_factory,
         UsersRepository,
         GroupsRepository,
-        TasksRepository
+        TasksRepository,
+        RevokedTokensRepository,
+        RefreshTokensRepository,
+        ApiKeysRepository,
+        read_session_factory_getter=database_helper.get_read_session_factory,
+        commit_hook=database_helper.record_commit_lsn
     )
 
 
@@ -38,3 +46,9 @@ def get_tasks_service(
         uow: Annotated[AbstractUnitOfWork, Depends(get_unit_of_work)]
 ) -> TasksService:
     return TasksService(uow)
+
+
+def get_batch_service(
+        uow: Annotated[AbstractUnitOfWork, Depends(get_unit_of_work)]
+) -> BatchService:
+    return BatchService(uow)
@@ -1,25 +1,35 @@
-from typing import Annotated
+from typing import Annotated, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
-from auth import TokenPayloadSchema, verify_token
+from auth import TokenPayloadSchema, verify_token_or_api_key
+from core import settings
 from exceptions import (
+    InvalidCursorError,
+    InvalidFieldsError,
     GroupNotFoundError,
     UserGroupAttachError,
-    UserGroupDetachError
+    UserGroupDetachError,
+    BulkGroupUsersTooLargeError
 )
 from schemas import (
     GroupSchema,
+    GroupListSchema,
     GroupItemsSchema,
+    GroupItemsStatsSchema,
     GroupUsersSchema,
     GroupTasksSchema,
     GroupSchemaCreate,
     GroupSchemaUpdate,
-    UserGroupSchemaAttach
+    UserGroupSchemaAttach,
+    UsersGroupSchemaBulk,
+    UsersGroupAttachResultSchema,
+    UsersGroupDetachResultSchema
 )
 from services import GroupsService
 from .dependencies import get_groups_service
+from .ndjson import NDJSON_RESPONSES, accepts_ndjson, ndjson_response
 
 
 router = APIRouter(prefix="/groups", tags=["groups"])
@@ -31,7 +41,7 @@ router = APIRouter(prefix="/groups", tags=["groups"])
     status_code=status.HTTP_201_CREATED
 )
 async def create_group(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         data: GroupSchemaCreate,
 ):
@@ -45,36 +55,82 @@ async def create_group(
 
 
 @router.get(
-    "/{group_id}",
-    response_model=GroupSchema,
+    "",
+    response_model=GroupListSchema,
     status_code=status.HTTP_200_OK
 )
-async def get_group_basic(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+async def get_groups(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
-        group_id: UUID
+        ids: Annotated[List[UUID], Query(min_length=1, max_length=settings.MULTI_GET_MAX_IDS)]
 ):
+    """Группы по списку id (?ids=...&ids=...) в порядке запроса"""
+
+    return await groups_service.get_groups(payload, ids)
+
+
+@router.get(
+    "/{group_id}",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"model": GroupItemsStatsSchema}}
+)
+async def get_group(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        groups_service: Annotated[GroupsService, Depends(get_groups_service)],
+        group_id: UUID,
+        fields: str | None = None,
+        include: str | None = None,
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+        users_cursor: str | None = None,
+        tasks_cursor: str | None = None
+):
+    """
+    Группа только с полями fields (через запятую, по умолчанию все), страницами
+    связей и счетчиками include (users, tasks, stats), по умолчанию без них
+    """
+
     try:
-        return await groups_service.get_group_basic(payload, group_id)
+        return await groups_service.get_group(
+            payload,
+            group_id,
+            fields,
+            include,
+            limit,
+            users_cursor,
+            tasks_cursor
+        )
     except GroupNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="group not found"
         )
+    except InvalidFieldsError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid fields"
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor"
+        )
 
 
 @router.get(
     "/{group_id}/details",
     response_model=GroupItemsSchema,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    deprecated=True
 )
 async def get_group_details(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         group_id: UUID,
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE
 ):
     try:
-        return await groups_service.get_group_details(payload, group_id)
+        return await groups_service.get_group_details(payload, group_id, limit)
     except GroupNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,39 +141,63 @@ async def get_group_details(
 @router.get(
     "/{group_id}/users",
     response_model=GroupUsersSchema,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=NDJSON_RESPONSES
 )
 async def get_group_users(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        request: Request,
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
-        group_id: UUID
+        group_id: UUID,
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+        cursor: str | None = None
 ):
     try:
-        return await groups_service.get_group_users(payload, group_id)
+        if accepts_ndjson(request):
+            return await ndjson_response(groups_service.stream_group_users(payload, group_id))
+
+        return await groups_service.get_group_users(payload, group_id, limit, cursor)
     except GroupNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="group not found"
         )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor"
+        )
 
 
 @router.get(
     "/{group_id}/tasks",
     response_model=GroupTasksSchema,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=NDJSON_RESPONSES
 )
 async def get_group_tasks(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        request: Request,
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
-        group_id: UUID
+        group_id: UUID,
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+        cursor: str | None = None
 ):
     try:
-        return await groups_service.get_group_tasks(payload, group_id)
+        if accepts_ndjson(request):
+            return await ndjson_response(groups_service.stream_group_tasks(payload, group_id))
+
+        return await groups_service.get_group_tasks(payload, group_id, limit, cursor)
     except GroupNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="group not found"
         )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor"
+        )
 
 
 @router.patch(
@@ -126,7 +206,7 @@ async def get_group_tasks(
     status_code=status.HTTP_200_OK
 )
 async def update_group(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         group_id: UUID,
         data: GroupSchemaUpdate
@@ -146,7 +226,7 @@ async def update_group(
     status_code=status.HTTP_200_OK
 )
 async def delete_group(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         group_id: UUID
 ):
@@ -161,7 +241,7 @@ async def delete_group(
 
 @router.post("/{group_id}/users", status_code=status.HTTP_204_NO_CONTENT)
 async def add_user_to_group(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         group_id: UUID,
         data: UserGroupSchemaAttach
@@ -175,12 +255,62 @@ async def add_user_to_group(
         )
 
 
+@router.post(
+    "/{group_id}/users/bulk",
+    response_model=UsersGroupAttachResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def add_users_to_group(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        groups_service: Annotated[GroupsService, Depends(get_groups_service)],
+        group_id: UUID,
+        data: UsersGroupSchemaBulk
+):
+    try:
+        return await groups_service.add_users_to_group(payload, group_id, data)
+    except BulkGroupUsersTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_GROUP_USERS_MAX_ITEMS} users per request"
+        )
+    except UserGroupAttachError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cannot add users to group"
+        )
+
+
+@router.delete(
+    "/{group_id}/users/bulk",
+    response_model=UsersGroupDetachResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def remove_users_from_group(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        groups_service: Annotated[GroupsService, Depends(get_groups_service)],
+        group_id: UUID,
+        data: UsersGroupSchemaBulk
+):
+    try:
+        return await groups_service.remove_users_from_group(payload, group_id, data)
+    except BulkGroupUsersTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_GROUP_USERS_MAX_ITEMS} users per request"
+        )
+    except UserGroupDetachError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cannot remove users from group"
+        )
+
+
 @router.delete(
     "/{group_id}/users/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT
 )
 async def remove_user_from_group(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         groups_service: Annotated[GroupsService, Depends(get_groups_service)],
         group_id: UUID,
         user_id: UUID,
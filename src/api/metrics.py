@@ -0,0 +1,27 @@
+import os
+
+from fastapi import APIRouter, Depends, status
+
+from auth import token_cache, api_key_cache, verify_admin_token
+from core import database_helper
+from services import user_search_cache
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(verify_admin_token)]
+)
+
+
+@router.get("", status_code=status.HTTP_200_OK)
+async def get_metrics():
+    """Метрики воркера, обработавшего запрос (у каждого воркера свой пул и кеши)"""
+
+    return {
+        "pid": os.getpid(),
+        "database_pool": database_helper.get_pool_stats(),
+        "token_cache": token_cache.stats(),
+        "api_key_cache": api_key_cache.stats(),
+        "user_search_cache": user_search_cache.stats()
+    }
@@ -0,0 +1,51 @@
+from typing import AsyncIterator, List
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# описание потокового варианта ответа для OpenAPI
+NDJSON_RESPONSES = {200: {"content": {NDJSON_MEDIA_TYPE: {}}}}
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """Клиент запросил список целиком потоком (Accept: application/x-ndjson)"""
+
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _encode(batch: List[BaseModel]) -> bytes:
+    return "".join(f"{item.model_dump_json()}\n" for item in batch).encode()
+
+
+async def ndjson_response(batches: AsyncIterator[List[BaseModel]]) -> StreamingResponse:
+    """
+    Потоковый ответ NDJSON: одна строка JSON на элемент, одна пачка - один кусок ответа.
+
+    Первая пачка читается до отправки заголовков, чтобы ошибки (например,
+    отсутствие доступа) превращались в обычные HTTP-ошибки. Следующая пачка
+    запрашивается, только когда предыдущая передана клиенту, поэтому в памяти
+    находится не больше одной пачки, а медленный клиент замедляет чтение из БД
+    """
+
+    first_batch = await anext(batches, [])
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            if first_batch:
+                yield _encode(first_batch)
+
+            async for batch in batches:
+                yield _encode(batch)
+        finally:
+            await batches.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=NDJSON_MEDIA_TYPE,
+        # без буферизации ответа в nginx, иначе он читает поток целиком
+        headers={"X-Accel-Buffering": "no"}
+    )
@@ -1,11 +1,29 @@
-from typing import Annotated
+from typing import Annotated, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from auth import TokenPayloadSchema, verify_token
-from exceptions import TaskNotFoundError, NonExistentGroupError
-from schemas import TaskSchema, TaskSchemaCreate, TaskSchemaUpdate
+from auth import TokenPayloadSchema, verify_token_or_api_key
+from core import settings
+from exceptions import (
+    TaskNotFoundError,
+    NonExistentGroupError,
+    BulkTasksTooLargeError,
+    InvalidFieldsError,
+    InvalidCursorError
+)
+from schemas import (
+    TaskSchema,
+    TaskListSchema,
+    TaskSearchListSchema,
+    TaskSchemaCreate,
+    TaskSchemaUpdate,
+    TaskBulkResultSchema,
+    TaskBulkIdsSchema,
+    TaskBulkUpdateSchema,
+    TaskBulkMoveSchema,
+    TaskBulkChangeResultSchema
+)
 from services import TasksService
 from .dependencies import get_tasks_service
 
@@ -19,7 +37,7 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
     status_code=status.HTTP_201_CREATED
 )
 async def create_task(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
         data: TaskSchemaCreate
 ):
@@ -33,22 +51,160 @@ async def create_task(
 
 
 @router.get(
-    "/{task_id}",
-    response_model=TaskSchema,
+    "",
+    response_model=TaskListSchema,
     status_code=status.HTTP_200_OK
 )
+async def get_tasks(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        ids: Annotated[List[UUID], Query(min_length=1, max_length=settings.MULTI_GET_MAX_IDS)]
+):
+    """Задачи по списку id (?ids=...&ids=...) в порядке запроса"""
+
+    return await tasks_service.get_tasks(payload, ids)
+
+
+@router.get(
+    "/search",
+    response_model=TaskSearchListSchema,
+    status_code=status.HTTP_200_OK
+)
+async def search_tasks(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        q: Annotated[str, Query(min_length=1, max_length=settings.TASK_SEARCH_MAX_QUERY_LENGTH)],
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+        cursor: str | None = None,
+        group_id: UUID | None = None
+):
+    """
+    Полнотекстовый поиск по названиям и описаниям задач групп пользователя
+    (синтаксис websearch: "фраза", -исключение, or), по убыванию релевантности;
+    group_id - искать только в этой группе
+    """
+
+    try:
+        return await tasks_service.search_tasks(payload, q, limit, cursor, group_id)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor"
+        )
+
+
+@router.post(
+    "/bulk",
+    response_model=TaskBulkResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def create_tasks_bulk(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        data: List[TaskSchemaCreate]
+):
+    try:
+        return await tasks_service.create_tasks_bulk(payload, data)
+    except BulkTasksTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_TASKS_MAX_ITEMS} tasks per request"
+        )
+    except NonExistentGroupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="group does not exist"
+        )
+
+
+@router.patch(
+    "/bulk",
+    response_model=TaskBulkChangeResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def update_tasks_bulk(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        data: TaskBulkUpdateSchema
+):
+    try:
+        return await tasks_service.update_tasks_bulk(payload, data)
+    except BulkTasksTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_TASKS_MAX_ITEMS} tasks per request"
+        )
+
+
+@router.delete(
+    "/bulk",
+    response_model=TaskBulkChangeResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def delete_tasks_bulk(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        data: TaskBulkIdsSchema
+):
+    try:
+        return await tasks_service.delete_tasks_bulk(payload, data)
+    except BulkTasksTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_TASKS_MAX_ITEMS} tasks per request"
+        )
+
+
+@router.post(
+    "/bulk/move",
+    response_model=TaskBulkChangeResultSchema,
+    status_code=status.HTTP_200_OK
+)
+async def move_tasks_bulk(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
+        data: TaskBulkMoveSchema
+):
+    try:
+        return await tasks_service.move_tasks_bulk(payload, data)
+    except BulkTasksTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_TASKS_MAX_ITEMS} tasks per request"
+        )
+    except NonExistentGroupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="group does not exist"
+        )
+
+
+@router.get(
+    "/{task_id}",
+    response_model=None,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_200_OK: {"model": TaskSchema}}
+)
 async def get_task(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
-        task_id: UUID
+        task_id: UUID,
+        fields: str | None = None
 ):
+    """Задача только с полями fields (через запятую, по умолчанию все)"""
+
     try:
-        return await tasks_service.get_task(payload, task_id)
+        return await tasks_service.get_task(payload, task_id, fields)
     except TaskNotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="task not found"
         )
+    except InvalidFieldsError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid fields"
+        )
 
 
 @router.patch(
@@ -57,7 +213,7 @@ async def get_task(
     status_code=status.HTTP_200_OK
 )
 async def update_task(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
         task_id: UUID,
         data: TaskSchemaUpdate
@@ -77,7 +233,7 @@ async def update_task(
     status_code=status.HTTP_200_OK
 )
 async def delete_task(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         tasks_service: Annotated[TasksService, Depends(get_tasks_service)],
         task_id: UUID
 ):
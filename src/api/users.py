@@ -1,12 +1,24 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
-from auth import TokenPayloadSchema, verify_token
-from exceptions import UserNotFoundError, UsernameTakenError
-from schemas import UserSchema, UserSchemaUpdate, GroupPreviewListSchema
+from auth import (
+    TokenPayloadSchema,
+    HashingPoolOverloadedError,
+    verify_token,
+    verify_token_or_api_key
+)
+from core import settings
+from exceptions import (
+    UserNotFoundError,
+    UsernameTakenError,
+    InvalidCursorError,
+    InvalidFieldsError
+)
+from schemas import UserSchema, UserSchemaUpdate, UserPreviewListSchema, GroupPreviewListSchema
 from services import UsersService, GroupsService
 from .dependencies import get_users_service, get_groups_service
+from .ndjson import NDJSON_RESPONSES, accepts_ndjson, ndjson_response
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -14,7 +26,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=UserSchema, status_code=status.HTTP_200_OK)
 async def get_user(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
         users_servidce: Annotated[UsersService, Depends(get_users_service)]
 ):
     try:
@@ -48,6 +60,12 @@ async def update_user(
             detail="username is already taken",
             status_code=status.HTTP_409_CONFLICT
         )
+    except HashingPoolOverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="service is overloaded",
+            headers={"Retry-After": str(settings.PASSWORD_HASHING_RETRY_AFTER_SECONDS)}
+        )
 
 
 @router.delete(
@@ -71,10 +89,46 @@ async def delete_user(
 @router.get(
     "/me/groups",
     response_model=GroupPreviewListSchema,
-    status_code=status.HTTP_200_OK
+    status_code=status.HTTP_200_OK,
+    responses=NDJSON_RESPONSES
 )
 async def get_user_groups_list(
-        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
-        groups_service: Annotated[GroupsService, Depends(get_groups_service)]
+        request: Request,
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        groups_service: Annotated[GroupsService, Depends(get_groups_service)],
+        limit: Annotated[int, Query(ge=1, le=settings.MAX_PAGE_SIZE)] = settings.PAGE_SIZE,
+        cursor: str | None = None,
+        include: str | None = None
 ):
-    return await groups_service.get_user_groups_list(payload)
+    """Группы пользователя (со счетчиками задач и участников, если include=stats)"""
+
+    try:
+        if accepts_ndjson(request):
+            return await ndjson_response(groups_service.stream_user_groups(payload, include))
+
+        return await groups_service.get_user_groups_list(payload, limit, cursor, include)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid cursor"
+        )
+    except InvalidFieldsError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="invalid fields"
+        )
+
+
+@router.get("/search", response_model=UserPreviewListSchema, status_code=status.HTTP_200_OK)
+async def search_users(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token_or_api_key)],
+        users_service: Annotated[UsersService, Depends(get_users_service)],
+        prefix: Annotated[str, Query(min_length=1, max_length=18)],
+        limit: Annotated[
+            int,
+            Query(ge=1, le=settings.USER_SEARCH_MAX_LIMIT)
+        ] = settings.USER_SEARCH_LIMIT
+):
+    """Пользователи, чей username начинается с prefix (без учета регистра), по порядку username"""
+
+    return await users_service.search_users(prefix, limit)
@@ -1,4 +1,8 @@
-from .dependencies import verify_token
-from .hashing import get_password_hash
+from .capabilities import membership_versions, has_group_access
+from .dependencies import verify_token, verify_token_or_api_key, verify_admin_token
+from .exceptions import HashingPoolOverloadedError
+from .hashing import get_password_hash, get_password_hash_async, hashing_pool
+from .revocation import revocation_list
 from .routes import router as auth_router
 from .schemas import TokenPayloadSchema
+from .token_cache import token_cache, api_key_cache
@@ -1,10 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta, UTC
+from typing import List, Set
+from uuid import UUID, uuid4
+
 from sqlalchemy.exc import IntegrityError
 
+from core import logger, settings
 from interfaces import AbstractUnitOfWork
-from .exceptions import UsernameTakenError, InvalidCredentialsError
-from .hashing import get_password_hash, verify_password
-from .schemas import CredentialsSchema, TokenSchema, TokenPayloadSchema
-from .tokens import encode_token
+from .capabilities import get_capability_claims
+from .exceptions import (
+    UsernameTakenError,
+    InvalidCredentialsError,
+    InvalidRefreshTokenError,
+    HashingPoolOverloadedError,
+    BulkRegistrationTooLargeError,
+    ApiKeyNotFoundError
+)
+from .hashing import (
+    get_password_hash_async,
+    verify_password_async,
+    password_needs_rehash,
+    get_password_hashes_bulk
+)
+from .revocation import revocation_list
+from .schemas import (
+    CredentialsSchema,
+    TokenSchema,
+    TokenPayloadSchema,
+    BulkRegistrationResultSchema,
+    ApiKeySchemaCreate,
+    ApiKeySchema,
+    ApiKeyCreatedSchema
+)
+from .tokens import (
+    encode_token,
+    generate_refresh_token,
+    hash_refresh_token,
+    generate_api_key,
+    hash_api_key,
+    get_api_key_jti
+)
+
+
+# ссылки на фоновые задачи, чтобы их не удалил сборщик мусора до завершения
+background_tasks: Set[asyncio.Task] = set()
 
 
 class AuthService:
@@ -12,28 +51,258 @@ class AuthService:
         self.uow = uow
 
     async def register(self, credentials: CredentialsSchema) -> TokenSchema:
+        hashed_password = await get_password_hash_async(credentials.password)
+
         try:
             async with self.uow as uow:
                 user = await uow.users.create({
                     "username": credentials.username,
-                    "hashed_password": get_password_hash(credentials.password)
+                    "hashed_password": hashed_password
                 })
+                tokens = await self.__issue_tokens(uow, user.user_id)
                 await uow.commit()
 
-            return TokenSchema(token=encode_token({"sub": str(user.user_id)}))
+            return tokens
         except IntegrityError:
             raise UsernameTakenError("username is already taken")
 
+    async def register_bulk(
+            self,
+            credentials_list: List[CredentialsSchema]
+    ) -> BulkRegistrationResultSchema:
+        """
+        Массовая регистрация без выдачи токенов.
+        Занятые (в том числе повторяющиеся в запросе) username не прерывают
+        регистрацию остальных, а возвращаются в conflicts;
+        пароли занятых username не хешируются
+        """
+
+        if len(credentials_list) > settings.BULK_REGISTRATION_MAX_USERS:
+            raise BulkRegistrationTooLargeError("too many users")
+
+        passwords = {}
+        conflicts = []
+
+        for credentials in credentials_list:
+            if credentials.username in passwords:
+                conflicts.append(credentials.username)
+            else:
+                passwords[credentials.username] = credentials.password
+
+        async with self.uow as uow:
+            existing_usernames = await uow.users.get_existing_usernames(list(passwords))
+
+        for username in existing_usernames:
+            del passwords[username]
+
+        usernames = list(passwords)
+        hashed_passwords = await get_password_hashes_bulk(list(passwords.values()))
+
+        async with self.uow as uow:
+            users = await uow.users.bulk_create([
+                {"username": username, "hashed_password": hashed_password}
+                for username, hashed_password in zip(usernames, hashed_passwords)
+            ])
+            await uow.commit()
+
+        created_usernames = {user.username for user in users}
+        conflicts.extend(existing_usernames)
+        conflicts.extend(
+            username for username in usernames
+            if username not in created_usernames
+        )
+
+        return BulkRegistrationResultSchema.model_validate(
+            {"created": users, "conflicts": conflicts},
+            from_attributes=True
+        )
+
     async def login(self, credentials: CredentialsSchema) -> TokenSchema:
         async with self.uow as uow:
             user = await uow.users.get_user_by_username(credentials.username)
 
         if user is None:
             raise InvalidCredentialsError("invalid credentials")
-        elif not verify_password(credentials.password, user.hashed_password):
+        elif not await verify_password_async(credentials.password, user.hashed_password):
             raise InvalidCredentialsError("invalid credentials")
 
-        return TokenSchema(token=encode_token({"sub": str(user.user_id)}))
+        async with self.uow as uow:
+            tokens = await self.__issue_tokens(uow, user.user_id)
+            await uow.commit()
+
+        if password_needs_rehash(user.hashed_password):
+            task = asyncio.create_task(
+                self.__rehash_password(user.user_id, credentials.password, user.hashed_password)
+            )
+            background_tasks.add(task)
+            task.add_done_callback(background_tasks.discard)
+
+        return tokens
+
+    async def refresh(self, refresh_token: str) -> TokenSchema:
+        """
+        Обмен refresh-токена на новую пару токенов (ротация).
+        Повторное предъявление уже использованного refresh-токена
+        считается кражей: отзываются все токены этой сессии
+        """
+
+        token_hash = hash_refresh_token(refresh_token)
+
+        async with self.uow as uow:
+            used_token = await uow.refresh_tokens.use(token_hash)
+
+            if used_token is not None:
+                user_id, family_id = used_token
+                tokens = await self.__issue_tokens(uow, user_id, family_id)
+                await uow.commit()
+
+                return tokens
+
+            reused_token = await uow.refresh_tokens.get(token_hash)
+
+            if reused_token is not None and reused_token.used_at is not None:
+                await uow.refresh_tokens.revoke_family(reused_token.family_id)
+                await uow.commit()
+
+        raise InvalidRefreshTokenError("invalid refresh token")
+
+    async def logout(self, payload: TokenPayloadSchema) -> None:
+        """
+        Отзыв токена и refresh-токенов его сессии. Токены без jti (выпущенные
+        до появления отзыва) отозвать нельзя - они остаются действительными
+        до истечения
+        """
+
+        if payload.jti is None:
+            return
+
+        async with self.uow as uow:
+            await uow.revoked_tokens.revoke(payload.jti, payload.exp)
+
+            if payload.fam is not None:
+                await uow.refresh_tokens.revoke_family(payload.fam)
+
+            await uow.commit()
+
+        revocation_list.add(payload.jti, payload.exp)
+
+    async def create_api_key(
+            self,
+            user_id: UUID,
+            api_key_data: ApiKeySchemaCreate
+    ) -> ApiKeyCreatedSchema:
+        api_key = generate_api_key()
+
+        async with self.uow as uow:
+            api_key_model = await uow.api_keys.create({
+                "user_id": user_id,
+                "name": api_key_data.name,
+                "key_hash": hash_api_key(api_key)
+            })
+            await uow.commit()
+
+        return ApiKeyCreatedSchema(
+            api_key_id=api_key_model.api_key_id,
+            name=api_key_model.name,
+            created_at=api_key_model.created_at,
+            api_key=api_key
+        )
+
+    async def get_api_keys(self, user_id: UUID) -> List[ApiKeySchema]:
+        async with self.uow as uow:
+            api_keys = await uow.api_keys.get_user_api_keys(user_id)
+
+        return [
+            ApiKeySchema.model_validate(api_key, from_attributes=True)
+            for api_key in api_keys
+        ]
+
+    async def delete_api_key(self, user_id: UUID, api_key_id: UUID) -> None:
+        """
+        Удаление API-ключа. Закешированный в воркерах ключ отзывается
+        на время жизни записи кеша через список отозванных токенов
+        """
+
+        expires_at = datetime.now(UTC) + timedelta(seconds=settings.API_KEY_CACHE_TTL_SECONDS)
+
+        async with self.uow as uow:
+            key_hash = await uow.api_keys.delete_user_api_key(user_id, api_key_id)
+
+            if key_hash is None:
+                raise ApiKeyNotFoundError("api key not found")
+
+            await uow.revoked_tokens.revoke(get_api_key_jti(key_hash), expires_at)
+            await uow.commit()
+
+        revocation_list.add(get_api_key_jti(key_hash), expires_at)
+
+    async def get_api_key_payload(self, key_hash: str) -> TokenPayloadSchema | None:
+        """payload для запросов по API-ключу (None, если ключ не найден)"""
+
+        async with self.uow as uow:
+            user_id = await uow.api_keys.get_user_id_by_key_hash(key_hash)
+
+        if user_id is None:
+            return None
+
+        issued_at = datetime.now(UTC)
+
+        return TokenPayloadSchema(
+            sub=user_id,
+            iat=issued_at,
+            exp=issued_at + timedelta(seconds=settings.API_KEY_CACHE_TTL_SECONDS),
+            jti=get_api_key_jti(key_hash)
+        )
+
+    async def __rehash_password(
+            self,
+            user_id: UUID,
+            password: str,
+            old_hashed_password: str
+    ) -> None:
+        """
+        Пересчет устаревшего хеша пароля с текущими параметрами (после ответа на запрос);
+        при перегрузке пула хеширования пересчет откладывается до следующего входа
+        """
+
+        try:
+            new_hashed_password = await get_password_hash_async(password)
+
+            async with self.uow as uow:
+                await uow.users.update_password_hash(
+                    user_id,
+                    old_hashed_password,
+                    new_hashed_password
+                )
+                await uow.commit()
+        except HashingPoolOverloadedError:
+            pass
+        except Exception:
+            logger.exception("password rehash failed")
+
+    @staticmethod
+    async def __issue_tokens(
+            uow: AbstractUnitOfWork,
+            user_id: UUID,
+            family_id: UUID | None = None
+    ) -> TokenSchema:
+        """Выпуск jwt и refresh-токена (новая сессия, если family_id не передан)"""
+
+        refresh_token = generate_refresh_token()
+        family_id = family_id or uuid4()
+
+        await uow.refresh_tokens.create({
+            "token_hash": hash_refresh_token(refresh_token),
+            "family_id": family_id,
+            "user_id": user_id,
+            "expires_at": datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        })
 
-    async def refresh(self, payload: TokenPayloadSchema) -> TokenSchema:
-        return TokenSchema(token=encode_token({"sub": str(payload.sub)}))
+        return TokenSchema(
+            token=encode_token({
+                "sub": str(user_id),
+                "fam": str(family_id),
+                **await get_capability_claims(uow, user_id)
+            }),
+            refresh_token=refresh_token
+        )
@@ -0,0 +1,82 @@
+"""
+Подбор стоимости хеширования паролей под целевую задержку на текущей машине.
+
+Для каждой стоимости выбранного алгоритма измеряется медианное время хеширования
+одного пароля; предлагается наибольшая стоимость, укладывающаяся в цель.
+Пропускная способность входа на узел оценивается как
+количество процессов хеширования / время одного хеша.
+
+Запуск из каталога src:
+python -m auth.calibrate --scheme bcrypt --target-ms 250 --processes 8
+"""
+
+import argparse
+import statistics
+import time
+
+from .hashing import create_crypt_context
+
+
+# проверяемые стоимости: log2 числа итераций bcrypt и log2 N для scrypt
+COST_RANGES = {
+    "bcrypt": range(8, 17),
+    "scrypt": range(12, 21)
+}
+
+
+def measure_hash_time(scheme: str, cost: int, block_size: int, samples: int) -> float:
+    """Медианное время хеширования одного пароля в секундах"""
+
+    context = create_crypt_context(
+        scheme=scheme,
+        bcrypt_rounds=cost,
+        scrypt_rounds=cost,
+        scrypt_block_size=block_size
+    )
+    timings = []
+
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        context.hash("calibration-password")
+        timings.append(time.perf_counter() - started_at)
+
+    return statistics.median(timings)
+
+
+def main(args: argparse.Namespace) -> None:
+    suggested_cost = None
+
+    print(f"{"cost":>4} {"hash, ms":>10} {"logins/s":>10}")
+
+    for cost in COST_RANGES[args.scheme]:
+        hash_time = measure_hash_time(args.scheme, cost, args.block_size, args.samples)
+        print(f"{cost:>4} {hash_time * 1000:>10.1f} {args.processes / hash_time:>10.1f}")
+
+        if hash_time * 1000 > args.target_ms:
+            break
+
+        suggested_cost = cost
+
+    if suggested_cost is None:
+        print(f"\nno {args.scheme} cost fits into {args.target_ms} ms")
+        return
+
+    setting = "BCRYPT_ROUNDS" if args.scheme == "bcrypt" else "SCRYPT_ROUNDS"
+    print(f"\nPASSWORD_HASHING_SCHEME={args.scheme}")
+    print(f"PASSWORD_HASHING_{setting}={suggested_cost}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scheme", choices=COST_RANGES.keys(), default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--block-size", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="количество процессов хеширования на узле (воркеры * PASSWORD_HASHING_WORKERS)"
+    )
+
+    main(parser.parse_args())
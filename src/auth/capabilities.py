@@ -0,0 +1,123 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Tuple
+from uuid import UUID
+
+from core import logger, settings
+from interfaces import AbstractUnitOfWork
+from .schemas import TokenPayloadSchema
+
+
+class MembershipVersions:
+    """
+    Локальная (на каждый воркер) копия версий членства пользователей в группах.
+
+    Хранятся только версии, изменившиеся за время жизни токена: токен,
+    выпущенный до более раннего изменения, уже истек. Токен со списком групп
+    считается устаревшим, если его версия (claim mv) меньше известной версии
+    """
+
+    def __init__(self):
+        self.__versions: Dict[UUID, Tuple[int, float]] = {}
+        self.__synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self.__versions)
+
+    def set(self, user_id: UUID, version: int, changed_at: datetime) -> None:
+        current = self.__versions.get(user_id)
+
+        if current is None or current[0] < version:
+            self.__versions[user_id] = (version, changed_at.timestamp())
+
+    def is_current(self, user_id: UUID, version: int) -> bool:
+        current = self.__versions.get(user_id)
+        return current is None or current[0] <= version
+
+    def prune(self) -> None:
+        """Удаление версий, измененных раньше времени жизни токена"""
+
+        expired_at = time.time() - settings.TOKEN_EXPIRE_MINUTES * 60
+
+        for user_id in [
+            user_id for user_id, (_, changed_at) in self.__versions.items()
+            if changed_at < expired_at
+        ]:
+            del self.__versions[user_id]
+
+    async def sync(self, uow: AbstractUnitOfWork) -> None:
+        """Загрузка версий, изменившихся с момента предыдущей синхронизации"""
+
+        started_at = datetime.now(UTC)
+
+        if self.__synced_at is None:
+            since = started_at - timedelta(minutes=settings.TOKEN_EXPIRE_MINUTES)
+        else:
+            since = self.__synced_at - timedelta(
+                seconds=settings.TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS
+            )
+
+        async with uow:
+            versions = await uow.users.get_membership_versions_changed_since(since)
+
+        for user_id, version, changed_at in versions:
+            self.set(user_id, version, changed_at)
+
+        self.__synced_at = started_at
+        self.prune()
+
+    async def run_sync(self, uow_factory: Callable[[], AbstractUnitOfWork]) -> None:
+        """Бесконечный цикл синхронизации с БД (запускается задачей при старте воркера)"""
+
+        while True:
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS)
+
+            try:
+                await self.sync(uow_factory())
+            except Exception:
+                logger.exception("membership versions synchronization failed")
+
+
+membership_versions = MembershipVersions()
+
+
+async def get_capability_claims(
+        uow: AbstractUnitOfWork,
+        user_id: UUID
+) -> Dict[str, Any]:
+    """
+    Claims со списком групп пользователя (grp) и версией членства (mv).
+    Версия читается до списка групп: если пользователя исключат из группы
+    между двумя запросами, токен получит старую версию и будет считаться устаревшим.
+    Для пользователей в большом количестве групп claims не добавляются -
+    доступ проверяется запросом к БД
+    """
+
+    if not settings.CAPABILITY_TOKENS_ENABLED:
+        return {}
+
+    version = await uow.users.get_membership_version(user_id)
+    group_ids = await uow.groups.get_user_group_ids(
+        user_id,
+        limit=settings.CAPABILITY_TOKEN_MAX_GROUPS + 1
+    )
+
+    if version is None or len(group_ids) > settings.CAPABILITY_TOKEN_MAX_GROUPS:
+        return {}
+
+    return {"mv": version, "grp": [group_id.hex for group_id in group_ids]}
+
+
+def has_group_access(payload: TokenPayloadSchema, group_id: UUID) -> bool:
+    """
+    Проверка доступа к группе только по claims токена.
+    False не означает отказ: доступ нужно проверить запросом к БД
+    (группа могла появиться у пользователя после выпуска токена)
+    """
+
+    return (
+        payload.grp is not None
+        and group_id in payload.grp
+        and membership_versions.is_current(payload.sub, payload.mv)
+    )
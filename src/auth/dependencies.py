@@ -1,35 +1,36 @@
-from typing import Annotated
+import hmac
+import json
+from typing import Annotated, List
 
 import jwt
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import TypeAdapter, ValidationError
 
-from core import database_helper
+from core import database_helper, settings
 from infrastructure import (
     SQLAlchemyUnitOfWork,
     UsersRepository,
     TasksRepository,
-    GroupsRepository
+    GroupsRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
 )
 from interfaces import AbstractUnitOfWork
 from .auth_service import AuthService
-from .schemas import TokenPayloadSchema
-from .tokens import decode_token
+from .revocation import revocation_list
+from .schemas import TokenPayloadSchema, CredentialsSchema
+from .token_cache import token_cache, api_key_cache, get_token_digest, get_entry_size
+from .tokens import decode_token, hash_api_key
 
 
 http_bearer = HTTPBearer()
-
-
-def verify_token(
-        token: Annotated[HTTPAuthorizationCredentials, Depends(http_bearer)]
-) -> TokenPayloadSchema:
-    try:
-        return TokenPayloadSchema(**decode_token(token.credentials))
-    except jwt.exceptions.InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="invalid token"
-        )
+# схемы для эндпоинтов, принимающих jwt или API-ключ: отсутствие одного
+# из заголовков не ошибка, обе схемы попадают в OpenAPI
+optional_http_bearer = HTTPBearer(auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
 def get_unit_of_work() -> AbstractUnitOfWork:
@@ -37,7 +38,12 @@ def get_unit_of_work() -> AbstractUnitOfWork:
         database_helper.session_factory,
         UsersRepository,
         GroupsRepository,
-        TasksRepository
+        TasksRepository,
+        RevokedTokensRepository,
+        RefreshTokensRepository,
+        ApiKeysRepository,
+        read_session_factory_getter=database_helper.get_read_session_factory,
+        commit_hook=database_helper.record_commit_lsn
     )
 
 
@@ -45,3 +51,136 @@ def get_auth_service(
         uow: Annotated[AbstractUnitOfWork, Depends(get_unit_of_work)]
 ) -> AuthService:
     return AuthService(uow)
+
+
+def verify_token(
+        token: Annotated[HTTPAuthorizationCredentials, Depends(http_bearer)]
+) -> TokenPayloadSchema:
+    digest = get_token_digest(token.credentials)
+    payload = token_cache.get(digest)
+
+    if payload is None:
+        try:
+            payload = TokenPayloadSchema(**decode_token(token.credentials))
+        except jwt.exceptions.InvalidTokenError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="invalid token"
+            )
+
+        token_cache.set(
+            digest,
+            payload,
+            expires_at=payload.exp.timestamp(),
+            size=get_entry_size(digest, payload)
+        )
+
+    if payload.jti is not None and payload.jti in revocation_list:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="invalid token"
+        )
+
+    return payload
+
+
+async def verify_api_key(
+        api_key: str,
+        auth_service: AuthService
+) -> TokenPayloadSchema:
+    """
+    Проверка API-ключа: sha256 и поиск в кеше воркера,
+    при промахе - один запрос по уникальному индексу
+    """
+
+    key_hash = hash_api_key(api_key)
+    payload = api_key_cache.get(key_hash)
+
+    if payload is None:
+        payload = await auth_service.get_api_key_payload(key_hash)
+
+        if payload is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="invalid api key"
+            )
+
+        api_key_cache.set(
+            key_hash,
+            payload,
+            expires_at=payload.exp.timestamp(),
+            size=get_entry_size(key_hash, payload)
+        )
+
+    if payload.jti in revocation_list:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="invalid api key"
+        )
+
+    return payload
+
+
+async def verify_token_or_api_key(
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        token: Annotated[HTTPAuthorizationCredentials | None, Depends(optional_http_bearer)],
+        api_key: Annotated[str | None, Depends(api_key_header)]
+) -> TokenPayloadSchema:
+    """Аутентификация по jwt (Authorization: Bearer) или по API-ключу (X-API-Key)"""
+
+    if api_key is not None:
+        return await verify_api_key(api_key, auth_service)
+
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authenticated"
+        )
+
+    return verify_token(token)
+
+
+def verify_admin_token(
+        x_admin_token: Annotated[str | None, Header()] = None
+) -> None:
+    """Доступ к административным эндпоинтам по заголовку X-Admin-Token"""
+
+    if (
+        settings.ADMIN_API_TOKEN is None
+        or x_admin_token is None
+        or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode())
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="forbidden"
+        )
+
+
+credentials_list_adapter = TypeAdapter(List[CredentialsSchema])
+
+
+async def get_credentials_list(request: Request) -> List[CredentialsSchema]:
+    """
+    Тело запроса массовой регистрации: JSON-массив
+    или NDJSON (Content-Type: application/x-ndjson, по объекту на строку)
+    """
+
+    body = await request.body()
+
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            data = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            data = json.loads(body)
+
+        return credentials_list_adapter.validate_python(data)
+    except json.JSONDecodeError as error:
+        raise RequestValidationError([{
+            "type": "json_invalid",
+            "loc": ("body", error.pos),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": error.msg}
+        }])
+    except ValidationError as error:
+        raise RequestValidationError(error.errors(include_url=False))
@@ -11,3 +11,23 @@ class InvalidCredentialsError(AuthServiceError):
 class UsernameTakenError(AuthServiceError):
     """Ошибка, когда username уже занят"""
     pass
+
+
+class HashingPoolOverloadedError(AuthServiceError):
+    """Ошибка, когда очередь пула хеширования паролей переполнена"""
+    pass
+
+
+class InvalidRefreshTokenError(AuthServiceError):
+    """Ошибка, когда refresh-токен не найден, истек или уже был использован"""
+    pass
+
+
+class BulkRegistrationTooLargeError(AuthServiceError):
+    """Ошибка, когда в запросе массовой регистрации слишком много пользователей"""
+    pass
+
+
+class ApiKeyNotFoundError(AuthServiceError):
+    """Ошибка, когда API-ключ не найден"""
+    pass
@@ -1,7 +1,45 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Callable, Any, List
+
 from passlib.context import CryptContext
 
+from core import settings
+from .exceptions import HashingPoolOverloadedError
+
+
+def create_crypt_context(
+        scheme: str,
+        bcrypt_rounds: int,
+        scrypt_rounds: int,
+        scrypt_block_size: int
+) -> CryptContext:
+    """
+    Контекст passlib для хеширования паролей выбранным алгоритмом.
+    Хеши другого алгоритма или с меньшей стоимостью считаются устаревшими
+    (needs_update), но продолжают проверяться
+    """
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return CryptContext(
+        schemes=["bcrypt", "scrypt"],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        scrypt__rounds=scrypt_rounds,
+        scrypt__min_rounds=scrypt_rounds,
+        scrypt__block_size=scrypt_block_size
+    )
+
+
+pwd_context = create_crypt_context(
+    scheme=settings.PASSWORD_HASHING_SCHEME,
+    bcrypt_rounds=settings.PASSWORD_HASHING_BCRYPT_ROUNDS,
+    scrypt_rounds=settings.PASSWORD_HASHING_SCRYPT_ROUNDS,
+    scrypt_block_size=settings.PASSWORD_HASHING_SCRYPT_BLOCK_SIZE
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -10,3 +48,127 @@ def get_password_hash(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Хеширование пачки паролей за одну задачу пула"""
+
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хеш создан другим алгоритмом или с устаревшей стоимостью"""
+
+    return pwd_context.needs_update(hashed_password)
+
+
+def _warm_up() -> None:
+    """Загрузка бэкенда хеширования в процессе пула до прихода первых запросов"""
+
+    pwd_context.dummy_verify()
+
+
+class HashingPool:
+    """
+    Пул процессов для вычисления хешей паролей вне event loop воркера.
+
+    Одновременно в пуле может находиться не больше workers + queue_size задач;
+    при переполнении сразу поднимается HashingPoolOverloadedError,
+    чтобы запросы не копились в очереди
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+
+        self.__executor: ProcessPoolExecutor | None = None
+        self.__pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Количество задач, которые выполняются или ждут в очереди"""
+
+        return self.__pending
+
+    def start(self) -> None:
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def warm_up(self) -> None:
+        """Запуск всех процессов пула (вызывать при старте воркера)"""
+
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        await asyncio.gather(*[
+            loop.run_in_executor(self.__executor, _warm_up)
+            for _ in range(self.workers)
+        ])
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.__pending >= self.workers + self.queue_size:
+            raise HashingPoolOverloadedError("password hashing pool is overloaded")
+
+        self.start()
+        self.__pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, func, *args)
+        finally:
+            self.__pending -= 1
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASHING_WORKERS,
+    queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+# массовые операции выполняются в воркере по одной
+bulk_hashing_lock = asyncio.Lock()
+
+
+async def get_password_hashes_bulk(passwords: List[str]) -> List[str]:
+    """
+    Хеширование большого количества паролей во временном пуле процессов
+    на BULK_HASHING_WORKERS ядер; общий пул воркера не занимается,
+    чтобы не увеличивать задержку обычных входов и регистраций
+    """
+
+    if not passwords:
+        return []
+
+    chunk_size = settings.BULK_HASHING_CHUNK_SIZE
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+
+    async with bulk_hashing_lock:
+        pool = HashingPool(
+            workers=min(settings.BULK_HASHING_WORKERS, len(chunks)),
+            queue_size=len(chunks)
+        )
+
+        try:
+            hashes = await asyncio.gather(*[
+                pool.run(get_password_hashes, chunk) for chunk in chunks
+            ])
+        finally:
+            pool.shutdown()
+
+    return list(chain.from_iterable(hashes))
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Callable, Dict, List, Set
+
+from core import logger, settings
+from interfaces import AbstractUnitOfWork
+
+
+class RevocationList:
+    """
+    Локальная (на каждый воркер) копия списка отозванных токенов.
+
+    Проверка - один поиск jti во множестве. Дополнительно jti сгруппированы
+    по минуте истечения токена, чтобы истекшие удалялись целыми группами.
+    Список дополняется из БД инкрементально - по времени отзыва с запасом
+    на рассинхронизацию часов и долгие транзакции
+    """
+
+    def __init__(self):
+        self.__revoked: Set[str] = set()
+        self.__buckets: Dict[int, List[str]] = {}
+        self.__synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self.__revoked)
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self.__revoked
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        if jti in self.__revoked:
+            return
+
+        self.__revoked.add(jti)
+        self.__buckets.setdefault(int(expires_at.timestamp()) // 60, []).append(jti)
+
+    def prune(self) -> None:
+        """Удаление групп, все токены которых уже истекли"""
+
+        current_key = int(time.time()) // 60
+
+        for key in [key for key in self.__buckets if key < current_key]:
+            for jti in self.__buckets.pop(key):
+                self.__revoked.discard(jti)
+
+    async def sync(self, uow: AbstractUnitOfWork) -> None:
+        """Загрузка токенов, отозванных с момента предыдущей синхронизации"""
+
+        started_at = datetime.now(UTC)
+        since = None
+
+        if self.__synced_at is not None:
+            since = self.__synced_at - timedelta(
+                seconds=settings.TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS
+            )
+
+        async with uow:
+            revoked_tokens = await uow.revoked_tokens.get_revoked_since(since)
+
+        for jti, expires_at in revoked_tokens:
+            self.add(jti, expires_at)
+
+        self.__synced_at = started_at
+        self.prune()
+
+    async def run_sync(self, uow_factory: Callable[[], AbstractUnitOfWork]) -> None:
+        """
+        Бесконечный цикл синхронизации с БД (запускается задачей при старте воркера);
+        заодно периодически удаляет из БД истекшие отозванные и refresh-токены
+        """
+
+        pruned_at = time.monotonic()
+
+        while True:
+            await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS)
+
+            try:
+                await self.sync(uow_factory())
+
+                if time.monotonic() - pruned_at >= settings.TOKEN_REVOCATION_PRUNE_INTERVAL_SECONDS:
+                    async with uow_factory() as uow:
+                        await uow.revoked_tokens.delete_expired()
+                        await uow.refresh_tokens.delete_expired()
+                        await uow.commit()
+
+                    pruned_at = time.monotonic()
+            except Exception:
+                logger.exception("revoked tokens synchronization failed")
+
+
+revocation_list = RevocationList()
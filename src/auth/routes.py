@@ -1,11 +1,34 @@
-from typing import Annotated
+from typing import Annotated, List
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from core import settings
 from .auth_service import AuthService
-from .dependencies import verify_token, get_auth_service
-from .exceptions import UsernameTakenError, InvalidCredentialsError
-from .schemas import CredentialsSchema, TokenPayloadSchema, TokenSchema
+from .dependencies import (
+    verify_token,
+    verify_admin_token,
+    get_auth_service,
+    get_credentials_list
+)
+from .exceptions import (
+    UsernameTakenError,
+    InvalidCredentialsError,
+    InvalidRefreshTokenError,
+    HashingPoolOverloadedError,
+    BulkRegistrationTooLargeError,
+    ApiKeyNotFoundError
+)
+from .schemas import (
+    CredentialsSchema,
+    TokenPayloadSchema,
+    TokenSchema,
+    RefreshTokenSchema,
+    BulkRegistrationResultSchema,
+    ApiKeySchemaCreate,
+    ApiKeySchema,
+    ApiKeyCreatedSchema
+)
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -27,6 +50,31 @@ async def register(
             status_code=status.HTTP_409_CONFLICT,
             detail="username is already taken"
         )
+    except HashingPoolOverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="service is overloaded",
+            headers={"Retry-After": str(settings.PASSWORD_HASHING_RETRY_AFTER_SECONDS)}
+        )
+
+
+@router.post(
+    "/register/bulk",
+    response_model=BulkRegistrationResultSchema,
+    dependencies=[Depends(verify_admin_token)],
+    status_code=status.HTTP_200_OK
+)
+async def register_bulk(
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        credentials_list: Annotated[List[CredentialsSchema], Depends(get_credentials_list)]
+):
+    try:
+        return await auth_service.register_bulk(credentials_list)
+    except BulkRegistrationTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"no more than {settings.BULK_REGISTRATION_MAX_USERS} users per request"
+        )
 
 
 @router.post(
@@ -45,6 +93,12 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="invalid credentials"
         )
+    except HashingPoolOverloadedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="service is overloaded",
+            headers={"Retry-After": str(settings.PASSWORD_HASHING_RETRY_AFTER_SECONDS)}
+        )
 
 
 @router.post(
@@ -53,16 +107,67 @@ async def login(
     status_code=status.HTTP_200_OK
 )
 async def refresh(
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        data: RefreshTokenSchema
+):
+    try:
+        return await auth_service.refresh(data.refresh_token)
+    except InvalidRefreshTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="invalid refresh token"
+        )
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT
+)
+async def logout(
         payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
         auth_service: Annotated[AuthService, Depends(get_auth_service)]
 ):
-    return await auth_service.refresh(payload)
+    await auth_service.logout(payload)
 
 
 @router.post(
-    "/logout",
-    dependencies=[Depends(verify_token)],
+    "/api-keys",
+    response_model=ApiKeyCreatedSchema,
+    status_code=status.HTTP_201_CREATED
+)
+async def create_api_key(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        api_key_data: ApiKeySchemaCreate
+):
+    return await auth_service.create_api_key(payload.sub, api_key_data)
+
+
+@router.get(
+    "/api-keys",
+    response_model=List[ApiKeySchema],
+    status_code=status.HTTP_200_OK
+)
+async def get_api_keys(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        auth_service: Annotated[AuthService, Depends(get_auth_service)]
+):
+    return await auth_service.get_api_keys(payload.sub)
+
+
+@router.delete(
+    "/api-keys/{api_key_id}",
     status_code=status.HTTP_204_NO_CONTENT
 )
-async def logout():
-    return None
+async def delete_api_key(
+        payload: Annotated[TokenPayloadSchema, Depends(verify_token)],
+        auth_service: Annotated[AuthService, Depends(get_auth_service)],
+        api_key_id: UUID
+):
+    try:
+        await auth_service.delete_api_key(payload.sub, api_key_id)
+    except ApiKeyNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="api key not found"
+        )
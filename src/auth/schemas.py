@@ -1,7 +1,10 @@
 from datetime import datetime
+from typing import FrozenSet, List
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from schemas import UserPreviewSchema
 
 
 class CredentialsSchema(BaseModel):
@@ -14,12 +17,54 @@ class CredentialsSchema(BaseModel):
 class TokenPayloadSchema(BaseModel):
     """payload токена"""
 
+    # экземпляры переиспользуются кешем токенов между запросами
+    model_config = ConfigDict(frozen=True)
+
     sub: UUID
     iat: datetime
     exp: datetime
+    jti: str | None = None
+    # сессия (семейство refresh-токенов), в которой выпущен токен
+    fam: UUID | None = None
+    grp: FrozenSet[UUID] | None = None
+    mv: int | None = None
 
 
 class TokenSchema(BaseModel):
-    """jwt"""
+    """jwt и refresh-токен для его обновления"""
 
     token: str
+    refresh_token: str
+
+
+class RefreshTokenSchema(BaseModel):
+    """Данные для обновления токена"""
+
+    refresh_token: str
+
+
+class BulkRegistrationResultSchema(BaseModel):
+    """Результат массовой регистрации"""
+
+    created: List[UserPreviewSchema]
+    conflicts: List[str]
+
+
+class ApiKeySchemaCreate(BaseModel):
+    """Данные для создания API-ключа"""
+
+    name: str = Field(min_length=1, max_length=50)
+
+
+class ApiKeySchema(BaseModel):
+    """API-ключ (без самого ключа)"""
+
+    api_key_id: UUID
+    name: str
+    created_at: datetime
+
+
+class ApiKeyCreatedSchema(ApiKeySchema):
+    """Созданный API-ключ; сам ключ возвращается только один раз"""
+
+    api_key: str
@@ -0,0 +1,27 @@
+import hashlib
+import sys
+
+from core import ExpiringLRUCache, ENTRY_OVERHEAD_BYTES, settings
+from .schemas import TokenPayloadSchema
+
+
+token_cache = ExpiringLRUCache(max_bytes=settings.TOKEN_CACHE_MAX_BYTES)
+api_key_cache = ExpiringLRUCache(max_bytes=settings.API_KEY_CACHE_MAX_BYTES)
+
+
+def get_token_digest(token: str) -> bytes:
+    """Ключ кеша: сам токен в памяти не хранится"""
+
+    return hashlib.sha256(token.encode()).digest()
+
+
+def get_entry_size(digest: bytes | str, payload: TokenPayloadSchema) -> int:
+    """Приблизительный размер записи кеша в байтах"""
+
+    return (
+        ENTRY_OVERHEAD_BYTES
+        + sys.getsizeof(digest)
+        + sys.getsizeof(payload)
+        + sum(sys.getsizeof(value) for value in payload.__dict__.values())
+        + sum(sys.getsizeof(group_id) for group_id in payload.grp or ())
+    )
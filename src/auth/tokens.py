@@ -1,6 +1,9 @@
+import hashlib
+import secrets
 import warnings
 from datetime import datetime, timedelta, UTC
 from typing import Dict, Any
+from uuid import uuid4
 
 import jwt
 
@@ -16,6 +19,7 @@ def encode_token(payload: Dict[str, Any]) -> str:
                 stacklevel=2
             )
 
+    payload.setdefault("jti", uuid4().hex)
     payload.setdefault("iat", datetime.now(UTC))
     payload.setdefault(
         "exp",
@@ -35,3 +39,39 @@ def decode_token(token: str) -> dict:
         key=settings.TOKEN_SECRET_KEY,
         algorithms=[settings.ALGORITHM]
     )
+
+
+def generate_refresh_token() -> str:
+    """Непрозрачный refresh-токен (в БД хранится только его хеш)"""
+
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Хеш refresh-токена для хранения и поиска в БД;
+    токен случайный и длинный, поэтому медленный хеш (bcrypt) не нужен
+    """
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def generate_api_key() -> str:
+    """API-ключ для машинных клиентов (в БД хранится только его хеш)"""
+
+    return secrets.token_urlsafe(32)
+
+
+def hash_api_key(api_key: str) -> str:
+    """Хеш API-ключа для хранения и поиска в БД (как и у refresh-токена, достаточно sha256)"""
+
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def get_api_key_jti(key_hash: str) -> str:
+    """
+    jti payload, полученного по API-ключу: по нему удаленный ключ
+    попадает в список отозванных токенов и вытесняется из кешей воркеров
+    """
+
+    return key_hash[:32]
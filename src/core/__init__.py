@@ -1,4 +1,6 @@
+from .cache import ExpiringLRUCache, ENTRY_OVERHEAD_BYTES
 from .config import Settings, settings, BASE_DIR
 from .database import DatabaseHelper, database_helper
+from .read_your_writes import read_your_writes_middleware
 from .gunicorn_app import GunicornApplication, get_app_options
 from .logger import logger, get_logger
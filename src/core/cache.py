@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+
+# накладные расходы OrderedDict и кортежа записи на одну запись
+# (прибавляются к размеру ключа и значения при расчете размера записи)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class ExpiringLRUCache:
+    """
+    Потокобезопасный LRU-кеш с ограничением по занимаемой памяти.
+
+    У каждой записи свой момент истечения (unix time): просроченная запись
+    никогда не возвращается и удаляется при первом обращении к ней.
+    Размер записи передается вызывающим кодом; при превышении max_bytes
+    вытесняются самые давно использованные записи
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.__entries: OrderedDict[Hashable, Tuple[Any, float, int]] = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер всех записей в байтах"""
+
+        return self.__size
+
+    def get(self, key: Hashable) -> Any | None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+
+            if expires_at <= time.time():
+                self.__pop(key)
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float, size: int) -> None:
+        if size > self.max_bytes or expires_at <= time.time():
+            return
+
+        with self.__lock:
+            self.__pop(key)
+
+            self.__entries[key] = (value, expires_at, size)
+            self.__size += size
+
+            while self.__size > self.max_bytes:
+                oldest_key = next(iter(self.__entries))
+                self.__pop(oldest_key)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self.__lock:
+            self.__pop(key)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.__entries),
+            "size": self.__size,
+            "max_size": self.max_bytes
+        }
+
+    def __pop(self, key: Hashable) -> None:
+        """Удаление записи (вызывать только под блокировкой)"""
+
+        entry = self.__entries.pop(key, None)
+
+        if entry is not None:
+            self.__size -= entry[2]
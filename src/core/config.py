@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
+from typing import List, Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
@@ -16,9 +19,122 @@ class Settings(BaseSettings):
     ALGORITHM: str
     TOKEN_EXPIRE_MINUTES: float
     TOKEN_SECRET_KEY: str
+    # срок жизни refresh-токена (ротируется при каждом обновлении access-токена)
+    REFRESH_TOKEN_EXPIRE_DAYS: float = 30
+
+    # количество воркеров gunicorn
+    WORKERS: int = 4
+
+    # пул соединений с БД (отдельный на каждый воркер). По умолчанию
+    # DATABASE_MAX_CONNECTIONS делятся поровну между воркерами, из доли воркера
+    # DATABASE_MAX_OVERFLOW соединений открываются только на время пиковой нагрузки
+    DATABASE_MAX_CONNECTIONS: int = 80
+    DATABASE_POOL_SIZE: int | None = None
+    DATABASE_MAX_OVERFLOW: int = 4
+    DATABASE_POOL_TIMEOUT: float = 10
+    DATABASE_POOL_RECYCLE: int = 1800
+    # проверка соединения перед выдачей из пула: всегда, только после простоя
+    # дольше DATABASE_POOL_PRE_PING_IDLE_SECONDS или никогда
+    DATABASE_POOL_PRE_PING: Literal["always", "idle", "never"] = "always"
+    DATABASE_POOL_PRE_PING_IDLE_SECONDS: float = 30
+    # работа через PgBouncer в режиме pool_mode = transaction: без кеша подготовленных
+    # выражений и без pre-ping; DATABASE_PGBOUNCER_POOL = null - соединение
+    # с PgBouncer на каждую транзакцию, queue - небольшой локальный пул
+    DATABASE_PGBOUNCER_MODE: bool = False
+    DATABASE_PGBOUNCER_POOL: Literal["null", "queue"] = "queue"
+
+    # реплики для чтения (полные URL, пулы настраиваются так же, как у основной БД);
+    # реплика с отставанием больше DATABASE_REPLICA_MAX_LAG_SECONDS не используется
+    DATABASE_REPLICA_URLS: List[str] = []
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = 5
+    DATABASE_REPLICA_CHECK_INTERVAL_SECONDS: float = 1
+    # чтение своих записей: LSN последнего коммита клиента возвращается
+    # в заголовке и cookie X-Database-LSN, и чтение идет только с реплик, которые его догнали
+    READ_YOUR_WRITES_ENABLED: bool = False
+    READ_YOUR_WRITES_COOKIE_MAX_AGE_SECONDS: int = 60
+
+    # кеш проверенных токенов (отдельный на каждый воркер), 0 - отключен
+    TOKEN_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # кеш API-ключей (отдельный на каждый воркер); удаленный ключ перестает
+    # действовать в других воркерах после синхронизации списка отозванных токенов
+    API_KEY_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    API_KEY_CACHE_TTL_SECONDS: float = 60
+
+    # список групп пользователя в токене (claims grp и mv) для проверки доступа без БД;
+    # пользователи в большем количестве групп получают токены без списка
+    CAPABILITY_TOKENS_ENABLED: bool = False
+    CAPABILITY_TOKEN_MAX_GROUPS: int = 32
+
+    # синхронизация списка отозванных токенов и версий членства между воркерами
+    TOKEN_REVOCATION_SYNC_INTERVAL_SECONDS: float = 1
+    TOKEN_REVOCATION_SYNC_OVERLAP_SECONDS: float = 30
+    TOKEN_REVOCATION_PRUNE_INTERVAL_SECONDS: float = 300
+
+    # алгоритм и стоимость хеширования паролей (bcrypt или scrypt);
+    # хеши с устаревшими параметрами пересчитываются при входе
+    PASSWORD_HASHING_SCHEME: Literal["bcrypt", "scrypt"] = "bcrypt"
+    PASSWORD_HASHING_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASHING_SCRYPT_ROUNDS: int = 16
+    PASSWORD_HASHING_SCRYPT_BLOCK_SIZE: int = 8
+
+    # пул процессов для хеширования паролей (отдельный на каждый воркер)
+    PASSWORD_HASHING_WORKERS: int = 2
+    PASSWORD_HASHING_QUEUE_SIZE: int = 32
+    PASSWORD_HASHING_RETRY_AFTER_SECONDS: int = 1
+
+    # токен для административных эндпоинтов (X-Admin-Token), None - эндпоинты отключены
+    ADMIN_API_TOKEN: str | None = None
+
+    # массовая регистрация: хеширование во временном пуле процессов
+    # на все ядра и вставка пачками
+    BULK_REGISTRATION_MAX_USERS: int = 10000
+    BULK_HASHING_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    BULK_HASHING_CHUNK_SIZE: int = 16
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+
+    # массовые операции над задачами (/tasks/bulk): максимум задач в одном запросе
+    BULK_TASKS_MAX_ITEMS: int = 50000
+    # массовое добавление и удаление участников группы: максимум пользователей в запросе
+    BULK_GROUP_USERS_MAX_ITEMS: int = 10000
+    # пакетный запрос (POST /batch): максимум операций чтения в одном запросе
+    BATCH_MAX_OPERATIONS: int = 50
+    # получение задач и групп по списку id (GET /tasks?ids=..., GET /groups?ids=...)
+    MULTI_GET_MAX_IDS: int = 1000
+    # полнотекстовый поиск задач (GET /tasks/search): максимальная длина запроса
+    TASK_SEARCH_MAX_QUERY_LENGTH: int = 200
+    # если в группах поиска не больше задач, поиск перебирает их (до ~2 мкс на задачу),
+    # иначе идет по GIN-индексу (время зависит от частоты слов запроса во всей таблице)
+    TASK_SEARCH_SCAN_MAX_TASKS: int = 20000
+    # поиск пользователей по префиксу username (GET /users/search):
+    # число результатов по умолчанию и максимальное
+    USER_SEARCH_LIMIT: int = 10
+    USER_SEARCH_MAX_LIMIT: int = 50
+    # кеш результатов для коротких (самых частых) префиксов, отдельный на каждый воркер;
+    # переименованный пользователь находится по старому префиксу не дольше TTL
+    USER_SEARCH_CACHE_MAX_PREFIX_LENGTH: int = 3
+    USER_SEARCH_CACHE_TTL_SECONDS: float = 10
+    USER_SEARCH_CACHE_MAX_BYTES: int = 1024 * 1024
+    # сверка счетчиков групп (task_count, member_count, estimated_time_sum) с задачами
+    # и участниками (python -m services.group_counters): размер пачки групп на транзакцию
+    GROUP_COUNTERS_RECONCILE_BATCH_SIZE: int = 1000
+
+    # постраничная выдача списков (keyset): размер страницы по умолчанию и максимальный
+    PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+    # потоковая выдача списков целиком (Accept: application/x-ndjson):
+    # строки читаются серверным курсором пачками по STREAM_YIELD_PER
+    STREAM_YIELD_PER: int = 1000
 
     MODE: str = "dev"
 
+    @property
+    def database_pool_size(self) -> int:
+        if self.DATABASE_POOL_SIZE is not None:
+            return self.DATABASE_POOL_SIZE
+
+        return max(1, self.DATABASE_MAX_CONNECTIONS // self.WORKERS - self.DATABASE_MAX_OVERFLOW)
+
     @property
     def database_url(self):
         return f"postgresql+asyncpg://{self.DATABASE_USER}:{self.DATABASE_USER_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
@@ -1,30 +1,301 @@
-from typing import AsyncGenerator
+import asyncio
+import random
+import time
+from bisect import bisect_left
+from typing import AsyncGenerator, Any, Dict, List
+from uuid import uuid4
 
+from sqlalchemy import event, exc, text
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
+    AsyncEngine,
     AsyncSession
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from .config import settings
+from .logger import logger
+from .read_your_writes import lsn_tracker
 
 
-class DatabaseHelper:
+# границы корзин гистограммы времени получения соединения из пула (секунды)
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PoolMetrics:
+    """Счетчики получения соединений из пула"""
+
+    def __init__(self):
+        self.timeouts = 0
+        self.wait_time_count = 0
+        self.wait_time_sum = 0.0
+        self.wait_time_buckets = [0] * (len(WAIT_TIME_BUCKETS) + 1)
+
+    def observe_wait_time(self, seconds: float) -> None:
+        self.wait_time_count += 1
+        self.wait_time_sum += seconds
+        self.wait_time_buckets[bisect_left(WAIT_TIME_BUCKETS, seconds)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Гистограмма в формате Prometheus: накопленное количество для каждой границы"""
+
+        buckets = {}
+        count = 0
+
+        for bound, bucket_count in zip(WAIT_TIME_BUCKETS + ("+Inf",), self.wait_time_buckets):
+            count += bucket_count
+            buckets[str(bound)] = count
+
+        return {
+            "timeouts": self.timeouts,
+            "wait_time": {
+                "count": self.wait_time_count,
+                "sum": self.wait_time_sum,
+                "buckets": buckets
+            }
+        }
+
+
+class InstrumentedPoolMixin:
+    """
+    Пул соединений, который измеряет время получения соединения
+    (ожидание свободного соединения, подключение и pre-ping) и считает таймауты
+    """
+
+    def __init__(self, *args: Any, metrics: PoolMetrics | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        started_at = time.perf_counter()
+
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait_time(time.perf_counter() - started_at)
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(InstrumentedPoolMixin, NullPool):
+    pass
+
+
+def enable_idle_pre_ping(pool: AsyncAdaptedQueuePool, idle_seconds: float) -> None:
+    """
+    Проверка соединения перед выдачей только после простоя дольше idle_seconds:
+    активно используемые соединения выдаются без лишнего запроса к БД,
+    разорванное соединение пересоздается пулом (DisconnectionError)
+    """
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_in_at = connection_record.info.get("checked_in_at")
+
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+
+        try:
+            dbapi_connection.ping()
+        except Exception as error:
+            raise exc.DisconnectionError() from error
+
+
+def create_engine(database_url: str) -> AsyncEngine:
+    """Движок с пулом соединений по настройкам DATABASE_POOL_* и DATABASE_PGBOUNCER_*"""
+
+    if settings.DATABASE_PGBOUNCER_MODE and settings.DATABASE_PGBOUNCER_POOL == "null":
+        options = {"poolclass": InstrumentedNullPool}
+    else:
+        options = {
+            "poolclass": InstrumentedAsyncAdaptedQueuePool,
+            "pool_size": settings.database_pool_size,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+            "pool_recycle": settings.DATABASE_POOL_RECYCLE
+        }
+
+    if settings.DATABASE_PGBOUNCER_MODE:
+        # соседние транзакции могут выполняться на разных серверных соединениях:
+        # подготовленные выражения не кешируются, а их имена уникальны, чтобы
+        # не конфликтовать с выражениями других клиентов PgBouncer
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+        }
+    else:
+        options["pool_pre_ping"] = settings.DATABASE_POOL_PRE_PING == "always"
+
+    engine = create_async_engine(database_url, **options)
+
+    if not settings.DATABASE_PGBOUNCER_MODE and settings.DATABASE_POOL_PRE_PING == "idle":
+        enable_idle_pre_ping(engine.pool, settings.DATABASE_POOL_PRE_PING_IDLE_SECONDS)
+
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False
+    )
+
+
+def get_pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+    """Состояние пула соединений движка"""
+
+    pool = engine.pool
+
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"size": 0, **pool.metrics.stats()}
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        # до заполнения пула счетчик переполнения отрицательный
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        **pool.metrics.stats()
+    }
+
+
+# LSN в байтах: у реплики - воспроизведенная позиция, у обычной БД - текущая;
+# отставание - время с последней воспроизведенной транзакции, если реплика
+# получила еще не воспроизведенный журнал, иначе 0
+REPLICA_STATUS_QUERY = text("""
+    SELECT
+        pg_wal_lsn_diff(COALESCE(pg_last_wal_replay_lsn(), pg_current_wal_lsn()), '0/0')::bigint,
+        CASE
+            WHEN pg_last_wal_receive_lsn() IS DISTINCT FROM pg_last_wal_replay_lsn()
+            THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+            ELSE 0
+        END
+""")
+
+CURRENT_LSN_QUERY = text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')::bigint")
+
+
+class Replica:
+    """Реплика для чтения и ее последнее известное состояние"""
+
     def __init__(self, database_url: str):
-        self.engine = create_async_engine(
-            database_url,
-            pool_pre_ping=True
-        )
-        self.session_factory = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False
+        self.engine = create_engine(database_url)
+        self.session_factory = create_session_factory(self.engine)
+
+        # None - реплика еще не проверялась
+        self.available: bool | None = None
+        self.lag: float | None = None
+        self.replay_lsn = 0
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as connection:
+                replay_lsn, lag = (await connection.execute(REPLICA_STATUS_QUERY)).one()
+        except Exception:
+            if self.available is not False:
+                logger.warning("database replica %s is unavailable", self.engine.url.host)
+
+            self.available = False
+            return
+
+        self.available = True
+        self.lag = float(lag or 0)
+        self.replay_lsn = replay_lsn
+
+    def is_usable(self, min_lsn: int | None) -> bool:
+        return (
+            self.available
+            and self.lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+            and (min_lsn is None or self.replay_lsn >= min_lsn)
         )
 
+
+class DatabaseHelper:
+    def __init__(self, database_url: str, replica_urls: List[str] | None = None):
+        self.engine = create_engine(database_url)
+        self.session_factory = create_session_factory(self.engine)
+        self.replicas = [Replica(replica_url) for replica_url in replica_urls or []]
+
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    def get_read_session_factory(self) -> async_sessionmaker:
+        """
+        Фабрика сессий для чтения: случайная реплика с допустимым отставанием,
+        которая уже воспроизвела последний коммит клиента (read-your-writes);
+        если таких нет - основная БД
+        """
+
+        tracker = lsn_tracker.get()
+        min_lsn = tracker.lsn if tracker is not None else None
+        replicas = [replica for replica in self.replicas if replica.is_usable(min_lsn)]
+
+        if not replicas:
+            return self.session_factory
+
+        return random.choice(replicas).session_factory
+
+    async def record_commit_lsn(self, session: AsyncSession) -> None:
+        """
+        Запоминание LSN основной БД после коммита для чтения своих записей
+        (только внутри запроса и только при наличии реплик)
+        """
+
+        tracker = lsn_tracker.get()
+
+        if tracker is None or not self.replicas:
+            return
+
+        tracker.advance(await session.scalar(CURRENT_LSN_QUERY))
+
+    async def check_replicas(self) -> None:
+        await asyncio.gather(*[replica.check() for replica in self.replicas])
+
+    async def run_replica_checks(self) -> None:
+        """Периодическая проверка отставания реплик (запускать при старте воркера)"""
+
+        if not self.replicas:
+            return
+
+        while True:
+            await asyncio.sleep(settings.DATABASE_REPLICA_CHECK_INTERVAL_SECONDS)
+            await self.check_replicas()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Состояние пулов соединений воркера"""
+
+        return {
+            **get_pool_stats(self.engine),
+            "replicas": [
+                {
+                    "host": replica.engine.url.host,
+                    "available": replica.available,
+                    "lag": replica.lag,
+                    **get_pool_stats(replica.engine)
+                }
+                for replica in self.replicas
+            ]
+        }
+
 
-database_helper = DatabaseHelper(settings.database_url)
+database_helper = DatabaseHelper(settings.database_url, settings.DATABASE_REPLICA_URLS)
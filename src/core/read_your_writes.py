@@ -0,0 +1,70 @@
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from .config import settings
+
+
+LSN_HEADER = "X-Database-LSN"
+LSN_COOKIE = "database_lsn"
+
+
+class LsnTracker:
+    """
+    Позиция в журнале основной БД (LSN в байтах), которую должна догнать
+    реплика, чтобы клиент увидел свои записи
+    """
+
+    def __init__(self, lsn: int | None = None):
+        self.lsn = lsn
+        self.advanced = False
+
+    def advance(self, lsn: int) -> None:
+        if self.lsn is None or lsn > self.lsn:
+            self.lsn = lsn
+            self.advanced = True
+
+
+# трекер текущего запроса (None вне запроса или при выключенном чтении своих записей)
+lsn_tracker: ContextVar[LsnTracker | None] = ContextVar("lsn_tracker", default=None)
+
+
+def parse_lsn(value: str | None) -> int | None:
+    if value is None or not value.isdigit():
+        return None
+
+    return int(value)
+
+
+async def read_your_writes_middleware(
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    LSN из заголовка или cookie запроса ограничивает выбор реплик для чтения;
+    LSN коммитов запроса возвращается клиенту в заголовке и cookie
+    """
+
+    tracker = LsnTracker(
+        parse_lsn(request.headers.get(LSN_HEADER))
+        or parse_lsn(request.cookies.get(LSN_COOKIE))
+    )
+    token = lsn_tracker.set(tracker)
+
+    try:
+        response = await call_next(request)
+    finally:
+        lsn_tracker.reset(token)
+
+    if tracker.advanced:
+        response.headers[LSN_HEADER] = str(tracker.lsn)
+        response.set_cookie(
+            LSN_COOKIE,
+            str(tracker.lsn),
+            max_age=settings.READ_YOUR_WRITES_COOKIE_MAX_AGE_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+
+    return response
@@ -4,13 +4,19 @@ from .repositories import (
 )
 from .services import (
     ServiceError,
+    InvalidCursorError,
+    InvalidFieldsError,
+    BatchServiceError,
+    BatchTooLargeError,
     GroupsServiceError,
     GroupNotFoundError,
     UserGroupAttachError,
     UserGroupDetachError,
+    BulkGroupUsersTooLargeError,
     TasksServiceError,
     TaskNotFoundError,
     NonExistentGroupError,
+    BulkTasksTooLargeError,
     UsersServiceError,
     UserNotFoundError,
     UsernameTakenError
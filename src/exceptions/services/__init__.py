@@ -1,14 +1,17 @@
-from .base_exceptions import ServiceError
+from .base_exceptions import ServiceError, InvalidCursorError, InvalidFieldsError
+from .batch_service_exceptions import BatchServiceError, BatchTooLargeError
 from .groups_service_exceptions import (
     GroupsServiceError,
     GroupNotFoundError,
     UserGroupAttachError,
-    UserGroupDetachError
+    UserGroupDetachError,
+    BulkGroupUsersTooLargeError
 )
 from .tasks_service_exceptions import (
     TasksServiceError,
     TaskNotFoundError,
-    NonExistentGroupError
+    NonExistentGroupError,
+    BulkTasksTooLargeError
 )
 from .users_service_exceptions import (
     UsersServiceError,
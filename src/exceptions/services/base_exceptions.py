@@ -1,3 +1,13 @@
 class ServiceError(Exception):
     """Базовый класс для всех ошибок из слоя сервисов"""
     pass
+
+
+class InvalidCursorError(ServiceError):
+    """Курсор постраничной выдачи поврежден или создан не этим сервером"""
+    pass
+
+
+class InvalidFieldsError(ServiceError):
+    """В fields или include запрошены неизвестные поля"""
+    pass
@@ -0,0 +1,11 @@
+from .base_exceptions import ServiceError
+
+
+class BatchServiceError(ServiceError):
+    """Базовый класс для ошибок сервиса пакетных запросов"""
+    pass
+
+
+class BatchTooLargeError(BatchServiceError):
+    """Ошибка, когда в пакетном запросе слишком много операций"""
+    pass
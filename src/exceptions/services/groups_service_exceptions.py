@@ -19,3 +19,8 @@ class UserGroupAttachError(GroupsServiceError):
 class UserGroupDetachError(GroupsServiceError):
     """Ошибка удаления пользователя из группы"""
     pass
+
+
+class BulkGroupUsersTooLargeError(GroupsServiceError):
+    """Ошибка, когда в запросе массового изменения участников группы слишком много пользователей"""
+    pass
@@ -13,3 +13,8 @@ class TaskNotFoundError(TasksServiceError):
 class NonExistentGroupError(TasksServiceError):
     """Ошибка, когда задача создается в несущетсвующей группе"""
     pass
+
+
+class BulkTasksTooLargeError(TasksServiceError):
+    """Ошибка, когда в запросе массового создания слишком много задач"""
+    pass
@@ -2,5 +2,8 @@ from .sqlalchemy import (
     SQLAlchemyUnitOfWork,
     UsersRepository,
     TasksRepository,
-    GroupsRepository
+    GroupsRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
 )
@@ -1,2 +1,9 @@
-from .repositories import UsersRepository, GroupsRepository, TasksRepository
+from .repositories import (
+    UsersRepository,
+    GroupsRepository,
+    TasksRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
+)
 from .uow import SQLAlchemyUnitOfWork
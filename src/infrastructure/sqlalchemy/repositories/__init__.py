@@ -1,4 +1,7 @@
+from .api_keys_repository import ApiKeysRepository
 from .groups_repository import GroupsRepository
+from .refresh_tokens_repository import RefreshTokensRepository
+from .revoked_tokens_repository import RevokedTokensRepository
 from .sqlalchemy_repository import SQLAlchemyRepository
 from .tasks_repository import TasksRepository
 from .users_repository import UsersRepository
@@ -0,0 +1,50 @@
+from typing import Dict, Any, List
+from uuid import UUID
+
+from sqlalchemy import select, insert, delete
+
+from models import ApiKey
+from .sqlalchemy_repository import SQLAlchemyRepository
+
+
+class ApiKeysRepository(SQLAlchemyRepository):
+    """Реализация репозитория для работы с API-ключами"""
+
+    model = ApiKey
+
+    async def create(self, data: Dict[str, Any]) -> ApiKey:
+        """Создание ключа одним INSERT ... RETURNING (вместе с created_at)"""
+
+        api_key = await self.session.execute(
+            insert(ApiKey)
+            .values(**data)
+            .returning(ApiKey)
+        )
+        return api_key.scalar_one()
+
+    async def get_user_id_by_key_hash(self, key_hash: str) -> UUID | None:
+        """Поиск владельца ключа по хешу (уникальный индекс)"""
+
+        user_id = await self.session.execute(
+            select(ApiKey.user_id)
+            .where(ApiKey.key_hash == key_hash)
+        )
+        return user_id.scalar_one_or_none()
+
+    async def get_user_api_keys(self, user_id: UUID) -> List[ApiKey]:
+        api_keys = await self.session.execute(
+            select(ApiKey)
+            .where(ApiKey.user_id == user_id)
+            .order_by(ApiKey.created_at)
+        )
+        return list(api_keys.scalars())
+
+    async def delete_user_api_key(self, user_id: UUID, api_key_id: UUID) -> str | None:
+        """Удаление ключа пользователя, возвращает хеш удаленного ключа или None"""
+
+        key_hash = await self.session.execute(
+            delete(ApiKey)
+            .where(ApiKey.api_key_id == api_key_id, ApiKey.user_id == user_id)
+            .returning(ApiKey.key_hash)
+        )
+        return key_hash.scalar_one_or_none()
@@ -1,12 +1,101 @@
-from typing import Dict, Any, List
-from uuid import UUID
+from typing import Dict, Any, AsyncIterator, Iterable, List, Sequence, Set, Tuple
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload, load_only
+from sqlalchemy import (
+    JSON,
+    Row,
+    Select,
+    ScalarSelect,
+    select,
+    insert,
+    update,
+    delete,
+    and_,
+    func,
+    literal
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.orm import aliased, load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
 from exceptions import ResultNotFound
 from models import Group, UsersGroups, User, Task
-from .sqlalchemy_repository import SQLAlchemyRepository
+from .sqlalchemy_repository import SQLAlchemyRepository, in_array
+
+
+# счетчики группы, поддерживаемые триггерами
+_STATS_COLUMNS = (Group.task_count, Group.member_count, Group.estimated_time_sum)
+
+
+def _group_users_page(limit: int, after: UUID | None = None) -> ScalarSelect:
+    """
+    Страница участников группы (не более limit, по возрастанию user_id,
+    начиная после after) одним значением json в строке группы
+    """
+
+    page = (
+        select(User.user_id, User.username)
+        .join(UsersGroups, UsersGroups.user_id == User.user_id)
+        .where(UsersGroups.group_id == Group.group_id)
+        .order_by(UsersGroups.user_id)
+        .limit(limit)
+        .correlate(Group)
+    )
+
+    if after is not None:
+        page = page.where(UsersGroups.user_id > after)
+
+    page = page.subquery("users_page")
+
+    return select(func.json_agg(
+        aggregate_order_by(
+            func.json_build_object("user_id", page.c.user_id, "username", page.c.username),
+            page.c.user_id
+        ),
+        type_=JSON
+    )).scalar_subquery()
+
+
+def _group_tasks_page(limit: int, after: UUID | None = None) -> ScalarSelect:
+    """
+    Страница задач группы (не более limit, по возрастанию task_id,
+    начиная после after) одним значением json в строке группы
+    """
+
+    page = (
+        select(Task.task_id, Task.name)
+        .where(Task.group_id == Group.group_id)
+        .order_by(Task.task_id)
+        .limit(limit)
+        .correlate(Group)
+    )
+
+    if after is not None:
+        page = page.where(Task.task_id > after)
+
+    page = page.subquery("tasks_page")
+
+    return select(func.json_agg(
+        aggregate_order_by(
+            func.json_build_object("task_id", page.c.task_id, "name", page.c.name),
+            page.c.task_id
+        ),
+        type_=JSON
+    )).scalar_subquery()
+
+
+def _make_users(users: List[Dict[str, Any]] | None) -> List[User]:
+    return [
+        User(user_id=UUID(user["user_id"]), username=user["username"])
+        for user in users or []
+    ]
+
+
+def _make_tasks(tasks: List[Dict[str, Any]] | None) -> List[Task]:
+    return [
+        Task(task_id=UUID(task["task_id"]), name=task["name"])
+        for task in tasks or []
+    ]
 
 
 class GroupsRepository(SQLAlchemyRepository):
@@ -15,63 +104,304 @@ class GroupsRepository(SQLAlchemyRepository):
     model = Group
 
     async def create(self, data: Dict[str, Any]) -> Group:
-        group = Group(name=data["name"], description=data["description"])
-        self.session.add(group)
-        await self.session.flush()
+        """
+        Создание группы вместе с членством владельца одним запросом:
+        WITH new_group AS (INSERT ... RETURNING), owner AS (INSERT INTO users_groups ...)
+        """
 
-        relation = UsersGroups(group_id=group.group_id, user_id=data["user_id"])
-        self.session.add(relation)
+        new_group = (
+            insert(Group.__table__)
+            .values(group_id=uuid4(), name=data["name"], description=data["description"])
+            .returning(*self._get_returning_columns())
+            .cte("new_group")
+        )
+        owner = (
+            insert(UsersGroups.__table__)
+            .from_select(
+                ["group_id", "user_id"],
+                select(new_group.c.group_id, literal(data["user_id"], UsersGroups.user_id.type))
+            )
+            .cte("owner")
+        )
 
-        return group
+        group = await self.session.execute(select(new_group).add_cte(owner))
+        return self._from_row(group.one())
 
-    async def get_group_details(self, group_id: UUID) -> Group:
-        """Получение данных о группе + все relationship"""
+    @staticmethod
+    def _select_for_user(user_id: UUID, group_id: UUID, *columns: Any) -> Select:
+        """
+        Выборка группы вместе с проверкой доступа: join с users_groups
+        оставляет строку, только если пользователь состоит в группе
+        """
 
-        group = await self.session.execute(
-            select(Group)
+        member = aliased(UsersGroups)
+
+        return (
+            select(Group, *columns)
+            .join(member, and_(member.group_id == Group.group_id, member.user_id == user_id))
             .where(Group.group_id == group_id)
-            .options(
-                selectinload(Group.users).load_only(User.user_id, User.username),
-                selectinload(Group.tasks).load_only(Task.task_id, Task.name)
+        )
+
+    async def get_for_user(
+            self,
+            user_id: UUID,
+            group_id: UUID,
+            fields: Sequence[str] | None = None,
+            users_page: Tuple[int, UUID | None] | None = None,
+            tasks_page: Tuple[int, UUID | None] | None = None
+    ) -> Group | None:
+        """
+        Получение группы, если пользователь в ней состоит, иначе None.
+        Выбираются только колонки fields (по умолчанию все), а страницы участников
+        и задач (limit, after) - только если переданы, все одним запросом
+        """
+
+        pages = []
+
+        if users_page is not None:
+            pages.append(_group_users_page(*users_page))
+        if tasks_page is not None:
+            pages.append(_group_tasks_page(*tasks_page))
+
+        query = self._select_for_user(user_id, group_id, *pages)
+
+        if fields is not None:
+            query = query.options(
+                load_only(Group.group_id, *(getattr(Group, field) for field in fields))
             )
+
+        group = await self.session.execute(query)
+        row = group.one_or_none()
+
+        if row is None:
+            return None
+
+        group, *pages = row
+
+        if users_page is not None:
+            set_committed_value(group, "users", _make_users(pages.pop(0)))
+        if tasks_page is not None:
+            set_committed_value(group, "tasks", _make_tasks(pages.pop(0)))
+
+        return group
+
+    async def get_many_for_user(self, user_id: UUID, group_ids: List[UUID]) -> List[Group]:
+        """Получение тех групп из group_ids, в которых состоит пользователь (один запрос)"""
+
+        member = aliased(UsersGroups)
+
+        groups = await self.session.execute(
+            select(Group)
+            .join(member, and_(member.group_id == Group.group_id, member.user_id == user_id))
+            .where(in_array(Group.group_id, group_ids))
         )
-        return group.scalar_one_or_none()
+        return list(groups.scalars())
+
+    async def get_group_details(
+            self,
+            user_id: UUID,
+            group_id: UUID,
+            limit: int
+    ) -> Group | None:
+        """
+        Получение данных о группе + первые limit участников и задач
+        одним запросом (с проверкой доступа)
+        """
 
-    async def get_group_users(self, group_id: UUID) -> Group:
-        """Получение данных о группе + relationship с User"""
+        return await self.get_for_user(
+            user_id,
+            group_id,
+            users_page=(limit, None),
+            tasks_page=(limit, None)
+        )
+
+    async def get_group_users(
+            self,
+            user_id: UUID,
+            group_id: UUID,
+            limit: int,
+            after: UUID | None = None
+    ) -> Group | None:
+        """
+        Получение данных о группе + страница участников (не более limit,
+        с user_id больше after) одним запросом (с проверкой доступа)
+        """
+
+        return await self.get_for_user(user_id, group_id, users_page=(limit, after))
+
+    async def get_group_tasks(
+            self,
+            user_id: UUID,
+            group_id: UUID,
+            limit: int,
+            after: UUID | None = None
+    ) -> Group | None:
+        """
+        Получение данных о группе + страница задач (не более limit,
+        с task_id больше after) одним запросом (с проверкой доступа)
+        """
+
+        return await self.get_for_user(user_id, group_id, tasks_page=(limit, after))
+
+    async def update_for_user(
+            self,
+            user_id: UUID,
+            group_id: UUID,
+            data: Dict[str, Any]
+    ) -> Group | None:
+        """
+        Обновление группы, если пользователь в ней состоит
+        (UPDATE ... FROM users_groups ... RETURNING), иначе None
+        """
+
+        if not data:
+            return await self.get_for_user(user_id, group_id)
 
         group = await self.session.execute(
-            select(Group)
-            .options(selectinload(Group.users).load_only(User.user_id, User.username))
-            .where(Group.group_id == group_id)
+            update(Group.__table__)
+            .where(
+                Group.group_id == group_id,
+                UsersGroups.group_id == Group.group_id,
+                UsersGroups.user_id == user_id
+            )
+            .values(**data)
+            .returning(*self._get_returning_columns())
         )
-        return group.scalar_one_or_none()
+        return self._from_row(group.one_or_none())
 
-    async def get_group_tasks(self, group_id: UUID) -> Group:
-        """Получение данных о группе + relationship с Task"""
+    async def delete_for_user(self, user_id: UUID, group_id: UUID) -> Group | None:
+        """
+        Удаление группы, если пользователь в ней состоит
+        (DELETE ... USING users_groups ... RETURNING), иначе None
+        """
 
         group = await self.session.execute(
-            select(Group)
-            .options(selectinload(Group.tasks).load_only(Task.task_id, Task.name))
-            .where(Group.group_id == group_id)
+            delete(Group.__table__)
+            .where(
+                Group.group_id == group_id,
+                UsersGroups.group_id == Group.group_id,
+                UsersGroups.user_id == user_id
+            )
+            .returning(*self._get_returning_columns())
         )
-        return group.scalar_one_or_none()
+        return self._from_row(group.one_or_none())
 
-    async def get_user_groups_list(self, user_id: UUID) -> List[Group]:
+    async def get_user_groups_list(
+            self,
+            user_id: UUID,
+            limit: int,
+            after: UUID | None = None,
+            stats: bool = False
+    ) -> List[Group]:
         """
-        Получение только group_id и name для каждой группы,
-        которая связана с переданным user_id
+        Получение только group_id и name (и счетчиков, если stats) для групп,
+        связанных с переданным user_id (не более limit, по возрастанию group_id,
+        начиная после after)
         """
 
-        groups = await self.session.execute(
+        query = (
             select(Group)
-            .options(load_only(Group.group_id, Group.name))
+            .options(load_only(Group.group_id, Group.name, *(_STATS_COLUMNS if stats else ())))
             .join(UsersGroups)
-            .join(User)
-            .where(User.user_id == user_id)
+            .where(UsersGroups.user_id == user_id)
+            .order_by(UsersGroups.group_id)
+            .limit(limit)
         )
+
+        if after is not None:
+            query = query.where(UsersGroups.group_id > after)
+
+        groups = await self.session.execute(query)
         return list(groups.scalars())
 
+    def stream_group_users(self, group_id: UUID) -> AsyncIterator[Sequence[Row]]:
+        """Все участники группы (user_id, username) пачками по возрастанию user_id"""
+
+        return self._stream(
+            select(User.user_id, User.username)
+            .join(UsersGroups, UsersGroups.user_id == User.user_id)
+            .where(UsersGroups.group_id == group_id)
+            .order_by(UsersGroups.user_id)
+        )
+
+    def stream_group_tasks(self, group_id: UUID) -> AsyncIterator[Sequence[Row]]:
+        """Все задачи группы (task_id, name) пачками по возрастанию task_id"""
+
+        return self._stream(
+            select(Task.task_id, Task.name)
+            .where(Task.group_id == group_id)
+            .order_by(Task.task_id)
+        )
+
+    def stream_user_groups(
+            self,
+            user_id: UUID,
+            stats: bool = False
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Все группы пользователя (group_id, name и счетчики, если stats)
+        пачками по возрастанию group_id
+        """
+
+        return self._stream(
+            select(Group.group_id, Group.name, *(_STATS_COLUMNS if stats else ()))
+            .join(UsersGroups)
+            .where(UsersGroups.user_id == user_id)
+            .order_by(UsersGroups.group_id)
+        )
+
+    async def get_user_group_ids(self, user_id: UUID, limit: int) -> List[UUID]:
+        """Получение не более limit group_id групп пользователя"""
+
+        group_ids = await self.session.execute(
+            select(UsersGroups.group_id)
+            .where(UsersGroups.user_id == user_id)
+            .limit(limit)
+        )
+        return list(group_ids.scalars())
+
+    async def get_user_group_ids_among(
+            self,
+            user_id: UUID,
+            group_ids: Iterable[UUID],
+            existing_group_ids: Iterable[UUID] = ()
+    ) -> Set[UUID]:
+        """
+        Те group_id из переданных, в группах которых состоит пользователь,
+        и те из existing_group_ids, группы которых существуют (один запрос)
+        """
+
+        query = (
+            select(UsersGroups.group_id)
+            .where(UsersGroups.user_id == user_id, UsersGroups.group_id.in_(group_ids))
+        )
+
+        if existing_group_ids:
+            query = query.union(
+                select(Group.group_id).where(Group.group_id.in_(existing_group_ids))
+            )
+
+        group_ids = await self.session.execute(query)
+        return set(group_ids.scalars())
+
+    async def get_user_task_count(self, user_id: UUID, group_id: UUID | None = None) -> int:
+        """
+        Число задач во всех группах пользователя или только в группе group_id,
+        если он в ней состоит (по счетчикам групп)
+        """
+
+        query = (
+            select(func.coalesce(func.sum(Group.task_count), 0))
+            .join(UsersGroups, UsersGroups.group_id == Group.group_id)
+            .where(UsersGroups.user_id == user_id)
+        )
+
+        if group_id is not None:
+            query = query.where(UsersGroups.group_id == group_id)
+
+        task_count = await self.session.execute(query)
+        return task_count.scalar_one()
+
     async def get_group_id_if_user_in_group(
             self,
             user_id: UUID,
@@ -83,9 +413,8 @@ class GroupsRepository(SQLAlchemyRepository):
         """
 
         group_id = await self.session.execute(
-            select(Group.group_id)
-            .join(UsersGroups)
-            .where(UsersGroups.user_id == user_id, Group.group_id == group_id)
+            select(UsersGroups.group_id)
+            .where(UsersGroups.user_id == user_id, UsersGroups.group_id == group_id)
         )
         return group_id.scalar_one_or_none()
 
@@ -93,6 +422,71 @@ class GroupsRepository(SQLAlchemyRepository):
         relation = UsersGroups(group_id=group_id, user_id=user_id)
         self.session.add(relation)
 
+    async def bulk_add_users_to_group(
+            self,
+            group_id: UUID,
+            user_ids: List[UUID]
+    ) -> List[Tuple[UUID, bool]]:
+        """
+        Добавление пользователей в группу одним запросом:
+        WITH existing AS (SELECT ... FROM users WHERE user_id = ANY(...)),
+        added AS (INSERT ... SELECT ... FROM existing ON CONFLICT DO NOTHING RETURNING).
+        Возвращает (user_id, добавлен ли) для существующих пользователей;
+        False - пользователь уже состоял в группе
+        """
+
+        existing = (
+            select(User.user_id)
+            .where(in_array(User.user_id, user_ids))
+            .cte("existing")
+        )
+        added = (
+            pg_insert(UsersGroups.__table__)
+            .from_select(
+                ["group_id", "user_id"],
+                select(literal(group_id, UsersGroups.group_id.type), existing.c.user_id)
+            )
+            .on_conflict_do_nothing()
+            .returning(UsersGroups.user_id)
+            .cte("added")
+        )
+
+        users = await self.session.execute(
+            select(existing.c.user_id, added.c.user_id.is_not(None))
+            .outerjoin(added, added.c.user_id == existing.c.user_id)
+        )
+        return [tuple(user) for user in users]
+
+    async def bulk_remove_users_from_group(
+            self,
+            group_id: UUID,
+            user_ids: List[UUID]
+    ) -> List[Tuple[UUID, int]]:
+        """
+        Удаление пользователей из группы одним запросом вместе с увеличением
+        их версии членства: WITH removed AS (DELETE ... WHERE user_id = ANY(...)
+        RETURNING) UPDATE users ... FROM removed RETURNING.
+        Возвращает (user_id, новая версия членства) удаленных из группы
+        """
+
+        removed = (
+            delete(UsersGroups.__table__)
+            .where(UsersGroups.group_id == group_id, in_array(UsersGroups.user_id, user_ids))
+            .returning(UsersGroups.user_id)
+            .cte("removed")
+        )
+
+        users = await self.session.execute(
+            update(User.__table__)
+            .where(User.user_id == removed.c.user_id)
+            .values(
+                membership_version=User.membership_version + 1,
+                membership_changed_at=func.now()
+            )
+            .returning(User.user_id, User.membership_version)
+        )
+        return [tuple(user) for user in users]
+
     async def remove_user_from_group(self, group_id: UUID, user_id: UUID) -> None:
         relation = await self.session.get(UsersGroups, [group_id, user_id])
 
@@ -100,3 +494,62 @@ class GroupsRepository(SQLAlchemyRepository):
             raise ResultNotFound("relation not found")
 
         await self.session.delete(relation)
+
+    async def reconcile_counters(self, after: UUID | None, limit: int) -> Tuple[UUID | None, int]:
+        """
+        Пересчет счетчиков следующих limit групп после after (по возрастанию group_id)
+        и исправление разошедшихся. Группы пачки сначала блокируются отдельным запросом:
+        пересчет видит все зафиксированные изменения, а триггеры параллельных транзакций
+        ждут блокировки и применяют свои изменения уже к пересчитанным значениям.
+        Обновляются только разошедшиеся группы. Возвращает последний group_id пачки
+        (None, если групп больше нет) и количество исправленных групп
+        """
+
+        query = (
+            select(Group.group_id, *_STATS_COLUMNS)
+            .order_by(Group.group_id)
+            .limit(limit)
+            .with_for_update()
+        )
+
+        if after is not None:
+            query = query.where(Group.group_id > after)
+
+        stored = {
+            group_id: tuple(counters)
+            for group_id, *counters in await self.session.execute(query)
+        }
+
+        if not stored:
+            return None, 0
+
+        actual = await self.session.execute(
+            select(
+                Group.group_id,
+                select(func.count())
+                .where(Task.group_id == Group.group_id)
+                .scalar_subquery(),
+                select(func.count())
+                .where(UsersGroups.group_id == Group.group_id)
+                .scalar_subquery(),
+                select(func.coalesce(func.sum(Task.estimated_time), 0))
+                .where(Task.group_id == Group.group_id)
+                .scalar_subquery()
+            )
+            .where(in_array(Group.group_id, list(stored)))
+        )
+        drifted = [
+            {
+                "group_id": group_id,
+                "task_count": task_count,
+                "member_count": member_count,
+                "estimated_time_sum": estimated_time_sum
+            }
+            for group_id, task_count, member_count, estimated_time_sum in actual
+            if stored[group_id] != (task_count, member_count, estimated_time_sum)
+        ]
+
+        if drifted:
+            await self.session.execute(update(Group), drifted)
+
+        return list(stored)[-1], len(drifted)
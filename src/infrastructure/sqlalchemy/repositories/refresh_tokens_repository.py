@@ -0,0 +1,51 @@
+from typing import Tuple
+from uuid import UUID
+
+from sqlalchemy import update, delete, func
+
+from models import RefreshToken
+from .sqlalchemy_repository import SQLAlchemyRepository
+
+
+class RefreshTokensRepository(SQLAlchemyRepository):
+    """Реализация репозитория для работы с refresh-токенами"""
+
+    model = RefreshToken
+
+    async def use(self, token_hash: str) -> Tuple[UUID, UUID] | None:
+        """
+        Пометка действующего токена использованным (одним UPDATE по первичному ключу).
+        Возвращает user_id и family_id токена или None, если токен не найден,
+        истек или уже был использован
+        """
+
+        result = await self.session.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.used_at.is_(None),
+                RefreshToken.expires_at > func.now()
+            )
+            .values(used_at=func.now())
+            .returning(RefreshToken.user_id, RefreshToken.family_id)
+        )
+        row = result.one_or_none()
+
+        return None if row is None else tuple(row)
+
+    async def revoke_family(self, family_id: UUID) -> None:
+        """Удаление всех токенов, выпущенных в рамках одной сессии"""
+
+        await self.session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.family_id == family_id)
+        )
+
+    async def delete_expired(self) -> int:
+        """Удаление истекших токенов, возвращает их количество"""
+
+        result = await self.session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.expires_at <= func.now())
+        )
+        return result.rowcount
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+
+from models import RevokedToken
+from .sqlalchemy_repository import SQLAlchemyRepository
+
+
+class RevokedTokensRepository(SQLAlchemyRepository):
+    """Реализация репозитория для работы с отозванными токенами"""
+
+    model = RevokedToken
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        """Отзыв токена; повторный отзыв того же токена игнорируется"""
+
+        await self.session.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+
+    async def get_revoked_since(
+            self,
+            since: datetime | None
+    ) -> List[Tuple[str, datetime]]:
+        """
+        Получение jti и срока действия неистекших токенов,
+        отозванных начиная с since (всех, если since не передан)
+        """
+
+        query = (
+            select(RevokedToken.jti, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at > func.now())
+        )
+
+        if since is not None:
+            query = query.where(RevokedToken.revoked_at >= since)
+
+        revoked_tokens = await self.session.execute(query)
+        return [tuple(row) for row in revoked_tokens]
+
+    async def delete_expired(self) -> int:
+        """Удаление записей об истекших токенах, возвращает их количество"""
+
+        result = await self.session.execute(
+            delete(RevokedToken)
+            .where(RevokedToken.expires_at <= func.now())
+        )
+        return result.rowcount
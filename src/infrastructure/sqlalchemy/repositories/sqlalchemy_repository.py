@@ -1,21 +1,71 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Iterable, List, Sequence
 from uuid import UUID
 
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Row,
+    Select,
+    update,
+    delete,
+    inspect,
+    any_,
+    bindparam
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core import settings
 from exceptions import ResultNotFound
 from interfaces import AbstractRepository
 from models import Base
 
 
+def in_array(column: Any, values: List[Any]) -> ColumnElement[bool]:
+    """column = ANY(:values) с одним параметром-массивом вместо IN (...)"""
+
+    return column == any_(
+        bindparam(f"{column.key}_array", values, type_=ARRAY(column.type), unique=True)
+    )
+
+
 class SQLAlchemyRepository(AbstractRepository):
     """Реализация репозитория под SQLAlchemy"""
 
     model = None
 
+    # колонки, возвращаемые из INSERT/UPDATE/DELETE ... RETURNING (по умолчанию все)
+    returning_columns: Iterable[Column] | None = None
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    def _get_returning_columns(self) -> Iterable[Column]:
+        return self.returning_columns or self.model.__table__.c
+
+    def _from_row(self, row: Row | None) -> Base | None:
+        """
+        Сущность из строки RETURNING; объект не добавляется в identity map сессии
+        """
+
+        if row is None:
+            return None
+
+        return self.model(**row._mapping)
+
+    async def _stream(self, query: Select) -> AsyncIterator[Sequence[Row]]:
+        """
+        Строки запроса пачками по STREAM_YIELD_PER через серверный курсор:
+        следующая пачка читается из БД, только когда запрошена предыдущая
+        """
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=settings.STREAM_YIELD_PER)
+        )
+
+        async for partition in result.partitions():
+            yield partition
+
     async def create(self, data: Dict[str, Any]) -> Base:
         entity = self.model(**data)
         self.session.add(entity)
@@ -26,21 +76,33 @@ class SQLAlchemyRepository(AbstractRepository):
         return entity
 
     async def update(self, entity_id: UUID, data: Dict[str, Any]) -> Base:
-        entity = await self.session.get(self.model, entity_id)
+        """Обновление одним запросом UPDATE ... RETURNING"""
+
+        if not data:
+            entity = await self.get(entity_id)
+        else:
+            entity = self._from_row((await self.session.execute(
+                update(self.model.__table__)
+                .where(inspect(self.model).primary_key[0] == entity_id)
+                .values(**data)
+                .returning(*self._get_returning_columns())
+            )).one_or_none())
 
         if entity is None:
             raise ResultNotFound("result not found")
 
-        for key, value in data.items():
-            setattr(entity, key, value)
-
         return entity
 
     async def delete(self, entity_id: UUID) -> Base:
-        entity = await self.session.get(self.model, entity_id)
+        """Удаление одним запросом DELETE ... RETURNING"""
+
+        entity = self._from_row((await self.session.execute(
+            delete(self.model.__table__)
+            .where(inspect(self.model).primary_key[0] == entity_id)
+            .returning(*self._get_returning_columns())
+        )).one_or_none())
 
         if entity is None:
             raise ResultNotFound("result not found")
 
-        await self.session.delete(entity)
         return entity
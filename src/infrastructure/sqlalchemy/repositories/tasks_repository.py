@@ -1,15 +1,124 @@
-from uuid import UUID
+from datetime import date
+from typing import Dict, Any, List, Sequence, Tuple
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from asyncpg import IntegrityConstraintViolationError
+from sqlalchemy import Row, select, update, delete, func, literal, or_, and_, any_, true
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
-from models import Task, Group, UsersGroups
-from .sqlalchemy_repository import SQLAlchemyRepository
+from models import Task, UsersGroups, TASK_SEARCH_CONFIG
+from .sqlalchemy_repository import SQLAlchemyRepository, in_array
+
+
+BULK_CREATE_COLUMNS = (
+    "task_id",
+    "group_id",
+    "name",
+    "description",
+    "created_at",
+    "estimated_time"
+)
+
+# выделение совпадений в названии и описании (оба короткие, поэтому целиком)
+SEARCH_HIGHLIGHT_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
 
 
 class TasksRepository(SQLAlchemyRepository):
     """Реализация репозитория для работы с задачами"""
 
     model = Task
+    # все колонки, кроме генерируемого search_vector
+    returning_columns = (
+        Task.task_id,
+        Task.group_id,
+        Task.name,
+        Task.description,
+        Task.created_at,
+        Task.estimated_time
+    )
+
+    async def bulk_create(self, data: List[Dict[str, Any]]) -> List[UUID]:
+        """
+        Создание задач одним COPY на соединении сессии (в ее транзакции):
+        task_id генерируются заранее, поэтому возвращаются в порядке data
+        """
+
+        if not data:
+            return []
+
+        task_ids = [uuid4() for _ in data]
+        created_at = date.today()
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+
+        try:
+            await raw_connection.driver_connection.copy_records_to_table(
+                Task.__tablename__,
+                columns=BULK_CREATE_COLUMNS,
+                records=[
+                    (
+                        task_id,
+                        task["group_id"],
+                        task["name"],
+                        task["description"],
+                        created_at,
+                        task["estimated_time"]
+                    )
+                    for task_id, task in zip(task_ids, data)
+                ]
+            )
+        except IntegrityConstraintViolationError as error:
+            # COPY идет мимо SQLAlchemy, поэтому ошибка приводится к ее типу
+            raise IntegrityError(f"COPY {Task.__tablename__}", None, error) from error
+
+        return task_ids
+
+    async def lock_for_user(self, user_id: UUID, task_ids: List[UUID]) -> List[UUID]:
+        """
+        task_id из переданных, к задачам которых у пользователя есть доступ
+        (tasks JOIN users_groups WHERE task_id = ANY(...)). Строки задач блокируются
+        FOR UPDATE в порядке task_id, поэтому параллельные массовые операции
+        над пересекающимися задачами не взаимоблокируются
+        """
+
+        task_ids = await self.session.execute(
+            select(Task.task_id)
+            .join(UsersGroups, UsersGroups.group_id == Task.group_id)
+            .where(UsersGroups.user_id == user_id, in_array(Task.task_id, task_ids))
+            .order_by(Task.task_id)
+            .with_for_update(of=Task)
+        )
+        return list(task_ids.scalars())
+
+    async def bulk_update(self, task_ids: List[UUID], data: Dict[str, Any]) -> List[Task]:
+        """Обновление задач одним UPDATE ... WHERE task_id = ANY(...) RETURNING"""
+
+        if not data:
+            tasks = await self.session.execute(
+                select(*self._get_returning_columns()).where(in_array(Task.task_id, task_ids))
+            )
+        else:
+            tasks = await self.session.execute(
+                update(Task.__table__)
+                .where(in_array(Task.task_id, task_ids))
+                .values(**data)
+                .returning(*self._get_returning_columns())
+            )
+
+        return [self._from_row(task) for task in tasks]
+
+    async def bulk_delete(self, task_ids: List[UUID]) -> List[Task]:
+        """Удаление задач одним DELETE ... WHERE task_id = ANY(...) RETURNING"""
+
+        tasks = await self.session.execute(
+            delete(Task.__table__)
+            .where(in_array(Task.task_id, task_ids))
+            .returning(*self._get_returning_columns())
+        )
+        return [self._from_row(task) for task in tasks]
 
     async def get_task_id_if_user_in_group(
             self,
@@ -24,8 +133,180 @@ class TasksRepository(SQLAlchemyRepository):
 
         task_id = await self.session.execute(
             select(Task.task_id)
-            .join(Group)
-            .join(UsersGroups)
+            .join(UsersGroups, UsersGroups.group_id == Task.group_id)
             .where(UsersGroups.user_id == user_id, Task.task_id == task_id)
         )
         return task_id.scalar_one_or_none()
+
+    async def get_for_user(
+            self,
+            user_id: UUID,
+            task_id: UUID,
+            fields: Sequence[str] | None = None
+    ) -> Task | None:
+        """
+        Получение задачи, если пользователь состоит в её группе, иначе None
+        (только колонки fields, по умолчанию все)
+        """
+
+        query = (
+            select(Task)
+            .join(UsersGroups, UsersGroups.group_id == Task.group_id)
+            .where(UsersGroups.user_id == user_id, Task.task_id == task_id)
+        )
+
+        if fields is not None:
+            query = query.options(
+                load_only(Task.task_id, *(getattr(Task, field) for field in fields))
+            )
+
+        task = await self.session.execute(query)
+        return task.scalar_one_or_none()
+
+    async def get_many_for_user(self, user_id: UUID, task_ids: List[UUID]) -> List[Task]:
+        """Получение тех задач из task_ids, в группах которых состоит пользователь (один запрос)"""
+
+        tasks = await self.session.execute(
+            select(Task)
+            .join(UsersGroups, UsersGroups.group_id == Task.group_id)
+            .where(UsersGroups.user_id == user_id, in_array(Task.task_id, task_ids))
+        )
+        return list(tasks.scalars())
+
+    async def search_for_user(
+            self,
+            user_id: UUID,
+            query: str,
+            limit: int,
+            after: Tuple[float, UUID] | None = None,
+            group_id: UUID | None = None,
+            use_index: bool = True
+    ) -> List[Row]:
+        """
+        Полнотекстовый поиск (websearch_to_tsquery) по задачам групп пользователя
+        (только группы group_id, если передан): search_vector @@ запрос и членство
+        в группе в одном запросе. Строки по убыванию релевантности (ts_rank),
+        затем по task_id, не более limit, начиная после after (rank, task_id).
+        Выделение совпадений (ts_headline) считается только для строк страницы.
+        use_index=True - битмап GIN-индекса по запросу, отфильтрованный по группам;
+        use_index=False - перебор задач каждой группы по ix_tasks_group_id_task_id
+        (когда задач в группах немного, это дешевле битмапа частого слова по всей таблице)
+        """
+
+        ts_query = func.websearch_to_tsquery(literal(TASK_SEARCH_CONFIG, REGCONFIG), query)
+        membership = select(UsersGroups.group_id).where(UsersGroups.user_id == user_id)
+
+        if group_id is not None:
+            membership = membership.where(UsersGroups.group_id == group_id)
+
+        if use_index:
+            # план зависит от частоты слов запроса, которой нет в общем плане
+            # подготовленного выражения: план строится под запрос (до конца транзакции)
+            await self.session.execute(
+                select(func.set_config("plan_cache_mode", "force_custom_plan", True))
+            )
+
+            # группы пользователя - один массив (initplan): GIN-индекс сканируется
+            # один раз, а не в цикле по группам
+            visible = (
+                select(Task.__table__)
+                .where(Task.group_id == any_(func.array(membership.scalar_subquery())))
+                .subquery("visible")
+            )
+            tasks_from = visible
+        else:
+            # задачи одной группы (LATERAL): OFFSET 0 не дает развернуть подзапрос
+            # в соединение и перенести в него условие @@ (и GIN-индекс), так что
+            # каждая группа читается по ix_tasks_group_id_task_id (иначе при большом
+            # числе групп планировщик выбирает seq scan всей таблицы)
+            membership = membership.subquery("membership")
+            visible = (
+                select(Task.__table__)
+                .where(Task.group_id == membership.c.group_id)
+                .offset(0)
+                .lateral("visible")
+            )
+            tasks_from = membership.join(visible, true())
+
+        columns = [visible.c[column.key] for column in self.returning_columns]
+        rank = func.ts_rank(visible.c.search_vector, ts_query)
+
+        page = (
+            select(*columns, rank.label("rank"))
+            .select_from(tasks_from)
+            .where(visible.c.search_vector.bool_op("@@")(ts_query))
+            .order_by(rank.desc(), visible.c.task_id)
+            .limit(limit)
+        )
+
+        if after is not None:
+            after_rank, after_task_id = after
+            page = page.where(or_(
+                rank < after_rank,
+                and_(rank == after_rank, visible.c.task_id > after_task_id)
+            ))
+
+        page = page.subquery("page")
+
+        tasks = await self.session.execute(
+            select(
+                page,
+                func.ts_headline(
+                    literal(TASK_SEARCH_CONFIG, REGCONFIG),
+                    page.c.name,
+                    ts_query,
+                    SEARCH_HIGHLIGHT_OPTIONS
+                ).label("name_highlight"),
+                func.ts_headline(
+                    literal(TASK_SEARCH_CONFIG, REGCONFIG),
+                    page.c.description,
+                    ts_query,
+                    SEARCH_HIGHLIGHT_OPTIONS
+                ).label("description_highlight")
+            )
+            .order_by(page.c.rank.desc(), page.c.task_id)
+        )
+        return list(tasks)
+
+    async def update_for_user(
+            self,
+            user_id: UUID,
+            task_id: UUID,
+            data: Dict[str, Any]
+    ) -> Task | None:
+        """
+        Обновление задачи, если пользователь состоит в её группе
+        (UPDATE ... FROM users_groups ... RETURNING), иначе None
+        """
+
+        if not data:
+            return await self.get_for_user(user_id, task_id)
+
+        task = await self.session.execute(
+            update(Task.__table__)
+            .where(
+                Task.task_id == task_id,
+                UsersGroups.group_id == Task.group_id,
+                UsersGroups.user_id == user_id
+            )
+            .values(**data)
+            .returning(*self._get_returning_columns())
+        )
+        return self._from_row(task.one_or_none())
+
+    async def delete_for_user(self, user_id: UUID, task_id: UUID) -> Task | None:
+        """
+        Удаление задачи, если пользователь состоит в её группе
+        (DELETE ... USING users_groups ... RETURNING), иначе None
+        """
+
+        task = await self.session.execute(
+            delete(Task.__table__)
+            .where(
+                Task.task_id == task_id,
+                UsersGroups.group_id == Task.group_id,
+                UsersGroups.user_id == user_id
+            )
+            .returning(*self._get_returning_columns())
+        )
+        return self._from_row(task.one_or_none())
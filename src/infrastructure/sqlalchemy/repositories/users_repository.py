@@ -1,18 +1,70 @@
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, select, update, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import load_only
 
-from exceptions import ResultNotFound
+from core import settings
 from models import User
 from .sqlalchemy_repository import SQLAlchemyRepository
 
 
+# выражение индекса ix_users_username_prefix
+USERNAME_PREFIX_KEY = func.lower(User.username).collate("C")
+# наибольший символ Unicode: строки с префиксом p лежат в диапазоне [p, p + MAX_CHAR)
+MAX_CHAR = "\U0010ffff"
+
+
 class UsersRepository(SQLAlchemyRepository):
     """Реализация репозитория для работы с пользователями"""
 
     model = User
+    returning_columns = (User.user_id, User.username, User.created_at)
+
+    async def create(self, data: Dict[str, Any]) -> User:
+        """Создание пользователя; user_id доступен сразу после вызова"""
+
+        user = User(**data)
+        self.session.add(user)
+        await self.session.flush()
+
+        return user
+
+    async def bulk_create(self, data: List[Dict[str, Any]]) -> List[User]:
+        """
+        Создание пользователей пачками по BULK_INSERT_CHUNK_SIZE
+        (один INSERT ... ON CONFLICT DO NOTHING RETURNING на пачку).
+        Пользователи с уже занятым username пропускаются без ошибки;
+        возвращаются только созданные (user_id и username)
+        """
+
+        users = []
+        chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+
+        for i in range(0, len(data), chunk_size):
+            created_users = await self.session.execute(
+                insert(User)
+                .values(data[i:i + chunk_size])
+                .on_conflict_do_nothing(index_elements=[User.username])
+                .returning(User.user_id, User.username)
+            )
+            users.extend(
+                User(user_id=user_id, username=username)
+                for user_id, username in created_users
+            )
+
+        return users
+
+    async def get_existing_usernames(self, usernames: List[str]) -> Set[str]:
+        """Получение тех username из переданных, которые уже заняты"""
+
+        existing_usernames = await self.session.execute(
+            select(User.username)
+            .where(User.username.in_(usernames))
+        )
+        return set(existing_usernames.scalars())
 
     async def get(self, user_id: UUID) -> User | None:
         """Получение данных пользователя (кроме хеша пароля)"""
@@ -33,47 +85,75 @@ class UsersRepository(SQLAlchemyRepository):
         )
         return user.scalar_one_or_none()
 
-    async def update(self, user_id: UUID, data: Dict[str, Any]) -> User:
+    async def search_by_username_prefix(self, prefix: str, limit: int) -> List[Row]:
         """
-        Обновление данных пользователя;
-        Метод поднимет исключение ResultNotFound, если пользователь
-        с переданным user_id не будет существовать. Так было сделано для
-        сохранения совместимости с базовым классом SQLAlchemyRepository,
-        метод update которого поднимает исключение, если запись в БД не существует
+        Не более limit пользователей (user_id, username), чей username начинается
+        с prefix без учета регистра, по порядку username. Префикс задан диапазоном,
+        а не LIKE: LIKE с параметром не превращается в условие по индексу
+        в общем плане подготовленного выражения
         """
 
-        user = await self.session.get(
-            User,
-            user_id,
-            options=[load_only(User.user_id, User.username, User.created_at)]
+        users = await self.session.execute(
+            select(User.user_id, User.username)
+            .where(
+                USERNAME_PREFIX_KEY >= func.lower(prefix),
+                USERNAME_PREFIX_KEY < func.lower(prefix + MAX_CHAR)
+            )
+            .order_by(USERNAME_PREFIX_KEY)
+            .limit(limit)
         )
-
-        if user is None:
-            raise ResultNotFound("user not found")
-
-        for key, value in data.items():
-            setattr(user, key, value)
-
-        return user
-
-    async def delete(self, user_id: UUID) -> User:
+        return list(users)
+
+    async def update_password_hash(
+            self,
+            user_id: UUID,
+            old_hashed_password: str,
+            new_hashed_password: str
+    ) -> bool:
         """
-        Удаление пользователя;
-        Метод поднимет исключение ResultNotFound, если пользователь
-        с переданным user_id не будет существовать. Так было сделано для
-        сохранения совместимости с базовым классом SQLAlchemyRepository,
-        метод delete которого поднимает исключение, если запись в БД не существует
+        Замена хеша пароля, только если он не изменился с момента чтения
+        (чтобы не затереть смену пароля, произошедшую параллельно)
         """
 
-        user = await self.session.get(
-            User,
-            user_id,
-            options=[load_only(User.user_id, User.username, User.created_at)]
+        result = await self.session.execute(
+            update(User)
+            .where(
+                User.user_id == user_id,
+                User.hashed_password == old_hashed_password
+            )
+            .values(hashed_password=new_hashed_password)
+        )
+        return result.rowcount == 1
+
+    async def get_membership_version(self, user_id: UUID) -> int | None:
+        membership_version = await self.session.execute(
+            select(User.membership_version)
+            .where(User.user_id == user_id)
         )
+        return membership_version.scalar_one_or_none()
+
+    async def bump_membership_version(self, user_id: UUID) -> int | None:
+        """Увеличение версии членства в группах, возвращает новую версию"""
 
-        if user is None:
-            raise ResultNotFound("user not found")
+        membership_version = await self.session.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(
+                membership_version=User.membership_version + 1,
+                membership_changed_at=func.now()
+            )
+            .returning(User.membership_version)
+        )
+        return membership_version.scalar_one_or_none()
 
-        await self.session.delete(user)
+    async def get_membership_versions_changed_since(
+            self,
+            since: datetime
+    ) -> List[Tuple[UUID, int, datetime]]:
+        """user_id, версия и время изменения для пользователей, исключенных из групп начиная с since"""
 
-        return user
+        membership_versions = await self.session.execute(
+            select(User.user_id, User.membership_version, User.membership_changed_at)
+            .where(User.membership_changed_at >= since)
+        )
+        return [tuple(row) for row in membership_versions]
@@ -1,32 +1,75 @@
-from typing import Type
+from typing import Awaitable, Callable, Type
 
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 from interfaces import AbstractUnitOfWork
-from ..repositories import UsersRepository, GroupsRepository, TasksRepository
+from ..repositories import (
+    UsersRepository,
+    GroupsRepository,
+    TasksRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
+)
 
 
 class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
-    """Реализация Unit of Work для репозиториев, использующих SQLAlchemy"""
+    """
+    Реализация Unit of Work для репозиториев, использующих SQLAlchemy.
+
+    Сессия берет соединение из пула только на время транзакции и закрывается
+    при выходе из контекстного менеджера, поэтому между транзакциями на соединении
+    не остается состояния (это нужно для PgBouncer в режиме transaction)
+    """
 
     def __init__(
             self,
             session_factory: async_sessionmaker,
             users_repository_factory: Type[UsersRepository],
             groups_repository_factory: Type[GroupsRepository],
-            tasks_repository_factory: Type[TasksRepository]
+            tasks_repository_factory: Type[TasksRepository],
+            revoked_tokens_repository_factory: Type[RevokedTokensRepository],
+            refresh_tokens_repository_factory: Type[RefreshTokensRepository],
+            api_keys_repository_factory: Type[ApiKeysRepository],
+            read_session_factory_getter: Callable[[], async_sessionmaker] | None = None,
+            commit_hook: Callable[[AsyncSession], Awaitable[None]] | None = None
     ):
+        """
+        :param read_session_factory_getter: выбор фабрики сессий для read_only
+        (например, реплики); без него чтение идет через session_factory
+        :param commit_hook: вызывается после каждого коммита
+        (например, для запоминания LSN коммита)
+        """
+
         self.__session_factory = session_factory
         self.__users_repository_factory = users_repository_factory
         self.__groups_repository_factory = groups_repository_factory
         self.__tasks_repository_factory = tasks_repository_factory
+        self.__revoked_tokens_repository_factory = revoked_tokens_repository_factory
+        self.__refresh_tokens_repository_factory = refresh_tokens_repository_factory
+        self.__api_keys_repository_factory = api_keys_repository_factory
+        self.__read_session_factory_getter = read_session_factory_getter
+        self.__commit_hook = commit_hook
+        self.__read_only = False
+
+    def read_only(self) -> "SQLAlchemyUnitOfWork":
+        """Следующая сессия только для чтения (может быть открыта на реплике)"""
+
+        self.__read_only = True
+        return self
 
     async def __aenter__(self):
-        self.session = self.__session_factory()
+        if self.__read_only and self.__read_session_factory_getter is not None:
+            self.session = self.__read_session_factory_getter()()
+        else:
+            self.session = self.__session_factory()
 
         self.users = self.__users_repository_factory(self.session)
         self.groups = self.__groups_repository_factory(self.session)
         self.tasks = self.__tasks_repository_factory(self.session)
+        self.revoked_tokens = self.__revoked_tokens_repository_factory(self.session)
+        self.refresh_tokens = self.__refresh_tokens_repository_factory(self.session)
+        self.api_keys = self.__api_keys_repository_factory(self.session)
 
         return self
 
@@ -36,13 +79,20 @@ class SQLAlchemyUnitOfWork(AbstractUnitOfWork):
 
         await self.session.close()
         self.session = None
+        self.__read_only = False
 
         self.users = None
         self.groups = None
         self.tasks = None
+        self.revoked_tokens = None
+        self.refresh_tokens = None
+        self.api_keys = None
 
     async def commit(self) -> None:
         await self.session.commit()
 
+        if self.__commit_hook is not None and not self.__read_only:
+            await self.__commit_hook(self.session)
+
     async def rollback(self) -> None:
         await self.session.rollback()
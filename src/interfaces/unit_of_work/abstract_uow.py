@@ -5,6 +5,11 @@ from typing import Any
 class AbstractUnitOfWork(ABC):
     """Интерфейс Unit of Work"""
 
+    @abstractmethod
+    def read_only(self) -> "AbstractUnitOfWork":
+        """Перевод в режим только для чтения до выхода из контекстного менеджера"""
+        pass
+
     @abstractmethod
     async def __aenter__(self):
         pass
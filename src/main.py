@@ -1,12 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api import (
+    users_router,
+    groups_router,
+    tasks_router,
+    batch_router,
+    metrics_router,
+    get_unit_of_work
+)
+from auth import auth_router, hashing_pool, revocation_list, membership_versions
+from core import database_helper, read_your_writes_middleware, settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await hashing_pool.warm_up()
+    await database_helper.check_replicas()
+    await revocation_list.sync(get_unit_of_work())
+    await membership_versions.sync(get_unit_of_work())
+    sync_tasks = [
+        asyncio.create_task(revocation_list.run_sync(get_unit_of_work)),
+        asyncio.create_task(membership_versions.run_sync(get_unit_of_work)),
+        asyncio.create_task(database_helper.run_replica_checks())
+    ]
+
+    yield
+
+    for sync_task in sync_tasks:
+        sync_task.cancel()
+    hashing_pool.shutdown()
 
-from api import users_router, groups_router, tasks_router
-from auth import auth_router
 
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+if settings.READ_YOUR_WRITES_ENABLED:
+    app.add_middleware(BaseHTTPMiddleware, dispatch=read_your_writes_middleware)
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(groups_router)
 app.include_router(tasks_router)
+app.include_router(batch_router)
+app.include_router(metrics_router)
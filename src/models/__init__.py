@@ -1,5 +1,8 @@
+from .api_key import ApiKey
 from .base import Base
 from .group import Group
+from .refresh_token import RefreshToken
 from .relations import UsersGroups
-from .task import Task
+from .revoked_token import RevokedToken
+from .task import Task, TASK_SEARCH_CONFIG
 from .user import User
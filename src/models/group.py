@@ -2,7 +2,7 @@ from datetime import date
 from typing import List
 from uuid import uuid4
 
-from sqlalchemy import String, Date
+from sqlalchemy import String, Date, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -21,6 +21,12 @@ class Group(Base):
     description: Mapped[str] = mapped_column(String(200))
     created_at: Mapped[date] = mapped_column(Date, default=date.today)
 
+    # счетчики поддерживаются триггерами на tasks и users_groups в той же транзакции,
+    # что и изменение (см. миграцию group counters), и сверяются фоновой задачей
+    task_count: Mapped[int] = mapped_column(server_default="0")
+    member_count: Mapped[int] = mapped_column(server_default="0")
+    estimated_time_sum: Mapped[int] = mapped_column(BigInteger, server_default="0")
+
     users: Mapped[List["User"]] = relationship(
         back_populates="groups",
         secondary="users_groups",
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -7,6 +7,9 @@ from .base import Base
 
 class UsersGroups(Base):
     __tablename__ = "users_groups"
+    # первичный ключ (user_id, group_id) обслуживает группы пользователя,
+    # этот индекс - участников группы (включая постраничную выдачу по user_id)
+    __table_args__ = (Index("ix_users_groups_group_id_user_id", "group_id", "user_id"),)
 
     group_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
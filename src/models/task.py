@@ -1,15 +1,25 @@
 from datetime import date
 from uuid import uuid4
 
-from sqlalchemy import String, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
 
 
+# конфигурация полнотекстового поиска: русские слова и латиница (english_stem)
+TASK_SEARCH_CONFIG = "russian"
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # постраничная выдача задач группы по task_id и поиск по задачам небольших групп
+        Index("ix_tasks_group_id_task_id", "group_id", "task_id"),
+        # поиск по задачам, когда в группах поиска их много
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     task_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -24,6 +34,17 @@ class Task(Base):
     description: Mapped[str] = mapped_column(String(100))
     created_at: Mapped[date] = mapped_column(default=date.today)
     estimated_time: Mapped[int | None]
+    # полнотекстовый поиск: название (вес A) и описание (вес B);
+    # колонка генерируется БД и не загружается вместе с задачей
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}'::regconfig, name), 'A') || "
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}'::regconfig, description), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
 
     group: Mapped["Group"] = relationship(
         back_populates="tasks",
@@ -1,8 +1,8 @@
-from datetime import date
+from datetime import date, datetime
 from typing import List
 from uuid import uuid4
 
-from sqlalchemy import String, Date
+from sqlalchemy import String, Date, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -11,6 +11,11 @@ from .base import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # поиск по префиксу username без учета регистра: в побайтовом порядке "C"
+        # префикс - непрерывный диапазон индекса, который отдается уже по порядку
+        Index("ix_users_username_prefix", text('lower(username) COLLATE "C"')),
+    )
 
     user_id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -21,6 +26,14 @@ class User(Base):
     hashed_password: Mapped[str]
     created_at: Mapped[date] = mapped_column(Date, default=date.today)
 
+    # увеличивается при исключении пользователя из группы
+    # (делает устаревшими выданные ранее токены со списком групп)
+    membership_version: Mapped[int] = mapped_column(default=0, server_default="0")
+    membership_changed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        index=True
+    )
+
     groups: Mapped[List["Group"]] = relationship(
         back_populates="users",
         secondary="users_groups",
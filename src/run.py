@@ -1,4 +1,4 @@
-from core import GunicornApplication, get_app_options
+from core import GunicornApplication, get_app_options, settings
 from main import app as fastapi_app
 
 
@@ -8,7 +8,7 @@ def main():
         options=get_app_options(
             host="0.0.0.0",
             port=8000,
-            workers=4,
+            workers=settings.WORKERS,
             timeout=45
         )
     )
@@ -3,20 +3,44 @@ from .group import (
     GroupSchemaCreate,
     GroupSchemaUpdate,
     GroupItemsSchema,
+    GroupItemsStatsSchema,
+    GroupStatsSchema,
+    GroupPreviewStatsSchema,
     GroupUsersSchema,
     GroupTasksSchema,
     UserGroupSchemaAttach,
+    UsersGroupSchemaBulk,
+    UsersGroupAttachResultSchema,
+    UsersGroupDetachResultSchema,
     GroupPreviewListSchema,
+    GroupListSchema,
     GroupPreviewSchema
 )
 from .task import (
     TaskSchema,
     TaskPreviewSchema,
+    TaskListSchema,
+    TaskSearchResultSchema,
+    TaskSearchListSchema,
     TaskSchemaCreate,
-    TaskSchemaUpdate
+    TaskSchemaUpdate,
+    TaskBulkItemResultSchema,
+    TaskBulkResultSchema,
+    TaskBulkIdsSchema,
+    TaskBulkUpdateSchema,
+    TaskBulkMoveSchema,
+    TaskBulkChangeResultSchema
 )
 from .user import (
     UserSchema,
     UserPreviewSchema,
+    UserPreviewListSchema,
     UserSchemaUpdate
 )
+from .batch import (
+    BatchOperationSchema,
+    BatchSchema,
+    BatchOperationResultSchema,
+    BatchResultSchema
+)
+from .fields import get_fields_schema
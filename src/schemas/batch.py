@@ -0,0 +1,29 @@
+from typing import Any, List
+
+from pydantic import BaseModel, Field
+
+
+class BatchOperationSchema(BaseModel):
+    """Одна операция пакетного запроса: метод и путь с query-параметрами"""
+
+    method: str = "GET"
+    path: str = Field(max_length=2048)
+
+
+class BatchSchema(BaseModel):
+    """Тело пакетного запроса"""
+
+    operations: List[BatchOperationSchema] = Field(min_length=1)
+
+
+class BatchOperationResultSchema(BaseModel):
+    """Результат одной операции: HTTP-статус и тело ответа, как у отдельного запроса"""
+
+    status: int
+    body: Any
+
+
+class BatchResultSchema(BaseModel):
+    """Результаты операций пакетного запроса в порядке запроса"""
+
+    results: List[BatchOperationResultSchema]
@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Iterable, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+
+@lru_cache(maxsize=None)
+def _make_fields_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    if fields == tuple(schema.model_fields):
+        return schema
+
+    return create_model(
+        f"{schema.__name__}_{'_'.join(fields)}",
+        **{
+            field: (schema.model_fields[field].annotation, schema.model_fields[field])
+            for field in fields
+        }
+    )
+
+
+def get_fields_schema(schema: Type[BaseModel], fields: Iterable[str]) -> Type[BaseModel]:
+    """
+    Схема только с полями fields схемы schema (для ?fields= и ?include=).
+    Схема создается один раз на каждый набор полей, со всеми полями - сама schema
+    """
+
+    fields = set(fields)
+    return _make_fields_schema(
+        schema,
+        tuple(field for field in schema.model_fields if field in fields)
+    )
@@ -24,17 +24,55 @@ class GroupPreviewSchema(BaseModel):
     name: str
 
 
+class GroupStatsSchema(BaseModel):
+    """
+    Счетчики группы: задачи, участники и суммарное оценочное время задач
+    (хранятся в группе, чтение без COUNT(*) по задачам и участникам)
+    """
+
+    task_count: int
+    member_count: int
+    estimated_time_sum: int
+
+
+class GroupPreviewStatsSchema(GroupStatsSchema, GroupPreviewSchema):
+    """Схема данных группы задач для предпросмотра со счетчиками"""
+
+
 class GroupPreviewListSchema(BaseModel):
-    """Схема данных списка из групп задач"""
+    """Схема данных списка из групп задач (со счетчиками, если запрошены)"""
 
-    groups: List[GroupPreviewSchema]
+    groups: List[GroupPreviewStatsSchema | GroupPreviewSchema]
+    next_cursor: str | None = None
+
+
+class GroupListSchema(BaseModel):
+    """
+    Группы по списку group_id в порядке запроса и group_id, которые не найдены
+    среди групп пользователя (несуществующие и недоступные не различаются)
+    """
+
+    groups: List[GroupSchema]
+    not_found: List[UUID]
 
 
 class GroupItemsSchema(GroupSchema):
-    """Схема данных со всей информацией, связанной с группой"""
+    """
+    Схема данных со всей информацией, связанной с группой
+    (первые страницы участников и задач)
+    """
 
     users: List[UserPreviewSchema]
     tasks: List[TaskPreviewSchema]
+    users_next_cursor: str | None = None
+    tasks_next_cursor: str | None = None
+
+
+class GroupItemsStatsSchema(GroupStatsSchema, GroupItemsSchema):
+    """
+    Все поля, связи и счетчики группы; GET /groups/{group_id} возвращает
+    их подмножество по ?fields= и ?include=
+    """
 
 
 class GroupUsersSchema(GroupSchema):
@@ -44,6 +82,7 @@ class GroupUsersSchema(GroupSchema):
     """
 
     users: List[UserPreviewSchema]
+    users_next_cursor: str | None = None
 
 
 class GroupTasksSchema(GroupSchema):
@@ -53,6 +92,7 @@ class GroupTasksSchema(GroupSchema):
     """
 
     tasks: List[TaskPreviewSchema]
+    tasks_next_cursor: str | None = None
 
 
 class GroupSchemaCreate(BaseModel):
@@ -73,3 +113,27 @@ class UserGroupSchemaAttach(BaseModel):
     """Тело запроса на добавление участника в группу"""
 
     user_id: UUID
+
+
+class UsersGroupSchemaBulk(BaseModel):
+    """Тело запроса на массовое добавление или удаление участников группы"""
+
+    user_ids: List[UUID] = Field(min_length=1)
+
+
+class UsersGroupAttachResultSchema(BaseModel):
+    """
+    Результат массового добавления в группу: добавленные, уже состоявшие
+    в группе и несуществующие пользователи
+    """
+
+    added: List[UUID]
+    skipped: List[UUID]
+    missing: List[UUID]
+
+
+class UsersGroupDetachResultSchema(BaseModel):
+    """Результат массового удаления из группы: удаленные и не состоявшие в группе"""
+
+    removed: List[UUID]
+    missing: List[UUID]
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -22,6 +23,34 @@ class TaskPreviewSchema(BaseModel):
     name: str
 
 
+class TaskListSchema(BaseModel):
+    """
+    Задачи по списку task_id в порядке запроса и task_id, которые не найдены
+    среди задач групп пользователя (несуществующие и недоступные не различаются)
+    """
+
+    tasks: List[TaskSchema]
+    not_found: List[UUID]
+
+
+class TaskSearchResultSchema(TaskSchema):
+    """
+    Найденная задача: релевантность и название с описанием, в которых
+    совпавшие слова выделены <mark>...</mark>
+    """
+
+    rank: float
+    name_highlight: str
+    description_highlight: str
+
+
+class TaskSearchListSchema(BaseModel):
+    """Страница результатов поиска задач по убыванию релевантности"""
+
+    tasks: List[TaskSearchResultSchema]
+    next_cursor: str | None = None
+
+
 class TaskSchemaCreate(BaseModel):
     """Тело запроа на создание задачи"""
 
@@ -31,9 +60,50 @@ class TaskSchemaCreate(BaseModel):
     estimated_time: int | None = Field(ge=0, le=1000, default=None)
 
 
+class TaskBulkItemResultSchema(BaseModel):
+    """Результат создания одной задачи из массового запроса: task_id или ошибка"""
+
+    task_id: UUID | None = None
+    error: str | None = None
+
+
+class TaskBulkResultSchema(BaseModel):
+    """Результаты массового создания задач в порядке запроса"""
+
+    results: List[TaskBulkItemResultSchema]
+
+
 class TaskSchemaUpdate(BaseModel):
     """Тело запроса на обновление задачи"""
 
     name: str | None = Field(max_length=50, default=None)
     description: str | None = Field(max_length=100, default=None)
     estimated_time: int | None = Field(ge=0, le=1000, default=None)
+
+
+class TaskBulkIdsSchema(BaseModel):
+    """Тело запроса на массовое удаление задач"""
+
+    task_ids: List[UUID] = Field(min_length=1)
+
+
+class TaskBulkUpdateSchema(TaskBulkIdsSchema):
+    """Тело запроса на одинаковое обновление нескольких задач"""
+
+    data: TaskSchemaUpdate
+
+
+class TaskBulkMoveSchema(TaskBulkIdsSchema):
+    """Тело запроса на перенос нескольких задач в группу group_id"""
+
+    group_id: UUID
+
+
+class TaskBulkChangeResultSchema(BaseModel):
+    """
+    Результат массового изменения задач: измененные задачи (по возрастанию task_id)
+    и task_id, которые не найдены среди задач групп пользователя
+    """
+
+    tasks: List[TaskSchema]
+    not_found: List[UUID]
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -19,6 +20,12 @@ class UserPreviewSchema(BaseModel):
     username: str
 
 
+class UserPreviewListSchema(BaseModel):
+    """Схема списка пользователей (поиск по префиксу username)"""
+
+    users: List[UserPreviewSchema]
+
+
 class UserSchemaUpdate(BaseModel):
     """Тело запроса на обновление пользователя"""
 
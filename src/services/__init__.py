@@ -1,3 +1,4 @@
 from .groups_service import GroupsService
 from .tasks_service import TasksService
-from .users_service import UsersService
+from .users_service import UsersService, user_search_cache
+from .batch_service import BatchService
@@ -0,0 +1,236 @@
+import re
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+from urllib.parse import urlsplit, parse_qs
+from uuid import UUID
+
+from auth import TokenPayloadSchema
+from core import settings
+from exceptions import (
+    BatchTooLargeError,
+    GroupNotFoundError,
+    TaskNotFoundError,
+    UserNotFoundError,
+    InvalidCursorError,
+    InvalidFieldsError
+)
+from interfaces import AbstractUnitOfWork
+from schemas import (
+    BatchSchema,
+    BatchOperationSchema,
+    BatchOperationResultSchema,
+    BatchResultSchema,
+    GroupSchema,
+    TaskSchema
+)
+from .groups_service import GroupsService
+from .tasks_service import TasksService
+from .users_service import UsersService
+
+
+# операции пакетного запроса: шаблон пути, имя операции и ее query-параметры
+_OPERATIONS = (
+    (re.compile(r"/users/me"), "user", ()),
+    (re.compile(r"/users/me/groups"), "user_groups", ("limit", "cursor", "include")),
+    (
+        re.compile(r"/groups/(?P<group_id>[^/]+)"),
+        "group",
+        ("fields", "include", "limit", "users_cursor", "tasks_cursor")
+    ),
+    (re.compile(r"/groups/(?P<group_id>[^/]+)/details"), "group_details", ("limit",)),
+    (re.compile(r"/groups/(?P<group_id>[^/]+)/users"), "group_users", ("limit", "cursor")),
+    (re.compile(r"/groups/(?P<group_id>[^/]+)/tasks"), "group_tasks", ("limit", "cursor")),
+    (re.compile(r"/tasks/(?P<task_id>[^/]+)"), "task", ("fields",))
+)
+
+# ошибки сервисов -> статус и detail, как в ответах отдельных эндпоинтов
+_ERRORS = {
+    UserNotFoundError: (HTTPStatus.NOT_FOUND, "user not found"),
+    GroupNotFoundError: (HTTPStatus.NOT_FOUND, "group not found"),
+    TaskNotFoundError: (HTTPStatus.NOT_FOUND, "task not found"),
+    InvalidCursorError: (HTTPStatus.BAD_REQUEST, "invalid cursor"),
+    InvalidFieldsError: (HTTPStatus.BAD_REQUEST, "invalid fields")
+}
+
+
+class _Operation(NamedTuple):
+    name: str
+    params: Dict[str, Any]
+
+
+def _error(status: HTTPStatus, detail: str) -> BatchOperationResultSchema:
+    return BatchOperationResultSchema(status=status, body={"detail": detail})
+
+
+def _parse_operation(operation: BatchOperationSchema) -> _Operation | BatchOperationResultSchema:
+    """Операция по методу и пути или сразу ее результат-ошибка"""
+
+    if operation.method.upper() != "GET":
+        return _error(HTTPStatus.METHOD_NOT_ALLOWED, "method not allowed")
+
+    url = urlsplit(operation.path)
+
+    for pattern, name, query_params in _OPERATIONS:
+        match = pattern.fullmatch(url.path)
+
+        if match is None:
+            continue
+
+        query = {
+            key: values[-1]
+            for key, values in parse_qs(url.query, keep_blank_values=True).items()
+            if key in query_params
+        }
+
+        try:
+            params: Dict[str, Any] = {key: UUID(value) for key, value in match.groupdict().items()}
+
+            if "limit" in query:
+                params["limit"] = int(query["limit"])
+
+                if not 1 <= params["limit"] <= settings.MAX_PAGE_SIZE:
+                    raise ValueError("limit out of range")
+        except ValueError:
+            return _error(HTTPStatus.UNPROCESSABLE_ENTITY, "invalid parameters")
+
+        params.update({key: value for key, value in query.items() if key != "limit"})
+
+        return _Operation(name, params)
+
+    return _error(HTTPStatus.NOT_FOUND, "not found")
+
+
+class _SharedUnitOfWork(AbstractUnitOfWork):
+    """
+    Уже открытый unit of work для сервисов: они открывают и закрывают его как обычно,
+    но новая сессия не создается, и все операции пакета идут в одной транзакции
+    """
+
+    def __init__(self, uow: AbstractUnitOfWork):
+        self.__uow = uow
+
+    def read_only(self) -> "_SharedUnitOfWork":
+        return self
+
+    async def __aenter__(self):
+        return self.__uow
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def commit(self) -> None:
+        await self.__uow.commit()
+
+    async def rollback(self) -> None:
+        await self.__uow.rollback()
+
+
+class BatchService:
+    """Сервис пакетных запросов: несколько операций чтения за один запрос"""
+
+    def __init__(self, uow: AbstractUnitOfWork):
+        self.uow = uow
+
+    @staticmethod
+    async def _load(
+            get_many: Callable[[UUID, List[UUID]], Awaitable[List[Any]]],
+            payload: TokenPayloadSchema,
+            operations: List[_Operation | BatchOperationResultSchema],
+            name: str,
+            key: str
+    ) -> Dict[UUID, Any]:
+        """
+        Объекты всех операций name пакета без query-параметров одним запросом
+        (= ANY(...)) вместо запроса на каждую операцию; результат по ключу key
+        (только доступные пользователю)
+        """
+
+        ids = list(dict.fromkeys(
+            operation.params[key]
+            for operation in operations
+            if isinstance(operation, _Operation)
+            and operation.name == name
+            and operation.params.keys() == {key}
+        ))
+
+        if not ids:
+            return {}
+
+        return {getattr(item, key): item for item in await get_many(payload.sub, ids)}
+
+    @staticmethod
+    async def _execute(
+            uow: AbstractUnitOfWork,
+            payload: TokenPayloadSchema,
+            operation: _Operation,
+            groups: Dict[UUID, Any],
+            tasks: Dict[UUID, Any]
+    ) -> BatchOperationResultSchema:
+        """Выполнение операции методом сервиса (группы и задачи уже загружены)"""
+
+        params = operation.params
+
+        try:
+            if operation.name == "user":
+                body = await UsersService(uow).get_user(payload)
+            elif operation.name == "user_groups":
+                body = await GroupsService(uow).get_user_groups_list(payload, **params)
+            elif operation.name == "group_details":
+                body = await GroupsService(uow).get_group_details(payload, **params)
+            elif operation.name == "group_users":
+                body = await GroupsService(uow).get_group_users(payload, **params)
+            elif operation.name == "group_tasks":
+                body = await GroupsService(uow).get_group_tasks(payload, **params)
+            elif operation.name == "group" and len(params) > 1:
+                body = await GroupsService(uow).get_group(payload, **params)
+            elif operation.name == "task" and len(params) > 1:
+                body = await TasksService(uow).get_task(payload, **params)
+            elif operation.name == "group":
+                if params["group_id"] not in groups:
+                    raise GroupNotFoundError("group not found")
+
+                body = GroupSchema.model_validate(groups[params["group_id"]], from_attributes=True)
+            else:
+                if params["task_id"] not in tasks:
+                    raise TaskNotFoundError("task not found")
+
+                body = TaskSchema.model_validate(tasks[params["task_id"]], from_attributes=True)
+        except tuple(_ERRORS) as error:
+            return _error(*_ERRORS[type(error)])
+
+        return BatchOperationResultSchema(status=HTTPStatus.OK, body=body)
+
+    async def run_batch(
+            self,
+            payload: TokenPayloadSchema,
+            data: BatchSchema
+    ) -> BatchResultSchema:
+        """
+        Выполнение операций чтения пакета в одной сессии (одно соединение
+        и одна транзакция) по одному токену. Группы и задачи по id загружаются
+        одним запросом на тип, остальные операции выполняются методами сервисов.
+        Ошибка операции не прерывает пакет, а возвращается ее статусом
+        """
+
+        if len(data.operations) > settings.BATCH_MAX_OPERATIONS:
+            raise BatchTooLargeError("too many operations")
+
+        operations = [_parse_operation(operation) for operation in data.operations]
+        results = []
+
+        async with self.uow.read_only() as uow:
+            groups = await self._load(
+                uow.groups.get_many_for_user, payload, operations, "group", "group_id"
+            )
+            tasks = await self._load(
+                uow.tasks.get_many_for_user, payload, operations, "task", "task_id"
+            )
+            shared_uow = _SharedUnitOfWork(uow)
+
+            for operation in operations:
+                if isinstance(operation, _Operation):
+                    operation = await self._execute(shared_uow, payload, operation, groups, tasks)
+
+                results.append(operation)
+
+        return BatchResultSchema(results=results)
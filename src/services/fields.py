@@ -0,0 +1,20 @@
+from typing import Tuple
+
+from exceptions import InvalidFieldsError
+
+
+def parse_fields(value: str | None, allowed: Tuple[str, ...]) -> Tuple[str, ...] | None:
+    """
+    Список полей из query-параметра ("name,created_at") в порядке allowed;
+    None, если параметр не передан
+    """
+
+    if value is None:
+        return None
+
+    fields = {field.strip() for field in value.split(",")} - {""}
+
+    if not fields <= set(allowed):
+        raise InvalidFieldsError("invalid fields")
+
+    return tuple(field for field in allowed if field in fields)
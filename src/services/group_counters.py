@@ -0,0 +1,43 @@
+"""
+Сверка счетчиков групп (task_count, member_count, estimated_time_sum) с задачами
+и участниками: один проход по всем группам.
+
+Счетчики поддерживаются триггерами, сверка только исправляет расхождения
+после ручных правок БД, TRUNCATE и т.п. Запускается по расписанию (cron,
+docker compose run --rm group_counters) одним процессом, а не в каждом воркере:
+параллельные проходы пересчитывали и блокировали бы одни и те же группы.
+
+Запуск из каталога src:
+python -m services.group_counters --batch-size 1000
+"""
+
+import argparse
+import asyncio
+
+from core import database_helper, logger, settings
+from .groups_service import GroupsService
+
+
+async def main(args: argparse.Namespace) -> None:
+    # api импортирует services, поэтому фабрика unit of work берется только при запуске
+    from api import get_unit_of_work
+
+    try:
+        repaired = await GroupsService(get_unit_of_work()).reconcile_counters(args.batch_size)
+    finally:
+        await database_helper.engine.dispose()
+
+    if repaired:
+        logger.warning("group counters repaired: %d groups", repaired)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.GROUP_COUNTERS_RECONCILE_BATCH_SIZE,
+        help="количество групп, сверяемых в одной транзакции"
+    )
+
+    asyncio.run(main(parser.parse_args()))
@@ -1,26 +1,50 @@
+from datetime import datetime, UTC
+from typing import Any, AsyncIterator, Dict, List
 from uuid import UUID
 
+from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 
-from auth import TokenPayloadSchema
+from auth import TokenPayloadSchema, has_group_access, membership_versions
+from core import settings
 from exceptions import (
     GroupNotFoundError,
     UserGroupAttachError,
     UserGroupDetachError,
+    BulkGroupUsersTooLargeError,
     ResultNotFound
 )
 from interfaces import AbstractUnitOfWork
 from schemas import (
     GroupSchema,
     GroupItemsSchema,
+    GroupItemsStatsSchema,
+    GroupStatsSchema,
     GroupSchemaCreate,
     GroupSchemaUpdate,
     UserGroupSchemaAttach,
+    UsersGroupSchemaBulk,
+    UsersGroupAttachResultSchema,
+    UsersGroupDetachResultSchema,
     GroupPreviewListSchema,
+    GroupListSchema,
     GroupPreviewSchema,
+    GroupPreviewStatsSchema,
     GroupUsersSchema,
-    GroupTasksSchema
+    GroupTasksSchema,
+    UserPreviewSchema,
+    TaskPreviewSchema,
+    get_fields_schema
 )
+from .fields import parse_fields
+from .pagination import decode_cursor, get_page
+
+
+# поля группы, связи и счетчики, которые можно запросить через ?fields= и ?include=
+GROUP_FIELDS = tuple(GroupSchema.model_fields)
+GROUP_RELATIONS = ("users", "tasks")
+GROUP_STATS = tuple(GroupStatsSchema.model_fields)
+GROUP_INCLUDE = (*GROUP_RELATIONS, "stats")
 
 
 class GroupsService:
@@ -32,20 +56,24 @@ class GroupsService:
     @staticmethod
     async def _check_user_access_to_group(
             uow: AbstractUnitOfWork,
-            user_id: UUID,
+            payload: TokenPayloadSchema,
             group_id: UUID
     ) -> bool:
         """
-        Проверка присутствия пользователя с user_id в группе с group_id
+        Проверка присутствия пользователя в группе с group_id
+        (по claims токена, если возможно, иначе запросом к БД)
 
         :param uow: объект unit of work с открытой сессией
         (объект нужно открыть через асинхронный контекстный менеджер)
-        :param user_id: user_id проверяемого пользователя
+        :param payload: payload токена проверяемого пользователя
         :param group_id: group_id группы, к которой пользователь должен относиться
         :return: True/False в зависимости от результата проверки
         """
 
-        return bool(await uow.groups.get_group_id_if_user_in_group(user_id, group_id))
+        if has_group_access(payload, group_id):
+            return True
+
+        return bool(await uow.groups.get_group_id_if_user_in_group(payload.sub, group_id))
 
     async def create_group(
             self,
@@ -71,90 +99,259 @@ class GroupsService:
     ) -> GroupSchema:
         """Получение всей информации о группе"""
 
-        async with self.uow as uow:
-            if await self._check_user_access_to_group(uow, payload.sub, group_id):
-                group = await uow.groups.get(group_id)
-            else:
-                raise GroupNotFoundError("group not found")
+        async with self.uow.read_only() as uow:
+            group = await uow.groups.get_for_user(payload.sub, group_id)
 
         if group is None:
             raise GroupNotFoundError("group not found")
 
         return GroupSchema.model_validate(group, from_attributes=True)
 
+    async def get_group(
+            self,
+            payload: TokenPayloadSchema,
+            group_id: UUID,
+            fields: str | None = None,
+            include: str | None = None,
+            limit: int = settings.PAGE_SIZE,
+            users_cursor: str | None = None,
+            tasks_cursor: str | None = None
+    ) -> BaseModel:
+        """
+        Получение группы только с полями fields (по умолчанию все), страницами
+        связей и счетчиками include ("users,tasks,stats"). Незапрошенные колонки
+        и связи не читаются из БД и не сериализуются
+        """
+
+        fields = parse_fields(fields, GROUP_FIELDS)
+        include = parse_fields(include, GROUP_INCLUDE) or ()
+        stats = GROUP_STATS if "stats" in include else ()
+        users_after = decode_cursor(users_cursor)
+        tasks_after = decode_cursor(tasks_cursor)
+
+        async with self.uow.read_only() as uow:
+            group = await uow.groups.get_for_user(
+                payload.sub,
+                group_id,
+                None if fields is None else fields + stats,
+                users_page=(limit + 1, users_after) if "users" in include else None,
+                tasks_page=(limit + 1, tasks_after) if "tasks" in include else None
+            )
+
+        if group is None:
+            raise GroupNotFoundError("group not found")
+
+        data: Dict[str, Any] = {
+            field: getattr(group, field)
+            for field in (GROUP_FIELDS if fields is None else fields) + stats
+        }
+
+        if "users" in include:
+            data["users"], data["users_next_cursor"] = get_page(
+                group.users, limit, lambda user: user.user_id
+            )
+        if "tasks" in include:
+            data["tasks"], data["tasks_next_cursor"] = get_page(
+                group.tasks, limit, lambda task: task.task_id
+            )
+
+        schema = get_fields_schema(GroupItemsStatsSchema, data)
+        return schema.model_validate(data, from_attributes=True)
+
+    async def get_groups(
+            self,
+            payload: TokenPayloadSchema,
+            group_ids: List[UUID]
+    ) -> GroupListSchema:
+        """
+        Получение групп по списку group_id одним запросом с проверкой доступа.
+        Порядок групп - как в запросе, несуществующие и недоступные group_id
+        возвращаются вместе в not_found
+        """
+
+        group_ids = list(dict.fromkeys(group_ids))
+
+        async with self.uow.read_only() as uow:
+            groups = await uow.groups.get_many_for_user(payload.sub, group_ids)
+
+        groups = {group.group_id: group for group in groups}
+
+        return GroupListSchema.model_validate(
+            {
+                "groups": [groups[group_id] for group_id in group_ids if group_id in groups],
+                "not_found": [group_id for group_id in group_ids if group_id not in groups]
+            },
+            from_attributes=True
+        )
+
     async def get_group_details(
             self,
             paylaod: TokenPayloadSchema,
-            group_id: UUID
+            group_id: UUID,
+            limit: int = settings.PAGE_SIZE
     ) -> GroupItemsSchema:
         """
         Получение всей информации о группе,
-        включая данные о пользователях в этой группе и списке ее задач
+        включая первые страницы пользователей в этой группе и ее задач
         """
 
-        async with self.uow as uow:
-            if await self._check_user_access_to_group(uow, paylaod.sub, group_id):
-                group = await uow.groups.get_group_details(group_id)
-            else:
-                raise GroupNotFoundError("group not found")
+        async with self.uow.read_only() as uow:
+            group = await uow.groups.get_group_details(paylaod.sub, group_id, limit + 1)
 
         if group is None:
             raise GroupNotFoundError("group not found")
 
-        return GroupItemsSchema.model_validate(group, from_attributes=True)
+        users, users_next_cursor = get_page(group.users, limit, lambda user: user.user_id)
+        tasks, tasks_next_cursor = get_page(group.tasks, limit, lambda task: task.task_id)
+
+        return GroupItemsSchema.model_validate(
+            {
+                **GroupSchema.model_validate(group, from_attributes=True).model_dump(),
+                "users": users,
+                "tasks": tasks,
+                "users_next_cursor": users_next_cursor,
+                "tasks_next_cursor": tasks_next_cursor
+            },
+            from_attributes=True
+        )
 
     async def get_group_users(
             self,
             payload: TokenPayloadSchema,
-            group_id: UUID) -> GroupUsersSchema:
-        """Получение всей информации о группе, включая список ее пользователей"""
+            group_id: UUID,
+            limit: int = settings.PAGE_SIZE,
+            cursor: str | None = None
+    ) -> GroupUsersSchema:
+        """Получение всей информации о группе, включая страницу ее пользователей"""
 
-        async with self.uow as uow:
-            if await self._check_user_access_to_group(uow, payload.sub, group_id):
-                group = await uow.groups.get_group_users(group_id)
-            else:
-                raise GroupNotFoundError("group not found")
+        after = decode_cursor(cursor)
+
+        async with self.uow.read_only() as uow:
+            group = await uow.groups.get_group_users(payload.sub, group_id, limit + 1, after)
 
         if group is None:
             raise GroupNotFoundError("group not found")
 
-        return GroupUsersSchema.model_validate(group, from_attributes=True)
+        users, users_next_cursor = get_page(group.users, limit, lambda user: user.user_id)
+
+        return GroupUsersSchema.model_validate(
+            {
+                **GroupSchema.model_validate(group, from_attributes=True).model_dump(),
+                "users": users,
+                "users_next_cursor": users_next_cursor
+            },
+            from_attributes=True
+        )
 
     async def get_group_tasks(
             self,
             payload: TokenPayloadSchema,
-            group_id: UUID
+            group_id: UUID,
+            limit: int = settings.PAGE_SIZE,
+            cursor: str | None = None
     ) -> GroupTasksSchema:
-        """Получение всей информации о группе, включая связанные с ней задачи"""
+        """Получение всей информации о группе, включая страницу связанных с ней задач"""
 
-        async with self.uow as uow:
-            if await self._check_user_access_to_group(uow, payload.sub, group_id):
-                group = await uow.groups.get_group_tasks(group_id)
-            else:
-                raise GroupNotFoundError("group not found")
+        after = decode_cursor(cursor)
+
+        async with self.uow.read_only() as uow:
+            group = await uow.groups.get_group_tasks(payload.sub, group_id, limit + 1, after)
 
         if group is None:
             raise GroupNotFoundError("group not found")
 
-        return GroupTasksSchema.model_validate(group, from_attributes=True)
+        tasks, tasks_next_cursor = get_page(group.tasks, limit, lambda task: task.task_id)
+
+        return GroupTasksSchema.model_validate(
+            {
+                **GroupSchema.model_validate(group, from_attributes=True).model_dump(),
+                "tasks": tasks,
+                "tasks_next_cursor": tasks_next_cursor
+            },
+            from_attributes=True
+        )
 
     async def get_user_groups_list(
             self,
-            payload: TokenPayloadSchema
+            payload: TokenPayloadSchema,
+            limit: int = settings.PAGE_SIZE,
+            cursor: str | None = None,
+            include: str | None = None
     ) -> GroupPreviewListSchema:
         """
-        Получение списка из групп пользователя,
-        содержащего идентифицирующие данные о группе
+        Получение страницы списка из групп пользователя,
+        содержащего идентифицирующие данные о группе (и счетчики, если include=stats)
         """
 
-        async with self.uow as uow:
-            groups = await uow.groups.get_user_groups_list(payload.sub)
+        stats = "stats" in (parse_fields(include, ("stats",)) or ())
+        after = decode_cursor(cursor)
+
+        async with self.uow.read_only() as uow:
+            groups = await uow.groups.get_user_groups_list(payload.sub, limit + 1, after, stats)
+
+        groups, next_cursor = get_page(groups, limit, lambda group: group.group_id)
+        schema = GroupPreviewStatsSchema if stats else GroupPreviewSchema
 
         groups = [
-            GroupPreviewSchema.model_validate(group, from_attributes=True)
+            schema.model_validate(group, from_attributes=True)
             for group in groups
         ]
-        return GroupPreviewListSchema(groups=groups)
+        return GroupPreviewListSchema(groups=groups, next_cursor=next_cursor)
+
+    async def stream_group_users(
+            self,
+            payload: TokenPayloadSchema,
+            group_id: UUID
+    ) -> AsyncIterator[List[UserPreviewSchema]]:
+        """
+        Все пользователи группы пачками. Сессия (и соединение с БД) остается
+        открытой, пока поток не будет прочитан до конца или закрыт
+        """
+
+        async with self.uow.read_only() as uow:
+            if not await self._check_user_access_to_group(uow, payload, group_id):
+                raise GroupNotFoundError("group not found")
+
+            async for users in uow.groups.stream_group_users(group_id):
+                yield [UserPreviewSchema.model_validate(user, from_attributes=True) for user in users]
+
+    async def stream_group_tasks(
+            self,
+            payload: TokenPayloadSchema,
+            group_id: UUID
+    ) -> AsyncIterator[List[TaskPreviewSchema]]:
+        """
+        Все задачи группы пачками. Сессия (и соединение с БД) остается
+        открытой, пока поток не будет прочитан до конца или закрыт
+        """
+
+        async with self.uow.read_only() as uow:
+            if not await self._check_user_access_to_group(uow, payload, group_id):
+                raise GroupNotFoundError("group not found")
+
+            async for tasks in uow.groups.stream_group_tasks(group_id):
+                yield [TaskPreviewSchema.model_validate(task, from_attributes=True) for task in tasks]
+
+    async def stream_user_groups(
+            self,
+            payload: TokenPayloadSchema,
+            include: str | None = None
+    ) -> AsyncIterator[List[GroupPreviewSchema]]:
+        """
+        Все группы пользователя пачками (со счетчиками, если include=stats).
+        Сессия (и соединение с БД) остается открытой, пока поток
+        не будет прочитан до конца или закрыт
+        """
+
+        stats = "stats" in (parse_fields(include, ("stats",)) or ())
+        schema = GroupPreviewStatsSchema if stats else GroupPreviewSchema
+
+        async with self.uow.read_only() as uow:
+            async for groups in uow.groups.stream_user_groups(payload.sub, stats):
+                yield [
+                    schema.model_validate(group, from_attributes=True)
+                    for group in groups
+                ]
 
     async def update_group(
             self,
@@ -162,37 +359,34 @@ class GroupsService:
             group_id: UUID,
             data: GroupSchemaUpdate
     ) -> GroupSchema:
-        try:
-            async with self.uow as uow:
-                if await self._check_user_access_to_group(uow, paylaod.sub, group_id):
-                    group = await uow.groups.update(
-                        group_id,
-                        data.model_dump(exclude_none=True)
-                    )
-                    await uow.commit()
-                else:
-                    raise GroupNotFoundError("group not found")
+        async with self.uow as uow:
+            group = await uow.groups.update_for_user(
+                paylaod.sub,
+                group_id,
+                data.model_dump(exclude_none=True)
+            )
 
-            return GroupSchema.model_validate(group, from_attributes=True)
-        except ResultNotFound:
-            raise GroupNotFoundError("group not found")
+            if group is None:
+                raise GroupNotFoundError("group not found")
+
+            await uow.commit()
+
+        return GroupSchema.model_validate(group, from_attributes=True)
 
     async def delete_group(
             self,
             payload: TokenPayloadSchema,
             group_id: UUID
     ) -> GroupSchema:
-        try:
-            async with self.uow as uow:
-                if await self._check_user_access_to_group(uow, payload.sub, group_id):
-                    group = await uow.groups.delete(group_id)
-                    await uow.commit()
-                else:
-                    raise GroupNotFoundError("group not found")
+        async with self.uow as uow:
+            group = await uow.groups.delete_for_user(payload.sub, group_id)
 
-            return GroupSchema.model_validate(group, from_attributes=True)
-        except ResultNotFound:
-            raise GroupNotFoundError("group not found")
+            if group is None:
+                raise GroupNotFoundError("group not found")
+
+            await uow.commit()
+
+        return GroupSchema.model_validate(group, from_attributes=True)
 
     async def add_user_to_group(
             self,
@@ -202,7 +396,7 @@ class GroupsService:
     ) -> None:
         try:
             async with self.uow as uow:
-                if await self._check_user_access_to_group(uow, payload.sub, group_id):
+                if await self._check_user_access_to_group(uow, payload, group_id):
                     await uow.groups.add_user_to_group(group_id, data.user_id)
                     await uow.commit()
                 else:
@@ -218,10 +412,103 @@ class GroupsService:
     ) -> None:
         try:
             async with self.uow as uow:
-                if await self._check_user_access_to_group(uow, payload.sub, group_id):
+                if await self._check_user_access_to_group(uow, payload, group_id):
                     await uow.groups.remove_user_from_group(group_id, user_id)
+                    membership_version = await uow.users.bump_membership_version(user_id)
                     await uow.commit()
                 else:
                     raise UserGroupDetachError("cannot remove user from group")
         except ResultNotFound:
             raise UserGroupDetachError("cannot remove user from group")
+
+        membership_versions.set(user_id, membership_version, datetime.now(UTC))
+
+    async def add_users_to_group(
+            self,
+            payload: TokenPayloadSchema,
+            group_id: UUID,
+            data: UsersGroupSchemaBulk
+    ) -> UsersGroupAttachResultSchema:
+        """
+        Массовое добавление пользователей в группу одним запросом после проверки доступа;
+        уже состоящие в группе и несуществующие пользователи не прерывают добавление
+        """
+
+        if len(data.user_ids) > settings.BULK_GROUP_USERS_MAX_ITEMS:
+            raise BulkGroupUsersTooLargeError("too many users")
+
+        user_ids = list(dict.fromkeys(data.user_ids))
+
+        try:
+            async with self.uow as uow:
+                if not await self._check_user_access_to_group(uow, payload, group_id):
+                    raise UserGroupAttachError("cannot add users to group")
+
+                users = dict(await uow.groups.bulk_add_users_to_group(group_id, user_ids))
+                await uow.commit()
+        except IntegrityError:
+            raise UserGroupAttachError("cannot add users to group")
+
+        return UsersGroupAttachResultSchema(
+            added=[user_id for user_id in user_ids if users.get(user_id) is True],
+            skipped=[user_id for user_id in user_ids if users.get(user_id) is False],
+            missing=[user_id for user_id in user_ids if user_id not in users]
+        )
+
+    async def remove_users_from_group(
+            self,
+            payload: TokenPayloadSchema,
+            group_id: UUID,
+            data: UsersGroupSchemaBulk
+    ) -> UsersGroupDetachResultSchema:
+        """
+        Массовое удаление пользователей из группы одним запросом после проверки доступа;
+        версии членства удаленных увеличиваются в том же запросе
+        """
+
+        if len(data.user_ids) > settings.BULK_GROUP_USERS_MAX_ITEMS:
+            raise BulkGroupUsersTooLargeError("too many users")
+
+        user_ids = list(dict.fromkeys(data.user_ids))
+
+        async with self.uow as uow:
+            if not await self._check_user_access_to_group(uow, payload, group_id):
+                raise UserGroupDetachError("cannot remove users from group")
+
+            membership_versions_by_user = dict(
+                await uow.groups.bulk_remove_users_from_group(group_id, user_ids)
+            )
+            await uow.commit()
+
+        changed_at = datetime.now(UTC)
+
+        for user_id, membership_version in membership_versions_by_user.items():
+            membership_versions.set(user_id, membership_version, changed_at)
+
+        return UsersGroupDetachResultSchema(
+            removed=[user_id for user_id in user_ids if user_id in membership_versions_by_user],
+            missing=[user_id for user_id in user_ids if user_id not in membership_versions_by_user]
+        )
+
+    async def reconcile_counters(
+            self,
+            batch_size: int = settings.GROUP_COUNTERS_RECONCILE_BATCH_SIZE
+    ) -> int:
+        """
+        Сверка счетчиков всех групп с задачами и участниками пачками по batch_size
+        групп (каждая пачка в своей короткой транзакции).
+        Возвращает количество исправленных групп
+        """
+
+        after = None
+        repaired = 0
+
+        while True:
+            async with self.uow as uow:
+                after, batch_repaired = await uow.groups.reconcile_counters(after, batch_size)
+                await uow.commit()
+
+            if after is None:
+                return repaired
+
+            repaired += batch_repaired
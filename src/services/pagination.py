@@ -0,0 +1,63 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from binascii import Error as Base64Error
+from struct import pack, unpack, error as StructError
+from typing import Any, Callable, List, Tuple, TypeVar
+from uuid import UUID
+
+from exceptions import InvalidCursorError
+
+
+T = TypeVar("T")
+
+
+def encode_cursor(key: UUID) -> str:
+    """Непрозрачный курсор из ключа последней строки страницы"""
+
+    return urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str | None) -> UUID | None:
+    if cursor is None:
+        return None
+
+    try:
+        return UUID(bytes=urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (Base64Error, ValueError):
+        raise InvalidCursorError("invalid cursor")
+
+
+def encode_ranked_cursor(key: Tuple[float, UUID]) -> str:
+    """Курсор страницы, упорядоченной по убыванию релевантности, затем по id"""
+
+    rank, key_id = key
+    return urlsafe_b64encode(pack("!d", rank) + key_id.bytes).rstrip(b"=").decode()
+
+
+def decode_ranked_cursor(cursor: str | None) -> Tuple[float, UUID] | None:
+    if cursor is None:
+        return None
+
+    try:
+        data = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return unpack("!d", data[:8])[0], UUID(bytes=data[8:])
+    except (Base64Error, StructError, ValueError):
+        raise InvalidCursorError("invalid cursor")
+
+
+def get_page(
+        items: List[T],
+        limit: int,
+        key: Callable[[T], Any],
+        encode: Callable[[Any], str] = encode_cursor
+) -> Tuple[List[T], str | None]:
+    """
+    Страница из не более limit элементов и курсор следующей страницы.
+    Из репозитория запрашивается limit + 1 строка: лишняя строка
+    означает, что следующая страница существует
+    """
+
+    if len(items) <= limit:
+        return items, None
+
+    page = items[:limit]
+    return page, encode(key(page[-1]))
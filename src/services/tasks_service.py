@@ -1,11 +1,34 @@
+from typing import Iterable, List
 from uuid import UUID
 
+from pydantic import BaseModel
 from sqlalchemy.exc import IntegrityError
 
-from auth import TokenPayloadSchema
-from exceptions import NonExistentGroupError, TaskNotFoundError, ResultNotFound
+from auth import TokenPayloadSchema, has_group_access
+from core import settings
+from exceptions import NonExistentGroupError, TaskNotFoundError, BulkTasksTooLargeError
 from interfaces import AbstractUnitOfWork
-from schemas import TaskSchema, TaskSchemaCreate, TaskSchemaUpdate
+from models import Task
+from schemas import (
+    TaskSchema,
+    TaskListSchema,
+    TaskSearchResultSchema,
+    TaskSearchListSchema,
+    TaskSchemaCreate,
+    TaskSchemaUpdate,
+    TaskBulkResultSchema,
+    TaskBulkIdsSchema,
+    TaskBulkUpdateSchema,
+    TaskBulkMoveSchema,
+    TaskBulkChangeResultSchema,
+    get_fields_schema
+)
+from .fields import parse_fields
+from .pagination import decode_ranked_cursor, encode_ranked_cursor, get_page
+
+
+# поля задачи, которые можно запросить через ?fields=
+TASK_FIELDS = tuple(TaskSchema.model_fields)
 
 
 class TasksService:
@@ -13,25 +36,27 @@ class TasksService:
         self.uow = uow
 
     @staticmethod
-    async def _check_user_access_to_task(
-            uow: AbstractUnitOfWork,
-            user_id: UUID,
-            task_id: UUID
-    ) -> bool:
-        """
-        Проверка присутствия пользователя с user_id в группе,
-        к которой относится задача с task_id, с целью узнать, имеет лм право
-        данный пользователь на изменение задач в этой группе
-
-        :param uow: объект unit of work с открытой сессией
-        (объект нужно открыть через асинхронный контекстный менеджер)
-        :param user_id: user_id проверяемого пользователя
-        :param task_id: task_id задачи, которая должна относиться
-        к одной из групп из списка групп пользователя
-        :return: True/False в зависимости от результата проверки
-        """
+    def _check_bulk_size(items: List) -> None:
+        if len(items) > settings.BULK_TASKS_MAX_ITEMS:
+            raise BulkTasksTooLargeError("too many tasks")
+
+    @staticmethod
+    def _make_bulk_change_result(
+            task_ids: Iterable[UUID],
+            tasks: List[Task]
+    ) -> TaskBulkChangeResultSchema:
+        changed_task_ids = {task.task_id for task in tasks}
 
-        return bool(await uow.tasks.get_task_id_if_user_in_group(user_id, task_id))
+        return TaskBulkChangeResultSchema.model_validate(
+            {
+                "tasks": sorted(tasks, key=lambda task: task.task_id),
+                "not_found": [
+                    task_id for task_id in dict.fromkeys(task_ids)
+                    if task_id not in changed_task_ids
+                ]
+            },
+            from_attributes=True
+        )
 
     async def create_task(
             self,
@@ -40,7 +65,10 @@ class TasksService:
     ) -> TaskSchema:
         try:
             async with self.uow as uow:
-                if await uow.groups.get_group_id_if_user_in_group(payload.sub, data.group_id):
+                if (
+                    has_group_access(payload, data.group_id)
+                    or await uow.groups.get_group_id_if_user_in_group(payload.sub, data.group_id)
+                ):
                     task = await uow.tasks.create(data.model_dump())
                     await uow.commit()
                 else:
@@ -50,21 +78,136 @@ class TasksService:
         except IntegrityError:
             raise NonExistentGroupError("group does not exist")
 
+    async def create_tasks_bulk(
+            self,
+            payload: TokenPayloadSchema,
+            data: List[TaskSchemaCreate]
+    ) -> TaskBulkResultSchema:
+        """
+        Массовое создание задач (возможно, в разных группах) в одной транзакции.
+        Доступ ко всем группам проверяется одним запросом (группы из claims
+        токена - только на существование: группу могли удалить после выпуска
+        токена); задачи из групп без доступа не создаются и получают ошибку,
+        остальные создаются
+        """
+
+        self._check_bulk_size(data)
+
+        group_ids = {task.group_id for task in data}
+        claimed_group_ids = {
+            group_id for group_id in group_ids
+            if has_group_access(payload, group_id)
+        }
+
+        try:
+            async with self.uow as uow:
+                denied_group_ids = group_ids - await uow.groups.get_user_group_ids_among(
+                    payload.sub,
+                    group_ids - claimed_group_ids,
+                    claimed_group_ids
+                )
+
+                task_ids = await uow.tasks.bulk_create([
+                    task.model_dump() for task in data
+                    if task.group_id not in denied_group_ids
+                ])
+                await uow.commit()
+        except IntegrityError:
+            raise NonExistentGroupError("group does not exist")
+
+        task_ids = iter(task_ids)
+
+        return TaskBulkResultSchema.model_validate({"results": [
+            {"error": "group does not exist"}
+            if task.group_id in denied_group_ids
+            else {"task_id": next(task_ids)}
+            for task in data
+        ]})
+
     async def get_task(
             self,
             payload: TokenPayloadSchema,
-            task_id: UUID
-    ) -> TaskSchema:
-        async with self.uow as uow:
-            if await self._check_user_access_to_task(uow, payload.sub, task_id):
-                task = await uow.tasks.get(task_id)
-            else:
-                raise TaskNotFoundError("task not found")
+            task_id: UUID,
+            fields: str | None = None
+    ) -> BaseModel:
+        """Получение задачи только с полями fields (по умолчанию все)"""
+
+        fields = parse_fields(fields, TASK_FIELDS)
+
+        async with self.uow.read_only() as uow:
+            task = await uow.tasks.get_for_user(payload.sub, task_id, fields)
 
         if task is None:
             raise TaskNotFoundError("task not found")
 
-        return TaskSchema.model_validate(task, from_attributes=True)
+        schema = get_fields_schema(TaskSchema, TASK_FIELDS if fields is None else fields)
+        return schema.model_validate(task, from_attributes=True)
+
+    async def get_tasks(
+            self,
+            payload: TokenPayloadSchema,
+            task_ids: List[UUID]
+    ) -> TaskListSchema:
+        """
+        Получение задач по списку task_id одним запросом с проверкой доступа.
+        Порядок задач - как в запросе, несуществующие и недоступные task_id
+        возвращаются вместе в not_found
+        """
+
+        task_ids = list(dict.fromkeys(task_ids))
+
+        async with self.uow.read_only() as uow:
+            tasks = await uow.tasks.get_many_for_user(payload.sub, task_ids)
+
+        tasks = {task.task_id: task for task in tasks}
+
+        return TaskListSchema.model_validate(
+            {
+                "tasks": [tasks[task_id] for task_id in task_ids if task_id in tasks],
+                "not_found": [task_id for task_id in task_ids if task_id not in tasks]
+            },
+            from_attributes=True
+        )
+
+    async def search_tasks(
+            self,
+            payload: TokenPayloadSchema,
+            query: str,
+            limit: int = settings.PAGE_SIZE,
+            cursor: str | None = None,
+            group_id: UUID | None = None
+    ) -> TaskSearchListSchema:
+        """
+        Страница полнотекстового поиска по задачам групп пользователя
+        (или только группы group_id) по убыванию релевантности, с выделенными
+        совпадениями
+        """
+
+        after = decode_ranked_cursor(cursor)
+
+        async with self.uow.read_only() as uow:
+            task_count = await uow.groups.get_user_task_count(payload.sub, group_id)
+            tasks = await uow.tasks.search_for_user(
+                payload.sub,
+                query,
+                limit + 1,
+                after,
+                group_id,
+                use_index=task_count > settings.TASK_SEARCH_SCAN_MAX_TASKS
+            )
+
+        tasks, next_cursor = get_page(
+            tasks,
+            limit,
+            lambda task: (task.rank, task.task_id),
+            encode_ranked_cursor
+        )
+
+        tasks = [
+            TaskSearchResultSchema.model_validate(task, from_attributes=True)
+            for task in tasks
+        ]
+        return TaskSearchListSchema(tasks=tasks, next_cursor=next_cursor)
 
     async def update_task(
             self,
@@ -72,34 +215,104 @@ class TasksService:
             task_id: UUID,
             data: TaskSchemaUpdate
     ) -> TaskSchema:
-        try:
-            async with self.uow as uow:
-                if await self._check_user_access_to_task(uow, payload.sub, task_id):
-                    task = await uow.tasks.update(
-                        task_id,
-                        data.model_dump(exclude_none=True)
-                    )
-                    await uow.commit()
-                else:
-                    raise TaskNotFoundError("task not found")
+        async with self.uow as uow:
+            task = await uow.tasks.update_for_user(
+                payload.sub,
+                task_id,
+                data.model_dump(exclude_none=True)
+            )
 
-            return TaskSchema.model_validate(task, from_attributes=True)
-        except ResultNotFound:
-            raise TaskNotFoundError("task not found")
+            if task is None:
+                raise TaskNotFoundError("task not found")
+
+            await uow.commit()
+
+        return TaskSchema.model_validate(task, from_attributes=True)
 
     async def delete_task(
             self,
             payload: TokenPayloadSchema,
             task_id: UUID
     ) -> TaskSchema:
+        async with self.uow as uow:
+            task = await uow.tasks.delete_for_user(payload.sub, task_id)
+
+            if task is None:
+                raise TaskNotFoundError("task not found")
+
+            await uow.commit()
+
+        return TaskSchema.model_validate(task, from_attributes=True)
+
+    async def update_tasks_bulk(
+            self,
+            payload: TokenPayloadSchema,
+            data: TaskBulkUpdateSchema
+    ) -> TaskBulkChangeResultSchema:
+        """
+        Одинаковое обновление нескольких задач в одной транзакции;
+        задачи вне групп пользователя не изменяются и попадают в not_found
+        """
+
+        self._check_bulk_size(data.task_ids)
+
+        async with self.uow as uow:
+            task_ids = await uow.tasks.lock_for_user(payload.sub, data.task_ids)
+            tasks = await uow.tasks.bulk_update(
+                task_ids,
+                data.data.model_dump(exclude_none=True)
+            ) if task_ids else []
+            await uow.commit()
+
+        return self._make_bulk_change_result(data.task_ids, tasks)
+
+    async def delete_tasks_bulk(
+            self,
+            payload: TokenPayloadSchema,
+            data: TaskBulkIdsSchema
+    ) -> TaskBulkChangeResultSchema:
+        """
+        Удаление нескольких задач в одной транзакции;
+        задачи вне групп пользователя не удаляются и попадают в not_found
+        """
+
+        self._check_bulk_size(data.task_ids)
+
+        async with self.uow as uow:
+            task_ids = await uow.tasks.lock_for_user(payload.sub, data.task_ids)
+            tasks = await uow.tasks.bulk_delete(task_ids) if task_ids else []
+            await uow.commit()
+
+        return self._make_bulk_change_result(data.task_ids, tasks)
+
+    async def move_tasks_bulk(
+            self,
+            payload: TokenPayloadSchema,
+            data: TaskBulkMoveSchema
+    ) -> TaskBulkChangeResultSchema:
+        """
+        Перенос нескольких задач в группу group_id в одной транзакции (пользователь
+        должен состоять в ней); задачи вне групп пользователя не переносятся
+        и попадают в not_found
+        """
+
+        self._check_bulk_size(data.task_ids)
+
         try:
             async with self.uow as uow:
-                if await self._check_user_access_to_task(uow, payload.sub, task_id):
-                    task = await uow.tasks.delete(task_id)
-                    await uow.commit()
-                else:
-                    raise TaskNotFoundError("task not found")
+                if not (
+                    has_group_access(payload, data.group_id)
+                    or await uow.groups.get_group_id_if_user_in_group(payload.sub, data.group_id)
+                ):
+                    raise NonExistentGroupError("group does not exist")
 
-            return TaskSchema.model_validate(task, from_attributes=True)
-        except ResultNotFound:
-            raise TaskNotFoundError("task not found")
+                task_ids = await uow.tasks.lock_for_user(payload.sub, data.task_ids)
+                tasks = await uow.tasks.bulk_update(
+                    task_ids,
+                    {"group_id": data.group_id}
+                ) if task_ids else []
+                await uow.commit()
+        except IntegrityError:
+            raise NonExistentGroupError("group does not exist")
+
+        return self._make_bulk_change_result(data.task_ids, tasks)
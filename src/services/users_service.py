@@ -1,9 +1,26 @@
+import sys
+import time
+
 from sqlalchemy.exc import IntegrityError
 
-from auth import TokenPayloadSchema, get_password_hash
+from auth import TokenPayloadSchema, get_password_hash_async
+from core import ExpiringLRUCache, ENTRY_OVERHEAD_BYTES, settings
 from exceptions import UserNotFoundError, UsernameTakenError, ResultNotFound
 from interfaces import AbstractUnitOfWork
-from schemas import UserSchema, UserSchemaUpdate
+from schemas import UserSchema, UserPreviewSchema, UserPreviewListSchema, UserSchemaUpdate
+
+
+# результаты поиска по коротким префиксам username (отдельный кеш на каждый воркер)
+user_search_cache = ExpiringLRUCache(max_bytes=settings.USER_SEARCH_CACHE_MAX_BYTES)
+
+
+def get_search_entry_size(key: tuple, users: UserPreviewListSchema) -> int:
+    """Приблизительный размер записи кеша поиска в байтах"""
+
+    return ENTRY_OVERHEAD_BYTES + sys.getsizeof(key[0]) + sum(
+        sys.getsizeof(user) + sys.getsizeof(user.user_id) + sys.getsizeof(user.username)
+        for user in users.users
+    )
 
 
 class UsersService:
@@ -11,7 +28,7 @@ class UsersService:
         self.uow = uow
 
     async def get_user(self, payload: TokenPayloadSchema) -> UserSchema:
-        async with self.uow as uow:
+        async with self.uow.read_only() as uow:
             user = await uow.users.get(payload.sub)
 
         if user is None:
@@ -19,6 +36,43 @@ class UsersService:
 
         return UserSchema.model_validate(user, from_attributes=True)
 
+    async def search_users(
+            self,
+            prefix: str,
+            limit: int = settings.USER_SEARCH_LIMIT
+    ) -> UserPreviewListSchema:
+        """
+        Пользователи, чей username начинается с prefix (без учета регистра).
+        Результаты для префиксов не длиннее USER_SEARCH_CACHE_MAX_PREFIX_LENGTH
+        (их набирают чаще всего) кешируются в воркере
+        """
+
+        key = (prefix.lower(), limit)
+        cacheable = len(prefix) <= settings.USER_SEARCH_CACHE_MAX_PREFIX_LENGTH
+
+        if cacheable:
+            users = user_search_cache.get(key)
+
+            if users is not None:
+                return users
+
+        async with self.uow.read_only() as uow:
+            users = await uow.users.search_by_username_prefix(prefix, limit)
+
+        users = UserPreviewListSchema(users=[
+            UserPreviewSchema.model_validate(user, from_attributes=True) for user in users
+        ])
+
+        if cacheable:
+            user_search_cache.set(
+                key,
+                users,
+                expires_at=time.time() + settings.USER_SEARCH_CACHE_TTL_SECONDS,
+                size=get_search_entry_size(key, users)
+            )
+
+        return users
+
     async def update_user(
             self,
             payload: TokenPayloadSchema,
@@ -30,7 +84,7 @@ class UsersService:
                 for key, value in data.model_dump(exclude={"password"}, exclude_none=True).items()
             }
             if data.password:
-                fields_for_update["hashed_password"] = get_password_hash(data.password)
+                fields_for_update["hashed_password"] = await get_password_hash_async(data.password)
 
             async with self.uow as uow:
                 user = await uow.users.update(payload.sub, fields_for_update)
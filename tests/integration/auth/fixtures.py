@@ -1,9 +1,30 @@
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth_service import AuthService
-from infrastructure import SQLAlchemyUnitOfWork
+from infrastructure import (
+    SQLAlchemyUnitOfWork,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
+)
 
 
 @pytest.fixture
 def auth_service(unit_of_work: SQLAlchemyUnitOfWork) -> AuthService:
     return AuthService(unit_of_work)
+
+
+@pytest.fixture(scope="function")
+def revoked_tokens_repository(session: AsyncSession) -> RevokedTokensRepository:
+    return RevokedTokensRepository(session)
+
+
+@pytest.fixture(scope="function")
+def refresh_tokens_repository(session: AsyncSession) -> RefreshTokensRepository:
+    return RefreshTokensRepository(session)
+
+
+@pytest.fixture(scope="function")
+def api_keys_repository(session: AsyncSession) -> ApiKeysRepository:
+    return ApiKeysRepository(session)
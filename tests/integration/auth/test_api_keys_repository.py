@@ -0,0 +1,68 @@
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.tokens import generate_api_key, hash_api_key
+from infrastructure import ApiKeysRepository
+from schemas import UserSchema
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_create_and_get(
+        api_keys_repository: ApiKeysRepository,
+        session: AsyncSession,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    key_hash = hash_api_key(generate_api_key())
+
+    api_key = await api_keys_repository.create({
+        "user_id": user_data.user_id,
+        "name": "ci",
+        "key_hash": key_hash
+    })
+    await session.commit()
+
+    assert api_key.created_at is not None
+    assert await api_keys_repository.get_user_id_by_key_hash(key_hash) == user_data.user_id
+    assert await api_keys_repository.get_user_id_by_key_hash(
+        hash_api_key(generate_api_key())
+    ) is None
+
+    api_keys = await api_keys_repository.get_user_api_keys(user_data.user_id)
+    assert [api_key.api_key_id for api_key in api_keys] == [api_key.api_key_id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_delete_user_api_key(
+        api_keys_repository: ApiKeysRepository,
+        session: AsyncSession,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    other_user_data = await users_factory()
+    key_hash = hash_api_key(generate_api_key())
+
+    api_key = await api_keys_repository.create({
+        "user_id": user_data.user_id,
+        "name": "ci",
+        "key_hash": key_hash
+    })
+    await session.commit()
+
+    assert await api_keys_repository.delete_user_api_key(
+        other_user_data.user_id,
+        api_key.api_key_id
+    ) is None
+    assert await api_keys_repository.delete_user_api_key(user_data.user_id, uuid4()) is None
+    assert await api_keys_repository.delete_user_api_key(
+        user_data.user_id,
+        api_key.api_key_id
+    ) == key_hash
+    await session.commit()
+
+    assert await api_keys_repository.get_user_id_by_key_hash(key_hash) is None
@@ -1,8 +1,7 @@
-from datetime import datetime, timedelta, UTC
+import json
 from typing import Awaitable, Callable
 from uuid import uuid4
 
-import jwt
 import pytest
 from httpx import AsyncClient
 from sqlalchemy import delete
@@ -10,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import get_password_hash
 from core import settings
+from main import app
 from models import User
 from schemas import UserSchema
 from ..helpers import generate_username, generate_password, get_auth_headers
@@ -124,63 +124,243 @@ async def test_login(
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-@pytest.mark.parametrize(
-    ["signature_is_invalid", "token_is_expired"],
-    [
-        (False, False),
-        (True, False),
-        (False, True)
-    ]
-)
 async def test_refresh(
         async_client: AsyncClient,
-        users_factory: Callable[[], Awaitable[UserSchema]],
-        signature_is_invalid: bool,
-        token_is_expired: bool
+        session: AsyncSession
 ) -> None:
-    user_data = await users_factory()
+    json = {
+        "username": generate_username(),
+        "password": generate_password()
+    }
 
-    iat = datetime.now(UTC)
-    exp = iat + timedelta(minutes=settings.TOKEN_EXPIRE_MINUTES)
-    key = settings.TOKEN_SECRET_KEY
+    try:
+        response = await async_client.post(url="/auth/register", json=json)
+        assert response.status_code == 201
+        refresh_token = response.json()["refresh_token"]
 
-    if token_is_expired:
-        exp = iat - timedelta(seconds=1)
-    if signature_is_invalid:
-        key = "super_secret_fake_key"
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 200
+        new_refresh_token = response.json()["refresh_token"]
+        assert new_refresh_token != refresh_token
 
-    payload = {
-        "sub": str(user_data.user_id),
-        "iat": iat,
-        "exp": exp
+        response = await async_client.get(
+            url="/users/me",
+            headers={"Authorization": f"Bearer {response.json()["token"]}"}
+        )
+        assert response.status_code == 200
+        assert response.json()["username"] == json["username"]
+
+        # повторное использование отзывает все токены сессии
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 401
+
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": new_refresh_token}
+        )
+        assert response.status_code == 401
+
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": "invalid"}
+        )
+        assert response.status_code == 401
+    finally:
+        await session.execute(
+            delete(User)
+            .where(User.username == json["username"])
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_logout(async_client: AsyncClient) -> None:
+    headers = get_auth_headers(uuid4())
+
+    response = await async_client.post(url="/auth/logout", headers=headers)
+    assert response.status_code == 204
+
+    response = await async_client.get(url="/users/me", headers=headers)
+    assert response.status_code == 401
+
+    response = await async_client.post(url="/auth/logout", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_logout_revokes_refresh_token(
+        async_client: AsyncClient,
+        session: AsyncSession
+) -> None:
+    json = {
+        "username": generate_username(),
+        "password": generate_password()
     }
 
-    token = jwt.encode(payload, key=key, algorithm=settings.ALGORITHM)
+    try:
+        response = await async_client.post(url="/auth/register", json=json)
+        assert response.status_code == 201
 
-    response = await async_client.post(
-        url="/auth/refresh",
-        headers={"Authorization": f"Bearer {token}"}
-    )
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": response.json()["refresh_token"]}
+        )
+        assert response.status_code == 200
+        tokens = response.json()
+
+        response = await async_client.post(
+            url="/auth/logout",
+            headers={"Authorization": f"Bearer {tokens["token"]}"}
+        )
+        assert response.status_code == 204
 
-    if signature_is_invalid or token_is_expired:
+        # refresh-токен сессии отозван вместе с access-токеном
+        response = await async_client.post(
+            url="/auth/refresh",
+            json={"refresh_token": tokens["refresh_token"]}
+        )
         assert response.status_code == 401
+    finally:
+        await session.execute(
+            delete(User)
+            .where(User.username == json["username"])
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.parametrize(["ndjson"], [(False,), (True,)])
+async def test_register_bulk(
+        async_client: AsyncClient,
+        session: AsyncSession,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        monkeypatch: pytest.MonkeyPatch,
+        ndjson: bool
+) -> None:
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "admin_token")
+    user_data = await users_factory()
+
+    credentials_list = [
+        {"username": generate_username(), "password": generate_password()},
+        {"username": generate_username(), "password": generate_password()},
+        {"username": user_data.username, "password": generate_password()}
+    ]
+    credentials_list.append(credentials_list[0])
+    usernames = [credentials["username"] for credentials in credentials_list[:2]]
+
+    if ndjson:
+        request_kwargs = {
+            "content": "\n".join(json.dumps(credentials) for credentials in credentials_list),
+            "headers": {"Content-Type": "application/x-ndjson"}
+        }
     else:
+        request_kwargs = {"json": credentials_list}
+
+    try:
+        response = await async_client.post(url="/auth/register/bulk", **request_kwargs)
+        assert response.status_code == 403
+
+        request_kwargs.setdefault("headers", {})["X-Admin-Token"] = "admin_token"
+        response = await async_client.post(url="/auth/register/bulk", **request_kwargs)
         assert response.status_code == 200
 
-        response = await async_client.get(
-            url="/users/me",
-            headers={"Authorization": f"Bearer {response.json()["token"]}"}
-        )
+        result = response.json()
+        assert sorted(user["username"] for user in result["created"]) == sorted(usernames)
+        assert sorted(result["conflicts"]) == sorted([usernames[0], user_data.username])
 
+        response = await async_client.post(
+            url="/auth/login",
+            json=credentials_list[1]
+        )
         assert response.status_code == 200
-        assert response.json()["user_id"] == str(user_data.user_id)
+
+        response = await async_client.post(
+            url="/auth/register/bulk",
+            json=[{"username": "abc"}],
+            headers={"X-Admin-Token": "admin_token"}
+        )
+        assert response.status_code == 422
+    finally:
+        await session.execute(
+            delete(User)
+            .where(User.username.in_(usernames))
+        )
+        await session.commit()
 
 
 @pytest.mark.asyncio
 @pytest.mark.integration
-async def test_logout(async_client: AsyncClient) -> None:
-    response = await async_client.post(
-        url="/auth/logout",
-        headers=get_auth_headers(uuid4())
+async def test_api_keys(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    headers = get_auth_headers(user_data.user_id)
+
+    response = await async_client.post(url="/auth/api-keys", json={"name": "ci"}, headers=headers)
+    assert response.status_code == 201
+    api_key_data = response.json()
+    api_key_headers = {"X-API-Key": api_key_data["api_key"]}
+
+    response = await async_client.get(url="/auth/api-keys", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [{
+        "api_key_id": api_key_data["api_key_id"],
+        "name": "ci",
+        "created_at": api_key_data["created_at"]
+    }]
+
+    # второй запрос обслуживается из кеша ключей
+    for _ in range(2):
+        response = await async_client.get(url="/users/me", headers=api_key_headers)
+        assert response.status_code == 200
+        assert response.json()["user_id"] == str(user_data.user_id)
+
+    response = await async_client.get(url="/users/me", headers={"X-API-Key": "invalid"})
+    assert response.status_code == 401
+
+    response = await async_client.get(url="/users/me")
+    assert response.status_code == 403
+
+    # управление ключами и аккаунтом доступно только по jwt
+    response = await async_client.get(url="/auth/api-keys", headers=api_key_headers)
+    assert response.status_code == 403
+
+    response = await async_client.delete(
+        url=f"/auth/api-keys/{api_key_data["api_key_id"]}",
+        headers=headers
     )
     assert response.status_code == 204
+
+    response = await async_client.get(url="/users/me", headers=api_key_headers)
+    assert response.status_code == 401
+
+    response = await async_client.delete(
+        url=f"/auth/api-keys/{api_key_data["api_key_id"]}",
+        headers=headers
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.integration
+def test_api_key_security_schemes() -> None:
+    """Эндпоинты с jwt или API-ключом описывают в OpenAPI обе схемы"""
+
+    schema = app.openapi()
+
+    assert {"HTTPBearer", "APIKeyHeader"} <= set(schema["components"]["securitySchemes"])
+
+    for path, method in (("/users/me", "get"), ("/groups", "post"), ("/tasks/{task_id}", "get")):
+        assert schema["paths"][path][method]["security"] == [
+            {"HTTPBearer": []},
+            {"APIKeyHeader": []}
+        ]
@@ -7,7 +7,11 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.auth_service import AuthService
-from auth.exceptions import UsernameTakenError, InvalidCredentialsError
+from auth.exceptions import (
+    UsernameTakenError,
+    InvalidCredentialsError,
+    InvalidRefreshTokenError
+)
 from auth.hashing import get_password_hash
 from auth.schemas import CredentialsSchema
 from core import settings
@@ -117,3 +121,39 @@ async def test_login(
             .where(User.username == user.username)
         )
         await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_refresh(
+        auth_service: AuthService,
+        session: AsyncSession
+) -> None:
+    credentials_schema = CredentialsSchema(
+        username=generate_username(),
+        password=generate_password()
+    )
+
+    try:
+        tokens = await auth_service.register(credentials_schema)
+        new_tokens = await auth_service.refresh(tokens.refresh_token)
+
+        payload = jwt.decode(
+            new_tokens.token,
+            key=settings.TOKEN_SECRET_KEY,
+            algorithms=[settings.ALGORITHM]
+        )
+        user = await session.get(User, payload["sub"])
+        assert user.username == credentials_schema.username
+
+        with pytest.raises(InvalidRefreshTokenError):
+            await auth_service.refresh(tokens.refresh_token)
+
+        with pytest.raises(InvalidRefreshTokenError):
+            await auth_service.refresh(new_tokens.refresh_token)
+    finally:
+        await session.execute(
+            delete(User)
+            .where(User.username == credentials_schema.username)
+        )
+        await session.commit()
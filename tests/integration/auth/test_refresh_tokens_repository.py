@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, UTC
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.tokens import generate_refresh_token, hash_refresh_token
+from infrastructure import RefreshTokensRepository
+from models import RefreshToken
+from schemas import UserSchema
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_use(
+        refresh_tokens_repository: RefreshTokensRepository,
+        session: AsyncSession,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    family_id = uuid4()
+    token_hash = hash_refresh_token(generate_refresh_token())
+    expired_token_hash = hash_refresh_token(generate_refresh_token())
+
+    await refresh_tokens_repository.create({
+        "token_hash": token_hash,
+        "family_id": family_id,
+        "user_id": user_data.user_id,
+        "expires_at": datetime.now(UTC) + timedelta(days=1)
+    })
+    await refresh_tokens_repository.create({
+        "token_hash": expired_token_hash,
+        "family_id": family_id,
+        "user_id": user_data.user_id,
+        "expires_at": datetime.now(UTC) - timedelta(days=1)
+    })
+    await session.commit()
+
+    assert await refresh_tokens_repository.use(token_hash) == (user_data.user_id, family_id)
+    assert await refresh_tokens_repository.use(token_hash) is None
+    assert await refresh_tokens_repository.use(expired_token_hash) is None
+    await session.commit()
+
+    assert await refresh_tokens_repository.delete_expired() >= 1
+    await refresh_tokens_repository.revoke_family(family_id)
+    await session.commit()
+
+    session.expunge_all()
+    assert await session.get(RefreshToken, token_hash) is None
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, UTC
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure import RevokedTokensRepository
+from models import RevokedToken
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_revoke_and_get_revoked_since(
+        revoked_tokens_repository: RevokedTokensRepository,
+        session: AsyncSession
+) -> None:
+    started_at = datetime.now(UTC) - timedelta(seconds=1)
+    jti = uuid4().hex
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+
+    try:
+        await revoked_tokens_repository.revoke(jti, expires_at)
+        await revoked_tokens_repository.revoke(jti, expires_at)
+        await session.commit()
+
+        revoked_tokens = await revoked_tokens_repository.get_revoked_since(started_at)
+        assert (jti, expires_at) in revoked_tokens
+
+        revoked_tokens = await revoked_tokens_repository.get_revoked_since(None)
+        assert (jti, expires_at) in revoked_tokens
+
+        revoked_tokens = await revoked_tokens_repository.get_revoked_since(
+            datetime.now(UTC) + timedelta(minutes=1)
+        )
+        assert (jti, expires_at) not in revoked_tokens
+    finally:
+        await session.execute(delete(RevokedToken).where(RevokedToken.jti == jti))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_delete_expired(
+        revoked_tokens_repository: RevokedTokensRepository,
+        session: AsyncSession
+) -> None:
+    expired_jti = uuid4().hex
+    active_jti = uuid4().hex
+
+    try:
+        await revoked_tokens_repository.revoke(
+            expired_jti,
+            datetime.now(UTC) - timedelta(minutes=1)
+        )
+        await revoked_tokens_repository.revoke(
+            active_jti,
+            datetime.now(UTC) + timedelta(minutes=1)
+        )
+        await session.commit()
+
+        revoked_tokens = await revoked_tokens_repository.get_revoked_since(None)
+        assert expired_jti not in [jti for jti, _ in revoked_tokens]
+
+        assert await revoked_tokens_repository.delete_expired() >= 1
+        await session.commit()
+
+        assert await session.get(RevokedToken, expired_jti) is None
+        assert await session.get(RevokedToken, active_jti) is not None
+    finally:
+        await session.execute(
+            delete(RevokedToken)
+            .where(RevokedToken.jti.in_([expired_jti, active_jti]))
+        )
+        await session.commit()
@@ -0,0 +1,84 @@
+from typing import Callable, Awaitable
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from pytest_mock import MockerFixture
+
+from core import settings
+from schemas import UserSchema, GroupSchema, TaskSchema
+from ..helpers import get_auth_headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_run_batch(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    groups_data = [await groups_factory(user_data.user_id) for _ in range(2)]
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+    task_data = await tasks_factory(groups_data[0].group_id)
+    foreign_task_data = await tasks_factory(foreign_group_data.group_id)
+
+    operations = [
+        {"method": "GET", "path": "/users/me"},
+        {"method": "GET", "path": "/users/me/groups?limit=1"},
+        {"method": "GET", "path": f"/groups/{groups_data[0].group_id}"},
+        {"method": "GET", "path": f"/groups/{groups_data[1].group_id}"},
+        {"method": "GET", "path": f"/groups/{foreign_group_data.group_id}"},
+        {"method": "GET", "path": f"/groups/{groups_data[0].group_id}/tasks"},
+        {"method": "GET", "path": f"/tasks/{task_data.task_id}"},
+        {"method": "GET", "path": f"/tasks/{foreign_task_data.task_id}"},
+        {"method": "GET", "path": f"/tasks/{uuid4()}"},
+        {"method": "GET", "path": "/users/me/groups?cursor=invalid"},
+        {"method": "GET", "path": f"/groups/{groups_data[0].group_id}?fields=name&include=tasks"},
+        {"method": "GET", "path": f"/tasks/{task_data.task_id}?fields="},
+        {"method": "GET", "path": f"/tasks/{task_data.task_id}?fields=owner"},
+        {"method": "PATCH", "path": f"/tasks/{task_data.task_id}"}
+    ]
+
+    response = await async_client.post(
+        "/batch",
+        json={"operations": operations},
+        headers=get_auth_headers(user_data.user_id)
+    )
+
+    assert response.status_code == 200
+
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [
+        200, 200, 200, 200, 404, 200, 200, 404, 404, 400, 200, 200, 400, 405
+    ]
+
+    # тела ответов операций совпадают с ответами отдельных запросов
+    headers = get_auth_headers(user_data.user_id)
+
+    for operation, result in zip(operations[:-1], results):
+        single_response = await async_client.get(operation["path"], headers=headers)
+
+        assert single_response.status_code == result["status"]
+        assert single_response.json() == result["body"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_run_batch_too_large(
+        mocker: MockerFixture,
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    mocker.patch.object(settings, "BATCH_MAX_OPERATIONS", 2)
+
+    response = await async_client.post(
+        "/batch",
+        json={"operations": [{"method": "GET", "path": "/users/me"}] * 3},
+        headers=get_auth_headers(user_data.user_id)
+    )
+
+    assert response.status_code == 413
@@ -0,0 +1,95 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+
+from core import DatabaseHelper, settings
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_pool_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DATABASE_POOL_TIMEOUT", 0.1)
+    database_helper = DatabaseHelper(settings.database_url)
+
+    try:
+        async with database_helper.engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with database_helper.engine.connect():
+                    pass
+
+            stats = database_helper.get_pool_stats()
+            assert stats["checked_out"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["wait_time"]["count"] == 2
+            assert stats["wait_time"]["buckets"]["0.1"] == 1
+    finally:
+        await database_helper.engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_idle_pre_ping(
+        database_helper: DatabaseHelper,
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Соединение, разорванное во время простоя, пересоздается при выдаче из пула"""
+
+    monkeypatch.setattr(settings, "DATABASE_POOL_PRE_PING", "idle")
+    monkeypatch.setattr(settings, "DATABASE_POOL_PRE_PING_IDLE_SECONDS", 0)
+    idle_database_helper = DatabaseHelper(settings.database_url)
+
+    try:
+        async with idle_database_helper.engine.connect() as connection:
+            backend_pid = await connection.scalar(text("SELECT pg_backend_pid()"))
+
+        async with database_helper.engine.connect() as connection:
+            await connection.execute(
+                text("SELECT pg_terminate_backend(:pid)"),
+                {"pid": backend_pid}
+            )
+
+        async with idle_database_helper.engine.connect() as connection:
+            assert await connection.scalar(text("SELECT pg_backend_pid()")) != backend_pid
+    finally:
+        await idle_database_helper.engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_metrics(async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "admin_token")
+
+    response = await async_client.get(url="/metrics")
+    assert response.status_code == 403
+
+    response = await async_client.get(url="/metrics", headers={"X-Admin-Token": "admin_token"})
+    assert response.status_code == 200
+    assert {"size", "checked_out", "overflow", "timeouts", "wait_time"} <= set(
+        response.json()["database_pool"]
+    )
+    assert "hits" in response.json()["token_cache"]
+    assert "hits" in response.json()["user_search_cache"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.parametrize(["pgbouncer_pool"], [("null",), ("queue",)])
+async def test_pgbouncer_mode(monkeypatch: pytest.MonkeyPatch, pgbouncer_pool: str) -> None:
+    """Режим PgBouncer проверяется напрямую на PostgreSQL: без кеша выражений запросы работают так же"""
+
+    monkeypatch.setattr(settings, "DATABASE_PGBOUNCER_MODE", True)
+    monkeypatch.setattr(settings, "DATABASE_PGBOUNCER_POOL", pgbouncer_pool)
+    database_helper = DatabaseHelper(settings.database_url)
+
+    try:
+        for _ in range(2):
+            async with database_helper.session_factory() as session:
+                assert await session.scalar(text("SELECT CAST(:value AS integer)"), {"value": 1}) == 1
+
+        stats = database_helper.get_pool_stats()
+        assert stats["wait_time"]["count"] == 2
+        assert stats["size"] == (0 if pgbouncer_pool == "null" else settings.database_pool_size)
+    finally:
+        await database_helper.engine.dispose()
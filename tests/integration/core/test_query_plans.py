@@ -0,0 +1,382 @@
+"""
+Проверка планов запросов репозиториев на большом наборе данных:
+каждый запрос, отправленный методом репозитория, должен обходиться
+без последовательного сканирования таблиц (Seq Scan)
+"""
+
+import json
+from datetime import datetime, timedelta, UTC
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import DatabaseHelper
+from infrastructure import (
+    UsersRepository,
+    GroupsRepository,
+    TasksRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
+)
+
+
+SEED_USERS = 20000
+SEED_GROUP_SIZE = 4
+SEED_GROUP_TASKS = 10
+
+SEED_QUERIES = [
+    f"""
+    INSERT INTO users (user_id, username, hashed_password, created_at, membership_version)
+    SELECT gen_random_uuid(), 'plan_' || substr(md5(i::text), 1, 13), 'plan', current_date, 0
+    FROM generate_series(1, {SEED_USERS}) AS i
+    """,
+    f"""
+    INSERT INTO groups (group_id, name, description, created_at)
+    SELECT gen_random_uuid(), 'plan', 'plan', current_date
+    FROM generate_series(1, {SEED_USERS // SEED_GROUP_SIZE})
+    """,
+    f"""
+    WITH
+        u AS (SELECT user_id, row_number() OVER () AS n FROM users WHERE username LIKE 'plan\\_%'),
+        g AS (SELECT group_id, row_number() OVER () AS n FROM groups WHERE name = 'plan')
+    INSERT INTO users_groups (user_id, group_id)
+    SELECT u.user_id, g.group_id
+    FROM g JOIN u ON u.n BETWEEN (g.n - 1) * {SEED_GROUP_SIZE} + 1 AND g.n * {SEED_GROUP_SIZE}
+    """,
+    f"""
+    INSERT INTO tasks (task_id, group_id, name, description, created_at)
+    SELECT gen_random_uuid(), group_id, 'plan', 'plan', current_date
+    FROM groups, generate_series(1, {SEED_GROUP_TASKS})
+    WHERE name = 'plan'
+    """,
+    """
+    INSERT INTO revoked_tokens (jti, expires_at, revoked_at)
+    SELECT
+        'plan' || substr(md5(i::text), 1, 28),
+        now() + (i % 1000 - 10) * interval '1 minute',
+        now() - (i % 10000) * interval '1 minute'
+    FROM generate_series(1, 20000) AS i
+    """,
+    """
+    INSERT INTO refresh_tokens (token_hash, family_id, user_id, expires_at)
+    SELECT md5(user_id::text) || md5(username), gen_random_uuid(), user_id, now() + interval '1 day'
+    FROM users WHERE username LIKE 'plan\\_%'
+    """,
+    """
+    INSERT INTO api_keys (api_key_id, user_id, name, key_hash)
+    SELECT gen_random_uuid(), user_id, 'plan', md5(username) || md5(user_id::text)
+    FROM users WHERE username LIKE 'plan\\_%'
+    """
+]
+
+CLEANUP_QUERIES = [
+    "DELETE FROM groups WHERE name = 'plan'",
+    "DELETE FROM users WHERE username LIKE 'plan\\_%'",
+    "DELETE FROM revoked_tokens WHERE jti LIKE 'plan%'"
+]
+
+SAMPLE_QUERY = text("""
+    SELECT
+        ug.user_id, ug.group_id, t.task_id, u.username,
+        rt.token_hash, rt.family_id, ak.api_key_id, ak.key_hash
+    FROM users_groups ug
+    JOIN users u ON u.user_id = ug.user_id
+    JOIN tasks t ON t.group_id = ug.group_id
+    JOIN refresh_tokens rt ON rt.user_id = ug.user_id
+    JOIN api_keys ak ON ak.user_id = ug.user_id
+    WHERE u.username LIKE 'plan\\_%'
+    LIMIT 1
+""")
+
+
+@pytest_asyncio.fixture(scope="module")
+async def seeded_data(database_helper: DatabaseHelper) -> SimpleNamespace:
+    """Большой набор данных (со статистикой) и идентификаторы одной его строки"""
+
+    async with database_helper.engine.connect() as connection:
+        for query in SEED_QUERIES:
+            await connection.execute(text(query))
+
+        await connection.commit()
+        sample = (await connection.execute(SAMPLE_QUERY)).one()
+
+    async with database_helper.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("ANALYZE"))
+
+    yield SimpleNamespace(**sample._mapping)
+
+    async with database_helper.engine.connect() as connection:
+        for query in CLEANUP_QUERIES:
+            await connection.execute(text(query))
+
+        await connection.commit()
+
+
+def find_seq_scans(plan: Dict[str, Any]) -> List[str]:
+    seq_scans = []
+
+    if plan["Node Type"] == "Seq Scan":
+        seq_scans.append(plan["Relation Name"])
+
+    for subplan in plan.get("Plans", []):
+        seq_scans.extend(find_seq_scans(subplan))
+
+    return seq_scans
+
+
+async def consume(stream: AsyncIterator[Any]) -> None:
+    """Чтение потокового метода репозитория до конца"""
+
+    async for _ in stream:
+        pass
+
+
+Call = Callable[[AsyncSession, SimpleNamespace], Awaitable[Any]]
+
+REPOSITORY_CALLS: Dict[str, Call] = {
+    "UsersRepository.create": lambda s, d: UsersRepository(s).create({
+        "username": uuid4().hex[:18],
+        "hashed_password": "plan"
+    }),
+    "UsersRepository.bulk_create": lambda s, d: UsersRepository(s).bulk_create([
+        {"username": uuid4().hex[:18], "hashed_password": "plan"}
+    ]),
+    "UsersRepository.get_existing_usernames": lambda s, d: (
+        UsersRepository(s).get_existing_usernames([d.username])
+    ),
+    "UsersRepository.get": lambda s, d: UsersRepository(s).get(d.user_id),
+    "UsersRepository.search_by_username_prefix": lambda s, d: (
+        UsersRepository(s).search_by_username_prefix(d.username[:6], 10)
+    ),
+    "UsersRepository.get_user_by_username": lambda s, d: (
+        UsersRepository(s).get_user_by_username(d.username)
+    ),
+    "UsersRepository.update": lambda s, d: (
+        UsersRepository(s).update(d.user_id, {"username": uuid4().hex[:18]})
+    ),
+    "UsersRepository.delete": lambda s, d: UsersRepository(s).delete(d.user_id),
+    "UsersRepository.update_password_hash": lambda s, d: (
+        UsersRepository(s).update_password_hash(d.user_id, "plan", "plan")
+    ),
+    "UsersRepository.get_membership_version": lambda s, d: (
+        UsersRepository(s).get_membership_version(d.user_id)
+    ),
+    "UsersRepository.bump_membership_version": lambda s, d: (
+        UsersRepository(s).bump_membership_version(d.user_id)
+    ),
+    "UsersRepository.get_membership_versions_changed_since": lambda s, d: (
+        UsersRepository(s).get_membership_versions_changed_since(
+            datetime.now(UTC) - timedelta(minutes=1)
+        )
+    ),
+    "GroupsRepository.create": lambda s, d: GroupsRepository(s).create({
+        "user_id": d.user_id,
+        "name": "plan",
+        "description": "plan"
+    }),
+    "GroupsRepository.get": lambda s, d: GroupsRepository(s).get(d.group_id),
+    "GroupsRepository.update": lambda s, d: (
+        GroupsRepository(s).update(d.group_id, {"name": "plan"})
+    ),
+    "GroupsRepository.delete": lambda s, d: GroupsRepository(s).delete(d.group_id),
+    "GroupsRepository.get_for_user": lambda s, d: (
+        GroupsRepository(s).get_for_user(d.user_id, d.group_id)
+    ),
+    "GroupsRepository.get_many_for_user": lambda s, d: (
+        GroupsRepository(s).get_many_for_user(d.user_id, [d.group_id, uuid4()])
+    ),
+    "GroupsRepository.get_user_task_count": lambda s, d: (
+        GroupsRepository(s).get_user_task_count(d.user_id)
+    ),
+    "GroupsRepository.get_user_task_count(group_id)": lambda s, d: (
+        GroupsRepository(s).get_user_task_count(d.user_id, d.group_id)
+    ),
+    "GroupsRepository.get_group_details": lambda s, d: (
+        GroupsRepository(s).get_group_details(d.user_id, d.group_id, 101)
+    ),
+    "GroupsRepository.get_group_users": lambda s, d: (
+        GroupsRepository(s).get_group_users(d.user_id, d.group_id, 101, d.user_id)
+    ),
+    "GroupsRepository.get_group_tasks": lambda s, d: (
+        GroupsRepository(s).get_group_tasks(d.user_id, d.group_id, 101, d.task_id)
+    ),
+    "GroupsRepository.update_for_user": lambda s, d: (
+        GroupsRepository(s).update_for_user(d.user_id, d.group_id, {"name": "plan"})
+    ),
+    "GroupsRepository.delete_for_user": lambda s, d: (
+        GroupsRepository(s).delete_for_user(d.user_id, d.group_id)
+    ),
+    "GroupsRepository.get_user_groups_list": lambda s, d: (
+        GroupsRepository(s).get_user_groups_list(d.user_id, 101, d.group_id)
+    ),
+    "GroupsRepository.stream_group_users": lambda s, d: (
+        consume(GroupsRepository(s).stream_group_users(d.group_id))
+    ),
+    "GroupsRepository.stream_group_tasks": lambda s, d: (
+        consume(GroupsRepository(s).stream_group_tasks(d.group_id))
+    ),
+    "GroupsRepository.stream_user_groups": lambda s, d: (
+        consume(GroupsRepository(s).stream_user_groups(d.user_id))
+    ),
+    "GroupsRepository.get_user_group_ids": lambda s, d: (
+        GroupsRepository(s).get_user_group_ids(d.user_id, 10)
+    ),
+    "GroupsRepository.get_user_group_ids_among": lambda s, d: (
+        GroupsRepository(s).get_user_group_ids_among(d.user_id, [d.group_id, uuid4()])
+    ),
+    "GroupsRepository.get_user_group_ids_among(existing_group_ids)": lambda s, d: (
+        GroupsRepository(s).get_user_group_ids_among(d.user_id, [uuid4()], [d.group_id, uuid4()])
+    ),
+    "GroupsRepository.get_group_id_if_user_in_group": lambda s, d: (
+        GroupsRepository(s).get_group_id_if_user_in_group(d.user_id, d.group_id)
+    ),
+    "GroupsRepository.bulk_add_users_to_group": lambda s, d: (
+        GroupsRepository(s).bulk_add_users_to_group(d.group_id, [d.user_id, uuid4()])
+    ),
+    "GroupsRepository.bulk_remove_users_from_group": lambda s, d: (
+        GroupsRepository(s).bulk_remove_users_from_group(d.group_id, [d.user_id, uuid4()])
+    ),
+    "GroupsRepository.remove_user_from_group": lambda s, d: (
+        GroupsRepository(s).remove_user_from_group(d.group_id, d.user_id)
+    ),
+    "GroupsRepository.reconcile_counters": lambda s, d: (
+        GroupsRepository(s).reconcile_counters(d.group_id, 10)
+    ),
+    "TasksRepository.create": lambda s, d: TasksRepository(s).create({
+        "group_id": d.group_id,
+        "name": "plan",
+        "description": "plan"
+    }),
+    "TasksRepository.get": lambda s, d: TasksRepository(s).get(d.task_id),
+    "TasksRepository.update": lambda s, d: (
+        TasksRepository(s).update(d.task_id, {"estimated_time": 1})
+    ),
+    "TasksRepository.delete": lambda s, d: TasksRepository(s).delete(d.task_id),
+    "TasksRepository.lock_for_user": lambda s, d: (
+        TasksRepository(s).lock_for_user(d.user_id, [d.task_id, uuid4()])
+    ),
+    "TasksRepository.bulk_update": lambda s, d: (
+        TasksRepository(s).bulk_update([d.task_id, uuid4()], {"estimated_time": 1})
+    ),
+    "TasksRepository.bulk_delete": lambda s, d: (
+        TasksRepository(s).bulk_delete([d.task_id, uuid4()])
+    ),
+    "TasksRepository.get_task_id_if_user_in_group": lambda s, d: (
+        TasksRepository(s).get_task_id_if_user_in_group(d.user_id, d.task_id)
+    ),
+    "TasksRepository.get_for_user": lambda s, d: (
+        TasksRepository(s).get_for_user(d.user_id, d.task_id)
+    ),
+    "TasksRepository.get_many_for_user": lambda s, d: (
+        TasksRepository(s).get_many_for_user(d.user_id, [d.task_id, uuid4()])
+    ),
+    "TasksRepository.update_for_user": lambda s, d: (
+        TasksRepository(s).update_for_user(d.user_id, d.task_id, {"estimated_time": 1})
+    ),
+    "TasksRepository.delete_for_user": lambda s, d: (
+        TasksRepository(s).delete_for_user(d.user_id, d.task_id)
+    ),
+    "TasksRepository.search_for_user": lambda s, d: (
+        TasksRepository(s).search_for_user(d.user_id, "plan", 11)
+    ),
+    "TasksRepository.search_for_user(group_id)": lambda s, d: (
+        TasksRepository(s).search_for_user(d.user_id, "plan", 11, group_id=d.group_id)
+    ),
+    "TasksRepository.search_for_user(use_index=False)": lambda s, d: (
+        TasksRepository(s).search_for_user(d.user_id, "plan", 11, use_index=False)
+    ),
+    "TasksRepository.search_for_user(group_id, use_index=False)": lambda s, d: (
+        TasksRepository(s).search_for_user(
+            d.user_id,
+            "plan",
+            11,
+            group_id=d.group_id,
+            use_index=False
+        )
+    ),
+    "RevokedTokensRepository.revoke": lambda s, d: (
+        RevokedTokensRepository(s).revoke(uuid4().hex, datetime.now(UTC))
+    ),
+    "RevokedTokensRepository.get_revoked_since": lambda s, d: (
+        RevokedTokensRepository(s).get_revoked_since(datetime.now(UTC) - timedelta(minutes=1))
+    ),
+    "RevokedTokensRepository.delete_expired": lambda s, d: (
+        RevokedTokensRepository(s).delete_expired()
+    ),
+    "RefreshTokensRepository.use": lambda s, d: RefreshTokensRepository(s).use(d.token_hash),
+    "RefreshTokensRepository.revoke_family": lambda s, d: (
+        RefreshTokensRepository(s).revoke_family(d.family_id)
+    ),
+    "RefreshTokensRepository.delete_expired": lambda s, d: (
+        RefreshTokensRepository(s).delete_expired()
+    ),
+    "ApiKeysRepository.create": lambda s, d: ApiKeysRepository(s).create({
+        "user_id": d.user_id,
+        "name": "plan",
+        "key_hash": uuid4().hex * 2
+    }),
+    "ApiKeysRepository.get_user_id_by_key_hash": lambda s, d: (
+        ApiKeysRepository(s).get_user_id_by_key_hash(d.key_hash)
+    ),
+    "ApiKeysRepository.get_user_api_keys": lambda s, d: (
+        ApiKeysRepository(s).get_user_api_keys(d.user_id)
+    ),
+    "ApiKeysRepository.delete_user_api_key": lambda s, d: (
+        ApiKeysRepository(s).delete_user_api_key(d.user_id, d.api_key_id)
+    )
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.parametrize("name", REPOSITORY_CALLS)
+async def test_repository_query_plans(
+        database_helper: DatabaseHelper,
+        seeded_data: SimpleNamespace,
+        name: str
+) -> None:
+    """
+    Запросы метода репозитория перехватываются на уровне драйвера
+    и повторяются с EXPLAIN (FORMAT JSON) в той же транзакции
+    (которая затем откатывается)
+    """
+
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(database_helper.engine.sync_engine, "before_cursor_execute", capture)
+
+    async with database_helper.session_factory() as session:
+        try:
+            await REPOSITORY_CALLS[name](session, seeded_data)
+            await session.flush()
+        finally:
+            event.remove(database_helper.engine.sync_engine, "before_cursor_execute", capture)
+
+        assert statements
+
+        connection = await session.connection()
+
+        for statement, parameters in statements:
+            plan = await connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}",
+                parameters
+            )
+            plan = plan.scalar_one()
+
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            assert not find_seq_scans(plan[0]["Plan"]), (statement, plan)
+
+        await session.rollback()
@@ -0,0 +1,65 @@
+import pytest
+import pytest_asyncio
+
+from core import DatabaseHelper, settings
+from core.read_your_writes import LsnTracker, lsn_tracker
+
+
+@pytest_asyncio.fixture(scope="function")
+async def replicated_database_helper() -> DatabaseHelper:
+    """Основная БД и та же база в роли реплики"""
+
+    database_helper = DatabaseHelper(settings.database_url, [settings.database_url])
+    yield database_helper
+
+    await database_helper.engine.dispose()
+    await database_helper.replicas[0].engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_replica_routing(
+        replicated_database_helper: DatabaseHelper,
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    replica = replicated_database_helper.replicas[0]
+
+    # непроверенная реплика не используется
+    assert replicated_database_helper.get_read_session_factory() is (
+        replicated_database_helper.session_factory
+    )
+
+    await replicated_database_helper.check_replicas()
+    assert replica.available
+    assert replica.lag == 0
+    assert replicated_database_helper.get_read_session_factory() is replica.session_factory
+
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_MAX_LAG_SECONDS", -1)
+    assert replicated_database_helper.get_read_session_factory() is (
+        replicated_database_helper.session_factory
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_read_your_writes(replicated_database_helper: DatabaseHelper) -> None:
+    """Реплика, не догнавшая коммит клиента, не используется до следующей проверки"""
+
+    replica = replicated_database_helper.replicas[0]
+    await replicated_database_helper.check_replicas()
+    token = lsn_tracker.set(LsnTracker())
+
+    try:
+        async with replicated_database_helper.session_factory() as session:
+            await replicated_database_helper.record_commit_lsn(session)
+
+        assert lsn_tracker.get().lsn >= replica.replay_lsn
+        replica.replay_lsn = lsn_tracker.get().lsn - 1
+        assert replicated_database_helper.get_read_session_factory() is (
+            replicated_database_helper.session_factory
+        )
+
+        await replicated_database_helper.check_replicas()
+        assert replicated_database_helper.get_read_session_factory() is replica.session_factory
+    finally:
+        lsn_tracker.reset(token)
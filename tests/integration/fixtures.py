@@ -12,7 +12,10 @@ from infrastructure import (
     SQLAlchemyUnitOfWork,
     GroupsRepository,
     TasksRepository,
-    UsersRepository
+    UsersRepository,
+    RevokedTokensRepository,
+    RefreshTokensRepository,
+    ApiKeysRepository
 )
 from models import User, Group, UsersGroups, Task
 from schemas import UserSchema, GroupSchema, TaskSchema
@@ -27,7 +30,10 @@ def unit_of_work(database_helper: DatabaseHelper) -> SQLAlchemyUnitOfWork:
         database_helper.session_factory,
         UsersRepository,
         GroupsRepository,
-        TasksRepository
+        TasksRepository,
+        RevokedTokensRepository,
+        RefreshTokensRepository,
+        ApiKeysRepository
     )
 
 
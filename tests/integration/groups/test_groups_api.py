@@ -1,5 +1,6 @@
+from json import loads
 from typing import Awaitable, Callable
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 from httpx import AsyncClient
@@ -125,6 +126,261 @@ async def test_get_group(
     assert GroupTasksSchema(**response.json()).model_dump() == group_tasks_data.model_dump()
 
 
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_groups(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    groups_data = [await groups_factory(user_data.user_id) for _ in range(2)]
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+    missing_group_id = uuid4()
+
+    response = await async_client.get(
+        "/groups",
+        params={"ids": [
+            missing_group_id,
+            groups_data[1].group_id,
+            foreign_group_data.group_id,
+            groups_data[0].group_id
+        ]},
+        headers=get_auth_headers(user_data.user_id)
+    )
+
+    assert response.status_code == 200
+    assert [GroupSchema(**group) for group in response.json()["groups"]] == [
+        groups_data[1],
+        groups_data[0]
+    ]
+    assert response.json()["not_found"] == [
+        str(missing_group_id),
+        str(foreign_group_data.group_id)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_group_fields(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    user_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    tasks_data = sorted(
+        [await tasks_factory(group_data.group_id) for _ in range(2)],
+        key=lambda task_data: task_data.task_id
+    )
+
+    url = f"/groups/{group_data.group_id}"
+    headers = get_auth_headers(user_data.user_id)
+
+    response = await async_client.get(
+        url=url,
+        params={"fields": "name", "include": "tasks", "limit": 1},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json().keys() == {"name", "tasks", "tasks_next_cursor"}
+    assert response.json()["name"] == group_data.name
+    assert response.json()["tasks"] == [
+        {"task_id": str(tasks_data[0].task_id), "name": tasks_data[0].name}
+    ]
+
+    response = await async_client.get(
+        url=url,
+        params={"include": "tasks", "tasks_cursor": response.json()["tasks_next_cursor"]},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert GroupTasksSchema(**response.json()).tasks == [
+        TaskPreviewSchema(task_id=tasks_data[1].task_id, name=tasks_data[1].name)
+    ]
+
+    response = await async_client.get(
+        url=f"/tasks/{tasks_data[0].task_id}",
+        params={"fields": "name,estimated_time"},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"name": tasks_data[0].name, "estimated_time": None}
+
+    for params in ({"fields": "name,owner"}, {"include": "users,owner"}):
+        response = await async_client.get(url=url, params=params, headers=headers)
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_group_stats(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_groups_relations_factory: Callable[[UUID, UUID], Awaitable],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """Счетчики группы в списке групп пользователя и в группе (include=stats)"""
+
+    user_data = await users_factory()
+    member_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    await users_groups_relations_factory(group_data.group_id, member_data.user_id)
+
+    for _ in range(3):
+        await tasks_factory(group_data.group_id)
+
+    headers = get_auth_headers(user_data.user_id)
+    stats = {"task_count": 3, "member_count": 2, "estimated_time_sum": 0}
+
+    response = await async_client.get(url="/users/me/groups", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["groups"] == [
+        {"group_id": str(group_data.group_id), "name": group_data.name}
+    ]
+
+    response = await async_client.get(
+        url="/users/me/groups",
+        params={"include": "stats"},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["groups"] == [
+        {"group_id": str(group_data.group_id), "name": group_data.name, **stats}
+    ]
+
+    response = await async_client.get(
+        url="/users/me/groups",
+        params={"include": "stats"},
+        headers={**headers, "Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert [loads(line) for line in response.text.splitlines()] == [
+        {"group_id": str(group_data.group_id), "name": group_data.name, **stats}
+    ]
+
+    response = await async_client.get(
+        url=f"/groups/{group_data.group_id}",
+        params={"fields": "name", "include": "stats"},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"name": group_data.name, **stats}
+
+    response = await async_client.get(
+        url="/users/me/groups",
+        params={"include": "tasks"},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_group_pages(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """Обход задач группы и групп пользователя по курсорам"""
+
+    user_data = await users_factory()
+    groups_data = [await groups_factory(user_data.user_id) for _ in range(3)]
+    tasks_data = [await tasks_factory(groups_data[0].group_id) for _ in range(3)]
+
+    headers = get_auth_headers(user_data.user_id)
+
+    for url, items_key, cursor_key, item_key, items_data in (
+        (f"/groups/{groups_data[0].group_id}/tasks", "tasks", "tasks_next_cursor", "task_id", tasks_data),
+        ("/users/me/groups", "groups", "next_cursor", "group_id", groups_data)
+    ):
+        item_ids = []
+        params = {"limit": 2}
+
+        while True:
+            response = await async_client.get(url=url, headers=headers, params=params)
+            assert response.status_code == 200
+
+            item_ids.extend(UUID(item[item_key]) for item in response.json()[items_key])
+
+            if response.json()[cursor_key] is None:
+                break
+
+            params["cursor"] = response.json()[cursor_key]
+
+        assert item_ids == sorted(getattr(item_data, item_key) for item_data in items_data)
+
+        response = await async_client.get(url=url, headers=headers, params={"cursor": "@"})
+        assert response.status_code == 400
+
+    response = await async_client.get(
+        url=f"/groups/{groups_data[0].group_id}/details",
+        headers=headers,
+        params={"limit": 2}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["tasks"]) == 2
+    assert response.json()["tasks_next_cursor"] is not None
+    assert response.json()["users_next_cursor"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_stream_group_items(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """Списки целиком в формате NDJSON при Accept: application/x-ndjson"""
+
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    groups_data = [await groups_factory(user_data.user_id) for _ in range(3)]
+    tasks_data = [await tasks_factory(groups_data[0].group_id) for _ in range(3)]
+
+    headers = {**get_auth_headers(user_data.user_id), "Accept": "application/x-ndjson"}
+
+    for url, item_key, items_data in (
+        (f"/groups/{groups_data[0].group_id}/tasks", "task_id", tasks_data),
+        (f"/groups/{groups_data[0].group_id}/users", "user_id", [user_data]),
+        ("/users/me/groups", "group_id", groups_data)
+    ):
+        # limit и cursor в потоковом режиме не учитываются
+        response = await async_client.get(url=url, headers=headers, params={"limit": 1})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        items = [loads(line) for line in response.text.splitlines()]
+        assert [UUID(item[item_key]) for item in items] == sorted(
+            getattr(item_data, item_key) for item_data in items_data
+        )
+
+    response = await async_client.get(
+        url=f"/groups/{groups_data[1].group_id}/tasks",
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.text == ""
+
+    response = await async_client.get(
+        url=f"/groups/{groups_data[0].group_id}/tasks",
+        headers={**get_auth_headers(outsider_data.user_id), "Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 404
+
+
 @pytest.mark.asyncio
 @pytest.mark.integration
 async def test_update_group(
@@ -227,3 +483,55 @@ async def test_remove_user_from_group(
     )
 
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_add_remove_users_bulk(
+        async_client: AsyncClient,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    members_data = [await users_factory() for _ in range(2)]
+
+    member_ids = [str(member_data.user_id) for member_data in members_data]
+    missing_id = str(uuid4())
+    url = f"/groups/{group_data.group_id}/users/bulk"
+
+    response = await async_client.post(
+        url=url,
+        headers=get_auth_headers(outsider_data.user_id),
+        json={"user_ids": member_ids}
+    )
+    assert response.status_code == 400
+
+    response = await async_client.post(
+        url=url,
+        headers=get_auth_headers(user_data.user_id),
+        json={"user_ids": member_ids + [str(user_data.user_id), missing_id]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "added": member_ids,
+        "skipped": [str(user_data.user_id)],
+        "missing": [missing_id]
+    }
+
+    response = await async_client.request(
+        "DELETE",
+        url=url,
+        headers=get_auth_headers(user_data.user_id),
+        json={"user_ids": member_ids[:1] + [missing_id]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"removed": member_ids[:1], "missing": [missing_id]}
+
+    for member_data, status_code in zip(members_data, (404, 200)):
+        response = await async_client.get(
+            url=f"/groups/{group_data.group_id}",
+            headers=get_auth_headers(member_data.user_id)
+        )
+        assert response.status_code == status_code
@@ -1,10 +1,13 @@
 from random import randint
 from typing import Callable, Awaitable
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy import inspect, select, update
 
-from infrastructure import GroupsRepository
+from core import settings
+from infrastructure import GroupsRepository, TasksRepository
 from models import Group
 from schemas import UserSchema, GroupSchema, TaskSchema
 from .helpers import generate_group_name, generate_group_description
@@ -26,12 +29,16 @@ async def test_create(
         }
 
         group = await groups_repository.create(group_data_dict)
-        await groups_repository.session.flush()
-        groups_repository.session.expunge(group)
         assert group.name == group_data_dict["name"]
 
         group = await groups_repository.session.get(Group, group.group_id)
         assert group.name == group_data_dict["name"]
+
+        # владелец добавляется в группу тем же запросом
+        assert await groups_repository.get_group_id_if_user_in_group(
+            user_data.user_id,
+            group.group_id
+        ) == group.group_id
     finally:
         await groups_repository.session.rollback()
 
@@ -49,7 +56,7 @@ async def test_get_group(
     Тестирует методы для получения информации о группе.
 
     Тестируемые методы:
-    SQLAlchemyRepository.get
+    GroupsRepository.get_for_user
     GroupsRepository.get_group_details
     GroupsRepository.get_group_users
     GroupsRepository.get_group_tasks
@@ -59,6 +66,7 @@ async def test_get_group(
         await users_factory()
         for _ in range(randint(2, 4))
     ]
+    outsider_data = await users_factory()
 
     group_data = await groups_factory(users_data[0].user_id)
 
@@ -73,14 +81,20 @@ async def test_get_group(
         for _ in range(randint(2, 4))
     ]
 
-    group_basic = await groups_repository.get(group_data.group_id)
+    member_id = users_data[-1].user_id
+
+    group_basic = await groups_repository.get_for_user(member_id, group_data.group_id)
     groups_repository.session.expunge_all()
 
     assert group_basic
     assert group_basic.group_id == group_data.group_id
     assert group_basic.name == group_data.name
 
-    group_details = await groups_repository.get_group_details(group_data.group_id)
+    group_details = await groups_repository.get_group_details(
+        member_id,
+        group_data.group_id,
+        limit=10
+    )
     groups_repository.session.expunge_all()
 
     assert group_details
@@ -89,7 +103,11 @@ async def test_get_group(
     assert len(group_details.users) == len(users_data)
     assert len(group_details.tasks) == len(tasks_data)
 
-    group_users = await groups_repository.get_group_users(group_data.group_id)
+    group_users = await groups_repository.get_group_users(
+        member_id,
+        group_data.group_id,
+        limit=10
+    )
     groups_repository.session.expunge_all()
 
     assert group_users
@@ -97,13 +115,248 @@ async def test_get_group(
     assert group_users.name == group_data.name
     assert len(group_users.users) == len(users_data)
 
-    group_tasks = await groups_repository.get_group_tasks(group_data.group_id)
+    group_tasks = await groups_repository.get_group_tasks(
+        member_id,
+        group_data.group_id,
+        limit=10
+    )
     groups_repository.session.expunge_all()
 
     assert group_tasks
     assert group_tasks.group_id == group_data.group_id
     assert group_tasks.name == group_data.name
     assert len(group_tasks.tasks) == len(tasks_data)
+    assert {task.task_id for task in group_tasks.tasks} == {
+        task_data.task_id for task_data in tasks_data
+    }
+
+    # не участник группы не получает ее ни одним из методов
+    assert await groups_repository.get_for_user(
+        outsider_data.user_id,
+        group_data.group_id
+    ) is None
+
+    for method in (
+        groups_repository.get_group_details,
+        groups_repository.get_group_users,
+        groups_repository.get_group_tasks
+    ):
+        assert await method(outsider_data.user_id, group_data.group_id, 10) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_for_user_fields(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    user_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    task_data = await tasks_factory(group_data.group_id)
+
+    group = await groups_repository.get_for_user(
+        user_data.user_id,
+        group_data.group_id,
+        ("name",),
+        tasks_page=(10, None)
+    )
+    groups_repository.session.expunge_all()
+
+    # незапрошенные колонки и связи не загружаются
+    assert group.name == group_data.name
+    assert inspect(group).unloaded == {
+        "description",
+        "created_at",
+        "task_count",
+        "member_count",
+        "estimated_time_sum"
+    }
+    assert [task.task_id for task in group.tasks] == [task_data.task_id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_group_pages(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        users_groups_relations_factory: Callable[[UUID, UUID], Awaitable],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """
+    Страницы участников, задач и групп пользователя
+    идут по возрастанию ключа и не пересекаются
+    """
+
+    users_data = [await users_factory() for _ in range(5)]
+    group_data = await groups_factory(users_data[0].user_id)
+
+    for user_data in users_data[1:]:
+        await users_groups_relations_factory(group_data.group_id, user_data.user_id)
+
+    tasks_data = [await tasks_factory(group_data.group_id) for _ in range(5)]
+    groups_data = [group_data] + [
+        await groups_factory(users_data[0].user_id) for _ in range(4)
+    ]
+
+    member_id = users_data[0].user_id
+    pages = {"users": [], "tasks": [], "groups": []}
+
+    for relation, key in (("users", "user_id"), ("tasks", "task_id")):
+        method = getattr(groups_repository, f"get_group_{relation}")
+        after = None
+
+        while True:
+            group = await method(member_id, group_data.group_id, 2, after)
+            groups_repository.session.expunge_all()
+            page = [getattr(item, key) for item in getattr(group, relation)]
+
+            if not page:
+                break
+
+            pages[relation].append(page)
+            after = page[-1]
+
+    after = None
+
+    while page := [
+        group.group_id
+        for group in await groups_repository.get_user_groups_list(member_id, 2, after)
+    ]:
+        groups_repository.session.expunge_all()
+        pages["groups"].append(page)
+        after = page[-1]
+
+    for relation, items_data, key in (
+        ("users", users_data, "user_id"),
+        ("tasks", tasks_data, "task_id"),
+        ("groups", groups_data, "group_id")
+    ):
+        assert [len(page) for page in pages[relation]] == [2, 2, 1]
+        assert [item_id for page in pages[relation] for item_id in page] == sorted(
+            getattr(item_data, key) for item_data in items_data
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_stream_group_items(
+        mocker: MockerFixture,
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        users_groups_relations_factory: Callable[[UUID, UUID], Awaitable],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """Потоковое чтение отдает все строки пачками по STREAM_YIELD_PER по возрастанию ключа"""
+
+    mocker.patch.object(settings, "STREAM_YIELD_PER", 2)
+
+    users_data = [await users_factory() for _ in range(5)]
+    group_data = await groups_factory(users_data[0].user_id)
+
+    for user_data in users_data[1:]:
+        await users_groups_relations_factory(group_data.group_id, user_data.user_id)
+
+    tasks_data = [await tasks_factory(group_data.group_id) for _ in range(5)]
+    groups_data = [group_data] + [
+        await groups_factory(users_data[0].user_id) for _ in range(4)
+    ]
+
+    for stream, items_data, key in (
+        (groups_repository.stream_group_users(group_data.group_id), users_data, "user_id"),
+        (groups_repository.stream_group_tasks(group_data.group_id), tasks_data, "task_id"),
+        (groups_repository.stream_user_groups(users_data[0].user_id), groups_data, "group_id")
+    ):
+        batches = [[getattr(row, key) for row in rows] async for rows in stream]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [item_id for batch in batches for item_id in batch] == sorted(
+            getattr(item_data, key) for item_data in items_data
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_update_and_delete_for_user(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    """
+    Тестирует обновление и удаление группы с проверкой доступа в том же запросе.
+
+    Тестируемые методы:
+    GroupsRepository.update_for_user
+    GroupsRepository.delete_for_user
+    """
+
+    try:
+        member_data = await users_factory()
+        outsider_data = await users_factory()
+        group_data = await groups_factory(member_data.user_id)
+        new_name = generate_group_name()
+
+        assert await groups_repository.update_for_user(
+            outsider_data.user_id,
+            group_data.group_id,
+            {"name": new_name}
+        ) is None
+        assert await groups_repository.delete_for_user(
+            outsider_data.user_id,
+            group_data.group_id
+        ) is None
+
+        group = await groups_repository.update_for_user(
+            member_data.user_id,
+            group_data.group_id,
+            {"name": new_name}
+        )
+        assert group.name == new_name
+        assert group.description == group_data.description
+
+        group = await groups_repository.update_for_user(
+            member_data.user_id,
+            group_data.group_id,
+            {}
+        )
+        assert group.name == new_name
+
+        group = await groups_repository.delete_for_user(
+            member_data.user_id,
+            group_data.group_id
+        )
+        assert group.group_id == group_data.group_id
+
+        groups_repository.session.expunge_all()
+        assert await groups_repository.get(group_data.group_id) is None
+    finally:
+        await groups_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_many_for_user(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+
+    groups_data = [await groups_factory(user_data.user_id) for _ in range(randint(2, 4))]
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+
+    groups = await groups_repository.get_many_for_user(
+        user_data.user_id,
+        [group_data.group_id for group_data in groups_data] + [foreign_group_data.group_id, uuid4()]
+    )
+
+    assert sorted(group.group_id for group in groups) == sorted(
+        group_data.group_id for group_data in groups_data
+    )
 
 
 @pytest.mark.asyncio
@@ -120,7 +373,7 @@ async def test_get_user_groups_list(
         for _ in range(randint(2, 4))
     ]
 
-    groups_list = await groups_repository.get_user_groups_list(user_data.user_id)
+    groups_list = await groups_repository.get_user_groups_list(user_data.user_id, 10)
 
     assert len(groups_list) == len(groups_data)
 
@@ -229,3 +482,147 @@ async def test_remove_user_from_group(
             member_data.user_id,
             group_data.group_id
         )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_add_remove_users(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    """
+    Тестируемые методы:
+    GroupsRepository.bulk_add_users_to_group
+    GroupsRepository.bulk_remove_users_from_group
+    """
+
+    try:
+        owner_data = await users_factory()
+        users_data = [await users_factory() for _ in range(3)]
+        group_data = await groups_factory(owner_data.user_id)
+
+        user_ids = [user_data.user_id for user_data in users_data]
+        missing_id = uuid4()
+
+        users = await groups_repository.bulk_add_users_to_group(
+            group_data.group_id,
+            [owner_data.user_id, missing_id] + user_ids
+        )
+        assert dict(users) == {
+            owner_data.user_id: False,
+            **{user_id: True for user_id in user_ids}
+        }
+
+        for user_id in user_ids:
+            assert await groups_repository.get_group_id_if_user_in_group(
+                user_id,
+                group_data.group_id
+            )
+
+        users = await groups_repository.bulk_remove_users_from_group(
+            group_data.group_id,
+            user_ids[:2] + [missing_id]
+        )
+        assert dict(users) == {user_id: 1 for user_id in user_ids[:2]}
+
+        for user_id, in_group in zip(user_ids, (False, False, True)):
+            assert bool(await groups_repository.get_group_id_if_user_in_group(
+                user_id,
+                group_data.group_id
+            )) is in_group
+    finally:
+        await groups_repository.session.rollback()
+
+
+async def get_counters(groups_repository: GroupsRepository, group_id: UUID) -> tuple:
+    counters = await groups_repository.session.execute(
+        select(Group.task_count, Group.member_count, Group.estimated_time_sum)
+        .where(Group.group_id == group_id)
+    )
+    return tuple(counters.one())
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_group_counters(
+        groups_repository: GroupsRepository,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    """
+    Счетчики группы меняются триггерами в той же транзакции при создании (COPY),
+    переносе, изменении и удалении задач и при добавлении и удалении участников
+    """
+
+    try:
+        owner_data = await users_factory()
+        member_data = await users_factory()
+        tasks_repository = TasksRepository(groups_repository.session)
+
+        group, other_group = [
+            await groups_repository.create({
+                "user_id": owner_data.user_id,
+                "name": generate_group_name(),
+                "description": generate_group_description()
+            })
+            for _ in range(2)
+        ]
+        assert await get_counters(groups_repository, group.group_id) == (0, 1, 0)
+
+        task_ids = await tasks_repository.bulk_create([
+            {
+                "group_id": group.group_id,
+                "name": "task",
+                "description": "task",
+                "estimated_time": estimated_time
+            }
+            for estimated_time in (10, 20, None)
+        ])
+        await groups_repository.bulk_add_users_to_group(group.group_id, [member_data.user_id])
+        assert await get_counters(groups_repository, group.group_id) == (3, 2, 30)
+
+        await tasks_repository.bulk_update(task_ids[:1], {"group_id": other_group.group_id})
+        await tasks_repository.bulk_update(task_ids[2:], {"estimated_time": 5})
+        assert await get_counters(groups_repository, group.group_id) == (2, 2, 25)
+        assert await get_counters(groups_repository, other_group.group_id) == (1, 1, 10)
+
+        await tasks_repository.bulk_delete(task_ids[1:2])
+        await groups_repository.bulk_remove_users_from_group(
+            group.group_id,
+            [member_data.user_id]
+        )
+        assert await get_counters(groups_repository, group.group_id) == (1, 1, 5)
+    finally:
+        await groups_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_reconcile_counters(
+        groups_repository: GroupsRepository,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    try:
+        user_data = await users_factory()
+        group_data = await groups_factory(user_data.user_id)
+        await tasks_factory(group_data.group_id)
+
+        # пачка из одной группы, начиная сразу после group_id перед ней
+        after = UUID(int=group_data.group_id.int - 1)
+
+        assert await groups_repository.reconcile_counters(after, 1) == (group_data.group_id, 0)
+
+        await groups_repository.session.execute(
+            update(Group)
+            .where(Group.group_id == group_data.group_id)
+            .values(task_count=100, member_count=0, estimated_time_sum=7)
+        )
+
+        assert await groups_repository.reconcile_counters(after, 1) == (group_data.group_id, 1)
+        assert await get_counters(groups_repository, group_data.group_id) == (1, 1, 0)
+
+        assert await groups_repository.reconcile_counters(UUID(int=2 ** 128 - 1), 1) == (None, 0)
+    finally:
+        await groups_repository.session.rollback()
@@ -4,14 +4,18 @@ from typing import Callable, Awaitable, ContextManager, Any
 from uuid import uuid4, UUID
 
 import pytest
+from pytest_mock import MockerFixture
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from auth.capabilities import get_capability_claims
+from core import settings
 from exceptions import (
     GroupNotFoundError,
     UserGroupAttachError,
     UserGroupDetachError
 )
+from infrastructure import GroupsRepository
 from models import Group
 from schemas import (
     GroupSchema,
@@ -62,18 +66,77 @@ async def test_check_user_access_to_group(
         for member_data in members_data:
             assert await groups_service._check_user_access_to_group(
                 uow,
-                member_data.user_id,
+                get_fake_token_payload(member_data.user_id),
                 group_data.group_id
             )
 
         for user_data in users_data:
             assert not await groups_service._check_user_access_to_group(
                 uow,
-                user_data.user_id,
+                get_fake_token_payload(user_data.user_id),
                 group_data.group_id
             )
 
 
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_check_user_access_to_group_by_claims(
+        groups_service: GroupsService,
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        users_groups_relations_factory: Callable[[UUID, UUID], Awaitable],
+        monkeypatch: pytest.MonkeyPatch,
+        mocker: MockerFixture
+) -> None:
+    """
+    Доступ по списку групп в токене проверяется без запроса к БД,
+    а после исключения из группы токен считается устаревшим
+    """
+
+    monkeypatch.setattr(settings, "CAPABILITY_TOKENS_ENABLED", True)
+
+    owner_data = await users_factory()
+    member_data = await users_factory()
+    group_data = await groups_factory(owner_data.user_id)
+    await users_groups_relations_factory(group_data.group_id, member_data.user_id)
+
+    async with groups_service.uow as uow:
+        claims = await get_capability_claims(uow, member_data.user_id)
+
+    assert claims == {"mv": 0, "grp": [group_data.group_id.hex]}
+
+    payload = get_fake_token_payload(member_data.user_id).model_copy(
+        update={"grp": frozenset([group_data.group_id]), "mv": claims["mv"]}
+    )
+    get_group_id_if_user_in_group = mocker.spy(
+        GroupsRepository,
+        "get_group_id_if_user_in_group"
+    )
+
+    await groups_service.add_user_to_group(
+        payload,
+        group_data.group_id,
+        UserGroupSchemaAttach(user_id=(await users_factory()).user_id)
+    )
+    get_group_id_if_user_in_group.assert_not_called()
+
+    await groups_service.remove_user_from_group(
+        get_fake_token_payload(owner_data.user_id),
+        group_data.group_id,
+        member_data.user_id
+    )
+    get_group_id_if_user_in_group.reset_mock()
+
+    with pytest.raises(UserGroupAttachError):
+        await groups_service.add_user_to_group(
+            payload,
+            group_data.group_id,
+            UserGroupSchemaAttach(user_id=(await users_factory()).user_id)
+        )
+
+    get_group_id_if_user_in_group.assert_called_once()
+
+
 @pytest.mark.asyncio
 @pytest.mark.integration
 @pytest.mark.parametrize(
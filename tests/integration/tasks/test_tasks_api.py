@@ -3,9 +3,11 @@ from uuid import UUID, uuid4
 
 import pytest
 from httpx import AsyncClient
+from pytest_mock import MockerFixture
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core import settings
 from models import Task
 from schemas import TaskSchema, UserSchema, GroupSchema
 from .helpers import generate_task_name, generate_task_description
@@ -93,6 +95,120 @@ async def test_get_task(
         assert response.status_code == 404
 
 
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_tasks(
+        async_client: AsyncClient,
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+    tasks_data = [await tasks_factory(group_data.group_id) for _ in range(3)]
+    foreign_task_data = await tasks_factory(foreign_group_data.group_id)
+    missing_task_id = uuid4()
+
+    task_ids = [
+        tasks_data[2].task_id,
+        foreign_task_data.task_id,
+        tasks_data[0].task_id,
+        missing_task_id,
+        tasks_data[1].task_id
+    ]
+    headers = get_auth_headers(user_data.user_id)
+
+    response = await async_client.get("/tasks", params={"ids": task_ids}, headers=headers)
+
+    assert response.status_code == 200
+    assert [TaskSchema(**task) for task in response.json()["tasks"]] == [
+        tasks_data[2],
+        tasks_data[0],
+        tasks_data[1]
+    ]
+    # чужая и несуществующая задачи неразличимы
+    assert response.json()["not_found"] == [
+        str(foreign_task_data.task_id),
+        str(missing_task_id)
+    ]
+
+    for params in ({}, {"ids": [uuid4() for _ in range(settings.MULTI_GET_MAX_IDS + 1)]}):
+        response = await async_client.get("/tasks", params=params, headers=headers)
+        assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_search_tasks(
+        async_client: AsyncClient,
+        mocker: MockerFixture,
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+    task_data = await tasks_factory(group_data.group_id)
+    foreign_task_data = await tasks_factory(foreign_group_data.group_id)
+
+    headers = get_auth_headers(user_data.user_id)
+
+    response = await async_client.get(
+        "/tasks/search",
+        params={"q": f"{task_data.name} or {foreign_task_data.name}"},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] is None
+    assert len(response.json()["tasks"]) == 1
+
+    task = response.json()["tasks"][0]
+    assert TaskSchema(**task) == task_data
+    assert task["name_highlight"] == f"<mark>{task_data.name}</mark>"
+    assert task["description_highlight"] == task_data.description
+
+    for params, status_code in (
+            ({}, 422),
+            ({"q": "x" * (settings.TASK_SEARCH_MAX_QUERY_LENGTH + 1)}, 422),
+            ({"q": task_data.name, "cursor": "not a cursor"}, 400)
+    ):
+        response = await async_client.get("/tasks/search", params=params, headers=headers)
+        assert response.status_code == status_code
+
+    # в группах пользователя (и в одной группе) больше задач, чем перебирает поиск:
+    # поиск идет по GIN-индексу
+    other_group_data = await groups_factory(user_data.user_id)
+    other_task_data = await tasks_factory(other_group_data.group_id)
+    mocker.patch.object(settings, "TASK_SEARCH_SCAN_MAX_TASKS", 0)
+
+    response = await async_client.get(
+        "/tasks/search",
+        params={"q": f"{task_data.name} or {other_task_data.name}"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert {task["task_id"] for task in response.json()["tasks"]} == {
+        str(task_data.task_id),
+        str(other_task_data.task_id)
+    }
+
+    response = await async_client.get(
+        "/tasks/search",
+        params={
+            "q": f"{task_data.name} or {other_task_data.name}",
+            "group_id": str(group_data.group_id)
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert [TaskSchema(**task) for task in response.json()["tasks"]] == [task_data]
+
+
 @pytest.mark.asyncio
 @pytest.mark.integration
 @pytest.mark.parametrize(
@@ -165,3 +281,116 @@ async def test_delete_task(
         assert response.status_code == 404
     else:
         assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_create_tasks_bulk(
+        async_client: AsyncClient,
+        session: AsyncSession,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    outsider_group_data = await groups_factory(outsider_data.user_id)
+
+    headers = get_auth_headers(user_data.user_id)
+    json = [
+        {
+            "group_id": str(group_id),
+            "name": generate_task_name(),
+            "description": generate_task_description()
+        }
+        for group_id in (group_data.group_id, outsider_group_data.group_id, group_data.group_id)
+    ]
+
+    response = await async_client.post(url="/tasks/bulk", headers=headers, json=json)
+    assert response.status_code == 200
+
+    results = response.json()["results"]
+    assert results[1] == {"task_id": None, "error": "group does not exist"}
+
+    for i in (0, 2):
+        assert results[i]["error"] is None
+
+        response = await async_client.get(url=f"/tasks/{results[i]['task_id']}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["name"] == json[i]["name"]
+
+    await session.execute(
+        delete(Task)
+        .where(Task.task_id.in_([results[0]["task_id"], results[2]["task_id"]]))
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_change_tasks_bulk(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]]
+) -> None:
+    """Массовые обновление, перенос в другую группу и удаление задач"""
+
+    user_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(user_data.user_id)
+    target_group_data = await groups_factory(user_data.user_id)
+    outsider_group_data = await groups_factory(outsider_data.user_id)
+
+    tasks_data = [await tasks_factory(group_data.group_id) for _ in range(3)]
+    outsider_task_data = await tasks_factory(outsider_group_data.group_id)
+
+    headers = get_auth_headers(user_data.user_id)
+    task_ids = [str(task_data.task_id) for task_data in tasks_data]
+    all_task_ids = task_ids + [str(outsider_task_data.task_id)]
+
+    response = await async_client.patch(
+        url="/tasks/bulk",
+        headers=headers,
+        json={"task_ids": all_task_ids, "data": {"estimated_time": 9}}
+    )
+    assert response.status_code == 200
+    assert [task["task_id"] for task in response.json()["tasks"]] == sorted(task_ids)
+    assert {task["estimated_time"] for task in response.json()["tasks"]} == {9}
+    assert response.json()["not_found"] == [str(outsider_task_data.task_id)]
+
+    response = await async_client.post(
+        url="/tasks/bulk/move",
+        headers=headers,
+        json={"task_ids": task_ids[:2], "group_id": str(outsider_group_data.group_id)}
+    )
+    assert response.status_code == 400
+
+    response = await async_client.post(
+        url="/tasks/bulk/move",
+        headers=headers,
+        json={"task_ids": task_ids[:2], "group_id": str(target_group_data.group_id)}
+    )
+    assert response.status_code == 200
+    assert {task["group_id"] for task in response.json()["tasks"]} == {
+        str(target_group_data.group_id)
+    }
+
+    response = await async_client.request(
+        "DELETE",
+        url="/tasks/bulk",
+        headers=headers,
+        json={"task_ids": all_task_ids}
+    )
+    assert response.status_code == 200
+    assert [task["task_id"] for task in response.json()["tasks"]] == sorted(task_ids)
+
+    for task_id in all_task_ids:
+        response = await async_client.get(url=f"/tasks/{task_id}", headers=headers)
+        assert response.status_code == 404
+
+    response = await async_client.get(
+        url=f"/tasks/{outsider_task_data.task_id}",
+        headers=get_auth_headers(outsider_data.user_id)
+    )
+    assert response.status_code == 200
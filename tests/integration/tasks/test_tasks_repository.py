@@ -1,10 +1,13 @@
 from random import randint
 from typing import Callable, Awaitable
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 from infrastructure import TasksRepository
+from models import Task
 from schemas import UserSchema, GroupSchema, TaskSchema
 
 
@@ -41,3 +44,276 @@ async def test_get_task_id_if_user_in_group(
             user_data.user_id,
             task_data.task_id
         ) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_update_delete_for_user(
+        tasks_repository: TasksRepository,
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    """
+    Тестирует методы работы с задачей с проверкой доступа в том же запросе.
+
+    Тестируемые методы:
+    TasksRepository.get_for_user
+    TasksRepository.update_for_user
+    TasksRepository.delete_for_user
+    """
+
+    try:
+        member_data = await users_factory()
+        outsider_data = await users_factory()
+        group_data = await groups_factory(member_data.user_id)
+        task_data = await tasks_factory(group_data.group_id)
+
+        assert await tasks_repository.get_for_user(
+            outsider_data.user_id,
+            task_data.task_id
+        ) is None
+        assert await tasks_repository.update_for_user(
+            outsider_data.user_id,
+            task_data.task_id,
+            {"estimated_time": 5}
+        ) is None
+        assert await tasks_repository.delete_for_user(
+            outsider_data.user_id,
+            task_data.task_id
+        ) is None
+
+        task = await tasks_repository.get_for_user(member_data.user_id, task_data.task_id)
+        assert task.name == task_data.name
+        tasks_repository.session.expunge_all()
+
+        task = await tasks_repository.update_for_user(
+            member_data.user_id,
+            task_data.task_id,
+            {"estimated_time": 5}
+        )
+        assert task.estimated_time == 5
+        assert task.name == task_data.name
+
+        task = await tasks_repository.delete_for_user(
+            member_data.user_id,
+            task_data.task_id
+        )
+        assert task.task_id == task_data.task_id
+
+        tasks_repository.session.expunge_all()
+        assert await tasks_repository.get(task_data.task_id) is None
+    finally:
+        await tasks_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_get_many_for_user(
+        tasks_repository: TasksRepository,
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    member_data = await users_factory()
+    outsider_data = await users_factory()
+    group_data = await groups_factory(member_data.user_id)
+    foreign_group_data = await groups_factory(outsider_data.user_id)
+
+    tasks_data = [await tasks_factory(group_data.group_id) for _ in range(randint(2, 4))]
+    foreign_task_data = await tasks_factory(foreign_group_data.group_id)
+
+    tasks = await tasks_repository.get_many_for_user(
+        member_data.user_id,
+        [task_data.task_id for task_data in tasks_data] + [foreign_task_data.task_id, uuid4()]
+    )
+
+    assert sorted(task.task_id for task in tasks) == sorted(
+        task_data.task_id for task_data in tasks_data
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_create(
+        tasks_repository: TasksRepository,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    try:
+        user_data = await users_factory()
+        groups_data = [await groups_factory(user_data.user_id) for _ in range(2)]
+
+        data = [
+            {
+                "group_id": groups_data[i % 2].group_id,
+                "name": f"task {i}",
+                "description": "task",
+                "estimated_time": i
+            }
+            for i in range(5)
+        ]
+
+        task_ids = await tasks_repository.bulk_create(data)
+        assert len(task_ids) == len(data)
+
+        tasks = await tasks_repository.session.execute(
+            select(Task.task_id, Task.group_id, Task.name, Task.estimated_time)
+            .where(Task.task_id.in_(task_ids))
+        )
+        assert {tuple(task) for task in tasks} == {
+            (task_id, task["group_id"], task["name"], task["estimated_time"])
+            for task_id, task in zip(task_ids, data)
+        }
+
+        assert await tasks_repository.bulk_create([]) == []
+
+        with pytest.raises(IntegrityError):
+            await tasks_repository.bulk_create([{**data[0], "group_id": uuid4()}])
+    finally:
+        await tasks_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_update_delete(
+        tasks_repository: TasksRepository,
+        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]]
+) -> None:
+    """
+    Тестируемые методы:
+    TasksRepository.lock_for_user
+    TasksRepository.bulk_update
+    TasksRepository.bulk_delete
+    """
+
+    try:
+        member_data = await users_factory()
+        outsider_data = await users_factory()
+        group_data = await groups_factory(member_data.user_id)
+        outsider_group_data = await groups_factory(outsider_data.user_id)
+
+        tasks_data = [await tasks_factory(group_data.group_id) for _ in range(3)]
+        outsider_task_data = await tasks_factory(outsider_group_data.group_id)
+
+        task_ids = await tasks_repository.lock_for_user(
+            member_data.user_id,
+            [outsider_task_data.task_id] + [task_data.task_id for task_data in tasks_data]
+        )
+        assert task_ids == sorted(task_data.task_id for task_data in tasks_data)
+
+        tasks = await tasks_repository.bulk_update(task_ids, {"estimated_time": 7})
+        assert sorted(task.task_id for task in tasks) == task_ids
+        assert {task.estimated_time for task in tasks} == {7}
+
+        tasks = await tasks_repository.bulk_update(task_ids[:1], {})
+        assert [task.estimated_time for task in tasks] == [7]
+
+        tasks = await tasks_repository.bulk_delete(task_ids[:2])
+        assert sorted(task.task_id for task in tasks) == task_ids[:2]
+
+        assert await tasks_repository.lock_for_user(member_data.user_id, task_ids) == task_ids[2:]
+    finally:
+        await tasks_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+@pytest.mark.parametrize("use_index", [True, False])
+async def test_search_for_user(
+        tasks_repository: TasksRepository,
+        users_factory: Callable[[], Awaitable[UserSchema]],
+        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
+        use_index: bool
+) -> None:
+    """
+    Находятся только задачи групп пользователя (или одной его группы);
+    совпадение в названии релевантнее совпадения в описании;
+    страницы по курсору не пересекаются
+    (и по GIN-индексу, и перебором задач групп)
+    """
+
+    try:
+        user_data = await users_factory()
+        outsider_data = await users_factory()
+        groups_data = [await groups_factory(user_data.user_id) for _ in range(2)]
+        foreign_group_data = await groups_factory(outsider_data.user_id)
+
+        data = [
+            (groups_data[0], "Deploy release", "update servers"),
+            (groups_data[1], "Fix login", "blocked by failed deploys"),
+            (groups_data[1], "Deploy docs", "deploy documentation site"),
+            (groups_data[0], "Write tests", "unrelated"),
+            (foreign_group_data, "Deploy secret", "deploy")
+        ]
+        task_ids = await tasks_repository.bulk_create([
+            {
+                "group_id": group_data.group_id,
+                "name": name,
+                "description": description,
+                "estimated_time": None
+            }
+            for group_data, name, description in data
+        ])
+
+        tasks = await tasks_repository.search_for_user(
+            user_data.user_id,
+            "deploying",
+            10,
+            use_index=use_index
+        )
+
+        # стемминг: deploying находит deploy и deploys
+        assert [task.task_id for task in tasks] == [task_ids[2], task_ids[0], task_ids[1]]
+        assert tasks[0].rank > tasks[1].rank > tasks[2].rank
+        assert tasks[0].name_highlight == "<mark>Deploy</mark> docs"
+        assert tasks[2].description_highlight == "blocked by failed <mark>deploys</mark>"
+
+        pages = []
+        after = None
+
+        while page := await tasks_repository.search_for_user(
+                user_data.user_id,
+                "deploying",
+                1,
+                after,
+                use_index=use_index
+        ):
+            pages.append(page[0].task_id)
+            after = page[0].rank, page[0].task_id
+
+        assert pages == [task.task_id for task in tasks]
+
+        tasks = await tasks_repository.search_for_user(
+            user_data.user_id,
+            "deploy -docs",
+            10,
+            use_index=use_index
+        )
+        assert {task.task_id for task in tasks} == {task_ids[0], task_ids[1]}
+        assert await tasks_repository.search_for_user(
+            user_data.user_id,
+            "the",
+            10,
+            use_index=use_index
+        ) == []
+
+        tasks = await tasks_repository.search_for_user(
+            user_data.user_id,
+            "deploying",
+            10,
+            group_id=groups_data[1].group_id,
+            use_index=use_index
+        )
+        assert [task.task_id for task in tasks] == [task_ids[2], task_ids[1]]
+        assert await tasks_repository.search_for_user(
+            user_data.user_id,
+            "deploying",
+            10,
+            group_id=foreign_group_data.group_id,
+            use_index=use_index
+        ) == []
+    finally:
+        await tasks_repository.session.rollback()
@@ -1,5 +1,5 @@
 from contextlib import nullcontext
-from random import choice, randint
+from random import choice
 from typing import Awaitable, Callable, Any, ContextManager
 from uuid import UUID, uuid4
 
@@ -21,44 +21,6 @@ from .helpers import generate_task_name, generate_task_description
 from ..helpers import get_fake_token_payload
 
 
-@pytest.mark.asyncio
-@pytest.mark.integration
-async def test_check_user_access_to_task(
-        tasks_service: TasksService,
-        tasks_factory: Callable[[UUID], Awaitable[TaskSchema]],
-        users_factory: Callable[[], Awaitable[UserSchema]],
-        groups_factory: Callable[[UUID], Awaitable[GroupSchema]],
-        users_groups_relations_factory: Callable[[UUID, UUID], Awaitable]
-) -> None:
-    members_data = [await users_factory() for _ in range(randint(2, 4))]
-    users_data = [await users_factory() for _ in range(randint(2, 4))]
-
-    group_data = await groups_factory(members_data[0].user_id)
-
-    for member_data in members_data[1:]:
-        await users_groups_relations_factory(
-            group_data.group_id,
-            member_data.user_id
-        )
-
-    task_data = await tasks_factory(group_data.group_id)
-
-    async with tasks_service.uow as uow:
-        for member_data in members_data:
-            assert await tasks_service._check_user_access_to_task(
-                uow,
-                member_data.user_id,
-                task_data.task_id
-            )
-
-        for user_data in users_data:
-            assert not await tasks_service._check_user_access_to_task(
-                uow,
-                user_data.user_id,
-                task_data.task_id
-            )
-
-
 @pytest.mark.asyncio
 @pytest.mark.integration
 @pytest.mark.parametrize(
@@ -5,6 +5,7 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core import settings
 from schemas import UserSchema
 from ..helpers import get_auth_headers, generate_username
 
@@ -109,3 +110,34 @@ async def test_delete_user(
 
         response = await async_client.delete(url=url, headers=headers)
         assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_search_users(
+        async_client: AsyncClient,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    headers = get_auth_headers(user_data.user_id)
+
+    response = await async_client.get(
+        url="/users/search",
+        params={"prefix": user_data.username.upper()},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert {
+        "user_id": str(user_data.user_id),
+        "username": user_data.username
+    } in response.json()["users"]
+
+    for params in (
+            {},
+            {"prefix": ""},
+            {"prefix": "x" * 19},
+            {"prefix": "x", "limit": settings.USER_SEARCH_MAX_LIMIT + 1}
+    ):
+        response = await async_client.get(url="/users/search", params=params, headers=headers)
+        assert response.status_code == 422
@@ -69,6 +69,89 @@ async def test_update(
         await users_repository.update(uuid4(), data)
 
 
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_update_password_hash(
+        users_repository: UsersRepository,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    user = await users_repository.get_user_by_username(user_data.username)
+    old_hashed_password = user.hashed_password
+
+    assert not await users_repository.update_password_hash(
+        user_data.user_id,
+        "outdated_hash",
+        "new_hash"
+    )
+    assert await users_repository.update_password_hash(
+        user_data.user_id,
+        old_hashed_password,
+        "new_hash"
+    )
+
+    users_repository.session.expire_all()
+    user = await users_repository.get_user_by_username(user_data.username)
+    assert user.hashed_password == "new_hash"
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_bulk_create(
+        users_repository: UsersRepository,
+        users_factory: Callable[[], Awaitable[UserSchema]]
+) -> None:
+    user_data = await users_factory()
+    usernames = [generate_username() for _ in range(3)]
+
+    try:
+        users = await users_repository.bulk_create([
+            {"username": username, "hashed_password": "hash"}
+            for username in [*usernames, user_data.username]
+        ])
+
+        assert sorted(user.username for user in users) == sorted(usernames)
+        assert all(user.user_id for user in users)
+
+        existing_usernames = await users_repository.get_existing_usernames(
+            [*usernames, generate_username()]
+        )
+        assert existing_usernames == set(usernames)
+    finally:
+        await users_repository.session.rollback()
+
+
+@pytest.mark.asyncio
+@pytest.mark.integration
+async def test_search_by_username_prefix(users_repository: UsersRepository) -> None:
+    """Префикс без учета регистра, по порядку username; % и _ - обычные символы"""
+
+    prefix = "q" + uuid4().hex[:7]
+    usernames = [prefix + "c", prefix.upper() + "A", prefix + "b_x", prefix + "%"]
+
+    try:
+        await users_repository.bulk_create([
+            {"username": username, "hashed_password": "hash"}
+            for username in [*usernames, "x" + prefix]
+        ])
+
+        users = await users_repository.search_by_username_prefix(prefix, 10)
+        assert [user.username for user in users] == [
+            prefix + "%", prefix.upper() + "A", prefix + "b_x", prefix + "c"
+        ]
+        assert all(user.user_id for user in users)
+
+        users = await users_repository.search_by_username_prefix(prefix.upper() + "B", 10)
+        assert [user.username for user in users] == [prefix + "b_x"]
+
+        users = await users_repository.search_by_username_prefix(prefix, 2)
+        assert [user.username for user in users] == [prefix + "%", prefix.upper() + "A"]
+
+        assert await users_repository.search_by_username_prefix(prefix + "_", 10) == []
+    finally:
+        await users_repository.session.rollback()
+
+
 @pytest.mark.asyncio
 @pytest.mark.integration
 async def test_delete(
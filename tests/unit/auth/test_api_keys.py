@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, UTC
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from pytest_mock import MockerFixture
+
+from auth.dependencies import verify_api_key
+from auth.revocation import RevocationList
+from auth.schemas import TokenPayloadSchema
+from auth.token_cache import api_key_cache
+from auth.tokens import hash_api_key, get_api_key_jti
+
+
+@pytest.fixture(scope="function")
+def fake_auth_service(mocker: MockerFixture) -> Mock:
+    api_key_cache.clear()
+    yield mocker.Mock()
+    api_key_cache.clear()
+
+
+def get_payload(key_hash: str) -> TokenPayloadSchema:
+    issued_at = datetime.now(UTC)
+
+    return TokenPayloadSchema(
+        sub=uuid4(),
+        iat=issued_at,
+        exp=issued_at + timedelta(minutes=1),
+        jti=get_api_key_jti(key_hash)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_verify_api_key_uses_cache(
+        mocker: MockerFixture,
+        fake_auth_service: Mock
+) -> None:
+    payload = get_payload(hash_api_key("key"))
+    fake_auth_service.get_api_key_payload = mocker.AsyncMock(return_value=payload)
+
+    assert await verify_api_key("key", fake_auth_service) is payload
+    assert await verify_api_key("key", fake_auth_service) is payload
+
+    fake_auth_service.get_api_key_payload.assert_awaited_once_with(hash_api_key("key"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_verify_api_key_invalid(
+        mocker: MockerFixture,
+        fake_auth_service: Mock
+) -> None:
+    fake_auth_service.get_api_key_payload = mocker.AsyncMock(return_value=None)
+
+    with pytest.raises(HTTPException) as error:
+        await verify_api_key("key", fake_auth_service)
+
+    assert error.value.status_code == 401
+    assert api_key_cache.get(hash_api_key("key")) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_verify_api_key_revoked(
+        mocker: MockerFixture,
+        fake_auth_service: Mock
+) -> None:
+    """Закешированный ключ, удаленный в другом воркере, отклоняется после синхронизации"""
+
+    payload = get_payload(hash_api_key("key"))
+    revocation_list = RevocationList()
+    mocker.patch("auth.dependencies.revocation_list", revocation_list)
+    fake_auth_service.get_api_key_payload = mocker.AsyncMock(return_value=payload)
+
+    await verify_api_key("key", fake_auth_service)
+    revocation_list.add(payload.jti, payload.exp)
+
+    with pytest.raises(HTTPException) as error:
+        await verify_api_key("key", fake_auth_service)
+
+    assert error.value.status_code == 401
+    fake_auth_service.get_api_key_payload.assert_awaited_once()
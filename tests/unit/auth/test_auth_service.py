@@ -1,4 +1,6 @@
+import asyncio
 from contextlib import nullcontext
+from datetime import datetime, UTC
 from typing import ContextManager, Any
 from unittest.mock import Mock
 from uuid import uuid4
@@ -7,10 +9,17 @@ import pytest
 from pytest_mock import MockerFixture
 from sqlalchemy.exc import IntegrityError
 
-from auth.auth_service import AuthService
-from auth.exceptions import UsernameTakenError, InvalidCredentialsError
+from auth.auth_service import AuthService, background_tasks
+from auth.exceptions import (
+    UsernameTakenError,
+    InvalidCredentialsError,
+    InvalidRefreshTokenError,
+    BulkRegistrationTooLargeError,
+    ApiKeyNotFoundError
+)
 from auth.schemas import CredentialsSchema
-from models import User
+from auth.tokens import get_api_key_jti
+from models import User, RefreshToken
 
 
 @pytest.mark.asyncio
@@ -29,8 +38,10 @@ async def test_register(
         username_is_taken: bool,
         expectation: ContextManager[Any]
 ) -> None:
-    mocker.patch("auth.auth_service.get_password_hash", return_value="hash")
+    mocker.patch("auth.auth_service.get_password_hash_async", return_value="hash")
     mocker.patch("auth.auth_service.encode_token", return_value="jwt")
+    mocker.patch("auth.auth_service.generate_refresh_token", return_value="refresh")
+    fake_uow.refresh_tokens.create = mocker.AsyncMock(return_value=None)
 
     if username_is_taken:
         fake_uow.users.create = mocker.AsyncMock(
@@ -52,9 +63,11 @@ async def test_register(
     fake_uow.__aexit__.assert_awaited_once()
 
     if not username_is_taken:
-        assert result.model_dump() == {"token": "jwt"}
+        assert result.model_dump() == {"token": "jwt", "refresh_token": "refresh"}
+        fake_uow.refresh_tokens.create.assert_awaited_once()
         fake_uow.commit.assert_awaited_once()
     else:
+        fake_uow.refresh_tokens.create.assert_not_awaited()
         fake_uow.commit.assert_not_awaited()
 
 
@@ -83,15 +96,18 @@ async def test_login(
             return_value=User(hashed_password="hash")
         )
 
-        mocker.patch("auth.auth_service.verify_password", return_value=False)
+        mocker.patch("auth.auth_service.verify_password_async", return_value=False)
     else:
         fake_uow.users.get_user_by_username = mocker.AsyncMock(
             return_value=User(hashed_password="hash")
         )
 
-        mocker.patch("auth.auth_service.verify_password", return_value=True)
+        mocker.patch("auth.auth_service.verify_password_async", return_value=True)
         mocker.patch("auth.auth_service.encode_token", return_value="jwt")
+        mocker.patch("auth.auth_service.generate_refresh_token", return_value="refresh")
+        mocker.patch("auth.auth_service.password_needs_rehash", return_value=False)
 
+    fake_uow.refresh_tokens.create = mocker.AsyncMock(return_value=None)
     auth_service = AuthService(fake_uow)
 
     with expectation:
@@ -100,9 +116,222 @@ async def test_login(
     fake_uow.users.get_user_by_username.assert_awaited_once_with(
         fake_credentials_schema.username
     )
-    fake_uow.__aenter__.assert_awaited_once()
-    fake_uow.__aexit__.assert_awaited_once()
-    fake_uow.commit.assert_not_awaited()
 
     if not user_not_found and not password_is_invalid:
-        assert result.model_dump() == {"token": "jwt"}
+        assert result.model_dump() == {"token": "jwt", "refresh_token": "refresh"}
+        fake_uow.refresh_tokens.create.assert_awaited_once()
+        fake_uow.commit.assert_awaited_once()
+    else:
+        fake_uow.__aenter__.assert_awaited_once()
+        fake_uow.refresh_tokens.create.assert_not_awaited()
+        fake_uow.commit.assert_not_awaited()
+
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_register_bulk(mocker: MockerFixture, fake_uow: Mock) -> None:
+    credentials_list = [
+        CredentialsSchema(username="user_1", password="11111111"),
+        CredentialsSchema(username="user_2", password="22222222"),
+        CredentialsSchema(username="user_3", password="33333333"),
+        CredentialsSchema(username="user_1", password="44444444")
+    ]
+    user_id = uuid4()
+
+    get_password_hashes_bulk = mocker.patch(
+        "auth.auth_service.get_password_hashes_bulk",
+        return_value=["hash_1", "hash_2"]
+    )
+    fake_uow.users.get_existing_usernames = mocker.AsyncMock(return_value={"user_3"})
+    fake_uow.users.bulk_create = mocker.AsyncMock(
+        return_value=[User(user_id=user_id, username="user_1")]
+    )
+
+    auth_service = AuthService(fake_uow)
+    result = await auth_service.register_bulk(credentials_list)
+
+    get_password_hashes_bulk.assert_awaited_once_with(["11111111", "22222222"])
+    fake_uow.users.bulk_create.assert_awaited_once_with([
+        {"username": "user_1", "hashed_password": "hash_1"},
+        {"username": "user_2", "hashed_password": "hash_2"}
+    ])
+    fake_uow.commit.assert_awaited_once()
+
+    assert result.model_dump() == {
+        "created": [{"user_id": user_id, "username": "user_1"}],
+        "conflicts": ["user_1", "user_3", "user_2"]
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_register_bulk_too_large(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_credentials_schema: CredentialsSchema
+) -> None:
+    mocker.patch("auth.auth_service.settings.BULK_REGISTRATION_MAX_USERS", 1)
+
+    auth_service = AuthService(fake_uow)
+
+    with pytest.raises(BulkRegistrationTooLargeError):
+        await auth_service.register_bulk([fake_credentials_schema] * 2)
+
+    fake_uow.__aenter__.assert_not_awaited()
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_login_rehashes_outdated_password(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_credentials_schema: CredentialsSchema
+) -> None:
+    user = User(user_id=uuid4(), hashed_password="old_hash")
+    fake_uow.users.get_user_by_username = mocker.AsyncMock(return_value=user)
+    fake_uow.users.update_password_hash = mocker.AsyncMock(return_value=True)
+    fake_uow.refresh_tokens.create = mocker.AsyncMock(return_value=None)
+
+    mocker.patch("auth.auth_service.verify_password_async", return_value=True)
+    mocker.patch("auth.auth_service.password_needs_rehash", return_value=True)
+    mocker.patch("auth.auth_service.get_password_hash_async", return_value="new_hash")
+
+    auth_service = AuthService(fake_uow)
+    await auth_service.login(fake_credentials_schema)
+
+    assert len(background_tasks) == 1
+    await asyncio.gather(*background_tasks)
+
+    fake_uow.users.update_password_hash.assert_awaited_once_with(
+        user.user_id,
+        "old_hash",
+        "new_hash"
+    )
+    assert fake_uow.commit.await_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["stored_token", "token_is_reused", "expectation"],
+    [
+        (None, False, nullcontext()),
+        (None, False, pytest.raises(InvalidRefreshTokenError)),
+        (RefreshToken(family_id=uuid4()), False, pytest.raises(InvalidRefreshTokenError)),
+        (RefreshToken(family_id=uuid4()), True, pytest.raises(InvalidRefreshTokenError))
+    ]
+)
+async def test_refresh(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        stored_token: RefreshToken | None,
+        token_is_reused: bool,
+        expectation: ContextManager[Any]
+) -> None:
+    """
+    Первый случай - успешная ротация, второй - неизвестный токен,
+    третий - истекший токен, четвертый - повторное использование токена
+    """
+
+    token_is_valid = isinstance(expectation, nullcontext)
+    user_id, family_id = uuid4(), uuid4()
+
+    if stored_token is not None and token_is_reused:
+        stored_token.used_at = datetime.now(UTC)
+
+    mocker.patch("auth.auth_service.encode_token", return_value="jwt")
+    mocker.patch("auth.auth_service.generate_refresh_token", return_value="new_refresh")
+    fake_uow.refresh_tokens.use = mocker.AsyncMock(
+        return_value=(user_id, family_id) if token_is_valid else None
+    )
+    fake_uow.refresh_tokens.get = mocker.AsyncMock(return_value=stored_token)
+    fake_uow.refresh_tokens.create = mocker.AsyncMock(return_value=None)
+    fake_uow.refresh_tokens.revoke_family = mocker.AsyncMock(return_value=None)
+
+    auth_service = AuthService(fake_uow)
+
+    with expectation:
+        result = await auth_service.refresh("refresh")
+
+    fake_uow.refresh_tokens.use.assert_awaited_once()
+
+    if token_is_valid:
+        assert result.model_dump() == {"token": "jwt", "refresh_token": "new_refresh"}
+        assert fake_uow.refresh_tokens.create.await_args.args[0]["family_id"] == family_id
+        fake_uow.commit.assert_awaited_once()
+    elif token_is_reused:
+        fake_uow.refresh_tokens.create.assert_not_awaited()
+        fake_uow.refresh_tokens.revoke_family.assert_awaited_once_with(
+            stored_token.family_id
+        )
+        fake_uow.commit.assert_awaited_once()
+    else:
+        fake_uow.refresh_tokens.create.assert_not_awaited()
+        fake_uow.refresh_tokens.revoke_family.assert_not_awaited()
+        fake_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["key_hash", "expectation"],
+    [
+        ("a" * 64, nullcontext()),
+        (None, pytest.raises(ApiKeyNotFoundError))
+    ]
+)
+async def test_delete_api_key(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        key_hash: str | None,
+        expectation: ContextManager[Any]
+) -> None:
+    fake_revocation_list = mocker.patch("auth.auth_service.revocation_list")
+    fake_uow.api_keys.delete_user_api_key = mocker.AsyncMock(return_value=key_hash)
+    fake_uow.revoked_tokens.revoke = mocker.AsyncMock(return_value=None)
+    user_id, api_key_id = uuid4(), uuid4()
+
+    auth_service = AuthService(fake_uow)
+
+    with expectation:
+        await auth_service.delete_api_key(user_id, api_key_id)
+
+    fake_uow.api_keys.delete_user_api_key.assert_awaited_once_with(user_id, api_key_id)
+
+    if key_hash is not None:
+        fake_uow.revoked_tokens.revoke.assert_awaited_once()
+        assert fake_uow.revoked_tokens.revoke.await_args.args[0] == get_api_key_jti(key_hash)
+        fake_uow.commit.assert_awaited_once()
+        fake_revocation_list.add.assert_called_once()
+    else:
+        fake_uow.revoked_tokens.revoke.assert_not_awaited()
+        fake_uow.commit.assert_not_awaited()
+        fake_revocation_list.add.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(["key_exists"], [(True,), (False,)])
+async def test_get_api_key_payload(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        key_exists: bool
+) -> None:
+    user_id = uuid4()
+    key_hash = "a" * 64
+    fake_uow.api_keys.get_user_id_by_key_hash = mocker.AsyncMock(
+        return_value=user_id if key_exists else None
+    )
+
+    auth_service = AuthService(fake_uow)
+    payload = await auth_service.get_api_key_payload(key_hash)
+
+    fake_uow.api_keys.get_user_id_by_key_hash.assert_awaited_once_with(key_hash)
+
+    if key_exists:
+        assert payload.sub == user_id
+        assert payload.jti == get_api_key_jti(key_hash)
+        assert payload.exp > payload.iat
+    else:
+        assert payload is None
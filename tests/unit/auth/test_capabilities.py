@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, UTC
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from pytest_mock import MockerFixture
+
+from auth.capabilities import (
+    MembershipVersions,
+    get_capability_claims,
+    has_group_access
+)
+from auth.schemas import TokenPayloadSchema
+
+
+@pytest.mark.unit
+def test_membership_versions() -> None:
+    versions = MembershipVersions()
+    user_id = uuid4()
+
+    assert versions.is_current(user_id, 0)
+
+    versions.set(user_id, 2, datetime.now(UTC))
+    versions.set(user_id, 1, datetime.now(UTC))
+
+    assert not versions.is_current(user_id, 1)
+    assert versions.is_current(user_id, 2)
+
+    versions.set(uuid4(), 1, datetime.now(UTC) - timedelta(days=1))
+    versions.prune()
+
+    assert len(versions) == 1
+
+
+@pytest.mark.unit
+def test_has_group_access(
+        mocker: MockerFixture,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    versions = mocker.patch("auth.capabilities.membership_versions", MembershipVersions())
+    group_id = uuid4()
+    payload = fake_token_payload.model_copy(update={"grp": frozenset([group_id]), "mv": 0})
+
+    assert not has_group_access(fake_token_payload, group_id)
+    assert not has_group_access(payload, uuid4())
+    assert has_group_access(payload, group_id)
+
+    versions.set(payload.sub, 1, datetime.now(UTC))
+
+    assert not has_group_access(payload, group_id)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["enabled", "groups_count", "has_claims"],
+    [
+        (False, 1, False),
+        (True, 2, True),
+        (True, 3, False)
+    ]
+)
+async def test_get_capability_claims(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        enabled: bool,
+        groups_count: int,
+        has_claims: bool
+) -> None:
+    mocker.patch("auth.capabilities.settings.CAPABILITY_TOKENS_ENABLED", enabled)
+    mocker.patch("auth.capabilities.settings.CAPABILITY_TOKEN_MAX_GROUPS", 2)
+
+    group_ids = [uuid4() for _ in range(groups_count)]
+    fake_uow.users.get_membership_version = mocker.AsyncMock(return_value=3)
+    fake_uow.groups.get_user_group_ids = mocker.AsyncMock(return_value=group_ids)
+
+    claims = await get_capability_claims(fake_uow, uuid4())
+
+    if has_claims:
+        assert claims == {"mv": 3, "grp": [group_id.hex for group_id in group_ids]}
+        payload = TokenPayloadSchema(
+            sub=uuid4(),
+            iat=datetime.now(UTC),
+            exp=datetime.now(UTC),
+            **claims
+        )
+        assert payload.grp == frozenset(group_ids)
+    else:
+        assert claims == {}
@@ -1,6 +1,19 @@
+import asyncio
+import time
+
 import pytest
 
-from auth.hashing import get_password_hash, verify_password
+from auth.exceptions import HashingPoolOverloadedError
+from auth.hashing import (
+    HashingPool,
+    create_crypt_context,
+    get_password_hash,
+    password_needs_rehash,
+    verify_password,
+    get_password_hash_async,
+    verify_password_async
+)
+from core import settings
 
 
 @pytest.mark.unit
@@ -20,3 +33,72 @@ def test_hashing() -> None:
 
     fake_password = "qwerty12"
     assert not verify_password(fake_password, hash_1)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["scheme", "bcrypt_rounds", "needs_rehash"],
+    [
+        ("bcrypt", settings.PASSWORD_HASHING_BCRYPT_ROUNDS, False),
+        ("bcrypt", 4, True),
+        ("scrypt", settings.PASSWORD_HASHING_BCRYPT_ROUNDS, True)
+    ]
+)
+def test_password_needs_rehash(
+        scheme: str,
+        bcrypt_rounds: int,
+        needs_rehash: bool
+) -> None:
+    """Хеши другого алгоритма или с меньшей стоимостью считаются устаревшими"""
+
+    context = create_crypt_context(
+        scheme=scheme,
+        bcrypt_rounds=bcrypt_rounds,
+        scrypt_rounds=4,
+        scrypt_block_size=8
+    )
+    hashed_password = context.hash("11111111")
+
+    assert password_needs_rehash(hashed_password) is needs_rehash
+    assert verify_password("11111111", hashed_password)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_async_hashing() -> None:
+    """Тест асинхронных вариантов, выполняющихся в пуле процессов"""
+
+    password = "11111111"
+    hashed_password = await get_password_hash_async(password)
+
+    assert await verify_password_async(password, hashed_password)
+    assert not await verify_password_async("qwerty12", hashed_password)
+    assert verify_password(password, hashed_password)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_hashing_pool_overload() -> None:
+    """
+    Пул с одним процессом и без очереди должен сразу отклонять
+    вторую задачу, пока первая еще выполняется
+    """
+
+    pool = HashingPool(workers=1, queue_size=0)
+
+    try:
+        await pool.warm_up()
+
+        busy_task = asyncio.create_task(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        assert pool.pending == 1
+
+        with pytest.raises(HashingPoolOverloadedError):
+            await pool.run(time.sleep, 0)
+
+        await busy_task
+        assert pool.pending == 0
+
+        await pool.run(time.sleep, 0)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, UTC
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from pytest_mock import MockerFixture
+
+from auth.auth_service import AuthService
+from auth.revocation import RevocationList
+from auth.schemas import TokenPayloadSchema
+
+
+@pytest.mark.unit
+def test_revocation_list() -> None:
+    revocation_list = RevocationList()
+    jti = uuid4().hex
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+
+    assert jti not in revocation_list
+
+    revocation_list.add(jti, expires_at)
+    revocation_list.add(jti, expires_at)
+
+    assert jti in revocation_list
+    assert uuid4().hex not in revocation_list
+    assert len(revocation_list) == 1
+
+
+@pytest.mark.unit
+def test_revocation_list_prune() -> None:
+    revocation_list = RevocationList()
+    expired_jti = uuid4().hex
+    active_jti = uuid4().hex
+
+    revocation_list.add(expired_jti, datetime.now(UTC) - timedelta(minutes=2))
+    revocation_list.add(active_jti, datetime.now(UTC) + timedelta(minutes=2))
+    revocation_list.prune()
+
+    assert expired_jti not in revocation_list
+    assert active_jti in revocation_list
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_revocation_list_sync(mocker: MockerFixture, fake_uow: Mock) -> None:
+    revocation_list = RevocationList()
+    jti = uuid4().hex
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+
+    fake_uow.revoked_tokens.get_revoked_since = mocker.AsyncMock(
+        return_value=[(jti, expires_at)]
+    )
+
+    await revocation_list.sync(fake_uow)
+    await revocation_list.sync(fake_uow)
+
+    assert jti in revocation_list
+
+    first_call, second_call = fake_uow.revoked_tokens.get_revoked_since.await_args_list
+    assert first_call.args == (None,)
+    assert second_call.args[0] is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_logout(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    revocation_list = mocker.patch("auth.auth_service.revocation_list")
+    fake_uow.revoked_tokens.revoke = mocker.AsyncMock(return_value=None)
+    fake_uow.refresh_tokens.revoke_family = mocker.AsyncMock(return_value=None)
+    payload = fake_token_payload.model_copy(update={"jti": uuid4().hex, "fam": uuid4()})
+
+    auth_service = AuthService(fake_uow)
+    await auth_service.logout(payload)
+
+    fake_uow.revoked_tokens.revoke.assert_awaited_once_with(payload.jti, payload.exp)
+    fake_uow.refresh_tokens.revoke_family.assert_awaited_once_with(payload.fam)
+    fake_uow.commit.assert_awaited_once()
+    revocation_list.add.assert_called_once_with(payload.jti, payload.exp)
+
+    await auth_service.logout(fake_token_payload)
+    fake_uow.revoked_tokens.revoke.assert_awaited_once()
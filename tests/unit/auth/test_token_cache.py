@@ -0,0 +1,51 @@
+import time
+import uuid
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from auth import tokens
+from auth.dependencies import verify_token
+from auth.token_cache import token_cache, get_token_digest
+
+
+def get_credentials(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.unit
+def test_verify_token_uses_cache(mocker) -> None:
+    token = tokens.encode_token({"sub": str(uuid.uuid4())})
+    decode_token = mocker.patch(
+        "auth.dependencies.decode_token",
+        wraps=tokens.decode_token
+    )
+
+    payload_1 = verify_token(get_credentials(token))
+    payload_2 = verify_token(get_credentials(token))
+
+    assert payload_1 is payload_2
+    decode_token.assert_called_once_with(token)
+    assert token_cache.get(get_token_digest(token)) is payload_1
+
+
+@pytest.mark.unit
+def test_verify_token_cache_expiration() -> None:
+    """Payload просроченного токена не возвращается из кеша"""
+
+    now = datetime.now(UTC)
+    token = tokens.encode_token({
+        "sub": str(uuid.uuid4()),
+        "iat": now,
+        "exp": now + timedelta(seconds=1)
+    })
+
+    verify_token(get_credentials(token))
+    time.sleep(1.5)
+
+    with pytest.raises(HTTPException):
+        verify_token(get_credentials(token))
+
+    assert token_cache.get(get_token_digest(token)) is None
@@ -0,0 +1,95 @@
+from datetime import date
+from unittest.mock import Mock
+from uuid import uuid4
+
+import pytest
+from pytest_mock import MockerFixture
+
+from auth import TokenPayloadSchema
+from core import settings
+from exceptions import BatchTooLargeError
+from models import User
+from schemas import BatchSchema
+from services import BatchService
+from ..groups.helpers import make_fake_group
+from ..tasks.helpers import make_fake_task
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_run_batch(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    fake_groups = [make_fake_group() for _ in range(2)]
+    fake_task_schema, fake_task_model = make_fake_task()
+    missing_task_id = uuid4()
+
+    fake_uow.groups.get_many_for_user = mocker.AsyncMock(
+        return_value=[fake_group_model for _, fake_group_model in fake_groups]
+    )
+    fake_uow.tasks.get_many_for_user = mocker.AsyncMock(return_value=[fake_task_model])
+    fake_uow.users.get = mocker.AsyncMock(return_value=User(
+        user_id=fake_token_payload.sub,
+        username="egor",
+        hashed_password=None,
+        created_at=date.today()
+    ))
+
+    batch_service = BatchService(fake_uow)
+
+    result = await batch_service.run_batch(
+        fake_token_payload,
+        BatchSchema(operations=[
+            {"path": "/users/me"},
+            {"path": f"/groups/{fake_groups[0][0].group_id}"},
+            {"path": f"/groups/{fake_groups[1][0].group_id}"},
+            {"path": f"/groups/{fake_groups[0][0].group_id}"},
+            {"path": f"/tasks/{fake_task_schema.task_id}"},
+            {"path": f"/tasks/{missing_task_id}"},
+            {"path": "/users/me/groups?cursor=invalid"},
+            {"path": "/groups/invalid"},
+            {"path": "/unknown"},
+            {"method": "DELETE", "path": f"/tasks/{fake_task_schema.task_id}"}
+        ])
+    )
+
+    assert [item.status for item in result.results] == [
+        200, 200, 200, 200, 200, 404, 400, 422, 404, 405
+    ]
+    assert result.results[1].body == fake_groups[0][0]
+    assert result.results[2].body == fake_groups[1][0]
+    assert result.results[4].body == fake_task_schema
+    assert result.results[5].body == {"detail": "task not found"}
+
+    # одна сессия на весь пакет и один запрос на каждый тип объектов
+    fake_uow.read_only.assert_called_once()
+    fake_uow.__aenter__.assert_awaited_once()
+    fake_uow.groups.get_many_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        [fake_groups[0][0].group_id, fake_groups[1][0].group_id]
+    )
+    fake_uow.tasks.get_many_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        [fake_task_schema.task_id, missing_task_id]
+    )
+    fake_uow.groups.get_for_user.assert_not_called()
+    fake_uow.tasks.get_for_user.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_run_batch_too_large(
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    batch_service = BatchService(fake_uow)
+
+    with pytest.raises(BatchTooLargeError):
+        await batch_service.run_batch(
+            fake_token_payload,
+            BatchSchema(operations=[{"path": "/users/me"}] * (settings.BATCH_MAX_OPERATIONS + 1))
+        )
+
+    fake_uow.read_only.assert_not_called()
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from core import ExpiringLRUCache
+
+
+@pytest.mark.unit
+def test_cache_get_set() -> None:
+    cache = ExpiringLRUCache(max_bytes=100)
+    cache.set("key", "value", expires_at=time.time() + 60, size=10)
+
+    assert cache.get("key") == "value"
+    assert cache.get("unknown") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.size == 10
+
+
+@pytest.mark.unit
+def test_cache_expiration() -> None:
+    """Просроченная запись не возвращается и удаляется из кеша"""
+
+    cache = ExpiringLRUCache(max_bytes=100)
+    cache.set("expired", "value", expires_at=time.time() - 1, size=10)
+    cache.set("key", "value", expires_at=time.time() + 0.05, size=10)
+
+    assert cache.get("expired") is None
+    assert cache.get("key") == "value"
+
+    time.sleep(0.1)
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+@pytest.mark.unit
+def test_cache_eviction() -> None:
+    """При превышении лимита вытесняются давно использованные записи"""
+
+    cache = ExpiringLRUCache(max_bytes=30)
+    expires_at = time.time() + 60
+
+    for key in ("a", "b", "c"):
+        cache.set(key, key, expires_at=expires_at, size=10)
+
+    cache.get("a")
+    cache.set("d", "d", expires_at=expires_at, size=10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("d") == "d"
+    assert cache.size == 30
+
+    cache.set("too_big", "value", expires_at=expires_at, size=31)
+
+    assert cache.get("too_big") is None
+    assert len(cache) == 3
+
+
+@pytest.mark.unit
+def test_cache_invalidate() -> None:
+    cache = ExpiringLRUCache(max_bytes=100)
+    cache.set("key", "value", expires_at=time.time() + 60, size=10)
+    cache.set("key", "new_value", expires_at=time.time() + 60, size=20)
+
+    assert cache.get("key") == "new_value"
+    assert cache.size == 20
+
+    cache.invalidate("key")
+
+    assert cache.get("key") is None
+    assert cache.size == 0
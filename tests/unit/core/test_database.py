@@ -0,0 +1,47 @@
+import pytest
+
+from core import settings
+from core.database import PoolMetrics
+
+
+@pytest.mark.unit
+def test_pool_metrics_wait_time_histogram() -> None:
+    metrics = PoolMetrics()
+
+    for seconds in (0.0001, 0.001, 0.02, 30):
+        metrics.observe_wait_time(seconds)
+
+    stats = metrics.stats()["wait_time"]
+
+    assert stats["count"] == 4
+    assert stats["sum"] == pytest.approx(30.0211)
+    assert stats["buckets"]["0.001"] == 2
+    assert stats["buckets"]["0.01"] == 2
+    assert stats["buckets"]["0.025"] == 3
+    assert stats["buckets"]["10"] == 3
+    assert stats["buckets"]["+Inf"] == 4
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["pool_size", "workers", "expected_pool_size"],
+    [
+        (None, 4, 16),
+        (None, 40, 1),
+        (5, 4, 5)
+    ]
+)
+def test_database_pool_size(
+        monkeypatch: pytest.MonkeyPatch,
+        pool_size: int | None,
+        workers: int,
+        expected_pool_size: int
+) -> None:
+    """Без явного размера пул воркера получает свою долю DATABASE_MAX_CONNECTIONS"""
+
+    monkeypatch.setattr(settings, "DATABASE_MAX_CONNECTIONS", 80)
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 4)
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", pool_size)
+    monkeypatch.setattr(settings, "WORKERS", workers)
+
+    assert settings.database_pool_size == expected_pool_size
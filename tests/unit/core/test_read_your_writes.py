@@ -0,0 +1,46 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from core import read_your_writes_middleware
+from core.read_your_writes import LSN_HEADER, LSN_COOKIE, lsn_tracker
+
+
+@pytest.fixture(scope="function")
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BaseHTTPMiddleware, dispatch=read_your_writes_middleware)
+
+    @app.get("/read")
+    async def read():
+        return {"lsn": lsn_tracker.get().lsn}
+
+    @app.post("/write")
+    async def write():
+        lsn_tracker.get().advance(100)
+
+    return app
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_read_your_writes_middleware(app: FastAPI) -> None:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/read")
+        assert response.json() == {"lsn": None}
+        assert LSN_HEADER not in response.headers
+
+        response = await client.post("/write")
+        assert response.headers[LSN_HEADER] == "100"
+
+        # LSN из cookie
+        response = await client.get("/read")
+        assert response.json() == {"lsn": 100}
+
+        client.cookies.clear()
+        response = await client.get("/read", headers={LSN_HEADER: "200"})
+        assert response.json() == {"lsn": 200}
+
+        response = await client.get("/read", cookies={LSN_COOKIE: "invalid"})
+        assert response.json() == {"lsn": None}
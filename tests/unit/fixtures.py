@@ -17,6 +17,7 @@ def fake_uow(mocker: MockerFixture) -> Mock:
     fake_uow.__aexit__ = mocker.AsyncMock(return_value=None)
     fake_uow.commit = mocker.AsyncMock(return_value=None)
     fake_uow.rollback = mocker.AsyncMock(return_value=None)
+    fake_uow.read_only = mocker.Mock(return_value=fake_uow)
 
     return fake_uow
 
@@ -8,13 +8,16 @@ from pytest_mock import MockerFixture
 from sqlalchemy.exc import IntegrityError
 
 from auth import TokenPayloadSchema
+from core import settings
 from exceptions import (
     UserGroupAttachError,
     UserGroupDetachError,
     GroupNotFoundError,
+    InvalidCursorError,
+    InvalidFieldsError,
     ResultNotFound
 )
-from models import Group
+from models import Group, User, Task
 from schemas import (
     GroupSchema,
     GroupSchemaCreate,
@@ -22,9 +25,11 @@ from schemas import (
     GroupItemsSchema,
     GroupUsersSchema,
     GroupTasksSchema,
-    UserGroupSchemaAttach
+    UserGroupSchemaAttach,
+    UsersGroupSchemaBulk
 )
 from services import GroupsService
+from services.pagination import decode_cursor, encode_cursor
 from .helpers import make_fake_group
 
 
@@ -85,11 +90,10 @@ async def test_create_group(
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["group_not_found", "user_not_in_group", "expectation"],
+    ["group_not_found", "expectation"],
     [
-        (True, False, pytest.raises(GroupNotFoundError)),
-        (False, True, pytest.raises(GroupNotFoundError)),
-        (False, False, nullcontext())
+        (True, pytest.raises(GroupNotFoundError)),
+        (False, nullcontext())
     ]
 )
 async def test_get_group(
@@ -97,13 +101,13 @@ async def test_get_group(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         group_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     """
     Тест всех методов для получения информации о группе.
-    Тестриует на каждом из методов поведение при отсутствии группы,
-    при отсутствии прав на чтение группы, а также нормальный сценарий.
+    Тестриует на каждом из методов поведение при отсутствии группы
+    (или прав на ее чтение - репозиторий проверяет их в том же запросе),
+    а также нормальный сценарий.
 
     Тестируемые методы:
     GroupsService.get_group_basic
@@ -115,19 +119,11 @@ async def test_get_group(
     fake_group_id = uuid4()
 
     if group_not_found:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.get = mocker.AsyncMock(return_value=None)
+        fake_uow.groups.get_for_user = mocker.AsyncMock(return_value=None)
         fake_uow.groups.get_group_details = mocker.AsyncMock(return_value=None)
         fake_uow.groups.get_group_users = mocker.AsyncMock(return_value=None)
         fake_uow.groups.get_group_tasks = mocker.AsyncMock(return_value=None)
 
-    elif user_not_in_group:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
-
     else:
         fake_group_schema, fake_group_model = make_fake_group(group_id=fake_group_id)
 
@@ -145,10 +141,7 @@ async def test_get_group(
             tasks=[],
         )
 
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.get = mocker.AsyncMock(
+        fake_uow.groups.get_for_user = mocker.AsyncMock(
             return_value=fake_group_model
         )
         fake_uow.groups.get_group_details = mocker.AsyncMock(
@@ -184,30 +177,222 @@ async def test_get_group(
             fake_group_id
         )
 
-    assert fake_uow.groups.get_group_id_if_user_in_group.call_count == 4
-    fake_uow.groups.get_group_id_if_user_in_group.assert_awaited_with(
+    # репозиторий запрашивает на одну строку больше страницы,
+    # чтобы узнать, есть ли следующая
+    fake_uow.groups.get_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
         fake_group_id
     )
+    fake_uow.groups.get_group_details.assert_awaited_once_with(
+        fake_token_payload.sub,
+        fake_group_id,
+        settings.PAGE_SIZE + 1
+    )
+    for method in (fake_uow.groups.get_group_users, fake_uow.groups.get_group_tasks):
+        method.assert_awaited_once_with(
+            fake_token_payload.sub,
+            fake_group_id,
+            settings.PAGE_SIZE + 1,
+            None
+        )
+
     assert fake_uow.__aenter__.call_count == 4
     assert fake_uow.__aexit__.call_count == 4
     fake_uow.commit.assert_not_awaited()
 
-    if not group_not_found and not user_not_in_group:
+
+    if not group_not_found:
         assert group_basic_result.model_dump() == fake_group_schema.model_dump()
         assert group_details_result.model_dump() == fake_group_items_schema.model_dump()
         assert group_users_result.model_dump() == fake_group_users_schema.model_dump()
         assert group_tasks_result.model_dump() == fake_group_tasks_schema.model_dump()
 
 
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_groups(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    fake_groups = [make_fake_group() for _ in range(2)]
+    missing_group_id = uuid4()
+
+    fake_uow.groups.get_many_for_user = mocker.AsyncMock(
+        return_value=[fake_group_model for _, fake_group_model in fake_groups]
+    )
+
+    groups_service = GroupsService(fake_uow)
+
+    group_ids = [missing_group_id, fake_groups[1][0].group_id, fake_groups[0][0].group_id]
+    result = await groups_service.get_groups(fake_token_payload, group_ids)
+
+    fake_uow.groups.get_many_for_user.assert_awaited_once_with(fake_token_payload.sub, group_ids)
+    assert result.groups == [fake_groups[1][0], fake_groups[0][0]]
+    assert result.not_found == [missing_group_id]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_group_fields(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    fake_group_schema, fake_group_model = make_fake_group()
+    fake_tasks = [Task(task_id=uuid4(), name="task") for _ in range(2)]
+    fake_group_model.tasks = fake_tasks
+    fake_uow.groups.get_for_user = mocker.AsyncMock(return_value=fake_group_model)
+
+    groups_service = GroupsService(fake_uow)
+
+    result = await groups_service.get_group(
+        fake_token_payload,
+        fake_group_schema.group_id,
+        fields="name",
+        include="tasks",
+        limit=1
+    )
+
+    # из БД запрашиваются только нужные колонки и связи
+    fake_uow.groups.get_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        fake_group_schema.group_id,
+        ("name",),
+        users_page=None,
+        tasks_page=(2, None)
+    )
+    assert result.model_dump() == {
+        "name": fake_group_schema.name,
+        "tasks": [{"task_id": fake_tasks[0].task_id, "name": "task"}],
+        "tasks_next_cursor": encode_cursor(fake_tasks[0].task_id)
+    }
+
+    # схема ответа создается один раз на набор полей
+    same_fields_result = await groups_service.get_group(
+        fake_token_payload,
+        fake_group_schema.group_id,
+        fields="name,name",
+        include="tasks",
+        limit=1
+    )
+    assert type(same_fields_result) is type(result)
+
+    with pytest.raises(InvalidFieldsError):
+        await groups_service.get_group(
+            fake_token_payload,
+            fake_group_schema.group_id,
+            include="owner"
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_group_stats(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """Счетчики группы читаются из ее колонок вместе с запрошенными полями"""
+
+    fake_group_schema, fake_group_model = make_fake_group()
+    fake_group_model.task_count = 3
+    fake_group_model.member_count = 2
+    fake_group_model.estimated_time_sum = 90
+    fake_uow.groups.get_for_user = mocker.AsyncMock(return_value=fake_group_model)
+
+    groups_service = GroupsService(fake_uow)
+
+    result = await groups_service.get_group(
+        fake_token_payload,
+        fake_group_schema.group_id,
+        fields="name",
+        include="stats"
+    )
+
+    fake_uow.groups.get_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        fake_group_schema.group_id,
+        ("name", "task_count", "member_count", "estimated_time_sum"),
+        users_page=None,
+        tasks_page=None
+    )
+    assert result.model_dump() == {
+        "name": fake_group_schema.name,
+        "task_count": 3,
+        "member_count": 2,
+        "estimated_time_sum": 90
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize("include", [None, "stats"])
+async def test_get_user_groups_list_stats(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema,
+        include: str | None
+) -> None:
+    fake_group_schema, fake_group_model = make_fake_group()
+    fake_group_model.task_count = 1
+    fake_group_model.member_count = 1
+    fake_group_model.estimated_time_sum = 0
+    fake_uow.groups.get_user_groups_list = mocker.AsyncMock(return_value=[fake_group_model])
+
+    groups_service = GroupsService(fake_uow)
+
+    result = await groups_service.get_user_groups_list(fake_token_payload, include=include)
+
+    fake_uow.groups.get_user_groups_list.assert_awaited_once_with(
+        fake_token_payload.sub,
+        settings.PAGE_SIZE + 1,
+        None,
+        include is not None
+    )
+    expected = {"group_id": fake_group_schema.group_id, "name": fake_group_schema.name}
+
+    if include is not None:
+        expected.update(task_count=1, member_count=1, estimated_time_sum=0)
+
+    assert result.model_dump()["groups"] == [expected]
+
+    with pytest.raises(InvalidFieldsError):
+        await groups_service.get_user_groups_list(fake_token_payload, include="users")
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_reconcile_counters(
+        mocker: MockerFixture,
+        fake_uow: Mock
+) -> None:
+    """Пачки групп сверяются по очереди, каждая в своей транзакции, до конца таблицы"""
+
+    group_ids = [uuid4(), uuid4()]
+    fake_uow.groups.reconcile_counters = mocker.AsyncMock(
+        side_effect=[(group_ids[0], 2), (group_ids[1], 1), (None, 0)]
+    )
+
+    groups_service = GroupsService(fake_uow)
+
+    assert await groups_service.reconcile_counters(batch_size=2) == 3
+
+    assert fake_uow.groups.reconcile_counters.await_args_list == [
+        mocker.call(None, 2),
+        mocker.call(group_ids[0], 2),
+        mocker.call(group_ids[1], 2)
+    ]
+    assert fake_uow.commit.await_count == 3
+
+
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["group_not_found", "user_not_in_group", "expectation"],
+    ["group_not_found", "expectation"],
     [
-        (True, False, pytest.raises(GroupNotFoundError)),
-        (False, True, pytest.raises(GroupNotFoundError)),
-        (False, False, nullcontext())
+        (True, pytest.raises(GroupNotFoundError)),
+        (False, nullcontext())
     ]
 )
 async def test_full_update_group(
@@ -215,12 +400,11 @@ async def test_full_update_group(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         group_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     """
-    Тест поведения метода update_group при отсутствии группы, при отсутствии
-    у клиента прав на обновление группы (если клиент не является участником этой группы),
+    Тест поведения метода update_group при отсутствии группы или прав
+    на ее обновление (если клиент не является участником этой группы),
     а также при полном обновлении полей группы
     """
 
@@ -231,15 +415,7 @@ async def test_full_update_group(
     )
 
     if group_not_found:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.update = mocker.AsyncMock(side_effect=ResultNotFound())
-
-    elif user_not_in_group:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
+        fake_uow.groups.update_for_user = mocker.AsyncMock(return_value=None)
 
     else:
         fake_group_schema, fake_group_model = make_fake_group(
@@ -247,10 +423,7 @@ async def test_full_update_group(
             **fake_group_schema_update.model_dump()
         )
 
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.update = mocker.AsyncMock(
+        fake_uow.groups.update_for_user = mocker.AsyncMock(
             return_value=fake_group_model
         )
 
@@ -263,19 +436,16 @@ async def test_full_update_group(
             fake_group_schema_update
         )
 
-    fake_uow.groups.get_group_id_if_user_in_group.assert_awaited_once_with(
+    fake_uow.groups.update_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
-        fake_group_id
+        fake_group_id,
+        fake_group_schema_update.model_dump()
     )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
 
-    if not group_not_found and not user_not_in_group:
+    if not group_not_found:
         assert result.model_dump() == fake_group_schema.model_dump()
-        fake_uow.groups.update.assert_awaited_once_with(
-            fake_group_id,
-            fake_group_schema_update.model_dump()
-        )
         fake_uow.commit.assert_awaited_once()
     else:
         fake_uow.commit.assert_not_awaited()
@@ -305,10 +475,7 @@ async def test_partial_update_group(
 
     fake_group_id = fake_group_schema.group_id
 
-    fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-        return_value=fake_group_id
-    )
-    fake_uow.groups.update = mocker.AsyncMock(
+    fake_uow.groups.update_for_user = mocker.AsyncMock(
         return_value=fake_group_model
     )
 
@@ -321,14 +488,11 @@ async def test_partial_update_group(
     )
     assert result.model_dump() == fake_group_schema.model_dump()
 
-    fake_uow.groups.update.assert_awaited_once_with(
+    fake_uow.groups.update_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
         fake_group_id,
         fake_group_schema_update.model_dump(exclude_none=True)
     )
-    fake_uow.groups.get_group_id_if_user_in_group.assert_awaited_once_with(
-        fake_token_payload.sub,
-        fake_group_id
-    )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
     fake_uow.commit.assert_awaited_once()
@@ -337,11 +501,10 @@ async def test_partial_update_group(
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["group_not_found", "user_not_in_group", "expectation"],
+    ["group_not_found", "expectation"],
     [
-        (True, False, pytest.raises(GroupNotFoundError)),
-        (False, True, pytest.raises(GroupNotFoundError)),
-        (False, False, nullcontext())
+        (True, pytest.raises(GroupNotFoundError)),
+        (False, nullcontext())
     ]
 )
 async def test_delete_group(
@@ -349,29 +512,17 @@ async def test_delete_group(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         group_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     fake_group_id = uuid4()
 
     if group_not_found:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.delete = mocker.AsyncMock(side_effect=ResultNotFound())
-
-    elif user_not_in_group:
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
+        fake_uow.groups.delete_for_user = mocker.AsyncMock(return_value=None)
 
     else:
         fake_group_schema, fake_group_model = make_fake_group(group_id=fake_group_id)
 
-        fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_group_id
-        )
-        fake_uow.groups.delete = mocker.AsyncMock(return_value=fake_group_model)
+        fake_uow.groups.delete_for_user = mocker.AsyncMock(return_value=fake_group_model)
 
     groups_service = GroupsService(fake_uow)
 
@@ -381,14 +532,14 @@ async def test_delete_group(
             fake_group_id
         )
 
-    fake_uow.groups.get_group_id_if_user_in_group.assert_awaited_once_with(
+    fake_uow.groups.delete_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
         fake_group_id
     )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
 
-    if not group_not_found and not user_not_in_group:
+    if not group_not_found:
         assert result.model_dump() == fake_group_schema.model_dump()
 
         fake_uow.commit.assert_awaited_once()
@@ -501,6 +652,7 @@ async def test_remove_user_from_group(
         fake_uow.groups.remove_user_from_group = mocker.AsyncMock(
             return_value=None
         )
+        fake_uow.users.bump_membership_version = mocker.AsyncMock(return_value=1)
 
     groups_service = GroupsService(fake_uow)
 
@@ -522,3 +674,186 @@ async def test_remove_user_from_group(
         fake_uow.commit.assert_awaited_once()
     else:
         fake_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_group_users_pages(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """
+    Лишняя строка из репозитория превращается в курсор следующей страницы,
+    а курсор из запроса - в ключ, после которого начинается страница
+    """
+
+    fake_group_schema, fake_group_model = make_fake_group()
+    fake_users = sorted(
+        [User(user_id=uuid4(), username=f"user{i}") for i in range(3)],
+        key=lambda user: user.user_id
+    )
+    fake_group_model.users = fake_users
+
+    fake_uow.groups.get_group_users = mocker.AsyncMock(return_value=fake_group_model)
+
+    groups_service = GroupsService(fake_uow)
+
+    result = await groups_service.get_group_users(
+        fake_token_payload,
+        fake_group_schema.group_id,
+        limit=2
+    )
+    assert [user.user_id for user in result.users] == [
+        user.user_id for user in fake_users[:2]
+    ]
+    assert decode_cursor(result.users_next_cursor) == fake_users[1].user_id
+
+    fake_group_model.users = fake_users[2:]
+
+    result = await groups_service.get_group_users(
+        fake_token_payload,
+        fake_group_schema.group_id,
+        limit=2,
+        cursor=result.users_next_cursor
+    )
+    assert [user.user_id for user in result.users] == [fake_users[2].user_id]
+    assert result.users_next_cursor is None
+
+    fake_uow.groups.get_group_users.assert_awaited_with(
+        fake_token_payload.sub,
+        fake_group_schema.group_id,
+        3,
+        fake_users[1].user_id
+    )
+
+    with pytest.raises(InvalidCursorError):
+        await groups_service.get_group_users(
+            fake_token_payload,
+            fake_group_schema.group_id,
+            cursor="not a cursor"
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize("user_in_group", [True, False])
+async def test_stream_group_tasks(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema,
+        user_in_group: bool
+) -> None:
+    """Пачки из репозитория отдаются как есть; без доступа поток сразу завершается ошибкой"""
+
+    group_id = uuid4()
+    fake_tasks = [Task(task_id=uuid4(), name=f"task{i}") for i in range(3)]
+
+    async def fake_stream():
+        yield fake_tasks[:2]
+        yield fake_tasks[2:]
+
+    fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
+        return_value=group_id if user_in_group else None
+    )
+    fake_uow.groups.stream_group_tasks = mocker.Mock(return_value=fake_stream())
+
+    groups_service = GroupsService(fake_uow)
+    stream = groups_service.stream_group_tasks(fake_token_payload, group_id)
+
+    if user_in_group:
+        batches = [batch async for batch in stream]
+
+        assert [[task.task_id for task in batch] for batch in batches] == [
+            [task.task_id for task in fake_tasks[:2]],
+            [fake_tasks[2].task_id]
+        ]
+        fake_uow.groups.stream_group_tasks.assert_called_once_with(group_id)
+    else:
+        with pytest.raises(GroupNotFoundError):
+            await anext(stream)
+
+        fake_uow.groups.stream_group_tasks.assert_not_called()
+
+    fake_uow.read_only.assert_called_once()
+    fake_uow.__aexit__.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["user_in_group", "expectation"],
+    [
+        (True, nullcontext()),
+        (False, pytest.raises(UserGroupAttachError))
+    ]
+)
+async def test_add_users_to_group(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema,
+        user_in_group: bool,
+        expectation: ContextManager[Any]
+) -> None:
+    """Результат запроса раскладывается на added, skipped и missing в порядке запроса"""
+
+    group_id = uuid4()
+    added_id, skipped_id, missing_id = uuid4(), uuid4(), uuid4()
+
+    fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
+        return_value=group_id if user_in_group else None
+    )
+    fake_uow.groups.bulk_add_users_to_group = mocker.AsyncMock(
+        return_value=[(skipped_id, False), (added_id, True)]
+    )
+
+    groups_service = GroupsService(fake_uow)
+
+    with expectation:
+        result = await groups_service.add_users_to_group(
+            fake_token_payload,
+            group_id,
+            UsersGroupSchemaBulk(user_ids=[missing_id, added_id, skipped_id, added_id])
+        )
+
+    if user_in_group:
+        assert result.added == [added_id]
+        assert result.skipped == [skipped_id]
+        assert result.missing == [missing_id]
+        fake_uow.groups.bulk_add_users_to_group.assert_awaited_once_with(
+            group_id,
+            [missing_id, added_id, skipped_id]
+        )
+        fake_uow.commit.assert_awaited_once()
+    else:
+        fake_uow.groups.bulk_add_users_to_group.assert_not_awaited()
+        fake_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_remove_users_from_group(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """Новые версии членства удаленных пользователей сразу попадают в локальный кеш"""
+
+    group_id = uuid4()
+    removed_id, missing_id = uuid4(), uuid4()
+
+    fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(return_value=group_id)
+    fake_uow.groups.bulk_remove_users_from_group = mocker.AsyncMock(return_value=[(removed_id, 3)])
+    set_membership_version = mocker.patch("services.groups_service.membership_versions.set")
+
+    groups_service = GroupsService(fake_uow)
+    result = await groups_service.remove_users_from_group(
+        fake_token_payload,
+        group_id,
+        UsersGroupSchemaBulk(user_ids=[removed_id, missing_id])
+    )
+
+    assert result.removed == [removed_id]
+    assert result.missing == [missing_id]
+    assert set_membership_version.call_args.args[:2] == (removed_id, 3)
+    fake_uow.commit.assert_awaited_once()
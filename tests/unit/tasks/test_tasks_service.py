@@ -1,5 +1,6 @@
 from contextlib import nullcontext
-from typing import ContextManager, Any
+from types import SimpleNamespace
+from typing import ContextManager, Any, Tuple
 from unittest.mock import Mock
 from uuid import uuid4
 
@@ -8,10 +9,26 @@ from pytest_mock import MockerFixture
 from sqlalchemy.exc import IntegrityError
 
 from auth import TokenPayloadSchema
-from exceptions import NonExistentGroupError, TaskNotFoundError, ResultNotFound
+from auth.capabilities import MembershipVersions
+from core import settings
+from exceptions import (
+    NonExistentGroupError,
+    TaskNotFoundError,
+    BulkTasksTooLargeError,
+    InvalidFieldsError,
+    InvalidCursorError
+)
 from models import Task
-from schemas import TaskSchemaCreate, TaskSchemaUpdate, TaskSchema
+from schemas import (
+    TaskSchemaCreate,
+    TaskSchemaUpdate,
+    TaskSchema,
+    TaskBulkIdsSchema,
+    TaskBulkUpdateSchema,
+    TaskBulkMoveSchema
+)
 from services import TasksService
+from services.pagination import decode_ranked_cursor
 from .helpers import make_fake_task
 
 
@@ -94,11 +111,10 @@ async def test_create_task(
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["task_not_found", "user_not_in_group", "expectation"],
+    ["task_not_found", "expectation"],
     [
-        (False, False, nullcontext()),
-        (True, False, pytest.raises(TaskNotFoundError)),
-        (False, True, pytest.raises(TaskNotFoundError))
+        (False, nullcontext()),
+        (True, pytest.raises(TaskNotFoundError))
     ]
 )
 async def test_get_task(
@@ -106,57 +122,190 @@ async def test_get_task(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         task_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     fake_task_id = uuid4()
 
     if task_not_found:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.get = mocker.AsyncMock(return_value=None)
-
-    elif user_not_in_group:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
+        fake_uow.tasks.get_for_user = mocker.AsyncMock(return_value=None)
 
     else:
         fake_task_schema, fake_task_model = make_fake_task(
             task_id=fake_task_id
         )
 
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.get = mocker.AsyncMock(return_value=fake_task_model)
+        fake_uow.tasks.get_for_user = mocker.AsyncMock(return_value=fake_task_model)
 
     tasks_service = TasksService(fake_uow)
 
     with expectation:
         result = await tasks_service.get_task(fake_token_payload, fake_task_id)
 
-    fake_uow.tasks.get_task_id_if_user_in_group.assert_awaited_once_with(
+    fake_uow.tasks.get_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
-        fake_task_id
+        fake_task_id,
+        None
     )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
     fake_uow.commit.assert_not_awaited()
 
-    if not task_not_found and not user_not_in_group:
+    if not task_not_found:
         assert result.model_dump() == fake_task_schema.model_dump()
 
 
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_get_tasks(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    fake_tasks = [make_fake_task() for _ in range(3)]
+    missing_task_id = uuid4()
+
+    # репозиторий возвращает задачи в произвольном порядке
+    fake_uow.tasks.get_many_for_user = mocker.AsyncMock(
+        return_value=[fake_task_model for _, fake_task_model in reversed(fake_tasks)]
+    )
+
+    tasks_service = TasksService(fake_uow)
+
+    task_ids = [
+        fake_tasks[1][0].task_id,
+        missing_task_id,
+        fake_tasks[0][0].task_id,
+        fake_tasks[1][0].task_id,
+        fake_tasks[2][0].task_id
+    ]
+    result = await tasks_service.get_tasks(fake_token_payload, task_ids)
+
+    fake_uow.tasks.get_many_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        list(dict.fromkeys(task_ids))
+    )
+    assert result.tasks == [fake_tasks[1][0], fake_tasks[0][0], fake_tasks[2][0]]
+    assert result.not_found == [missing_task_id]
+
+
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["task_not_found", "user_not_in_group", "expectation"],
+    ["fields", "expected_fields", "expectation"],
     [
-        (False, False, nullcontext()),
-        (True, False, pytest.raises(TaskNotFoundError)),
-        (False, True, pytest.raises(TaskNotFoundError))
+        (" created_at,name ", ("name", "created_at"), nullcontext()),
+        ("", (), nullcontext()),
+        ("name,hashed_password", None, pytest.raises(InvalidFieldsError))
+    ]
+)
+async def test_get_task_fields(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema,
+        fields: str,
+        expected_fields: Tuple[str, ...] | None,
+        expectation: ContextManager[Any]
+) -> None:
+    fake_task_schema, fake_task_model = make_fake_task()
+    fake_uow.tasks.get_for_user = mocker.AsyncMock(return_value=fake_task_model)
+
+    tasks_service = TasksService(fake_uow)
+
+    with expectation:
+        result = await tasks_service.get_task(
+            fake_token_payload,
+            fake_task_schema.task_id,
+            fields
+        )
+
+    if expected_fields is None:
+        fake_uow.tasks.get_for_user.assert_not_awaited()
+    else:
+        # в репозиторий передаются только запрошенные колонки, в ответе только они
+        fake_uow.tasks.get_for_user.assert_awaited_once_with(
+            fake_token_payload.sub,
+            fake_task_schema.task_id,
+            expected_fields
+        )
+        assert result.model_dump() == fake_task_schema.model_dump(include=set(expected_fields))
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_tasks(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """
+    Курсор следующей страницы - релевантность и task_id последней строки страницы;
+    GIN-индекс используется, только если в группах поиска больше
+    TASK_SEARCH_SCAN_MAX_TASKS задач
+    """
+
+    fake_tasks = [
+        SimpleNamespace(
+            **make_fake_task(name=f"deploy {i}")[0].model_dump(),
+            rank=1.0 / (i + 1),
+            name_highlight=f"<mark>deploy</mark> {i}",
+            description_highlight="task"
+        )
+        for i in range(3)
+    ]
+    fake_uow.groups.get_user_task_count = mocker.AsyncMock(return_value=0)
+    fake_uow.tasks.search_for_user = mocker.AsyncMock(return_value=fake_tasks)
+
+    tasks_service = TasksService(fake_uow)
+
+    result = await tasks_service.search_tasks(fake_token_payload, "deploy", limit=2)
+
+    fake_uow.tasks.search_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        "deploy",
+        3,
+        None,
+        None,
+        use_index=False
+    )
+    assert [task.task_id for task in result.tasks] == [task.task_id for task in fake_tasks[:2]]
+    assert result.tasks[0].name_highlight == "<mark>deploy</mark> 0"
+    assert decode_ranked_cursor(result.next_cursor) == (0.5, fake_tasks[1].task_id)
+
+    fake_uow.groups.get_user_task_count.return_value = settings.TASK_SEARCH_SCAN_MAX_TASKS + 1
+    fake_uow.tasks.search_for_user.reset_mock()
+    fake_uow.tasks.search_for_user.return_value = fake_tasks[2:]
+    group_id = uuid4()
+
+    result = await tasks_service.search_tasks(
+        fake_token_payload,
+        "deploy",
+        limit=2,
+        cursor=result.next_cursor,
+        group_id=group_id
+    )
+
+    fake_uow.groups.get_user_task_count.assert_awaited_with(fake_token_payload.sub, group_id)
+    fake_uow.tasks.search_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
+        "deploy",
+        3,
+        (0.5, fake_tasks[1].task_id),
+        group_id,
+        use_index=True
+    )
+    assert result.next_cursor is None
+
+    with pytest.raises(InvalidCursorError):
+        await tasks_service.search_tasks(fake_token_payload, "deploy", cursor="not a cursor")
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["task_not_found", "expectation"],
+    [
+        (False, nullcontext()),
+        (True, pytest.raises(TaskNotFoundError))
     ]
 )
 async def test_full_update_task(
@@ -164,14 +313,13 @@ async def test_full_update_task(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         task_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     """
     Тест поведения метода update_task у сервиса задач.
-    Тест проверяет поведение при отсутствии прав у пользователя на изменение задачи,
-    поведение при попытке обновить несуществующую задачу, а также поведение при
-    обновлении всех полей задачи
+    Тест проверяет поведение при попытке обновить несуществующую задачу
+    или задачу, на изменение которой у пользователя нет прав,
+    а также поведение при обновлении всех полей задачи
     """
 
     fake_task_id = uuid4()
@@ -182,15 +330,7 @@ async def test_full_update_task(
     )
 
     if task_not_found:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.update = mocker.AsyncMock(side_effect=ResultNotFound())
-
-    elif user_not_in_group:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
+        fake_uow.tasks.update_for_user = mocker.AsyncMock(return_value=None)
 
     else:
         fake_task_schema, fake_task_model = make_fake_task(
@@ -200,10 +340,7 @@ async def test_full_update_task(
             estimated_time=fake_task_schema_update.estimated_time
         )
 
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.update = mocker.AsyncMock(return_value=fake_task_model)
+        fake_uow.tasks.update_for_user = mocker.AsyncMock(return_value=fake_task_model)
 
     tasks_service = TasksService(fake_uow)
 
@@ -214,19 +351,16 @@ async def test_full_update_task(
             fake_task_schema_update
         )
 
-    fake_uow.tasks.get_task_id_if_user_in_group.assert_awaited_once_with(
+    fake_uow.tasks.update_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
-        fake_task_id
+        fake_task_id,
+        fake_task_schema_update.model_dump()
     )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
 
-    if not task_not_found and not user_not_in_group:
+    if not task_not_found:
         assert result.model_dump() == fake_task_schema.model_dump()
-        fake_uow.tasks.update.assert_awaited_once_with(
-            fake_task_id,
-            fake_task_schema_update.model_dump()
-        )
         fake_uow.commit.assert_awaited_once()
     else:
         fake_uow.commit.assert_not_awaited()
@@ -258,10 +392,7 @@ async def test_partial_update_task(
 
     fake_task_id = fake_task_schema.task_id
 
-    fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-        return_value=fake_task_id
-    )
-    fake_uow.tasks.update = mocker.AsyncMock(return_value=fake_task_model)
+    fake_uow.tasks.update_for_user = mocker.AsyncMock(return_value=fake_task_model)
 
     tasks_service = TasksService(fake_uow)
 
@@ -272,14 +403,11 @@ async def test_partial_update_task(
     )
     assert result.model_dump() == fake_task_schema.model_dump()
 
-    fake_uow.tasks.update.assert_awaited_once_with(
+    fake_uow.tasks.update_for_user.assert_awaited_once_with(
+        fake_token_payload.sub,
         fake_task_id,
         fake_task_schema_update.model_dump(exclude_none=True)
     )
-    fake_uow.tasks.get_task_id_if_user_in_group.assert_awaited_once_with(
-        fake_token_payload.sub,
-        fake_task_id
-    )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
     fake_uow.commit.assert_awaited_once()
@@ -288,11 +416,10 @@ async def test_partial_update_task(
 @pytest.mark.asyncio
 @pytest.mark.unit
 @pytest.mark.parametrize(
-    ["task_not_found", "user_not_in_group", "expectation"],
+    ["task_not_found", "expectation"],
     [
-        (False, False, nullcontext()),
-        (True, False, pytest.raises(TaskNotFoundError)),
-        (False, True, pytest.raises(TaskNotFoundError))
+        (False, nullcontext()),
+        (True, pytest.raises(TaskNotFoundError))
     ]
 )
 async def test_delete_task(
@@ -300,44 +427,199 @@ async def test_delete_task(
         fake_uow: Mock,
         fake_token_payload: TokenPayloadSchema,
         task_not_found: bool,
-        user_not_in_group: bool,
         expectation: ContextManager[Any]
 ) -> None:
     fake_task_id = uuid4()
 
     if task_not_found:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.delete = mocker.AsyncMock(side_effect=ResultNotFound())
-
-    elif user_not_in_group:
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=None
-        )
+        fake_uow.tasks.delete_for_user = mocker.AsyncMock(return_value=None)
 
     else:
         fake_task_schema, fake_task_model = make_fake_task(task_id=fake_task_id)
 
-        fake_uow.tasks.get_task_id_if_user_in_group = mocker.AsyncMock(
-            return_value=fake_task_id
-        )
-        fake_uow.tasks.delete = mocker.AsyncMock(return_value=fake_task_model)
+        fake_uow.tasks.delete_for_user = mocker.AsyncMock(return_value=fake_task_model)
 
     tasks_service = TasksService(fake_uow)
 
     with expectation:
         result = await tasks_service.delete_task(fake_token_payload, fake_task_id)
 
-    fake_uow.tasks.get_task_id_if_user_in_group.assert_awaited_once_with(
+    fake_uow.tasks.delete_for_user.assert_awaited_once_with(
         fake_token_payload.sub,
         fake_task_id
     )
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
 
-    if not task_not_found and not user_not_in_group:
+    if not task_not_found:
         assert result.model_dump() == fake_task_schema.model_dump()
         fake_uow.commit.assert_awaited_once()
     else:
         fake_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_create_tasks_bulk(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """
+    Доступ ко всем группам проверяется одним вызовом (группы из claims токена -
+    на существование); задачи из групп без доступа и удаленных групп из claims
+    получают ошибку, остальные создаются, результаты идут в порядке запроса
+    """
+
+    mocker.patch("auth.capabilities.membership_versions", MembershipVersions())
+    member_group_id, outsider_group_id = uuid4(), uuid4()
+    claimed_group_id, deleted_group_id = uuid4(), uuid4()
+    payload = fake_token_payload.model_copy(
+        update={"grp": frozenset([claimed_group_id, deleted_group_id]), "mv": 0}
+    )
+    data = [
+        TaskSchemaCreate(group_id=group_id, name=f"task{i}", description="task")
+        for i, group_id in enumerate([
+            member_group_id,
+            outsider_group_id,
+            claimed_group_id,
+            deleted_group_id,
+            member_group_id
+        ])
+    ]
+    task_ids = [uuid4(), uuid4(), uuid4()]
+
+    fake_uow.groups.get_user_group_ids_among = mocker.AsyncMock(
+        return_value={member_group_id, claimed_group_id}
+    )
+    fake_uow.tasks.bulk_create = mocker.AsyncMock(return_value=task_ids)
+
+    tasks_service = TasksService(fake_uow)
+    result = await tasks_service.create_tasks_bulk(payload, data)
+
+    assert [(item.task_id, item.error) for item in result.results] == [
+        (task_ids[0], None),
+        (None, "group does not exist"),
+        (task_ids[1], None),
+        (None, "group does not exist"),
+        (task_ids[2], None)
+    ]
+
+    fake_uow.groups.get_user_group_ids_among.assert_awaited_once_with(
+        payload.sub,
+        {member_group_id, outsider_group_id},
+        {claimed_group_id, deleted_group_id}
+    )
+    fake_uow.tasks.bulk_create.assert_awaited_once_with([
+        data[0].model_dump(),
+        data[2].model_dump(),
+        data[4].model_dump()
+    ])
+    fake_uow.commit.assert_awaited_once()
+
+    mocker.patch.object(settings, "BULK_TASKS_MAX_ITEMS", 2)
+
+    with pytest.raises(BulkTasksTooLargeError):
+        await tasks_service.create_tasks_bulk(fake_token_payload, data)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_update_delete_tasks_bulk(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema
+) -> None:
+    """
+    Задачи блокируются и проверяются одним вызовом, изменяются только доступные;
+    недоступные (и повторяющиеся в запросе один раз) попадают в not_found
+    """
+
+    fake_tasks = sorted(
+        [make_fake_task(estimated_time=5) for _ in range(2)],
+        key=lambda fake_task: fake_task[0].task_id
+    )
+    outsider_task_id = uuid4()
+    task_ids = [
+        outsider_task_id,
+        fake_tasks[1][0].task_id,
+        fake_tasks[0][0].task_id,
+        outsider_task_id
+    ]
+    locked_task_ids = [fake_task[0].task_id for fake_task in fake_tasks]
+
+    fake_uow.tasks.lock_for_user = mocker.AsyncMock(return_value=locked_task_ids)
+    fake_uow.tasks.bulk_update = mocker.AsyncMock(
+        return_value=[fake_task[1] for fake_task in reversed(fake_tasks)]
+    )
+    fake_uow.tasks.bulk_delete = mocker.AsyncMock(
+        return_value=[fake_task[1] for fake_task in fake_tasks]
+    )
+
+    tasks_service = TasksService(fake_uow)
+
+    for result in (
+        await tasks_service.update_tasks_bulk(
+            fake_token_payload,
+            TaskBulkUpdateSchema(task_ids=task_ids, data=TaskSchemaUpdate(estimated_time=5))
+        ),
+        await tasks_service.delete_tasks_bulk(
+            fake_token_payload,
+            TaskBulkIdsSchema(task_ids=task_ids)
+        )
+    ):
+        assert [task.model_dump() for task in result.tasks] == [
+            fake_task[0].model_dump() for fake_task in fake_tasks
+        ]
+        assert result.not_found == [outsider_task_id]
+
+    fake_uow.tasks.lock_for_user.assert_awaited_with(fake_token_payload.sub, task_ids)
+    fake_uow.tasks.bulk_update.assert_awaited_once_with(locked_task_ids, {"estimated_time": 5})
+    fake_uow.tasks.bulk_delete.assert_awaited_once_with(locked_task_ids)
+    assert fake_uow.commit.await_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    ["user_in_target_group", "expectation"],
+    [
+        (True, nullcontext()),
+        (False, pytest.raises(NonExistentGroupError))
+    ]
+)
+async def test_move_tasks_bulk(
+        mocker: MockerFixture,
+        fake_uow: Mock,
+        fake_token_payload: TokenPayloadSchema,
+        user_in_target_group: bool,
+        expectation: ContextManager[Any]
+) -> None:
+    group_id = uuid4()
+    fake_task_schema, fake_task_model = make_fake_task(group_id=group_id)
+
+    fake_uow.groups.get_group_id_if_user_in_group = mocker.AsyncMock(
+        return_value=group_id if user_in_target_group else None
+    )
+    fake_uow.tasks.lock_for_user = mocker.AsyncMock(return_value=[fake_task_schema.task_id])
+    fake_uow.tasks.bulk_update = mocker.AsyncMock(return_value=[fake_task_model])
+
+    tasks_service = TasksService(fake_uow)
+
+    with expectation:
+        result = await tasks_service.move_tasks_bulk(
+            fake_token_payload,
+            TaskBulkMoveSchema(task_ids=[fake_task_schema.task_id], group_id=group_id)
+        )
+
+    if user_in_target_group:
+        assert result.tasks[0].group_id == group_id
+        assert result.not_found == []
+        fake_uow.tasks.bulk_update.assert_awaited_once_with(
+            [fake_task_schema.task_id],
+            {"group_id": group_id}
+        )
+        fake_uow.commit.assert_awaited_once()
+    else:
+        fake_uow.tasks.lock_for_user.assert_not_awaited()
+        fake_uow.commit.assert_not_awaited()
@@ -19,15 +19,30 @@ def uow(mocker: MockerFixture) -> SQLAlchemyUnitOfWork:
     fake_users_repository = mocker.Mock(session=fake_session)
     fake_groups_repository = mocker.Mock(session=fake_session)
     fake_tasks_repository = mocker.Mock(session=fake_session)
+    fake_revoked_tokens_repository = mocker.Mock(session=fake_session)
+    fake_refresh_tokens_repository = mocker.Mock(session=fake_session)
+    fake_api_keys_repository = mocker.Mock(session=fake_session)
 
     fake_session_factory = mocker.Mock(return_value=fake_session)
     fake_users_repository_factory = mocker.Mock(return_value=fake_users_repository)
     fake_groups_repository_factory = mocker.Mock(return_value=fake_groups_repository)
     fake_tasks_repository_factory = mocker.Mock(return_value=fake_tasks_repository)
+    fake_revoked_tokens_repository_factory = mocker.Mock(
+        return_value=fake_revoked_tokens_repository
+    )
+    fake_refresh_tokens_repository_factory = mocker.Mock(
+        return_value=fake_refresh_tokens_repository
+    )
+    fake_api_keys_repository_factory = mocker.Mock(
+        return_value=fake_api_keys_repository
+    )
 
     return SQLAlchemyUnitOfWork(
         fake_session_factory,
         fake_users_repository_factory,
         fake_groups_repository_factory,
-        fake_tasks_repository_factory
+        fake_tasks_repository_factory,
+        fake_revoked_tokens_repository_factory,
+        fake_refresh_tokens_repository_factory,
+        fake_api_keys_repository_factory
     )
@@ -17,17 +17,32 @@ async def test_aenter(mocker: MockerFixture) -> None:
     fake_users_repository = mocker.Mock()
     fake_groups_repository = mocker.Mock()
     fake_tasks_repository = mocker.Mock()
+    fake_revoked_tokens_repository = mocker.Mock()
+    fake_refresh_tokens_repository = mocker.Mock()
+    fake_api_keys_repository = mocker.Mock()
 
     fake_session_factory = mocker.Mock(return_value=fake_session)
     fake_users_repository_factory = mocker.Mock(return_value=fake_users_repository)
     fake_groups_repository_factory = mocker.Mock(return_value=fake_groups_repository)
     fake_tasks_repository_factory = mocker.Mock(return_value=fake_tasks_repository)
+    fake_revoked_tokens_repository_factory = mocker.Mock(
+        return_value=fake_revoked_tokens_repository
+    )
+    fake_refresh_tokens_repository_factory = mocker.Mock(
+        return_value=fake_refresh_tokens_repository
+    )
+    fake_api_keys_repository_factory = mocker.Mock(
+        return_value=fake_api_keys_repository
+    )
 
     uow = SQLAlchemyUnitOfWork(
         fake_session_factory,
         fake_users_repository_factory,
         fake_groups_repository_factory,
-        fake_tasks_repository_factory
+        fake_tasks_repository_factory,
+        fake_revoked_tokens_repository_factory,
+        fake_refresh_tokens_repository_factory,
+        fake_api_keys_repository_factory
     )
 
     async with uow as _uow:
@@ -37,6 +52,9 @@ async def test_aenter(mocker: MockerFixture) -> None:
         assert _uow.users is fake_users_repository
         assert _uow.groups is fake_groups_repository
         assert _uow.tasks is fake_tasks_repository
+        assert _uow.revoked_tokens is fake_revoked_tokens_repository
+        assert _uow.refresh_tokens is fake_refresh_tokens_repository
+        assert _uow.api_keys is fake_api_keys_repository
 
         assert uow is _uow
 
@@ -44,6 +62,9 @@ async def test_aenter(mocker: MockerFixture) -> None:
     fake_users_repository_factory.assert_called_once_with(fake_session)
     fake_groups_repository_factory.assert_called_once_with(fake_session)
     fake_tasks_repository_factory.assert_called_once_with(fake_session)
+    fake_revoked_tokens_repository_factory.assert_called_once_with(fake_session)
+    fake_refresh_tokens_repository_factory.assert_called_once_with(fake_session)
+    fake_api_keys_repository_factory.assert_called_once_with(fake_session)
 
 
 @pytest.mark.asyncio
@@ -74,6 +95,9 @@ async def test_aexit(
     assert uow.users is None
     assert uow.groups is None
     assert uow.tasks is None
+    assert uow.revoked_tokens is None
+    assert uow.refresh_tokens is None
+    assert uow.api_keys is None
 
     if raise_exception:
         session.rollback.assert_awaited_once()
@@ -98,3 +122,50 @@ async def test_rollback(uow: SQLAlchemyUnitOfWork) -> None:
 
     session.rollback.assert_awaited_once()
     session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_read_only(mocker: MockerFixture) -> None:
+    """Сессия только для чтения открывается через выбранную фабрику, и только одна"""
+
+    fake_session = mocker.Mock()
+    fake_session.close = mocker.AsyncMock()
+    fake_read_session = mocker.Mock()
+    fake_read_session.close = mocker.AsyncMock()
+    fake_read_session_factory = mocker.Mock(return_value=fake_read_session)
+    fake_read_session_factory_getter = mocker.Mock(return_value=fake_read_session_factory)
+
+    uow = SQLAlchemyUnitOfWork(
+        mocker.Mock(return_value=fake_session),
+        *[mocker.Mock() for _ in range(6)],
+        read_session_factory_getter=fake_read_session_factory_getter
+    )
+
+    async with uow.read_only() as _uow:
+        assert _uow.session is fake_read_session
+
+    async with uow as _uow:
+        assert _uow.session is fake_session
+
+    fake_read_session_factory_getter.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_commit_hook(mocker: MockerFixture) -> None:
+    fake_session = mocker.Mock()
+    fake_session.commit = mocker.AsyncMock()
+    fake_session.close = mocker.AsyncMock()
+    fake_commit_hook = mocker.AsyncMock()
+
+    uow = SQLAlchemyUnitOfWork(
+        mocker.Mock(return_value=fake_session),
+        *[mocker.Mock() for _ in range(6)],
+        commit_hook=fake_commit_hook
+    )
+
+    async with uow as _uow:
+        await _uow.commit()
+
+    fake_commit_hook.assert_awaited_once_with(fake_session)
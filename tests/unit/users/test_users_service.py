@@ -1,5 +1,7 @@
 from datetime import date
+from types import SimpleNamespace
 from unittest.mock import Mock
+from uuid import uuid4
 
 import pytest
 from pytest_mock import MockerFixture
@@ -9,7 +11,7 @@ from auth import TokenPayloadSchema
 from exceptions import ResultNotFound, UserNotFoundError, UsernameTakenError
 from models import User
 from schemas import UserSchema, UserSchemaUpdate
-from services import UsersService
+from services import UsersService, user_search_cache
 
 
 @pytest.mark.asyncio
@@ -85,7 +87,7 @@ async def test_full_update_user(
         created_at=fake_user_schema.created_at
     )
 
-    mocker.patch("services.users_service.get_password_hash", return_value="hash")
+    mocker.patch("services.users_service.get_password_hash_async", return_value="hash")
     fake_uow.users.update = mocker.AsyncMock(return_value=fake_user_model)
 
     users_service = UsersService(fake_uow)
@@ -249,3 +251,29 @@ async def test_delete_non_existent_user(
     fake_uow.__aenter__.assert_awaited_once()
     fake_uow.__aexit__.assert_awaited_once()
     fake_uow.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_search_users(mocker: MockerFixture, fake_uow: Mock) -> None:
+    """Результаты для коротких префиксов берутся из кеша воркера (без учета регистра)"""
+
+    user_search_cache.clear()
+    fake_users = [SimpleNamespace(user_id=uuid4(), username=f"egor{i}") for i in range(2)]
+    fake_uow.users.search_by_username_prefix = mocker.AsyncMock(return_value=fake_users)
+
+    users_service = UsersService(fake_uow)
+
+    try:
+        result = await users_service.search_users("eg", 5)
+        assert [user.username for user in result.users] == ["egor0", "egor1"]
+
+        assert await users_service.search_users("EG", 5) is result
+        fake_uow.users.search_by_username_prefix.assert_awaited_once_with("eg", 5)
+
+        await users_service.search_users("eg", 10)
+        await users_service.search_users("egor", 5)
+        await users_service.search_users("egor", 5)
+        assert fake_uow.users.search_by_username_prefix.await_count == 4
+    finally:
+        user_search_cache.clear()